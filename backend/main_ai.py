@@ -3,7 +3,8 @@ Smart Menu SaaS - Full AI Backend
 รวมทุก AI features: Translation, Image Enhancement, Generation
 """
 
-from fastapi import FastAPI, HTTPException, UploadFile, File, Form
+from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Header, Request, Response
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import Optional, Dict, Any, List
@@ -11,6 +12,7 @@ from contextlib import asynccontextmanager
 import os
 import base64
 import asyncio
+import json
 from datetime import datetime
 from dotenv import load_dotenv
 
@@ -27,6 +29,8 @@ from services.customization_service import customization_service
 from services.user_role_service import user_role_service
 from services.restaurant_service import restaurant_service
 from services.orders_service import orders_service
+from services.order_tracker import order_status_tracker  # Versioned order status for customer subscriptions
+from services.service_request_feed import service_request_feed  # Realtime call-waiter fan-out
 from services.best_sellers_service import best_sellers_service
 from services.email_service import email_service  # Email notifications
 from services.file_validation import validate_image_upload, get_safe_filename  # File upload validation
@@ -36,6 +40,11 @@ from services.image_library_service import image_library_service  # Shared Image
 from services.delivery_service import delivery_service  # Delivery distance calculation
 from services.admin_service import admin_service  # Super Admin Dashboard
 from services.security_middleware import setup_security  # Security: Rate limiting, headers
+from services.idempotency import idempotency_store, IDEMPOTENCY_HEADER  # Idempotency-Key replay protection
+from services.export_stream import EXPORT_FORMATS  # Streaming CSV / NDJSON exports
+from services.menu_clone_service import menu_clone_service  # Whole-menu clone jobs
+from services.menu_translation_service import menu_translation_service  # Background menu pre-translation
+from services.json_response import FastJSONResponse, json_response, dumps as json_dumps  # orjson responses
 
 # Initialize Supabase client for direct database access (menu_translations, etc.)
 try:
@@ -86,7 +95,8 @@ app = FastAPI(
     title="Smart Menu AI API",
     description="Full AI-powered backend: Translation, Image Enhancement, Generation",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse
 )
 
 # ============================================================
@@ -119,8 +129,8 @@ app.add_middleware(
     allow_origins=ALLOWED_ORIGINS,
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS", "PATCH"],
-    allow_headers=["Authorization", "Content-Type", "X-Requested-With", "Accept", "Origin"],
-    expose_headers=["X-Request-ID"],
+    allow_headers=["Authorization", "Content-Type", "X-Requested-With", "Accept", "Origin", "Idempotency-Key"],
+    expose_headers=["X-Request-ID", "Idempotent-Replayed"],
     max_age=600,  # Cache preflight for 10 minutes
 )
 
@@ -182,6 +192,20 @@ class SaveMenuItemRequest(BaseModel):
     restaurant_id: Optional[str] = "default"
     is_best_seller: Optional[bool] = False  # Best Seller flag
 
+class BulkMenuImportRequest(BaseModel):
+    restaurant_id: str
+    items: List[Dict[str, Any]]  # SaveMenuItemRequest fields, or menu_items from ai_service.extract_menu_from_file
+    user_id: Optional[str] = None  # Trial / plan menu item limit is checked and counted once per import
+    skip_existing: Optional[bool] = True  # Skip items whose name + category already exist
+
+class MenuCloneRequest(BaseModel):
+    user_id: str
+    source_restaurant_id: str
+    target_restaurant_id: str
+    menu_ids: Optional[List[str]] = None  # Only these items (default: whole menu)
+    categories: Optional[List[str]] = None  # Only these categories (default: all)
+    skip_existing: Optional[bool] = True  # Skip items whose name + category already exist in the target
+
 class CreateCheckoutSessionRequest(BaseModel):
     price_id: str
     user_id: str
@@ -666,34 +690,18 @@ async def get_menu_translations(restaurant_id: str, language_code: str):
 
         actual_restaurant_id = restaurant.get("id")
 
-        # Get cached translations
-        result = supabase.table("menu_translations") \
-            .select("*") \
-            .eq("restaurant_id", actual_restaurant_id) \
-            .eq("language_code", language_code) \
-            .execute()
-
-        # Convert to dictionary keyed by menu_id
-        translations_map = {}
-        if result.data:
-            for item in result.data:
-                translations_map[item["menu_id"]] = {
-                    "translated_name": item.get("translated_name"),
-                    "translated_description": item.get("translated_description"),
-                    "translated_category": item.get("translated_category"),
-                    "translated_meats": item.get("translated_meats", []),
-                    "translated_addons": item.get("translated_addons", []),
-                    "source_hash": item.get("source_hash"),
-                    "updated_at": item.get("updated_at")
-                }
+        # Projected read through the in-process cache (keyed by menu_id)
+        result = menu_translation_service.get_translations(actual_restaurant_id, language_code)
+        if "error" in result:
+            raise HTTPException(status_code=500, detail=result["error"])
 
-        return {
+        return json_response({
             "success": True,
             "restaurant_id": actual_restaurant_id,
             "language_code": language_code,
-            "count": len(translations_map),
-            "translations": translations_map
-        }
+            "count": len(result["translations"]),
+            "translations": result["translations"]
+        })
     except HTTPException:
         raise
     except Exception as e:
@@ -723,40 +731,15 @@ async def save_menu_translations(request: SaveMenuTranslationsRequest):
 
         actual_restaurant_id = restaurant.get("id")
 
-        saved_count = 0
-        for trans in request.translations:
-            try:
-                # Upsert translation - support both field naming conventions
-                # Frontend sends: translated_name, translated_description, etc.
-                # Also support: name, description (for backwards compatibility)
-                data = {
-                    "restaurant_id": actual_restaurant_id,
-                    "menu_id": trans.get("menu_id"),
-                    "language_code": request.language_code,
-                    "translated_name": trans.get("translated_name") or trans.get("name"),
-                    "translated_description": trans.get("translated_description") or trans.get("description"),
-                    "translated_category": trans.get("translated_category") or trans.get("category"),
-                    "translated_meats": trans.get("translated_meats") or trans.get("meats", []),
-                    "translated_addons": trans.get("translated_addons") or trans.get("addons", []),
-                    "source_hash": trans.get("source_hash"),
-                    "updated_at": "now()"
-                }
-
-                # Use upsert (insert or update on conflict)
-                supabase.table("menu_translations").upsert(
-                    data,
-                    on_conflict="restaurant_id,menu_id,language_code"
-                ).execute()
-
-                saved_count += 1
-            except Exception as e:
-                print(f"⚠️ Failed to save translation for menu {trans.get('menu_id')}: {str(e)}")
-
-        print(f"✅ Saved {saved_count} menu translations for restaurant {actual_restaurant_id}, lang: {request.language_code}")
+        # Multi-row upsert in chunks (supports both translated_* and legacy name / description fields)
+        result = await asyncio.to_thread(
+            menu_translation_service.save_translations,
+            actual_restaurant_id, request.language_code, request.translations
+        )
 
         return {
             "success": True,
-            "saved_count": saved_count,
+            "saved_count": result["saved_count"],
             "language_code": request.language_code
         }
     except HTTPException:
@@ -788,13 +771,12 @@ async def invalidate_menu_translation(restaurant_id: str, menu_id: str):
         actual_restaurant_id = restaurant.get("id")
 
         # Delete all language translations for this menu item
-        result = menu_service.supabase_client.table("menu_translations") \
-            .delete() \
-            .eq("restaurant_id", actual_restaurant_id) \
-            .eq("menu_id", menu_id) \
-            .execute()
+        result = menu_translation_service.delete_translations(actual_restaurant_id, menu_id=menu_id)
+        if "error" in result:
+            raise HTTPException(status_code=500, detail=result["error"])
 
         print(f"✅ Invalidated translation cache for menu {menu_id}")
+        menu_translation_service.enqueue(actual_restaurant_id, [menu_id])
 
         return {
             "success": True,
@@ -829,18 +811,13 @@ async def clear_all_menu_translations(restaurant_id: str, language_code: Optiona
 
         actual_restaurant_id = restaurant.get("id")
 
-        # Build delete query
-        query = supabase.table("menu_translations") \
-            .delete() \
-            .eq("restaurant_id", actual_restaurant_id)
-
-        if language_code:
-            query = query.eq("language_code", language_code)
-
-        result = query.execute()
+        result = menu_translation_service.delete_translations(actual_restaurant_id, language_code=language_code)
+        if "error" in result:
+            raise HTTPException(status_code=500, detail=result["error"])
 
         print(f"✅ Cleared translation cache for restaurant {actual_restaurant_id}" +
               (f", language: {language_code}" if language_code else ""))
+        menu_translation_service.enqueue(actual_restaurant_id)
 
         return {
             "success": True,
@@ -854,6 +831,50 @@ async def clear_all_menu_translations(restaurant_id: str, language_code: Optiona
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/translations/menu/{restaurant_id}/warm", summary="Pre-translate Menu in Background")
+async def warm_menu_translations(restaurant_id: str, user_id: str):
+    """
+    แปลเมนูทั้งร้านล่วงหน้าเป็นภาษาที่เปิดใช้ (background)
+    เมนูที่คำแปลใน cache ยังตรงกับ source_hash จะถูกข้าม
+
+    Args:
+        restaurant_id: Restaurant ID หรือ slug
+        user_id: เจ้าของร้าน
+
+    Returns:
+        Dictionary with queued languages
+    """
+    restaurant = restaurant_service.get_restaurant_by_id_or_slug(restaurant_id)
+    if not restaurant:
+        raise HTTPException(status_code=404, detail=f"Restaurant not found: {restaurant_id}")
+    if restaurant.get("user_id") != user_id:
+        raise HTTPException(status_code=403, detail="Access denied")
+
+    actual_restaurant_id = restaurant.get("id")
+    languages = await asyncio.to_thread(menu_translation_service.get_languages, actual_restaurant_id)
+    queued = bool(languages) and menu_translation_service.enqueue(actual_restaurant_id)
+
+    return {
+        "success": True,
+        "restaurant_id": actual_restaurant_id,
+        "languages": languages,
+        "queued": queued,
+        "status": menu_translation_service.get_status(actual_restaurant_id)
+    }
+
+@app.get("/api/translations/menu/{restaurant_id}/status", summary="Get Menu Pre-translation Status")
+async def get_menu_translation_status(restaurant_id: str):
+    """สถานะงานแปลล่วงหน้าล่าสุดของร้าน"""
+    restaurant = restaurant_service.get_restaurant_by_id_or_slug(restaurant_id)
+    if not restaurant:
+        raise HTTPException(status_code=404, detail=f"Restaurant not found: {restaurant_id}")
+
+    return {
+        "success": True,
+        "restaurant_id": restaurant.get("id"),
+        "status": menu_translation_service.get_status(restaurant.get("id"))
+    }
+
 # ============================================================
 # AI Image Enhancement Routes (NEW)
 # ============================================================
@@ -1032,6 +1053,7 @@ async def save_menu_item(menu_item: SaveMenuItemRequest):
             raise HTTPException(status_code=500, detail="Failed to save menu item to database. Please check logs.")
         
         print(f"✅ Menu item saved successfully with ID: {saved_item.get('menu_id')}")
+        menu_translation_service.enqueue(menu_item.restaurant_id, [saved_item.get('menu_id')])
         
         return {
             "success": True,
@@ -1046,13 +1068,63 @@ async def save_menu_item(menu_item: SaveMenuItemRequest):
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Failed to save menu item: {str(e)}")
 
+@app.post("/api/menu/bulk-import", summary="Bulk Import Menu Items")
+async def bulk_import_menu_items(request: BulkMenuImportRequest):
+    """
+    นำเข้าเมนูหลายรายการในครั้งเดียว (เปิดร้านใหม่ / ผลจากการสแกนเมนู)
+
+    - validate ทุกรายการก่อน insert
+    - ตัดรายการซ้ำ (ชื่อ + หมวดหมู่)
+    - insert แบบ multi-row เป็นชุด
+    - นับ trial / plan limit ครั้งเดียวต่อการนำเข้า
+    """
+    if not request.restaurant_id or request.restaurant_id == 'default':
+        raise HTTPException(status_code=400, detail="Valid restaurant_id is required. Please select a restaurant.")
+
+    max_items = None
+    if request.user_id:
+        limit_check = trial_limits_service.check_limit(request.user_id, "menu_items")
+        if not limit_check.get("allowed"):
+            raise HTTPException(status_code=403, detail=limit_check.get("message"))
+        max_items = limit_check.get("remaining")
+
+    result = menu_service.bulk_create_menu_items(
+        request.restaurant_id, request.items, request.skip_existing, max_items
+    )
+    if "error" in result:
+        if result.get("errors"):
+            raise HTTPException(status_code=400, detail={"message": result["error"], "errors": result["errors"]})
+        status_code = 403 if result.get("limit_exceeded") else 500 if "Database" in result["error"] else 400
+        raise HTTPException(status_code=status_code, detail=result["error"])
+
+    if request.user_id and result["created_count"]:
+        trial_limits_service.increment_usage(request.user_id, "menu_items", result["created_count"])
+    if result["created_count"]:
+        menu_translation_service.enqueue(request.restaurant_id, [item["menu_id"] for item in result["created"]])
+
+    return result
+
+def _compact_menu_response(fields: Dict[str, Any], menu: bytes) -> Response:
+    """JSON response ที่แทรก compact menu bytes (cache ไว้แล้ว) เป็น field "menu" โดยไม่ parse ใหม่"""
+    head = json_dumps(fields)
+    return Response(content=head[:-1] + b',"menu":' + menu + b'}', media_type="application/json")
+
 @app.get("/api/menus", summary="Get All Menu Items")
-async def get_menu_items(restaurant_id: str = "default"):
+async def get_menu_items(restaurant_id: str = "default", format: str = "full"):
     """
     ดึง menu items ทั้งหมดของร้าน
     IMPORTANT: ดึงจาก Supabase Database เท่านั้น (ไม่ใช้ mock data)
+
+    format=compact: เมนูจัดกลุ่มตาม category แบบไม่ส่ง field ซ้ำ (services/menu_wire.py)
     """
+    if format == "compact" and menu_service._is_valid_uuid(restaurant_id):
+        menu = menu_service.get_compact_menu(restaurant_id)
+        if menu is None:
+            raise HTTPException(status_code=500, detail="Failed to fetch menu items")
+        return _compact_menu_response({"success": True}, menu)
+
     try:
+        version = None
         # Use menu_service (Supabase) instead of menu_storage (in-memory)
         # First, try to get restaurant_id from user_id if restaurant_id is "default"
         if restaurant_id == "default":
@@ -1062,22 +1134,68 @@ async def get_menu_items(restaurant_id: str = "default"):
         else:
             # Validate UUID format
             if menu_service._is_valid_uuid(restaurant_id):
+                # Version before items: a concurrent edit is re-sent by the next delta
+                version = menu_service.get_menu_version(restaurant_id)
                 items = menu_service.get_menu_items(restaurant_id)
             else:
                 # Fallback to menu_storage for backward compatibility (will be removed)
                 items = menu_storage.get_menu_items(restaurant_id)
         
-        return {
+        return json_response({
             "success": True,
             "count": len(items),
+            "version": version,  # Pass as ?since= to /api/menus/changes
             "items": items
-        }
+        })
     except Exception as e:
         print(f"❌ Failed to fetch menu items: {str(e)}")
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Failed to fetch menu items: {str(e)}")
 
+@app.get("/api/menus/changes", summary="Get Menu Changes Since Version")
+async def get_menu_changes(restaurant_id: str, since: int = 0):
+    """
+    Delta sync ของเมนู: เฉพาะรายการที่เปลี่ยนแปลง / ถูกลบหลัง version ที่ client มี
+
+    Args:
+        restaurant_id: Restaurant ID
+        since: version จาก /api/menus หรือ delta ครั้งก่อน (0 = ดึงทั้งหมด)
+
+    Returns:
+        version, items (สร้าง / แก้ไข), deleted (menu_id), has_more, full (ส่งเมนูทั้งหมด)
+    """
+    result = menu_service.get_menu_changes(restaurant_id, since)
+    if "error" in result:
+        status_code = 400 if "Invalid" in result["error"] else 503 if "not available" in result["error"] else 500
+        raise HTTPException(status_code=status_code, detail=result["error"])
+
+    return json_response({"success": True, "restaurant_id": restaurant_id, "since": since, **result})
+
+@app.get("/api/menus/search", summary="Search Menu Items")
+async def search_menu_items(restaurant_id: str, q: str, limit: int = 20):
+    """
+    ค้นหาเมนูของร้าน (dashboard / หน้าเมนูลูกค้า)
+
+    ค้นจากชื่อ, คำอธิบาย, หมวด และคำแปลที่ cache ไว้ (ไทย / CJK / ละติน)
+    รองรับ prefix, substring และ fuzzy (สะกดผิดเล็กน้อย) จาก in-memory n-gram index
+
+    Args:
+        restaurant_id: Restaurant ID
+        q: คำค้นหา
+        limit: จำนวนผลลัพธ์สูงสุด (1-100)
+
+    Returns:
+        Ranked items with score and matched field
+    """
+    if not menu_service._is_valid_uuid(restaurant_id):
+        raise HTTPException(status_code=400, detail="Valid restaurant_id is required")
+    if limit < 1 or limit > 100:
+        raise HTTPException(status_code=400, detail="limit must be between 1 and 100")
+
+    items = menu_service.search_menus([restaurant_id], q, limit)
+    return json_response({"success": True, "query": q, "count": len(items), "items": items})
+
 @app.get("/api/menu/{menu_id}", summary="Get Single Menu Item")
 async def get_menu_item(menu_id: str, restaurant_id: str = "default"):
     """
@@ -1129,6 +1247,9 @@ async def update_menu_item(menu_id: str, menu_item: SaveMenuItemRequest):
         
         if not updated_item:
             raise HTTPException(status_code=404, detail="Menu item not found")
+
+        # Unchanged text keeps its source_hash, so only edited items are re-translated
+        menu_translation_service.enqueue(updated_item.get("restaurant_id"), [menu_id])
         
         return {
             "success": True,
@@ -1149,7 +1270,10 @@ async def delete_menu_item(menu_id: str, restaurant_id: str = "default"):
     ลบ menu item
     """
     try:
-        success = menu_storage.delete_menu_item(menu_id, restaurant_id)
+        # Supabase first (soft delete, bumps the menu version), in-memory fallback
+        success = menu_service._is_valid_uuid(menu_id) and menu_service.delete_menu_item(menu_id)
+        if not success:
+            success = menu_storage.delete_menu_item(menu_id, restaurant_id)
         
         if not success:
             raise HTTPException(status_code=404, detail="Menu item not found")
@@ -1166,49 +1290,33 @@ async def delete_menu_item(menu_id: str, restaurant_id: str = "default"):
 @app.get("/api/menu-stats", summary="Get Menu Statistics")
 async def get_menu_stats(restaurant_id: str = "default"):
     """
-    สถิติของร้าน (from Supabase)
+    สถิติของร้าน (นับใน database, cache ตาม menu version)
+
+    Returns:
+        total_items, categories, with_images, image_coverage (%), items_per_category,
+        missing_translations (ต่อภาษาที่เปิดแปลล่วงหน้า), version
     """
-    try:
-        # Use Supabase instead of in-memory storage
-        if restaurant_id == "default" or not menu_service._is_valid_uuid(restaurant_id):
-            # Return empty stats if invalid restaurant_id
-            return {
-                "success": True,
-                "stats": {
-                    "total_items": 0,
-                    "categories": 0,
-                    "with_images": 0
-                }
-            }
-        
-        # Get menus from Supabase
-        menus = menu_service.get_menu_items(restaurant_id)
-        
-        # Calculate stats
-        categories = set()
-        with_images = 0
-        
-        for menu in menus:
-            if menu.get('category'):
-                categories.add(menu.get('category'))
-            if menu.get('image_url') or menu.get('photo_url'):
-                with_images += 1
-        
-        stats = {
-            "total_items": len(menus),
-            "categories": len(categories),
-            "with_images": with_images
-        }
-        
+    # Use Supabase instead of in-memory storage
+    if restaurant_id == "default" or not menu_service._is_valid_uuid(restaurant_id):
+        # Return empty stats if invalid restaurant_id
         return {
             "success": True,
-            "stats": stats
+            "stats": {
+                "total_items": 0,
+                "categories": 0,
+                "with_images": 0
+            }
         }
-    except Exception as e:
-        print(f"❌ Failed to fetch menu stats: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        raise HTTPException(status_code=500, detail=f"Failed to fetch stats: {str(e)}")
+
+    languages = await asyncio.to_thread(menu_translation_service.get_languages, restaurant_id)
+    stats = await asyncio.to_thread(menu_service.get_menu_stats, restaurant_id, languages)
+    if "error" in stats:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch stats: {stats['error']}")
+
+    return {
+        "success": True,
+        "stats": stats
+    }
 
 # ============================================================
 # AI Image Generation Routes
@@ -1997,7 +2105,25 @@ async def get_stripe_dashboard_link(restaurant_id: str):
 # ============================================================
 
 @app.post("/api/payments/create-intent", summary="Create Payment Intent")
-async def create_payment_intent(request: CreatePaymentIntentRequest):
+async def create_payment_intent(
+    request: CreatePaymentIntentRequest,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_HEADER)
+):
+    """
+    สร้าง Payment Intent (รองรับ Idempotency-Key header - retry จะไม่เรียก Stripe ซ้ำ)
+    """
+    result, replayed = await idempotency_store.run(
+        scope="payments:create-intent",
+        key=idempotency_key,
+        payload=request.model_dump(),
+        func=lambda: _create_payment_intent(request)
+    )
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return result
+
+async def _create_payment_intent(request: CreatePaymentIntentRequest):
     """
     สร้าง Stripe Payment Intent สำหรับการชำระเงินของ Order
 
@@ -2198,6 +2324,10 @@ async def create_refund(request: CreateRefundRequest):
             reason=request.reason
         )
 
+        # Full refund: mark the order refunded (also invalidates cached analytics of its day)
+        if request.amount is None:
+            orders_service.mark_refunded(request.payment_intent_id)
+
         return {
             "success": True,
             "refund_id": result["refund_id"],
@@ -3545,13 +3675,16 @@ async def check_user_profiles_table(user_id: str):
 # ============================================================
 
 @app.get("/api/public/menu/{restaurant_id}", summary="Get Public Menu with Branding")
-async def get_public_menu(restaurant_id: str):
+async def get_public_menu(restaurant_id: str, format: str = "full", lang: Optional[str] = None):
     """
     ดึงเมนูสาธารณะพร้อมข้อมูล branding (logo, theme_color, cover_image)
     สำหรับหน้าเมนูลูกค้า
     
     Args:
         restaurant_id: Restaurant ID หรือ slug (ไม่รองรับ "default")
+        format: "full" (menu_items) หรือ "compact" (menu จัดกลุ่มตาม category, cache ตาม version)
+        lang: รหัสภาษา - menu_items รวมคำแปลที่ยังตรงกับ source_hash แล้ว (ใช้กับ format "full" เท่านั้น)
+              รายการที่ยังไม่มีคำแปลอยู่ใน translation.stale_ids และถูกส่งไปแปลใน background
         
     Returns:
         Dictionary with menu items and restaurant branding
@@ -3574,11 +3707,20 @@ async def get_public_menu(restaurant_id: str):
             )
         
         # Get menu items
-        try:
-            menu_items = menu_service.get_menu_items(restaurant.get("id"))
-        except Exception as e:
-            print(f"❌ Get public menu items error: {str(e)}")
-            menu_items = []
+        compact_menu = None
+        menu_items = []
+        menu_version = None
+        if lang == "original":
+            lang = None
+        if format == "compact" and not lang:
+            compact_menu = menu_service.get_compact_menu(restaurant.get("id"))
+        if compact_menu is None:
+            menu_version = menu_service.get_menu_version(restaurant.get("id"))
+            try:
+                menu_items = menu_service.get_menu_items(restaurant.get("id"))
+            except Exception as e:
+                print(f"❌ Get public menu items error: {str(e)}")
+                menu_items = []
         
         # Get restaurant owner's plan for branding restrictions
         owner_user_id = restaurant.get("user_id")
@@ -3611,7 +3753,7 @@ async def get_public_menu(restaurant_id: str):
         # Get delivery rates
         delivery_rates = restaurant.get("delivery_rates") or []
 
-        return {
+        response = {
             "success": True,
             "restaurant": {
                 "id": restaurant.get("id"),
@@ -3626,9 +3768,24 @@ async def get_public_menu(restaurant_id: str):
             "service_options": service_options,
             "delivery_rates": delivery_rates,  # Delivery fee tiers
             "plan": owner_plan,  # For language restriction: enterprise = multi-language, others = English only
+        }
+        if compact_menu is not None:
+            # Cached bytes already carry version and count
+            return _compact_menu_response(response, compact_menu)
+
+        if lang:
+            translated = menu_translation_service.translate_menu_items(restaurant.get("id"), menu_items, lang)
+            if "error" in translated:
+                raise HTTPException(status_code=400, detail=translated["error"])
+            menu_items = translated.pop("items")
+            response["translation"] = {"language_code": lang, **translated}
+
+        response.update({
             "menu_items": menu_items,
+            "menu_version": menu_version,  # For /api/menus/changes
             "count": len(menu_items)
-        }
+        })
+        return json_response(response)
     except HTTPException:
         raise
     except Exception as e:
@@ -3655,7 +3812,25 @@ class CreateOrderRequest(BaseModel):
     customer_details: Optional[Dict[str, Any]] = None
 
 @app.post("/api/orders", summary="Create New Order")
-async def create_order(request: CreateOrderRequest):
+async def create_order(
+    request: CreateOrderRequest,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_HEADER)
+):
+    """
+    สร้างออเดอร์ใหม่ (รองรับ Idempotency-Key header - retry ด้วย key เดิมจะได้ออเดอร์เดิม)
+    """
+    result, replayed = await idempotency_store.run(
+        scope="orders:create",
+        key=idempotency_key,
+        payload=request.model_dump(),
+        func=lambda: _create_order(request)
+    )
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return result
+
+async def _create_order(request: CreateOrderRequest):
     """
     สร้างออเดอร์ใหม่จากลูกค้า
     
@@ -3742,11 +3917,11 @@ async def get_orders(restaurant_id: str, status: Optional[str] = None):
     try:
         orders = orders_service.get_orders(restaurant_id, status)
         
-        return {
+        return json_response({
             "success": True,
             "count": len(orders),
             "orders": orders
-        }
+        })
     except Exception as e:
         print(f"❌ Get orders error: {str(e)}")
         import traceback
@@ -3760,7 +3935,8 @@ async def get_orders_summary(
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
     payment_status: Optional[str] = None,
-    service_type: Optional[str] = None
+    service_type: Optional[str] = None,
+    include_orders: bool = True
 ):
     """
     ดึงสรุป Orders พร้อม Filter สำหรับหน้า Dashboard
@@ -3771,6 +3947,7 @@ async def get_orders_summary(
         end_date: End date (YYYY-MM-DD format)
         payment_status: Filter by payment status (pending, paid, failed)
         service_type: Filter by service type (dine_in, pickup, delivery)
+        include_orders: Include order rows (false = summary only, aggregated in the database)
 
     Returns:
         Dictionary with orders list and summary statistics
@@ -3781,7 +3958,8 @@ async def get_orders_summary(
             start_date=start_date,
             end_date=end_date,
             payment_status=payment_status,
-            service_type=service_type
+            service_type=service_type,
+            include_orders=include_orders
         )
 
         return {
@@ -3802,6 +3980,55 @@ async def get_orders_summary(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _export_response(stream, name: str, export_format: str, gzip: bool) -> StreamingResponse:
+    """StreamingResponse for an export stream (CSV / NDJSON, optionally gzipped)"""
+    extension = export_format + ('.gz' if gzip else '')
+    headers = {
+        "Content-Disposition": f'attachment; filename="{name}.{extension}"',
+        "X-Accel-Buffering": "no",
+    }
+    if gzip:
+        return StreamingResponse(stream, media_type="application/gzip", headers=headers)
+    return StreamingResponse(stream, media_type=EXPORT_FORMATS[export_format], headers=headers)
+
+
+@app.get("/api/orders/export", summary="Export Orders (CSV / NDJSON stream)")
+async def export_orders(
+    restaurant_id: str,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    format: str = "csv",
+    columns: Optional[str] = None,
+    gzip: bool = False
+):
+    """
+    Export ประวัติออเดอร์ทั้งหมดของร้าน (สำหรับยื่น GST / นักบัญชี)
+
+    Stream ทีละหน้า (keyset) ไม่โหลดทั้งหมดเข้า memory
+
+    Args:
+        restaurant_id: Restaurant ID
+        start_date: Start date (YYYY-MM-DD format)
+        end_date: End date (YYYY-MM-DD format)
+        format: csv or ndjson
+        columns: Comma-separated columns (default: GST-relevant columns)
+        gzip: Gzip the response body
+
+    Returns:
+        File download stream
+    """
+    try:
+        stream = orders_service.export_orders(restaurant_id, start_date, end_date, columns, format, gzip)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if stream is None:
+        raise HTTPException(status_code=404, detail="Restaurant not found or database not available")
+
+    filename = f"orders-{start_date or 'all'}-{end_date or 'now'}"
+    return _export_response(stream, filename, format, gzip)
+
+
 class UpdateOrderStatusRequest(BaseModel):
     status: str
     cancel_reason: Optional[str] = None  # Reason for cancellation (e.g., 'payment_rejected')
@@ -3839,6 +4066,61 @@ async def update_order_status(order_id: str, request: UpdateOrderStatusRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+class BulkUpdateOrderStatusRequest(BaseModel):
+    restaurant_id: str
+    order_ids: List[str]
+    status: str
+    cancel_reason: Optional[str] = None
+
+@app.post("/api/orders/status/bulk", summary="Bulk Update Order Status")
+async def bulk_update_order_status(request: BulkUpdateOrderStatusRequest):
+    """
+    อัปเดตสถานะหลายออเดอร์ในครั้งเดียว (ครัว bump หลายบิลพร้อมกัน)
+
+    Args:
+        restaurant_id: Restaurant ID หรือ slug
+        order_ids: List of order IDs
+        status: New status for all orders
+        cancel_reason: Optional reason for cancellation
+
+    Returns:
+        Dictionary with per-order results and updated orders
+    """
+    try:
+        if not request.order_ids:
+            raise HTTPException(status_code=400, detail="order_ids is required")
+
+        # Convert slug to UUID if needed
+        restaurant = restaurant_service.get_restaurant_by_id_or_slug(request.restaurant_id)
+        if not restaurant:
+            raise HTTPException(status_code=404, detail=f"Restaurant not found: {request.restaurant_id}")
+
+        result = orders_service.bulk_update_order_status(
+            restaurant_id=restaurant.get("id"),
+            order_ids=request.order_ids,
+            status=request.status,
+            cancel_reason=request.cancel_reason
+        )
+
+        if not result.get("success"):
+            raise HTTPException(status_code=400, detail=result.get("error", "Bulk update failed"))
+
+        return {
+            "success": True,
+            "message": f"{result['updated_count']} orders updated to {request.status}",
+            "updated_count": result["updated_count"],
+            "results": result["results"],
+            "orders": result["orders"]
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"❌ Bulk update order status error: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 class UpdateEstimatedTimeRequest(BaseModel):
     estimated_minutes: int  # Estimated cooking time in minutes
 
@@ -3890,7 +4172,26 @@ class PayAtCounterRequest(BaseModel):
     payment_method: str = "cash_at_counter"
 
 @app.post("/api/orders/{order_id}/pay-at-counter", summary="Confirm Pay at Counter")
-async def pay_at_counter(order_id: str, request: PayAtCounterRequest):
+async def pay_at_counter(
+    order_id: str,
+    request: PayAtCounterRequest,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_HEADER)
+):
+    """
+    ยืนยันจ่ายที่เค้าท์เตอร์ (รองรับ Idempotency-Key header)
+    """
+    result, replayed = await idempotency_store.run(
+        scope="orders:pay-at-counter",
+        key=idempotency_key,
+        payload={"order_id": order_id, **request.model_dump()},
+        func=lambda: _pay_at_counter(order_id, request)
+    )
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return result
+
+async def _pay_at_counter(order_id: str, request: PayAtCounterRequest):
     """
     ยืนยันการจ่ายเงินที่เค้าท์เตอร์สำหรับ Dine-in orders
 
@@ -4308,6 +4609,8 @@ async def create_service_request(request: CreateServiceRequestRequest):
         result = supabase.table("service_requests").insert(service_request_data).execute()
 
         if result.data:
+            # Push to staff devices subscribed to this restaurant
+            service_request_feed.publish("service_request.created", result.data[0])
             return {
                 "success": True,
                 "message": "Service request created successfully",
@@ -4323,17 +4626,30 @@ async def create_service_request(request: CreateServiceRequestRequest):
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
+# Statuses a staff device still has to act on
+OPEN_SERVICE_REQUEST_STATUSES = ("pending", "acknowledged")
+
 @app.get("/api/service-requests", summary="Get Service Requests")
-async def get_service_requests(restaurant_id: str, status: Optional[str] = None):
+async def get_service_requests(
+    restaurant_id: str,
+    status: Optional[str] = None,
+    open_only: bool = False,
+    since: Optional[int] = None
+):
     """
-    ดึงคำขอบริการทั้งหมดของร้าน
+    ดึงคำขอบริการของร้าน
+
+    ถ้าส่ง `since` (seq ล่าสุดที่ client มี) และ event หลังจากนั้นยังอยู่ใน buffer ของ feed
+    จะคืน `events` จาก buffer โดยไม่ query database; ถ้า buffer ไม่ครบจะคืนรายการจาก database
 
     Args:
         restaurant_id: Restaurant ID
         status: Filter by status (optional: pending, acknowledged, completed)
+        open_only: Only requests staff still have to act on (pending, acknowledged)
+        since: Catch up from the feed buffer instead of reloading the list
 
     Returns:
-        List of service requests
+        List of service requests (or buffered events newer than `since`)
     """
     try:
         # Convert slug to UUID if needed
@@ -4343,6 +4659,15 @@ async def get_service_requests(restaurant_id: str, status: Optional[str] = None)
 
         actual_restaurant_id = restaurant.get("id")
 
+        if since:
+            events, complete = service_request_feed.events_since(actual_restaurant_id, since)
+            if complete:
+                return {
+                    "success": True,
+                    "events": events,
+                    "seq": events[-1]["seq"] if events else since
+                }
+
         # Build query
         query = supabase.table("service_requests") \
             .select("*") \
@@ -4351,13 +4676,19 @@ async def get_service_requests(restaurant_id: str, status: Optional[str] = None)
 
         if status:
             query = query.eq("status", status)
+        elif open_only:
+            query = query.in_("status", list(OPEN_SERVICE_REQUEST_STATUSES))
+
+        # Cursor captured before the query so no event between query and subscribe is lost
+        seq = service_request_feed.latest_seq(actual_restaurant_id)
 
         result = query.execute()
 
         return {
             "success": True,
             "count": len(result.data) if result.data else 0,
-            "service_requests": result.data or []
+            "service_requests": result.data or [],
+            "seq": seq
         }
     except HTTPException:
         raise
@@ -4367,6 +4698,100 @@ async def get_service_requests(restaurant_id: str, status: Optional[str] = None)
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
+SERVICE_REQUEST_MAX_WAIT_SECONDS = 55
+
+@app.get("/api/service-requests/updates", summary="Wait for Service Request Updates (Long-poll)")
+async def wait_for_service_request_updates(restaurant_id: str, since: int = 0, timeout: int = 25):
+    """
+    Long-poll คำขอบริการใหม่ / การเปลี่ยนสถานะ สำหรับเครื่องของพนักงาน
+
+    ใช้ `seq` จาก GET /api/service-requests เป็น `since` ครั้งแรก
+    ถ้า `resync` เป็น true แปลว่า event บางส่วนหลุดจาก buffer แล้ว ให้ดึงรายการเต็มใหม่
+
+    Args:
+        restaurant_id: Restaurant ID หรือ slug
+        since: Seq ล่าสุดที่ client มี
+        timeout: เวลารอสูงสุด (วินาที, สูงสุด 55)
+
+    Returns:
+        Dictionary with events newer than `since` and the next cursor
+    """
+    try:
+        restaurant = restaurant_service.get_restaurant_by_id_or_slug(restaurant_id)
+        if not restaurant:
+            raise HTTPException(status_code=404, detail=f"Restaurant not found: {restaurant_id}")
+
+        actual_restaurant_id = restaurant.get("id")
+        wait_seconds = max(1, min(timeout, SERVICE_REQUEST_MAX_WAIT_SECONDS))
+
+        events, complete = await service_request_feed.wait_for_events(actual_restaurant_id, since, wait_seconds)
+
+        next_seq = events[-1]["seq"] if events else since
+        if not complete:
+            next_seq = service_request_feed.latest_seq(actual_restaurant_id)
+
+        return {
+            "success": True,
+            "events": events,
+            "resync": not complete,
+            "seq": next_seq
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"❌ Wait for service request updates error: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/service-requests/stream", summary="Service Request Event Stream (SSE)")
+async def stream_service_requests(
+    restaurant_id: str,
+    http_request: Request,
+    since: int = 0,
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID")
+):
+    """
+    Server-Sent Events ของคำขอบริการต่อร้าน
+    Reconnect ด้วย Last-Event-ID จะได้ event ที่พลาดไปจาก buffer (ไม่ต้อง query database)
+    ถ้า buffer ไม่ครบจะส่ง event `resync` ให้ client ดึงรายการเต็มใหม่
+
+    Args:
+        restaurant_id: Restaurant ID หรือ slug
+        since: Seq ล่าสุดที่ client มี
+    """
+    restaurant = restaurant_service.get_restaurant_by_id_or_slug(restaurant_id)
+    if not restaurant:
+        raise HTTPException(status_code=404, detail=f"Restaurant not found: {restaurant_id}")
+
+    actual_restaurant_id = restaurant.get("id")
+    if last_event_id and last_event_id.isdigit():
+        since = max(since, int(last_event_id))
+
+    async def event_stream():
+        cursor = since or service_request_feed.latest_seq(actual_restaurant_id)
+        while True:
+            events, complete = await service_request_feed.wait_for_events(actual_restaurant_id, cursor, 25)
+            if not complete:
+                cursor = service_request_feed.latest_seq(actual_restaurant_id)
+                yield f"id: {cursor}\nevent: resync\ndata: {{}}\n\n"
+            elif not events:
+                # Keep the connection alive through proxies
+                yield ": keep-alive\n\n"
+
+            for event in events:
+                cursor = max(cursor, event["seq"])
+                yield f"id: {event['seq']}\nevent: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+
+            if await http_request.is_disconnected():
+                return
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"X-Accel-Buffering": "no"}
+    )
+
 class UpdateServiceRequestStatusRequest(BaseModel):
     status: str  # 'pending', 'acknowledged', 'completed'
     acknowledged_by: Optional[str] = None  # Staff ID who acknowledged
@@ -4406,6 +4831,8 @@ async def update_service_request_status(request_id: str, request: UpdateServiceR
             .execute()
 
         if result.data:
+            # Push acknowledgement back to staff devices (and any other listeners)
+            service_request_feed.publish("service_request.updated", result.data[0])
             return {
                 "success": True,
                 "message": f"Service request status updated to {request.status}",
@@ -4485,15 +4912,17 @@ async def update_bestseller_flags(restaurant_id: str, days: int = 14):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/best-sellers/update-all", summary="Update Bestseller Flags for All Restaurants")
-async def update_all_bestseller_flags(days: int = 14, admin_key: str = None):
+async def update_all_bestseller_flags(days: int = 14, admin_key: str = None, force: bool = False):
     """
     อัพเดท bestseller flags สำหรับทุกร้าน (สำหรับ cron job หรือ admin)
 
     ควรเรียกทุก 2 สัปดาห์เพื่ออัพเดท bestsellers อัตโนมัติ
+    ประมวลผลเฉพาะร้านที่มียอดขายใหม่ตั้งแต่รอบที่แล้ว แบบ batch พร้อมกันหลาย batch
 
     Args:
         days: จำนวนวันย้อนหลัง (default: 14)
         admin_key: Admin API key (optional, for security)
+        force: ประมวลผลทุกร้านที่มียอดขายในช่วง (ไม่สนรอบที่แล้ว)
 
     Returns:
         Update results for all restaurants
@@ -4503,7 +4932,9 @@ async def update_all_bestseller_flags(days: int = 14, admin_key: str = None):
         # if admin_key != os.getenv('ADMIN_API_KEY'):
         #     raise HTTPException(status_code=403, detail="Invalid admin key")
 
-        result = best_sellers_service.update_all_restaurants_bestsellers(days=days)
+        result = await asyncio.to_thread(
+            best_sellers_service.update_all_restaurants_bestsellers, days=days, force=force
+        )
         return result
     except Exception as e:
         print(f"❌ Update all bestseller flags error: {str(e)}")
@@ -4544,6 +4975,98 @@ async def get_order(order_id: str):
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
+# ============================================================
+# Customer Order Status Subscription (long-poll / SSE)
+# ============================================================
+
+ORDER_STATUS_MAX_WAIT_SECONDS = 55
+ORDER_STATUS_FINAL_STATUSES = ('completed', 'cancelled')
+
+@app.get("/api/orders/{order_id}/status", summary="Wait for Order Status Change (Long-poll)")
+async def wait_for_order_status(order_id: str, since: int = 0, timeout: int = 25):
+    """
+    Long-poll สถานะออเดอร์ (แทนการ poll GET /api/orders/{order_id})
+
+    ตอบทันทีถ้า version ปัจจุบันใหม่กว่า `since`
+    ไม่อย่างนั้นรอจนกว่าสถานะ/เวลาประมาณจะเปลี่ยน หรือครบ timeout
+
+    Args:
+        order_id: Order ID
+        since: Version ล่าสุดที่ client มี (0 = ยังไม่มี)
+        timeout: เวลารอสูงสุด (วินาที, สูงสุด 55)
+
+    Returns:
+        Dictionary with changed flag and lightweight order snapshot (status, payment_status, estimated time, version)
+    """
+    try:
+        snapshot = orders_service.get_order_snapshot(order_id)
+        if not snapshot:
+            raise HTTPException(status_code=404, detail="Order not found")
+
+        if snapshot["version"] > since:
+            return {"success": True, "changed": True, "order": snapshot}
+
+        wait_seconds = max(1, min(timeout, ORDER_STATUS_MAX_WAIT_SECONDS))
+        newer = await order_status_tracker.wait_for_change(order_id, since, wait_seconds)
+
+        return {
+            "success": True,
+            "changed": newer is not None,
+            "order": newer or snapshot
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"❌ Wait for order status error: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/orders/{order_id}/events", summary="Order Status Event Stream (SSE)")
+async def stream_order_status(
+    order_id: str,
+    http_request: Request,
+    since: int = 0,
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID")
+):
+    """
+    Server-Sent Events ของสถานะออเดอร์
+    ส่ง event เฉพาะเมื่อสถานะหรือเวลาประมาณเปลี่ยน และปิด stream เมื่อออเดอร์เสร็จ/ยกเลิก
+
+    Args:
+        order_id: Order ID
+        since: Version ล่าสุดที่ client มี (EventSource ส่ง Last-Event-ID ให้อัตโนมัติเมื่อ reconnect)
+    """
+    snapshot = orders_service.get_order_snapshot(order_id)
+    if not snapshot:
+        raise HTTPException(status_code=404, detail="Order not found")
+
+    if last_event_id and last_event_id.isdigit():
+        since = max(since, int(last_event_id))
+
+    async def event_stream():
+        current_since = since
+        current = snapshot
+        while True:
+            if current and current["version"] > current_since:
+                current_since = current["version"]
+                yield f"id: {current_since}\nevent: order\ndata: {json.dumps(current, default=str)}\n\n"
+                if current.get("status") in ORDER_STATUS_FINAL_STATUSES:
+                    return
+            else:
+                # Keep the connection alive through proxies
+                yield ": keep-alive\n\n"
+
+            if await http_request.is_disconnected():
+                return
+            current = await order_status_tracker.wait_for_change(order_id, current_since, 25)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"X-Accel-Buffering": "no"}
+    )
+
 # ============================================================
 # Analytics & Reports API
 # ============================================================
@@ -4569,7 +5092,7 @@ async def get_revenue_stats(
         start_date = end_date - timedelta(days=days)
         
         stats = analytics_service.get_revenue_stats(restaurant_id, start_date, end_date)
-        return stats
+        return json_response(stats)
     except Exception as e:
         print(f"❌ Get revenue stats error: {str(e)}")
         import traceback
@@ -4595,7 +5118,7 @@ async def get_popular_items_analytics(
     """
     try:
         result = analytics_service.get_popular_items(restaurant_id, days, limit)
-        return result
+        return json_response(result)
     except Exception as e:
         print(f"❌ Get popular items error: {str(e)}")
         import traceback
@@ -5185,13 +5708,67 @@ async def get_order_trends(
     """
     try:
         result = analytics_service.get_order_trends(restaurant_id, days)
-        return result
+        return json_response(result)
     except Exception as e:
         print(f"❌ Get order trends error: {str(e)}")
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/analytics/forecast", summary="Get Next Week Demand Forecast")
+async def get_demand_forecast(
+    restaurant_id: str,
+    weeks: int = 8
+):
+    """
+    คาดการณ์จำนวนออเดอร์ / ยอดขายสัปดาห์หน้า รายชั่วโมง (สำหรับจัดตารางพนักงาน)
+
+    Args:
+        restaurant_id: Restaurant ID
+        weeks: จำนวนสัปดาห์ย้อนหลังที่ใช้คำนวณ (default: 8, max: 52)
+
+    Returns:
+        Expected 7x24 heatmap (local time), per-day totals and busiest slots
+    """
+    if weeks < 1 or weeks > 52:
+        raise HTTPException(status_code=400, detail="weeks must be between 1 and 52")
+
+    try:
+        result = analytics_service.get_demand_forecast(restaurant_id, weeks)
+        return json_response(result)
+    except Exception as e:
+        print(f"❌ Get demand forecast error: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/analytics/comparison", summary="Get Period-over-Period Comparison")
+async def get_period_comparison(
+    restaurant_id: str,
+    days: int = 30
+):
+    """
+    เปรียบเทียบยอดขาย N วันล่าสุดกับ N วันก่อนหน้า
+
+    Args:
+        restaurant_id: Restaurant ID
+        days: ความยาวของแต่ละช่วง (default: 30, max: 366)
+
+    Returns:
+        Current/previous totals, % change, daily series and hourly distribution
+    """
+    if days < 1 or days > 366:
+        raise HTTPException(status_code=400, detail="days must be between 1 and 366")
+
+    try:
+        result = analytics_service.get_period_comparison(restaurant_id, days)
+        return json_response(result)
+    except Exception as e:
+        print(f"❌ Get period comparison error: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=str(e))
+
 # ============================================================================
 # IMAGE LIBRARY ENDPOINTS
 # ============================================================================
@@ -5262,6 +5839,8 @@ async def copy_menu_to_restaurant(request: Dict[str, Any]):
         }
         
         new_menu = menu_service.create_menu_item(target_restaurant_id, new_menu_data)
+        if new_menu:
+            menu_translation_service.enqueue(target_restaurant_id, [new_menu.get("menu_id")])
         
         return {
             "success": True,
@@ -5276,6 +5855,76 @@ async def copy_menu_to_restaurant(request: Dict[str, Any]):
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/menus/clone", summary="Clone Whole Menu to Another Restaurant")
+async def clone_menu_to_restaurant(request: MenuCloneRequest):
+    """
+    คัดลอกเมนูทั้งร้าน (หรือเฉพาะเมนู / หมวดที่เลือก) ไปยังอีกร้าน (Enterprise feature)
+
+    รันเป็น background job: คัดลอก options / variants, ใช้ image_url เดิม
+    และคัดลอกคำแปลที่ cache ไว้ใน menu_translations
+
+    Returns:
+        Job (id, status, total_items) - ติดตาม progress ที่ GET /api/menus/clone/{job_id}
+    """
+    try:
+        user_profile = user_role_service.get_user_profile(request.user_id)
+        role = user_profile.get('role', 'free_trial')
+
+        if role not in ['enterprise', 'premium', 'admin']:
+            raise HTTPException(
+                status_code=403,
+                detail="This feature is only available for Enterprise/Premium users"
+            )
+
+        # Both restaurants must belong to the user
+        for restaurant_id in (request.source_restaurant_id, request.target_restaurant_id):
+            restaurant = restaurant_service.get_restaurant_by_id(restaurant_id)
+            if not restaurant or restaurant.get('user_id') != request.user_id:
+                raise HTTPException(
+                    status_code=403,
+                    detail="Restaurant not found or you don't have permission"
+                )
+
+        job = await asyncio.to_thread(
+            menu_clone_service.start_clone,
+            request.user_id,
+            request.source_restaurant_id,
+            request.target_restaurant_id,
+            request.menu_ids,
+            request.categories,
+            request.skip_existing if request.skip_existing is not None else True
+        )
+
+        if job.get('error'):
+            raise HTTPException(status_code=400, detail=job['error'])
+
+        return {
+            "success": True,
+            "message": "Menu clone started",
+            "job": job
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"❌ Clone menu error: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/menus/clone/{job_id}", summary="Get Menu Clone Job Progress")
+async def get_menu_clone_job(job_id: str, user_id: str):
+    """
+    สถานะและ progress ของงาน clone เมนู
+
+    Returns:
+        Job (status: pending / running / completed / failed, processed_items, copied_items,
+        copied_translations, progress %)
+    """
+    job = menu_clone_service.get_job(job_id, user_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Clone job not found")
+    return {"success": True, "job": job}
+
 # ============================================================
 # Delivery Distance Calculation API (Google Maps)
 # ============================================================
@@ -5523,9 +6172,9 @@ async def get_restaurant_location(restaurant_id: str):
 # ============================================================
 
 @app.get("/api/admin/overview", summary="Get Platform Overview Stats")
-async def admin_get_overview(admin_user_id: str):
-    """Get platform-wide statistics for admin dashboard"""
-    result = admin_service.get_platform_overview(admin_user_id)
+async def admin_get_overview(admin_user_id: str, refresh: bool = False):
+    """Get platform-wide statistics for admin dashboard (cached snapshot; refresh=true recomputes)"""
+    result = admin_service.get_platform_overview(admin_user_id, refresh)
     if "error" in result:
         raise HTTPException(status_code=403 if "Access denied" in result["error"] else 500, detail=result["error"])
     return result
@@ -5543,7 +6192,7 @@ async def admin_get_users(
     result = admin_service.get_all_users_detailed(admin_user_id, page, limit, search, role_filter)
     if "error" in result:
         raise HTTPException(status_code=403 if "Access denied" in result["error"] else 500, detail=result["error"])
-    return result
+    return json_response(result)
 
 
 class AdminUpdateUserRequest(BaseModel):
@@ -5610,7 +6259,7 @@ async def admin_get_restaurants(
     result = admin_service.get_all_restaurants(admin_user_id, page, limit, search, is_active)
     if "error" in result:
         raise HTTPException(status_code=403 if "Access denied" in result["error"] else 500, detail=result["error"])
-    return result
+    return json_response(result)
 
 
 class AdminUpdateRestaurantRequest(BaseModel):
@@ -5656,7 +6305,49 @@ async def admin_get_orders(
     result = admin_service.get_all_orders(admin_user_id, page, limit, status, payment_status, restaurant_id, date_from, date_to)
     if "error" in result:
         raise HTTPException(status_code=403 if "Access denied" in result["error"] else 500, detail=result["error"])
-    return result
+    return json_response(result)
+
+
+@app.get("/api/admin/export/orders", summary="Export All Orders (Admin, CSV / NDJSON stream)")
+async def admin_export_orders(
+    admin_user_id: str,
+    restaurant_id: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    format: str = "csv",
+    columns: Optional[str] = None,
+    gzip: bool = False
+):
+    """Stream orders platform-wide (keyset pages, constant memory)"""
+    result = admin_service.export_orders(admin_user_id, restaurant_id, date_from, date_to, columns, format, gzip)
+    if "error" in result:
+        raise HTTPException(status_code=_admin_export_error_status(result["error"]), detail=result["error"])
+    return _export_response(result["stream"], f"orders-{date_from or 'all'}-{date_to or 'now'}", format, gzip)
+
+
+@app.get("/api/admin/export/payments", summary="Export Payment Logs (Admin, CSV / NDJSON stream)")
+async def admin_export_payments(
+    admin_user_id: str,
+    restaurant_id: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    format: str = "csv",
+    columns: Optional[str] = None,
+    gzip: bool = False
+):
+    """Stream payment logs (keyset pages, constant memory)"""
+    result = admin_service.export_payment_logs(admin_user_id, restaurant_id, date_from, date_to, columns, format, gzip)
+    if "error" in result:
+        raise HTTPException(status_code=_admin_export_error_status(result["error"]), detail=result["error"])
+    return _export_response(result["stream"], f"payments-{date_from or 'all'}-{date_to or 'now'}", format, gzip)
+
+
+def _admin_export_error_status(error: str) -> int:
+    if "Access denied" in error:
+        return 403
+    if "Database" in error:
+        return 500
+    return 400
 
 
 class AdminUpdateOrderRequest(BaseModel):
@@ -5689,7 +6380,7 @@ async def admin_get_payments(
     result = admin_service.get_payment_logs(admin_user_id, page, limit, status, restaurant_id, date_from, date_to)
     if "error" in result:
         raise HTTPException(status_code=403 if "Access denied" in result["error"] else 500, detail=result["error"])
-    return result
+    return json_response(result)
 
 
 @app.get("/api/admin/payments/summary", summary="Get Payment Summary (Admin)")
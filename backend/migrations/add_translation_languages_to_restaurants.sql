@@ -0,0 +1,20 @@
+-- Migration: Add translation languages to restaurants
+-- Date: 2026-10-19
+-- Description: Languages the menu is pre-translated into in the background
+--              (services/menu_translation_service.py)
+--              NULL = plan default (every public menu language for enterprise / premium / admin, none otherwise)
+--              '{}' = pre-translation off
+
+ALTER TABLE restaurants
+ADD COLUMN IF NOT EXISTS translation_languages TEXT[] DEFAULT NULL;
+
+COMMENT ON COLUMN restaurants.translation_languages IS 'Language codes (th, zh, ja, ko, vi, hi, es, fr, de, id, ms) to pre-translate the menu into; NULL = plan default';
+
+-- Pre-translation upserts on this key (same as POST /api/translations/menu)
+CREATE UNIQUE INDEX IF NOT EXISTS idx_menu_translations_unique
+ON menu_translations (restaurant_id, menu_id, language_code);
+
+-- Example usage:
+-- UPDATE restaurants
+-- SET translation_languages = ARRAY['zh', 'ja', 'ko']
+-- WHERE id = 'restaurant-uuid-here';
@@ -0,0 +1,145 @@
+-- ============================================================
+-- Migration: Set-based Bestseller Refresh
+-- ============================================================
+-- อัปเดต is_best_seller ของหลายร้านพร้อมกันใน statement เดียว
+--   - จัดอันดับ top-N ต่อร้านจาก menu_item_sales_daily (ROW_NUMBER per restaurant)
+--     ใช้ลำดับเดียวกับ BestSellersService.get_best_sellers:
+--       1. ยอด >= 20, 2. pinned, 3. ยอด < 20 (ภายในกลุ่มเรียงตามยอด)
+--   - set is_best_seller = TRUE ด้วย UPDATE เดียว (ไม่แตะเมนูที่ flag อยู่แล้ว)
+-- bestseller_refresh_runs เก็บประวัติการรัน เพื่อประมวลผลเฉพาะร้านที่มียอดขายใหม่
+-- Requires: create_menu_item_sales.sql
+-- ============================================================
+
+CREATE TABLE IF NOT EXISTS public.bestseller_refresh_runs (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    started_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    finished_at TIMESTAMP WITH TIME ZONE,
+    status TEXT NOT NULL DEFAULT 'running',  -- running, completed, failed
+    days INTEGER NOT NULL DEFAULT 14,
+    restaurants_processed INTEGER DEFAULT 0,
+    restaurants_failed INTEGER DEFAULT 0,
+    flags_updated INTEGER DEFAULT 0,
+    duration_ms INTEGER,
+    error TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_bestseller_refresh_runs_started ON public.bestseller_refresh_runs(status, started_at DESC);
+
+ALTER TABLE public.bestseller_refresh_runs ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Service role can manage bestseller refresh runs" ON public.bestseller_refresh_runs;
+CREATE POLICY "Service role can manage bestseller refresh runs"
+    ON public.bestseller_refresh_runs FOR ALL
+    TO service_role
+    USING (true)
+    WITH CHECK (true);
+
+-- Find restaurants whose item sales changed since the last run
+CREATE INDEX IF NOT EXISTS idx_menu_item_sales_updated_at ON public.menu_item_sales_daily(updated_at);
+
+-- ============================================================
+-- Restaurants with new sales since a timestamp
+-- ============================================================
+
+CREATE OR REPLACE FUNCTION public.get_restaurants_with_new_item_sales(
+    p_since TIMESTAMP WITH TIME ZONE DEFAULT NULL,
+    p_start DATE DEFAULT CURRENT_DATE - 14
+)
+RETURNS TABLE (restaurant_id UUID)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT DISTINCT s.restaurant_id
+    FROM public.menu_item_sales_daily s
+    WHERE s.day >= p_start
+      AND (p_since IS NULL OR s.updated_at > p_since)
+    ORDER BY s.restaurant_id;
+$$;
+
+GRANT EXECUTE ON FUNCTION public.get_restaurants_with_new_item_sales(TIMESTAMP WITH TIME ZONE, DATE) TO service_role;
+
+-- ============================================================
+-- Rank + flag for a batch of restaurants
+-- ============================================================
+
+CREATE OR REPLACE FUNCTION public.refresh_bestseller_flags(
+    p_restaurant_ids UUID[],
+    p_days INTEGER DEFAULT 14,
+    p_limit INTEGER DEFAULT 5,
+    p_min_quantity INTEGER DEFAULT 20
+)
+RETURNS TABLE (
+    restaurant_id UUID,
+    menu_id TEXT,
+    rank BIGINT,
+    quantity BIGINT,
+    is_pinned BOOLEAN,
+    newly_flagged BOOLEAN
+)
+LANGUAGE sql
+VOLATILE
+AS $$
+    WITH sales AS (
+        SELECT s.restaurant_id, s.menu_id,
+               SUM(s.quantity)::bigint AS quantity,
+               SUM(s.order_count)::bigint AS order_count
+        FROM public.menu_item_sales_daily s
+        WHERE s.restaurant_id = ANY(p_restaurant_ids)
+          AND s.day BETWEEN CURRENT_DATE - p_days AND CURRENT_DATE
+        GROUP BY s.restaurant_id, s.menu_id
+        HAVING SUM(s.quantity) > 0
+    ),
+    candidates AS (
+        -- Items with sales (including items no longer on the menu, as before)
+        SELECT sa.restaurant_id, sa.menu_id, sa.quantity, sa.order_count,
+               COALESCE(m.is_best_seller AND m.is_active, FALSE) AS is_pinned
+        FROM sales sa
+        LEFT JOIN public.menus m ON m.id::text = sa.menu_id AND m.restaurant_id = sa.restaurant_id
+        UNION ALL
+        -- Pinned items without sales
+        SELECT m.restaurant_id, m.id::text, 0::bigint, 0::bigint, TRUE
+        FROM public.menus m
+        WHERE m.restaurant_id = ANY(p_restaurant_ids)
+          AND m.is_best_seller AND m.is_active
+          AND NOT EXISTS (
+              SELECT 1 FROM sales sa
+              WHERE sa.restaurant_id = m.restaurant_id AND sa.menu_id = m.id::text
+          )
+    ),
+    ranked AS (
+        SELECT c.*,
+               ROW_NUMBER() OVER (
+                   PARTITION BY c.restaurant_id
+                   ORDER BY
+                       CASE WHEN c.quantity >= p_min_quantity THEN 0 WHEN c.is_pinned THEN 1 ELSE 2 END,
+                       c.quantity DESC,
+                       c.order_count DESC
+               ) AS rank
+        FROM candidates c
+    ),
+    top_items AS (
+        SELECT * FROM ranked WHERE ranked.rank <= p_limit
+    ),
+    flagged AS (
+        UPDATE public.menus m
+        SET is_best_seller = TRUE
+        FROM top_items t
+        WHERE m.id::text = t.menu_id
+          AND m.restaurant_id = t.restaurant_id
+          AND NOT COALESCE(m.is_best_seller, FALSE)
+        RETURNING m.id::text AS menu_id
+    )
+    SELECT t.restaurant_id, t.menu_id, t.rank, t.quantity, t.is_pinned, (f.menu_id IS NOT NULL)
+    FROM top_items t
+    LEFT JOIN flagged f ON f.menu_id = t.menu_id
+    ORDER BY t.restaurant_id, t.rank;
+$$;
+
+GRANT EXECUTE ON FUNCTION public.refresh_bestseller_flags(UUID[], INTEGER, INTEGER, INTEGER) TO service_role;
+
+-- ============================================================
+-- Verification Queries
+-- ============================================================
+-- SELECT * FROM public.get_restaurants_with_new_item_sales(NOW() - INTERVAL '1 day');
+-- SELECT * FROM public.refresh_bestseller_flags(ARRAY['<uuid>'::uuid], 14, 5);
+-- SELECT * FROM public.bestseller_refresh_runs ORDER BY started_at DESC LIMIT 5;
@@ -0,0 +1,221 @@
+-- ============================================================
+-- Migration: Hour-of-Week Demand Heatmap (local time)
+-- ============================================================
+-- ตาราง 7x24 (วันในสัปดาห์ x ชั่วโมง) ต่อร้านต่อสัปดาห์ ตามเวลาท้องถิ่นของร้าน
+-- อัปเดตแบบ incremental ทุกครั้งที่ order ถูก insert / update / delete (trigger)
+-- /api/analytics/trends และ /api/analytics/forecast อ่านได้ไม่เกิน 168 แถว
+-- แทนการดึง timestamp ของออเดอร์ทั้งหมด
+--
+-- นับเฉพาะออเดอร์ที่ status IN ('completed', 'ready', 'preparing')
+-- (เงื่อนไขเดียวกับ order_rollups) week_start = วันจันทร์ (เวลาท้องถิ่น)
+-- dow: 0 = Monday ... 6 = Sunday
+--
+-- Backfill: SELECT public.rebuild_order_demand(NULL, '2024-01-01', CURRENT_DATE);
+--   หรือ python scripts/backfill_order_rollups.py
+-- Requires: create_order_rollups.sql
+-- ============================================================
+
+-- Restaurant local time zone (IANA name); all current restaurants are in New Zealand
+ALTER TABLE public.restaurants ADD COLUMN IF NOT EXISTS timezone TEXT DEFAULT 'Pacific/Auckland';
+
+CREATE TABLE IF NOT EXISTS public.order_demand_weekly (
+    restaurant_id UUID NOT NULL REFERENCES restaurants(id) ON DELETE CASCADE,
+    week_start DATE NOT NULL,
+    dow SMALLINT NOT NULL CHECK (dow BETWEEN 0 AND 6),
+    hour SMALLINT NOT NULL CHECK (hour BETWEEN 0 AND 23),
+
+    order_count INTEGER NOT NULL DEFAULT 0,
+    revenue DECIMAL(12,2) NOT NULL DEFAULT 0,
+
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    PRIMARY KEY (restaurant_id, week_start, dow, hour)
+);
+
+ALTER TABLE public.order_demand_weekly ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Service role can manage demand heatmap" ON public.order_demand_weekly;
+CREATE POLICY "Service role can manage demand heatmap"
+    ON public.order_demand_weekly FOR ALL
+    TO service_role
+    USING (true)
+    WITH CHECK (true);
+
+CREATE OR REPLACE FUNCTION public.restaurant_timezone(p_restaurant_id UUID)
+RETURNS TEXT
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT COALESCE((SELECT timezone FROM public.restaurants WHERE id = p_restaurant_id), 'Pacific/Auckland');
+$$;
+
+-- ============================================================
+-- Incremental maintenance
+-- ============================================================
+
+-- Add (p_sign = 1) or remove (p_sign = -1) one order's contribution
+CREATE OR REPLACE FUNCTION public.apply_order_demand_delta(
+    p_restaurant_id UUID,
+    p_created_at TIMESTAMP WITH TIME ZONE,
+    p_total_price DECIMAL,
+    p_sign INTEGER
+)
+RETURNS VOID
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_local TIMESTAMP := p_created_at AT TIME ZONE public.restaurant_timezone(p_restaurant_id);
+BEGIN
+    INSERT INTO public.order_demand_weekly AS d (restaurant_id, week_start, dow, hour, order_count, revenue)
+    VALUES (
+        p_restaurant_id,
+        date_trunc('week', v_local)::date,
+        (EXTRACT(ISODOW FROM v_local) - 1)::smallint,
+        EXTRACT(HOUR FROM v_local)::smallint,
+        p_sign,
+        COALESCE(p_total_price, 0) * p_sign
+    )
+    ON CONFLICT (restaurant_id, week_start, dow, hour) DO UPDATE SET
+        order_count = d.order_count + EXCLUDED.order_count,
+        revenue = d.revenue + EXCLUDED.revenue,
+        updated_at = NOW();
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION public.order_demand_trigger()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.status IN ('completed', 'ready', 'preparing') THEN
+        PERFORM public.apply_order_demand_delta(OLD.restaurant_id, OLD.created_at, OLD.total_price, -1);
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.status IN ('completed', 'ready', 'preparing') THEN
+        PERFORM public.apply_order_demand_delta(NEW.restaurant_id, NEW.created_at, NEW.total_price, 1);
+    END IF;
+
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS order_demand_trigger ON public.orders;
+CREATE TRIGGER order_demand_trigger
+    AFTER INSERT OR DELETE OR UPDATE OF status, total_price, created_at, restaurant_id
+    ON public.orders
+    FOR EACH ROW
+    EXECUTE FUNCTION public.order_demand_trigger();
+
+-- ============================================================
+-- Reads (max 168 rows)
+-- ============================================================
+
+-- Summed 7x24 matrix over [p_start_week, p_end_week] (week_start dates, inclusive)
+CREATE OR REPLACE FUNCTION public.get_demand_heatmap(
+    p_restaurant_id UUID,
+    p_start_week DATE,
+    p_end_week DATE
+)
+RETURNS TABLE (dow SMALLINT, hour SMALLINT, order_count BIGINT, revenue NUMERIC)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT d.dow, d.hour, SUM(d.order_count)::bigint, SUM(d.revenue)
+    FROM public.order_demand_weekly d
+    WHERE d.restaurant_id = p_restaurant_id
+      AND d.week_start BETWEEN p_start_week AND p_end_week
+    GROUP BY d.dow, d.hour
+    HAVING SUM(d.order_count) <> 0
+    ORDER BY d.dow, d.hour;
+$$;
+
+-- Expected load for next week: exponentially weighted mean of the last p_weeks
+-- complete weeks (weight p_decay^age, age 0 = last week; weeks without orders count as 0)
+CREATE OR REPLACE FUNCTION public.get_demand_forecast(
+    p_restaurant_id UUID,
+    p_weeks INTEGER DEFAULT 8,
+    p_decay NUMERIC DEFAULT 0.7
+)
+RETURNS TABLE (dow SMALLINT, hour SMALLINT, expected_orders NUMERIC, expected_revenue NUMERIC)
+LANGUAGE sql
+STABLE
+AS $$
+    WITH bounds AS (
+        SELECT date_trunc('week', NOW() AT TIME ZONE public.restaurant_timezone(p_restaurant_id))::date AS current_week
+    ),
+    weights AS (
+        SELECT SUM(POWER(p_decay, k)) AS total
+        FROM generate_series(0, p_weeks - 1) AS k
+    )
+    SELECT
+        d.dow,
+        d.hour,
+        ROUND(SUM(d.order_count * POWER(p_decay, (b.current_week - 7 - d.week_start) / 7)) / w.total, 2),
+        ROUND(SUM(d.revenue * POWER(p_decay, (b.current_week - 7 - d.week_start) / 7)) / w.total, 2)
+    FROM public.order_demand_weekly d, bounds b, weights w
+    WHERE d.restaurant_id = p_restaurant_id
+      AND d.week_start BETWEEN b.current_week - 7 * p_weeks AND b.current_week - 7
+    GROUP BY d.dow, d.hour, w.total
+    ORDER BY d.dow, d.hour;
+$$;
+
+-- ============================================================
+-- Backfill / rebuild (batch)
+-- ============================================================
+
+-- Recompute weeks touched by [p_start, p_end] (local dates) for one restaurant (or all when NULL)
+CREATE OR REPLACE FUNCTION public.rebuild_order_demand(
+    p_restaurant_id UUID DEFAULT NULL,
+    p_start DATE DEFAULT NULL,
+    p_end DATE DEFAULT NULL
+)
+RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_start DATE := date_trunc('week', p_start)::date;
+    v_end DATE := (date_trunc('week', p_end) + INTERVAL '6 days')::date;
+    v_rows INTEGER;
+BEGIN
+    DELETE FROM public.order_demand_weekly
+    WHERE (p_restaurant_id IS NULL OR restaurant_id = p_restaurant_id)
+      AND (v_start IS NULL OR week_start >= v_start)
+      AND (v_end IS NULL OR week_start <= v_end);
+
+    INSERT INTO public.order_demand_weekly (restaurant_id, week_start, dow, hour, order_count, revenue)
+    SELECT
+        restaurant_id,
+        date_trunc('week', local_at)::date,
+        (EXTRACT(ISODOW FROM local_at) - 1)::smallint,
+        EXTRACT(HOUR FROM local_at)::smallint,
+        COUNT(*),
+        COALESCE(SUM(total_price), 0)
+    FROM (
+        SELECT o.restaurant_id, o.total_price,
+               o.created_at AT TIME ZONE COALESCE(r.timezone, 'Pacific/Auckland') AS local_at
+        FROM public.orders o
+        LEFT JOIN public.restaurants r ON r.id = o.restaurant_id
+        WHERE o.status IN ('completed', 'ready', 'preparing')
+          AND (p_restaurant_id IS NULL OR o.restaurant_id = p_restaurant_id)
+          -- Indexable UTC bounds wide enough for any local offset (-12h .. +14h);
+          -- the exact local-week filter below trims the edges
+          AND (v_start IS NULL OR o.created_at >= v_start - INTERVAL '1 day')
+          AND (v_end IS NULL OR o.created_at < v_end + INTERVAL '2 days')
+    ) src
+    WHERE (v_start IS NULL OR date_trunc('week', local_at)::date >= v_start)
+      AND (v_end IS NULL OR date_trunc('week', local_at)::date <= v_end)
+    GROUP BY 1, 2, 3, 4;
+
+    GET DIAGNOSTICS v_rows = ROW_COUNT;
+    RETURN v_rows;
+END;
+$$;
+
+GRANT EXECUTE ON FUNCTION public.get_demand_heatmap(UUID, DATE, DATE) TO service_role;
+GRANT EXECUTE ON FUNCTION public.get_demand_forecast(UUID, INTEGER, NUMERIC) TO service_role;
+GRANT EXECUTE ON FUNCTION public.rebuild_order_demand(UUID, DATE, DATE) TO service_role;
+
+-- ============================================================
+-- Verification Queries
+-- ============================================================
+-- SELECT * FROM public.get_demand_heatmap('<uuid>', CURRENT_DATE - 28, CURRENT_DATE);
+-- SELECT * FROM public.get_demand_forecast('<uuid>', 8, 0.7);
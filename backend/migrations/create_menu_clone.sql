@@ -0,0 +1,129 @@
+-- ============================================================
+-- Migration: Whole-menu Clone Between Restaurants
+-- ============================================================
+-- คัดลอกเมนูทั้งร้าน (หรือเฉพาะที่เลือก) ไปยังอีกร้านแบบ set-based
+--   - menus (รวม options / variants JSONB และ image_url เดิม ไม่อัปโหลดรูปใหม่)
+--   - menu_translations ที่ cache ไว้ของเมนูเหล่านั้น
+-- ทำทีละ batch (เรียงตาม id) เพื่อรายงาน progress ได้ระหว่างทาง
+-- menu_clone_jobs เก็บสถานะ / progress ของแต่ละงาน
+-- ใช้โดย services/menu_clone_service.py
+-- ============================================================
+
+CREATE TABLE IF NOT EXISTS public.menu_clone_jobs (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    user_id UUID NOT NULL,
+    source_restaurant_id UUID NOT NULL REFERENCES restaurants(id) ON DELETE CASCADE,
+    target_restaurant_id UUID NOT NULL REFERENCES restaurants(id) ON DELETE CASCADE,
+    status TEXT NOT NULL DEFAULT 'pending',  -- pending, running, completed, failed
+    filters JSONB DEFAULT '{}'::jsonb,       -- {menu_ids, categories, skip_existing}
+    total_items INTEGER DEFAULT 0,
+    processed_items INTEGER DEFAULT 0,
+    copied_items INTEGER DEFAULT 0,
+    copied_translations INTEGER DEFAULT 0,
+    error TEXT,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    started_at TIMESTAMP WITH TIME ZONE,
+    finished_at TIMESTAMP WITH TIME ZONE
+);
+
+CREATE INDEX IF NOT EXISTS idx_menu_clone_jobs_user ON public.menu_clone_jobs(user_id, created_at DESC);
+
+ALTER TABLE public.menu_clone_jobs ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Service role can manage menu clone jobs" ON public.menu_clone_jobs;
+CREATE POLICY "Service role can manage menu clone jobs"
+    ON public.menu_clone_jobs FOR ALL
+    TO service_role
+    USING (true)
+    WITH CHECK (true);
+
+-- ============================================================
+-- Copy one batch of source menu rows (id > p_after_id), with translations
+-- ============================================================
+
+CREATE OR REPLACE FUNCTION public.clone_menu_batch(
+    p_source_restaurant_id UUID,
+    p_target_restaurant_id UUID,
+    p_after_id UUID DEFAULT NULL,
+    p_batch_size INTEGER DEFAULT 100,
+    p_menu_ids UUID[] DEFAULT NULL,
+    p_categories TEXT[] DEFAULT NULL,
+    p_skip_existing BOOLEAN DEFAULT TRUE
+)
+RETURNS TABLE (
+    processed INTEGER,
+    copied INTEGER,
+    translations INTEGER,
+    last_id UUID
+)
+LANGUAGE sql
+VOLATILE
+AS $$
+    WITH batch AS (
+        SELECT m.*
+        FROM public.menus m
+        WHERE m.restaurant_id = p_source_restaurant_id
+          AND COALESCE(m.is_active, TRUE)
+          AND (p_after_id IS NULL OR m.id > p_after_id)
+          AND (p_menu_ids IS NULL OR m.id = ANY(p_menu_ids))
+          AND (p_categories IS NULL OR m.category = ANY(p_categories))
+        ORDER BY m.id
+        LIMIT p_batch_size
+    ),
+    src AS (
+        -- New ids up front so translations can follow their menu row
+        SELECT b.*, uuid_generate_v4() AS new_id
+        FROM batch b
+        WHERE NOT p_skip_existing OR NOT EXISTS (
+            SELECT 1 FROM public.menus t
+            WHERE t.restaurant_id = p_target_restaurant_id
+              AND COALESCE(t.is_active, TRUE)
+              AND lower(t.name_original) = lower(b.name_original)
+              AND COALESCE(lower(t.category), '') = COALESCE(lower(b.category), '')
+        )
+    ),
+    inserted AS (
+        INSERT INTO public.menus (
+            id, restaurant_id,
+            name_original, name_english, description_original, description_english,
+            price, image_url, category, category_english, language_code, display_mode,
+            is_active, is_featured, is_best_seller, menu_type, options, variants, sort_order
+        )
+        SELECT
+            s.new_id, p_target_restaurant_id,
+            s.name_original, s.name_english, s.description_original, s.description_english,
+            s.price, s.image_url, s.category, s.category_english, s.language_code, s.display_mode,
+            s.is_active, s.is_featured, s.is_best_seller, s.menu_type, s.options, s.variants, s.sort_order
+        FROM src s
+        RETURNING id
+    ),
+    translated AS (
+        INSERT INTO public.menu_translations (
+            restaurant_id, menu_id, language_code,
+            translated_name, translated_description, translated_category,
+            translated_meats, translated_addons, source_hash, updated_at
+        )
+        SELECT
+            p_target_restaurant_id, s.new_id, t.language_code,
+            t.translated_name, t.translated_description, t.translated_category,
+            t.translated_meats, t.translated_addons, t.source_hash, NOW()
+        FROM public.menu_translations t
+        JOIN src s ON t.menu_id::text = s.id::text
+        WHERE t.restaurant_id = p_source_restaurant_id
+        ON CONFLICT (restaurant_id, menu_id, language_code) DO NOTHING
+        RETURNING 1
+    )
+    SELECT
+        (SELECT COUNT(*) FROM batch)::integer,
+        (SELECT COUNT(*) FROM inserted)::integer,
+        (SELECT COUNT(*) FROM translated)::integer,
+        (SELECT MAX(id) FROM batch);
+$$;
+
+GRANT EXECUTE ON FUNCTION public.clone_menu_batch(UUID, UUID, UUID, INTEGER, UUID[], TEXT[], BOOLEAN) TO service_role;
+
+-- ============================================================
+-- Verification Queries
+-- ============================================================
+-- SELECT * FROM public.clone_menu_batch('<source-uuid>', '<target-uuid>', NULL, 100);
+-- SELECT * FROM public.menu_clone_jobs ORDER BY created_at DESC LIMIT 5;
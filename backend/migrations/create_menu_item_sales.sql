@@ -0,0 +1,253 @@
+-- ============================================================
+-- Migration: Menu Item Sales Facts (menu_id × day)
+-- ============================================================
+-- ยอดขายรายเมนูต่อวัน (quantity, revenue, order_count)
+-- อัปเดตแบบ incremental โดย trigger บน orders:
+--   - สร้างออเดอร์ -> บวกยอดของทุก item
+--   - ยกเลิก / void / refund -> ลบยอดออก (และบวกกลับถ้าถูก restore)
+-- ใช้โดย AnalyticsService.get_popular_items และ BestSellersService.get_best_sellers
+-- ผ่าน RPC get_top_menu_items (ต้นทุนขึ้นกับจำนวนเมนู ไม่ใช่จำนวนออเดอร์)
+--
+-- นับเฉพาะออเดอร์ที่ status IN ('completed', 'ready', 'preparing') (เหมือน order_rollups)
+-- ที่ไม่ถูก void และไม่ถูก refund
+-- Backfill: SELECT public.rebuild_menu_item_sales(NULL, NULL, CURRENT_DATE);
+-- ============================================================
+
+CREATE TABLE IF NOT EXISTS public.menu_item_sales_daily (
+    restaurant_id UUID NOT NULL REFERENCES restaurants(id) ON DELETE CASCADE,
+    menu_id TEXT NOT NULL,  -- menu_id from order items JSON (not always a valid UUID)
+    day DATE NOT NULL,
+
+    quantity INTEGER NOT NULL DEFAULT 0,
+    revenue DECIMAL(12,2) NOT NULL DEFAULT 0,
+    order_count INTEGER NOT NULL DEFAULT 0,
+
+    -- Last seen names (for items deleted from the menu)
+    name TEXT,
+    name_en TEXT,
+
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    PRIMARY KEY (restaurant_id, day, menu_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_menu_item_sales_restaurant_menu ON public.menu_item_sales_daily(restaurant_id, menu_id);
+
+ALTER TABLE public.menu_item_sales_daily ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Service role can manage menu item sales" ON public.menu_item_sales_daily;
+CREATE POLICY "Service role can manage menu item sales"
+    ON public.menu_item_sales_daily FOR ALL
+    TO service_role
+    USING (true)
+    WITH CHECK (true);
+
+-- ============================================================
+-- Incremental maintenance
+-- ============================================================
+
+-- Does this order row count towards item sales?
+CREATE OR REPLACE FUNCTION public.order_counts_for_item_sales(
+    p_status TEXT,
+    p_is_voided BOOLEAN,
+    p_payment_status TEXT
+)
+RETURNS BOOLEAN
+LANGUAGE sql
+IMMUTABLE
+AS $$
+    -- Same status set as order_rollups, so popular items and revenue agree
+    -- (pending / pending_payment carts are not sales yet)
+    SELECT COALESCE(p_status, '') IN ('completed', 'ready', 'preparing')
+       AND NOT COALESCE(p_is_voided, FALSE)
+       AND COALESCE(p_payment_status, '') <> 'refunded';
+$$;
+
+-- Numeric value of an order item field, or p_default when it is missing or not a number
+-- (items JSON comes from clients: "", "12,50" or "abc" must not make the trigger reject an order)
+CREATE OR REPLACE FUNCTION public.item_sales_number(
+    p_value TEXT,
+    p_default NUMERIC
+)
+RETURNS NUMERIC
+LANGUAGE sql
+IMMUTABLE
+AS $$
+    SELECT CASE
+        WHEN btrim(p_value) ~ '^[0-9]+(\.[0-9]+)?$' THEN btrim(p_value)::numeric
+        ELSE p_default
+    END;
+$$;
+
+-- Add (p_sign = 1) or remove (p_sign = -1) all items of one order
+CREATE OR REPLACE FUNCTION public.apply_item_sales_delta(
+    p_restaurant_id UUID,
+    p_created_at TIMESTAMP WITH TIME ZONE,
+    p_items JSONB,
+    p_sign INTEGER
+)
+RETURNS VOID
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF p_items IS NULL OR jsonb_typeof(p_items) <> 'array' THEN
+        RETURN;
+    END IF;
+
+    INSERT INTO public.menu_item_sales_daily AS s (restaurant_id, menu_id, day, quantity, revenue, order_count, name, name_en)
+    SELECT
+        p_restaurant_id,
+        item->>'menu_id',
+        (p_created_at AT TIME ZONE 'UTC')::date,
+        SUM(public.item_sales_number(item->>'quantity', 1))::integer * p_sign,
+        SUM(public.item_sales_number(item->>'price', 0) * public.item_sales_number(item->>'quantity', 1)) * p_sign,
+        p_sign,
+        MAX(item->>'name'),
+        MAX(item->>'nameEn')
+    FROM jsonb_array_elements(p_items) AS item
+    WHERE COALESCE(item->>'menu_id', '') <> ''
+    GROUP BY item->>'menu_id'
+    ON CONFLICT (restaurant_id, day, menu_id) DO UPDATE SET
+        quantity = s.quantity + EXCLUDED.quantity,
+        revenue = s.revenue + EXCLUDED.revenue,
+        order_count = s.order_count + EXCLUDED.order_count,
+        name = COALESCE(EXCLUDED.name, s.name),
+        name_en = COALESCE(EXCLUDED.name_en, s.name_en),
+        updated_at = NOW();
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION public.menu_item_sales_trigger()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_old_counts BOOLEAN := FALSE;
+    v_new_counts BOOLEAN := FALSE;
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        v_old_counts := public.order_counts_for_item_sales(OLD.status, OLD.is_voided, OLD.payment_status);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        v_new_counts := public.order_counts_for_item_sales(NEW.status, NEW.is_voided, NEW.payment_status);
+    END IF;
+
+    -- Skip status changes that do not affect item sales (e.g. preparing -> ready)
+    IF TG_OP = 'UPDATE' AND v_old_counts = v_new_counts AND (NOT v_new_counts OR OLD.items IS NOT DISTINCT FROM NEW.items) THEN
+        RETURN NULL;
+    END IF;
+
+    IF v_old_counts THEN
+        PERFORM public.apply_item_sales_delta(OLD.restaurant_id, OLD.created_at, OLD.items, -1);
+    END IF;
+    IF v_new_counts THEN
+        PERFORM public.apply_item_sales_delta(NEW.restaurant_id, NEW.created_at, NEW.items, 1);
+    END IF;
+
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS menu_item_sales_trigger ON public.orders;
+CREATE TRIGGER menu_item_sales_trigger
+    AFTER INSERT OR DELETE OR UPDATE OF status, is_voided, payment_status, items
+    ON public.orders
+    FOR EACH ROW
+    EXECUTE FUNCTION public.menu_item_sales_trigger();
+
+-- ============================================================
+-- Top-N read
+-- ============================================================
+
+-- Top items by quantity in a day range, plus any explicitly requested menu ids (e.g. pinned bestsellers)
+-- p_limit NULL = per-menu totals of every item (RollupService caches closed-range totals and adds the open day)
+CREATE OR REPLACE FUNCTION public.get_top_menu_items(
+    p_restaurant_id UUID,
+    p_start DATE,
+    p_end DATE DEFAULT CURRENT_DATE,
+    p_limit INTEGER DEFAULT 10,
+    p_menu_ids TEXT[] DEFAULT '{}'
+)
+RETURNS TABLE (
+    menu_id TEXT,
+    quantity BIGINT,
+    revenue DECIMAL,
+    order_count BIGINT,
+    name TEXT,
+    name_en TEXT
+)
+LANGUAGE sql
+STABLE
+AS $$
+    WITH totals AS (
+        SELECT
+            s.menu_id,
+            SUM(s.quantity)::bigint AS quantity,
+            SUM(s.revenue) AS revenue,
+            SUM(s.order_count)::bigint AS order_count,
+            MAX(s.name) AS name,
+            MAX(s.name_en) AS name_en
+        FROM public.menu_item_sales_daily s
+        WHERE s.restaurant_id = p_restaurant_id
+          AND s.day BETWEEN p_start AND p_end
+        GROUP BY s.menu_id
+        HAVING SUM(s.quantity) > 0
+    )
+    (SELECT * FROM totals ORDER BY quantity DESC, order_count DESC LIMIT p_limit)
+    UNION
+    (SELECT * FROM totals WHERE totals.menu_id = ANY(p_menu_ids));
+$$;
+
+GRANT EXECUTE ON FUNCTION public.get_top_menu_items(UUID, DATE, DATE, INTEGER, TEXT[]) TO service_role;
+
+-- ============================================================
+-- Backfill / rebuild (batch)
+-- ============================================================
+
+CREATE OR REPLACE FUNCTION public.rebuild_menu_item_sales(
+    p_restaurant_id UUID DEFAULT NULL,
+    p_start DATE DEFAULT NULL,
+    p_end DATE DEFAULT NULL
+)
+RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_rows INTEGER;
+BEGIN
+    DELETE FROM public.menu_item_sales_daily
+    WHERE (p_restaurant_id IS NULL OR restaurant_id = p_restaurant_id)
+      AND (p_start IS NULL OR day >= p_start)
+      AND (p_end IS NULL OR day <= p_end);
+
+    INSERT INTO public.menu_item_sales_daily (restaurant_id, menu_id, day, quantity, revenue, order_count, name, name_en)
+    SELECT
+        o.restaurant_id,
+        item->>'menu_id',
+        (o.created_at AT TIME ZONE 'UTC')::date,
+        SUM(public.item_sales_number(item->>'quantity', 1))::integer,
+        SUM(public.item_sales_number(item->>'price', 0) * public.item_sales_number(item->>'quantity', 1)),
+        COUNT(DISTINCT o.id),
+        MAX(item->>'name'),
+        MAX(item->>'nameEn')
+    FROM public.orders o
+    CROSS JOIN LATERAL jsonb_array_elements(
+        CASE WHEN jsonb_typeof(o.items) = 'array' THEN o.items ELSE '[]'::jsonb END
+    ) AS item
+    WHERE public.order_counts_for_item_sales(o.status, o.is_voided, o.payment_status)
+      AND COALESCE(item->>'menu_id', '') <> ''
+      AND (p_restaurant_id IS NULL OR o.restaurant_id = p_restaurant_id)
+      AND (p_start IS NULL OR (o.created_at AT TIME ZONE 'UTC')::date >= p_start)
+      AND (p_end IS NULL OR (o.created_at AT TIME ZONE 'UTC')::date <= p_end)
+    GROUP BY 1, 2, 3;
+
+    GET DIAGNOSTICS v_rows = ROW_COUNT;
+    RETURN v_rows;
+END;
+$$;
+
+GRANT EXECUTE ON FUNCTION public.rebuild_menu_item_sales(UUID, DATE, DATE) TO service_role;
+
+-- ============================================================
+-- Verification Queries
+-- ============================================================
+-- SELECT * FROM public.get_top_menu_items('<uuid>'::uuid, CURRENT_DATE - 14, CURRENT_DATE, 5);
@@ -0,0 +1,60 @@
+-- ============================================================
+-- Migration: Menu Stats RPC
+-- ============================================================
+-- สถิติเมนูของร้านคำนวณใน database (COUNT / GROUP BY) แทนการดึงทุกแถวมานับใน Python
+--   - total_items, categories, with_images
+--   - items_per_category: {"หมวด": จำนวน}
+--   - missing_translations: {"ภาษา": จำนวนเมนูที่ยังไม่มีคำแปลใน menu_translations}
+-- ใช้โดย services/menu_service.py (MenuService.get_menu_stats, GET /api/menu-stats)
+-- ============================================================
+
+CREATE INDEX IF NOT EXISTS idx_menus_restaurant_active
+ON public.menus(restaurant_id) WHERE is_active = true;
+
+CREATE OR REPLACE FUNCTION public.get_menu_stats(
+    p_restaurant_id UUID,
+    p_languages TEXT[] DEFAULT '{}'
+)
+RETURNS JSONB
+LANGUAGE sql
+STABLE
+AS $$
+    WITH active AS (
+        SELECT id,
+               NULLIF(category, '') AS category,
+               NULLIF(image_url, '') IS NOT NULL AS has_image
+        FROM public.menus
+        WHERE restaurant_id = p_restaurant_id
+          AND is_active = true
+    ),
+    per_category AS (
+        SELECT category, COUNT(*) AS items
+        FROM active
+        WHERE category IS NOT NULL
+        GROUP BY category
+    ),
+    missing AS (
+        SELECT l.code, COUNT(*) FILTER (WHERE t.menu_id IS NULL) AS items
+        FROM unnest(p_languages) AS l(code)
+        CROSS JOIN active a
+        LEFT JOIN public.menu_translations t
+               ON t.restaurant_id = p_restaurant_id
+              AND t.menu_id::text = a.id::text
+              AND t.language_code = l.code
+        GROUP BY l.code
+    )
+    SELECT jsonb_build_object(
+        'total_items', (SELECT COUNT(*) FROM active),
+        'categories', (SELECT COUNT(*) FROM per_category),
+        'with_images', (SELECT COUNT(*) FROM active WHERE has_image),
+        'items_per_category', COALESCE((SELECT jsonb_object_agg(category, items) FROM per_category), '{}'::jsonb),
+        'missing_translations', COALESCE((SELECT jsonb_object_agg(code, items) FROM missing), '{}'::jsonb)
+    );
+$$;
+
+GRANT EXECUTE ON FUNCTION public.get_menu_stats(UUID, TEXT[]) TO service_role;
+
+-- ============================================================
+-- Verification Queries
+-- ============================================================
+-- SELECT public.get_menu_stats('<uuid>'::uuid, ARRAY['zh', 'ja']);
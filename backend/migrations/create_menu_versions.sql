@@ -0,0 +1,126 @@
+-- ============================================================
+-- Migration: Versioned Menus (delta sync)
+-- ============================================================
+-- ทุกร้านมีตัวนับ menu version (menu_versions) ที่เพิ่มขึ้นทุกครั้งที่เมนูถูก
+-- insert / update (รวม soft delete, sort_order, bestseller flags) / delete
+-- แต่ละแถวใน menus เก็บ version ล่าสุดที่แก้ไข (menus.menu_version)
+-- การลบจริง (DELETE) เก็บ tombstone ไว้ใน menu_tombstones
+--
+-- GET /api/menus/changes?since=<version> อ่านเฉพาะแถวที่ menu_version > since
+-- (soft delete = is_active false -> ส่งเป็น tombstone)
+--
+-- version ต่อร้านไม่ซ้ำกันและ commit ตามลำดับ (row lock บน menu_versions)
+-- จึงใช้เป็น cursor สำหรับแบ่งหน้าได้
+-- ใช้โดย MenuService.get_menu_version / get_menu_changes
+-- ============================================================
+
+CREATE TABLE IF NOT EXISTS public.menu_versions (
+    restaurant_id UUID PRIMARY KEY REFERENCES restaurants(id) ON DELETE CASCADE,
+    version BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS public.menu_tombstones (
+    restaurant_id UUID NOT NULL REFERENCES restaurants(id) ON DELETE CASCADE,
+    menu_id UUID NOT NULL,
+    menu_version BIGINT NOT NULL,
+    deleted_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    PRIMARY KEY (restaurant_id, menu_version)
+);
+
+ALTER TABLE public.menus ADD COLUMN IF NOT EXISTS menu_version BIGINT NOT NULL DEFAULT 0;
+
+CREATE INDEX IF NOT EXISTS idx_menus_restaurant_version ON public.menus(restaurant_id, menu_version);
+
+ALTER TABLE public.menu_versions ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.menu_tombstones ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Service role can manage menu versions" ON public.menu_versions;
+CREATE POLICY "Service role can manage menu versions"
+    ON public.menu_versions FOR ALL
+    TO service_role
+    USING (true)
+    WITH CHECK (true);
+
+DROP POLICY IF EXISTS "Service role can manage menu tombstones" ON public.menu_tombstones;
+CREATE POLICY "Service role can manage menu tombstones"
+    ON public.menu_tombstones FOR ALL
+    TO service_role
+    USING (true)
+    WITH CHECK (true);
+
+-- ============================================================
+-- Backfill: existing rows start at version 1
+-- ============================================================
+
+UPDATE public.menus SET menu_version = 1 WHERE menu_version = 0;
+
+INSERT INTO public.menu_versions (restaurant_id, version)
+SELECT DISTINCT restaurant_id, 1 FROM public.menus WHERE restaurant_id IS NOT NULL
+ON CONFLICT (restaurant_id) DO NOTHING;
+
+-- ============================================================
+-- Version bump
+-- ============================================================
+
+CREATE OR REPLACE FUNCTION public.next_menu_version(p_restaurant_id UUID)
+RETURNS BIGINT
+LANGUAGE sql
+AS $$
+    INSERT INTO public.menu_versions AS v (restaurant_id, version)
+    VALUES (p_restaurant_id, 1)
+    ON CONFLICT (restaurant_id) DO UPDATE SET
+        version = v.version + 1,
+        updated_at = NOW()
+    RETURNING version;
+$$;
+
+CREATE OR REPLACE FUNCTION public.menu_version_trigger()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        -- Restaurant hard delete cascading to its menus: nothing left to sync
+        -- (and menu_tombstones / menu_versions rows would violate the FK)
+        IF NOT EXISTS (SELECT 1 FROM public.restaurants WHERE id = OLD.restaurant_id) THEN
+            RETURN OLD;
+        END IF;
+        INSERT INTO public.menu_tombstones (restaurant_id, menu_id, menu_version)
+        VALUES (OLD.restaurant_id, OLD.id, public.next_menu_version(OLD.restaurant_id));
+        RETURN OLD;
+    END IF;
+
+    IF TG_OP = 'UPDATE' AND NEW.restaurant_id IS DISTINCT FROM OLD.restaurant_id THEN
+        -- Moved to another restaurant: deleted from the old menu
+        INSERT INTO public.menu_tombstones (restaurant_id, menu_id, menu_version)
+        VALUES (OLD.restaurant_id, OLD.id, public.next_menu_version(OLD.restaurant_id));
+    END IF;
+
+    NEW.menu_version := public.next_menu_version(NEW.restaurant_id);
+    RETURN NEW;
+END;
+$$;
+
+-- Separate triggers so no-op UPDATEs (same values re-saved) do not bump the version
+DROP TRIGGER IF EXISTS menu_version_trigger ON public.menus;
+CREATE TRIGGER menu_version_trigger
+    BEFORE INSERT OR DELETE
+    ON public.menus
+    FOR EACH ROW
+    EXECUTE FUNCTION public.menu_version_trigger();
+
+DROP TRIGGER IF EXISTS menu_version_update_trigger ON public.menus;
+CREATE TRIGGER menu_version_update_trigger
+    BEFORE UPDATE
+    ON public.menus
+    FOR EACH ROW
+    WHEN (OLD IS DISTINCT FROM NEW)
+    EXECUTE FUNCTION public.menu_version_trigger();
+
+-- ============================================================
+-- Verification Queries
+-- ============================================================
+-- SELECT * FROM public.menu_versions WHERE restaurant_id = '<uuid>';
+-- SELECT id, menu_version, is_active FROM public.menus
+--   WHERE restaurant_id = '<uuid>' AND menu_version > 0 ORDER BY menu_version;
@@ -0,0 +1,260 @@
+-- ============================================================
+-- Migration: Order Revenue Rollups (daily + hourly)
+-- ============================================================
+-- ตารางสรุปยอดขายรายวัน / รายชั่วโมงต่อร้าน
+-- อัปเดตแบบ incremental ทุกครั้งที่ order ถูก insert / update / delete (trigger)
+-- /api/analytics/revenue และ /api/analytics/trends อ่านจากตารางนี้แทนการดึง orders ทั้งหมด
+--
+-- นับเฉพาะออเดอร์ที่ status IN ('completed', 'ready', 'preparing')
+-- (เงื่อนไขเดียวกับ AnalyticsService เดิม) วัน/ชั่วโมงเป็น UTC
+--
+-- Backfill: SELECT public.rebuild_order_rollups(NULL, '2024-01-01', CURRENT_DATE);
+--   หรือ python scripts/backfill_order_rollups.py
+-- ============================================================
+
+CREATE TABLE IF NOT EXISTS public.order_rollups_daily (
+    restaurant_id UUID NOT NULL REFERENCES restaurants(id) ON DELETE CASCADE,
+    day DATE NOT NULL,
+
+    order_count INTEGER NOT NULL DEFAULT 0,
+    revenue DECIMAL(12,2) NOT NULL DEFAULT 0,
+
+    -- Service type split
+    dine_in_orders INTEGER NOT NULL DEFAULT 0,
+    dine_in_revenue DECIMAL(12,2) NOT NULL DEFAULT 0,
+    pickup_orders INTEGER NOT NULL DEFAULT 0,
+    pickup_revenue DECIMAL(12,2) NOT NULL DEFAULT 0,
+    delivery_orders INTEGER NOT NULL DEFAULT 0,
+    delivery_revenue DECIMAL(12,2) NOT NULL DEFAULT 0,
+
+    -- Payment method split
+    card_orders INTEGER NOT NULL DEFAULT 0,
+    card_revenue DECIMAL(12,2) NOT NULL DEFAULT 0,
+    bank_transfer_orders INTEGER NOT NULL DEFAULT 0,
+    bank_transfer_revenue DECIMAL(12,2) NOT NULL DEFAULT 0,
+    cash_orders INTEGER NOT NULL DEFAULT 0,
+    cash_revenue DECIMAL(12,2) NOT NULL DEFAULT 0,
+    other_payment_orders INTEGER NOT NULL DEFAULT 0,
+    other_payment_revenue DECIMAL(12,2) NOT NULL DEFAULT 0,
+
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    PRIMARY KEY (restaurant_id, day)
+);
+
+CREATE TABLE IF NOT EXISTS public.order_rollups_hourly (
+    restaurant_id UUID NOT NULL REFERENCES restaurants(id) ON DELETE CASCADE,
+    day DATE NOT NULL,
+    hour SMALLINT NOT NULL CHECK (hour BETWEEN 0 AND 23),
+
+    order_count INTEGER NOT NULL DEFAULT 0,
+    revenue DECIMAL(12,2) NOT NULL DEFAULT 0,
+
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    PRIMARY KEY (restaurant_id, day, hour)
+);
+
+ALTER TABLE public.order_rollups_daily ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.order_rollups_hourly ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Service role can manage daily rollups" ON public.order_rollups_daily;
+CREATE POLICY "Service role can manage daily rollups"
+    ON public.order_rollups_daily FOR ALL
+    TO service_role
+    USING (true)
+    WITH CHECK (true);
+
+DROP POLICY IF EXISTS "Service role can manage hourly rollups" ON public.order_rollups_hourly;
+CREATE POLICY "Service role can manage hourly rollups"
+    ON public.order_rollups_hourly FOR ALL
+    TO service_role
+    USING (true)
+    WITH CHECK (true);
+
+-- ============================================================
+-- Incremental maintenance
+-- ============================================================
+
+-- Add (p_sign = 1) or remove (p_sign = -1) one order's contribution
+CREATE OR REPLACE FUNCTION public.apply_order_rollup_delta(
+    p_restaurant_id UUID,
+    p_created_at TIMESTAMP WITH TIME ZONE,
+    p_total_price DECIMAL,
+    p_service_type TEXT,
+    p_payment_method TEXT,
+    p_sign INTEGER
+)
+RETURNS VOID
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_day DATE := (p_created_at AT TIME ZONE 'UTC')::date;
+    v_hour SMALLINT := EXTRACT(HOUR FROM p_created_at AT TIME ZONE 'UTC')::smallint;
+    v_amount DECIMAL := COALESCE(p_total_price, 0) * p_sign;
+    v_service TEXT := COALESCE(p_service_type, 'dine_in');
+    v_method TEXT := CASE
+        WHEN p_payment_method IN ('card', 'bank_transfer') THEN p_payment_method
+        WHEN p_payment_method IN ('cash', 'cash_at_counter') THEN 'cash'
+        ELSE 'other'
+    END;
+BEGIN
+    INSERT INTO public.order_rollups_daily AS r (
+        restaurant_id, day, order_count, revenue,
+        dine_in_orders, dine_in_revenue, pickup_orders, pickup_revenue, delivery_orders, delivery_revenue,
+        card_orders, card_revenue, bank_transfer_orders, bank_transfer_revenue,
+        cash_orders, cash_revenue, other_payment_orders, other_payment_revenue
+    ) VALUES (
+        p_restaurant_id, v_day, p_sign, v_amount,
+        CASE WHEN v_service = 'dine_in' THEN p_sign ELSE 0 END, CASE WHEN v_service = 'dine_in' THEN v_amount ELSE 0 END,
+        CASE WHEN v_service = 'pickup' THEN p_sign ELSE 0 END, CASE WHEN v_service = 'pickup' THEN v_amount ELSE 0 END,
+        CASE WHEN v_service = 'delivery' THEN p_sign ELSE 0 END, CASE WHEN v_service = 'delivery' THEN v_amount ELSE 0 END,
+        CASE WHEN v_method = 'card' THEN p_sign ELSE 0 END, CASE WHEN v_method = 'card' THEN v_amount ELSE 0 END,
+        CASE WHEN v_method = 'bank_transfer' THEN p_sign ELSE 0 END, CASE WHEN v_method = 'bank_transfer' THEN v_amount ELSE 0 END,
+        CASE WHEN v_method = 'cash' THEN p_sign ELSE 0 END, CASE WHEN v_method = 'cash' THEN v_amount ELSE 0 END,
+        CASE WHEN v_method = 'other' THEN p_sign ELSE 0 END, CASE WHEN v_method = 'other' THEN v_amount ELSE 0 END
+    )
+    ON CONFLICT (restaurant_id, day) DO UPDATE SET
+        order_count = r.order_count + EXCLUDED.order_count,
+        revenue = r.revenue + EXCLUDED.revenue,
+        dine_in_orders = r.dine_in_orders + EXCLUDED.dine_in_orders,
+        dine_in_revenue = r.dine_in_revenue + EXCLUDED.dine_in_revenue,
+        pickup_orders = r.pickup_orders + EXCLUDED.pickup_orders,
+        pickup_revenue = r.pickup_revenue + EXCLUDED.pickup_revenue,
+        delivery_orders = r.delivery_orders + EXCLUDED.delivery_orders,
+        delivery_revenue = r.delivery_revenue + EXCLUDED.delivery_revenue,
+        card_orders = r.card_orders + EXCLUDED.card_orders,
+        card_revenue = r.card_revenue + EXCLUDED.card_revenue,
+        bank_transfer_orders = r.bank_transfer_orders + EXCLUDED.bank_transfer_orders,
+        bank_transfer_revenue = r.bank_transfer_revenue + EXCLUDED.bank_transfer_revenue,
+        cash_orders = r.cash_orders + EXCLUDED.cash_orders,
+        cash_revenue = r.cash_revenue + EXCLUDED.cash_revenue,
+        other_payment_orders = r.other_payment_orders + EXCLUDED.other_payment_orders,
+        other_payment_revenue = r.other_payment_revenue + EXCLUDED.other_payment_revenue,
+        updated_at = NOW();
+
+    INSERT INTO public.order_rollups_hourly AS h (restaurant_id, day, hour, order_count, revenue)
+    VALUES (p_restaurant_id, v_day, v_hour, p_sign, v_amount)
+    ON CONFLICT (restaurant_id, day, hour) DO UPDATE SET
+        order_count = h.order_count + EXCLUDED.order_count,
+        revenue = h.revenue + EXCLUDED.revenue,
+        updated_at = NOW();
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION public.order_rollups_trigger()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    -- Remove the old contribution
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.status IN ('completed', 'ready', 'preparing') THEN
+        PERFORM public.apply_order_rollup_delta(
+            OLD.restaurant_id, OLD.created_at, OLD.total_price, OLD.service_type, OLD.payment_method, -1
+        );
+    END IF;
+
+    -- Add the new contribution
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.status IN ('completed', 'ready', 'preparing') THEN
+        PERFORM public.apply_order_rollup_delta(
+            NEW.restaurant_id, NEW.created_at, NEW.total_price, NEW.service_type, NEW.payment_method, 1
+        );
+    END IF;
+
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS order_rollups_trigger ON public.orders;
+CREATE TRIGGER order_rollups_trigger
+    AFTER INSERT OR DELETE OR UPDATE OF status, total_price, service_type, payment_method, created_at, restaurant_id
+    ON public.orders
+    FOR EACH ROW
+    EXECUTE FUNCTION public.order_rollups_trigger();
+
+-- ============================================================
+-- Backfill / rebuild (batch)
+-- ============================================================
+
+-- Recompute rollups from orders for one restaurant (or all when NULL) and a day range
+CREATE OR REPLACE FUNCTION public.rebuild_order_rollups(
+    p_restaurant_id UUID DEFAULT NULL,
+    p_start DATE DEFAULT NULL,
+    p_end DATE DEFAULT NULL
+)
+RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_rows INTEGER;
+BEGIN
+    DELETE FROM public.order_rollups_daily
+    WHERE (p_restaurant_id IS NULL OR restaurant_id = p_restaurant_id)
+      AND (p_start IS NULL OR day >= p_start)
+      AND (p_end IS NULL OR day <= p_end);
+
+    DELETE FROM public.order_rollups_hourly
+    WHERE (p_restaurant_id IS NULL OR restaurant_id = p_restaurant_id)
+      AND (p_start IS NULL OR day >= p_start)
+      AND (p_end IS NULL OR day <= p_end);
+
+    WITH src AS (
+        SELECT
+            restaurant_id,
+            (created_at AT TIME ZONE 'UTC')::date AS day,
+            COALESCE(total_price, 0) AS amount,
+            COALESCE(service_type, 'dine_in') AS service,
+            CASE
+                WHEN payment_method IN ('card', 'bank_transfer') THEN payment_method
+                WHEN payment_method IN ('cash', 'cash_at_counter') THEN 'cash'
+                ELSE 'other'
+            END AS method
+        FROM public.orders
+        WHERE status IN ('completed', 'ready', 'preparing')
+          AND (p_restaurant_id IS NULL OR restaurant_id = p_restaurant_id)
+          AND (p_start IS NULL OR (created_at AT TIME ZONE 'UTC')::date >= p_start)
+          AND (p_end IS NULL OR (created_at AT TIME ZONE 'UTC')::date <= p_end)
+    )
+    INSERT INTO public.order_rollups_daily (
+        restaurant_id, day, order_count, revenue,
+        dine_in_orders, dine_in_revenue, pickup_orders, pickup_revenue, delivery_orders, delivery_revenue,
+        card_orders, card_revenue, bank_transfer_orders, bank_transfer_revenue,
+        cash_orders, cash_revenue, other_payment_orders, other_payment_revenue
+    )
+    SELECT
+        restaurant_id, day, COUNT(*), SUM(amount),
+        COUNT(*) FILTER (WHERE service = 'dine_in'), COALESCE(SUM(amount) FILTER (WHERE service = 'dine_in'), 0),
+        COUNT(*) FILTER (WHERE service = 'pickup'), COALESCE(SUM(amount) FILTER (WHERE service = 'pickup'), 0),
+        COUNT(*) FILTER (WHERE service = 'delivery'), COALESCE(SUM(amount) FILTER (WHERE service = 'delivery'), 0),
+        COUNT(*) FILTER (WHERE method = 'card'), COALESCE(SUM(amount) FILTER (WHERE method = 'card'), 0),
+        COUNT(*) FILTER (WHERE method = 'bank_transfer'), COALESCE(SUM(amount) FILTER (WHERE method = 'bank_transfer'), 0),
+        COUNT(*) FILTER (WHERE method = 'cash'), COALESCE(SUM(amount) FILTER (WHERE method = 'cash'), 0),
+        COUNT(*) FILTER (WHERE method = 'other'), COALESCE(SUM(amount) FILTER (WHERE method = 'other'), 0)
+    FROM src
+    GROUP BY restaurant_id, day;
+
+    GET DIAGNOSTICS v_rows = ROW_COUNT;
+
+    INSERT INTO public.order_rollups_hourly (restaurant_id, day, hour, order_count, revenue)
+    SELECT
+        restaurant_id,
+        (created_at AT TIME ZONE 'UTC')::date,
+        EXTRACT(HOUR FROM created_at AT TIME ZONE 'UTC')::smallint,
+        COUNT(*),
+        COALESCE(SUM(total_price), 0)
+    FROM public.orders
+    WHERE status IN ('completed', 'ready', 'preparing')
+      AND (p_restaurant_id IS NULL OR restaurant_id = p_restaurant_id)
+      AND (p_start IS NULL OR (created_at AT TIME ZONE 'UTC')::date >= p_start)
+      AND (p_end IS NULL OR (created_at AT TIME ZONE 'UTC')::date <= p_end)
+    GROUP BY 1, 2, 3;
+
+    RETURN v_rows;
+END;
+$$;
+
+GRANT EXECUTE ON FUNCTION public.rebuild_order_rollups(UUID, DATE, DATE) TO service_role;
+
+-- ============================================================
+-- Verification Queries
+-- ============================================================
+-- SELECT * FROM public.order_rollups_daily WHERE restaurant_id = '<uuid>' ORDER BY day DESC LIMIT 30;
+-- SELECT hour, SUM(order_count) FROM public.order_rollups_hourly WHERE restaurant_id = '<uuid>' GROUP BY hour ORDER BY hour;
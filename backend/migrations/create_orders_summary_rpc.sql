@@ -0,0 +1,75 @@
+-- ============================================================
+-- Migration: Orders Summary Aggregates RPC
+-- ============================================================
+-- คำนวณสรุปยอดออเดอร์ใน Postgres แล้วส่งกลับเฉพาะตัวเลขสรุป
+-- ใช้โดย OrdersService.get_orders_summary(include_orders=False)
+-- Shape ของ JSON ตรงกับ services/order_aggregation.py (to_summary)
+-- ============================================================
+
+CREATE OR REPLACE FUNCTION public.get_orders_summary_aggregates(
+    p_restaurant_id UUID,
+    p_start TIMESTAMP WITH TIME ZONE DEFAULT NULL,
+    p_end TIMESTAMP WITH TIME ZONE DEFAULT NULL,
+    p_payment_status TEXT DEFAULT NULL,
+    p_service_type TEXT DEFAULT NULL
+)
+RETURNS JSONB
+LANGUAGE sql
+STABLE
+AS $$
+    WITH filtered AS (
+        SELECT
+            COALESCE(total_price, 0) AS total_price,
+            COALESCE(tax, 0) AS tax,
+            payment_status,
+            payment_method,
+            service_type,
+            (COALESCE(is_voided, FALSE) OR status = 'voided') AS voided
+        FROM public.orders
+        WHERE restaurant_id = p_restaurant_id
+          AND (p_start IS NULL OR created_at >= p_start)
+          AND (p_end IS NULL OR created_at <= p_end)
+          AND (p_payment_status IS NULL OR payment_status = p_payment_status)
+          AND (p_service_type IS NULL OR service_type = p_service_type)
+    )
+    SELECT jsonb_build_object(
+        'total_orders', COUNT(*),
+        'total_revenue', COALESCE(SUM(total_price) FILTER (WHERE payment_status = 'paid'), 0),
+        'total_tax', COALESCE(SUM(tax) FILTER (WHERE payment_status = 'paid' AND NOT voided), 0),
+        'payment_status', jsonb_build_object(
+            'paid', COUNT(*) FILTER (WHERE payment_status = 'paid'),
+            'pending', COUNT(*) FILTER (WHERE payment_status = 'pending'),
+            'failed', COUNT(*) FILTER (WHERE payment_status = 'failed')
+        ),
+        'service_type', jsonb_build_object(
+            'dine_in', COUNT(*) FILTER (WHERE service_type = 'dine_in'),
+            'pickup', COUNT(*) FILTER (WHERE service_type = 'pickup'),
+            'delivery', COUNT(*) FILTER (WHERE service_type = 'delivery')
+        ),
+        'payment_method', jsonb_build_object(
+            'card', jsonb_build_object(
+                'count', COUNT(*) FILTER (WHERE payment_method = 'card' AND NOT voided),
+                'revenue', COALESCE(SUM(total_price) FILTER (WHERE payment_method = 'card' AND payment_status = 'paid'), 0)
+            ),
+            'bank_transfer', jsonb_build_object(
+                'count', COUNT(*) FILTER (WHERE payment_method = 'bank_transfer' AND NOT voided),
+                'revenue', COALESCE(SUM(total_price) FILTER (WHERE payment_method = 'bank_transfer' AND payment_status = 'paid'), 0)
+            ),
+            'cash', jsonb_build_object(
+                'count', COUNT(*) FILTER (WHERE payment_method = 'cash' AND NOT voided),
+                'revenue', COALESCE(SUM(total_price) FILTER (WHERE payment_method = 'cash' AND payment_status = 'paid'), 0)
+            )
+        )
+    )
+    FROM filtered;
+$$;
+
+-- Index for restaurant + date range scans
+CREATE INDEX IF NOT EXISTS idx_orders_restaurant_created_at ON public.orders(restaurant_id, created_at DESC);
+
+GRANT EXECUTE ON FUNCTION public.get_orders_summary_aggregates(UUID, TIMESTAMP WITH TIME ZONE, TIMESTAMP WITH TIME ZONE, TEXT, TEXT) TO service_role;
+
+-- ============================================================
+-- Verification Queries
+-- ============================================================
+-- SELECT public.get_orders_summary_aggregates('<restaurant-uuid>'::uuid);
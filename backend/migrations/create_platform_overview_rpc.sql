@@ -0,0 +1,93 @@
+-- ============================================================
+-- Migration: Platform Overview Aggregates RPC
+-- ============================================================
+-- คำนวณตัวเลขหน้า Admin Overview ใน Postgres ด้วย COUNT / SUM / GROUP BY
+-- ส่งกลับ JSON ก้อนเดียว ไม่ต้องโหลดออเดอร์ / ผู้ใช้ทั้งหมดมานับใน Python
+-- ใช้โดย AdminService.get_platform_overview (cache + background refresher)
+-- Shape ของ JSON ตรงกับ "stats" ของ /api/admin/overview
+-- ============================================================
+
+CREATE OR REPLACE FUNCTION public.get_platform_overview_stats(
+    p_today_start TIMESTAMP WITH TIME ZONE,
+    p_week_ago TIMESTAMP WITH TIME ZONE
+)
+RETURNS JSONB
+LANGUAGE sql
+STABLE
+AS $$
+    WITH order_stats AS (
+        SELECT
+            COUNT(*) AS total_orders,
+            COALESCE(SUM(total_price) FILTER (WHERE payment_status = 'paid'), 0) AS total_revenue,
+            COALESCE(SUM(total_price) FILTER (WHERE payment_status = 'pending'), 0) AS pending_revenue,
+            COUNT(*) FILTER (WHERE created_at >= p_today_start) AS today_orders,
+            COALESCE(SUM(total_price) FILTER (WHERE created_at >= p_today_start AND payment_status = 'paid'), 0) AS today_revenue
+        FROM public.orders
+    ),
+    order_status AS (
+        SELECT COALESCE(jsonb_object_agg(status, n), '{}'::jsonb) AS distribution
+        FROM (
+            SELECT COALESCE(status, 'unknown') AS status, COUNT(*) AS n
+            FROM public.orders
+            GROUP BY 1
+        ) s
+    ),
+    user_stats AS (
+        SELECT
+            COUNT(*) AS total_users,
+            COUNT(*) FILTER (WHERE created_at >= p_week_ago) AS new_users_this_week
+        FROM public.user_profiles
+    ),
+    roles AS (
+        SELECT COALESCE(jsonb_object_agg(role, n), '{}'::jsonb) AS distribution
+        FROM (
+            SELECT COALESCE(role, 'free_trial') AS role, COUNT(*) AS n
+            FROM public.user_profiles
+            GROUP BY 1
+        ) r
+    ),
+    subscriptions AS (
+        SELECT COALESCE(jsonb_object_agg(subscription_status, n), '{}'::jsonb) AS distribution
+        FROM (
+            SELECT COALESCE(subscription_status, 'trial') AS subscription_status, COUNT(*) AS n
+            FROM public.user_profiles
+            GROUP BY 1
+        ) s
+    ),
+    plans AS (
+        SELECT COALESCE(jsonb_object_agg(plan, n), '{}'::jsonb) AS distribution
+        FROM (
+            SELECT COALESCE(plan, 'free_trial') AS plan, COUNT(*) AS n
+            FROM public.user_profiles
+            GROUP BY 1
+        ) p
+    )
+    SELECT jsonb_build_object(
+        'total_users', u.total_users,
+        'total_restaurants', (SELECT COUNT(*) FROM public.restaurants),
+        'total_orders', o.total_orders,
+        'total_menus', (SELECT COUNT(*) FROM public.menus),
+        'total_revenue', ROUND(o.total_revenue::numeric, 2),
+        'pending_revenue', ROUND(o.pending_revenue::numeric, 2),
+        'today_orders', o.today_orders,
+        'today_revenue', ROUND(o.today_revenue::numeric, 2),
+        'new_users_this_week', u.new_users_this_week,
+        'role_distribution', roles.distribution,
+        'subscription_distribution', subscriptions.distribution,
+        'plan_distribution', plans.distribution,
+        'order_status_distribution', order_status.distribution
+    )
+    FROM order_stats o, user_stats u, roles, subscriptions, plans, order_status;
+$$;
+
+-- Indexes for the FILTER / GROUP BY scans
+CREATE INDEX IF NOT EXISTS idx_orders_created_at ON public.orders(created_at);
+CREATE INDEX IF NOT EXISTS idx_orders_status ON public.orders(status);
+CREATE INDEX IF NOT EXISTS idx_user_profiles_created_at ON public.user_profiles(created_at);
+
+GRANT EXECUTE ON FUNCTION public.get_platform_overview_stats(TIMESTAMP WITH TIME ZONE, TIMESTAMP WITH TIME ZONE) TO service_role;
+
+-- ============================================================
+-- Verification Queries
+-- ============================================================
+-- SELECT public.get_platform_overview_stats(date_trunc('day', NOW()), NOW() - INTERVAL '7 days');
@@ -0,0 +1,56 @@
+-- ============================================================
+-- Migration: Batched Restaurant Stats RPC
+-- ============================================================
+-- สถิติต่อร้าน (จำนวนออเดอร์, ยอดขายที่ชำระแล้ว, จำนวนเมนู, จำนวนพนักงาน)
+-- ของหลายร้านใน call เดียว แทนการนับทีละร้าน (N+1) ในหน้า admin
+-- ใช้โดย services/batch_loader.py (BatchLoader.restaurant_stats)
+-- ============================================================
+
+CREATE OR REPLACE FUNCTION public.get_restaurant_stats(
+    p_restaurant_ids UUID[]
+)
+RETURNS TABLE (
+    restaurant_id UUID,
+    total_orders BIGINT,
+    total_revenue NUMERIC,
+    menu_count BIGINT,
+    staff_count BIGINT
+)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT
+        r.id,
+        COALESCE(o.total_orders, 0),
+        COALESCE(o.total_revenue, 0),
+        COALESCE(m.menu_count, 0),
+        COALESCE(s.staff_count, 0)
+    FROM unnest(p_restaurant_ids) AS r(id)
+    LEFT JOIN (
+        SELECT orders.restaurant_id,
+               COUNT(*) AS total_orders,
+               SUM(total_price) FILTER (WHERE payment_status = 'paid') AS total_revenue
+        FROM public.orders
+        WHERE orders.restaurant_id = ANY(p_restaurant_ids)
+        GROUP BY orders.restaurant_id
+    ) o ON o.restaurant_id = r.id
+    LEFT JOIN (
+        SELECT menus.restaurant_id, COUNT(*) AS menu_count
+        FROM public.menus
+        WHERE menus.restaurant_id = ANY(p_restaurant_ids)
+        GROUP BY menus.restaurant_id
+    ) m ON m.restaurant_id = r.id
+    LEFT JOIN (
+        SELECT staff.restaurant_id, COUNT(*) AS staff_count
+        FROM public.staff
+        WHERE staff.restaurant_id = ANY(p_restaurant_ids)
+        GROUP BY staff.restaurant_id
+    ) s ON s.restaurant_id = r.id;
+$$;
+
+GRANT EXECUTE ON FUNCTION public.get_restaurant_stats(UUID[]) TO service_role;
+
+-- ============================================================
+-- Verification Queries
+-- ============================================================
+-- SELECT * FROM public.get_restaurant_stats(ARRAY['<uuid>'::uuid]);
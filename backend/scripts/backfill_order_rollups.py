@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Backfill Order Rollups - สร้างตาราง order_rollups_daily / order_rollups_hourly
+และ menu_item_sales_daily ใหม่จาก orders
+
+ใช้หลังจากรัน migrations/create_order_rollups.sql / create_menu_item_sales.sql ครั้งแรก
+หรือเมื่อต้องการ rebuild ช่วงวันที่ข้อมูลถูกแก้ไขโดยตรงใน database
+
+Usage:
+    python scripts/backfill_order_rollups.py                      # ทุกร้าน ทุกวัน
+    python scripts/backfill_order_rollups.py --days 90            # ทุกร้าน 90 วันล่าสุด
+    python scripts/backfill_order_rollups.py --restaurant <uuid> --start 2024-01-01 --end 2024-12-31
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import date, timedelta
+from dotenv import load_dotenv
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Load environment variables
+load_dotenv(dotenv_path=os.path.join(os.path.dirname(os.path.dirname(__file__)), '.env'))
+
+from services.rollup_service import rollup_service
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild order revenue rollups from the orders table")
+    parser.add_argument('--restaurant', help='Restaurant ID (default: all restaurants)')
+    parser.add_argument('--start', type=date.fromisoformat, help='First day (YYYY-MM-DD)')
+    parser.add_argument('--end', type=date.fromisoformat, help='Last day (YYYY-MM-DD, default: today)')
+    parser.add_argument('--days', type=int, help='Rebuild the last N days (overrides --start)')
+    args = parser.parse_args()
+
+    end_day = args.end or date.today()
+    start_day = end_day - timedelta(days=args.days) if args.days else args.start
+
+    print(f"🔄 Rebuilding rollups: restaurant={args.restaurant or 'ALL'}, "
+          f"range={start_day or 'beginning'} → {end_day}")
+
+    started = time.time()
+    result = rollup_service.rebuild(args.restaurant, start_day, end_day)
+
+    if not result.get('success'):
+        print(f"❌ Backfill failed: {result.get('error')}")
+        sys.exit(1)
+
+    print(f"✅ Backfill complete: {result['daily_rows']} daily rows, {result['item_rows']} item rows, "
+          f"{result['demand_rows']} demand rows "
+          f"in {result['chunks']} chunk(s) "
+          f"({time.time() - started:.1f}s)")
+
+
+if __name__ == '__main__':
+    main()
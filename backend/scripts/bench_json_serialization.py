@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Benchmark: JSON response serialization (representative API payloads)
+
+เปรียบเทียบ
+- FastAPI default: jsonable_encoder + JSONResponse (stdlib json)
+- jsonable_encoder + FastJSONResponse (orjson)
+- json_response() (orjson, ไม่ผ่าน jsonable_encoder)
+
+Payloads: public menu, orders list (items JSONB), admin users list, analytics daily series
+
+Usage:
+    python scripts/bench_json_serialization.py [--scale 1] [--repeat 20]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from services.json_response import FastJSONResponse, ORJSON_AVAILABLE, json_response
+
+NAMES = ['ผัดไทย', 'ต้มยำกุ้ง', 'แกงเขียวหวาน', 'Pad See Ew', 'Massaman Curry', '炒饭', 'ラーメン', 'Spring Rolls']
+CATEGORIES = ['Noodles', 'Curry', 'Soup', 'Starters', 'Drinks', 'Desserts']
+
+
+def _timestamp(rng: random.Random) -> str:
+    at = datetime(2026, 1, 1, tzinfo=timezone.utc) + timedelta(minutes=rng.randint(0, 400_000))
+    return at.isoformat()
+
+
+def make_public_menu(rng: random.Random, count: int):
+    items = []
+    for index in range(count):
+        name = rng.choice(NAMES)
+        category = rng.choice(CATEGORIES)
+        items.append({
+            "menu_id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "name": name,
+            "nameEn": name,
+            "description": f"{name} with jasmine rice and fresh herbs " * 2,
+            "descriptionEn": f"{name} with jasmine rice and fresh herbs " * 2,
+            "price": str(round(rng.uniform(6, 32), 2)),
+            "photo_url": f"https://cdn.example.com/menus/{index}.webp",
+            "image_url": f"https://cdn.example.com/menus/{index}.webp",
+            "category": category,
+            "categoryEn": category,
+            "menu_type": "food",
+            "meats": [{"name": m, "price": rng.choice([0, 2, 4])} for m in ('Chicken', 'Beef', 'Prawn')],
+            "addOns": [{"name": "Egg", "price": 2}],
+            "is_active": True,
+            "is_featured": rng.random() < 0.1,
+            "is_best_seller": rng.random() < 0.05,
+            "created_at": _timestamp(rng),
+            "updated_at": _timestamp(rng),
+            "restaurant_id": "5b0e4a52-43f3-4a39-9b6f-0c1d2e3f4a5b",
+            "sort_order": index,
+            "version": index + 1,
+        })
+    return {
+        "success": True,
+        "restaurant": {"id": "5b0e4a52-43f3-4a39-9b6f-0c1d2e3f4a5b", "name": "Bangkok Kitchen", "slug": "bangkok-kitchen"},
+        "branding": {"theme_color": "#c0392b", "menu_template": "grid", "primary_language": "en"},
+        "menu_items": items,
+        "count": len(items),
+    }
+
+
+def make_orders(rng: random.Random, count: int):
+    orders = []
+    for _ in range(count):
+        items = [
+            {"menu_id": str(uuid.UUID(int=rng.getrandbits(128))), "name": rng.choice(NAMES),
+             "quantity": rng.randint(1, 3), "price": round(rng.uniform(6, 32), 2),
+             "options": {"meat": "Chicken", "spice": rng.randint(0, 4)}}
+            for _ in range(rng.randint(1, 6))
+        ]
+        total = round(sum(i["price"] * i["quantity"] for i in items), 2)
+        orders.append({
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "order_number": rng.randint(1000, 99999),
+            "status": rng.choice(['pending', 'preparing', 'ready', 'completed']),
+            "payment_status": rng.choice(['paid', 'pending']),
+            "payment_method": rng.choice(['card', 'cash', 'bank_transfer']),
+            "service_type": rng.choice(['dine_in', 'pickup', 'delivery']),
+            "table_number": str(rng.randint(1, 30)),
+            "items": items,
+            "total_price": total,
+            "tax": round(total * 3 / 23, 2),
+            "created_at": _timestamp(rng),
+            "updated_at": _timestamp(rng),
+        })
+    return {"success": True, "count": len(orders), "orders": orders}
+
+
+def make_admin_users(rng: random.Random, count: int):
+    users = [
+        {
+            "user_id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "email": f"owner{index}@example.co.nz",
+            "role": rng.choice(['free_trial', 'pro', 'premium', 'enterprise']),
+            "subscription_status": rng.choice(['trial', 'active', 'cancelled']),
+            "created_at": _timestamp(rng),
+            "restaurants": [{"id": str(uuid.UUID(int=rng.getrandbits(128))), "name": f"Restaurant {index}"}],
+            "stats": {"total_orders": rng.randint(0, 5000), "total_revenue": round(rng.uniform(0, 90000), 2),
+                      "menu_count": rng.randint(0, 200), "staff_count": rng.randint(0, 20)},
+        }
+        for index in range(count)
+    ]
+    return {"users": users, "total": count * 10, "page": 1, "limit": count}
+
+
+def make_analytics(rng: random.Random, days: int):
+    start = datetime(2026, 1, 1).date()
+    return {
+        "total_revenue": 123456.78,
+        "daily_revenue": [
+            {"date": (start + timedelta(days=d)).isoformat(), "revenue": round(rng.uniform(500, 4000), 2),
+             "orders": rng.randint(20, 200)}
+            for d in range(days)
+        ],
+        "heatmap": {"orders": [[rng.randint(0, 40) for _ in range(24)] for _ in range(7)],
+                    "revenue": [[round(rng.uniform(0, 900), 2) for _ in range(24)] for _ in range(7)]},
+    }
+
+
+def default_render(payload) -> bytes:
+    return JSONResponse(jsonable_encoder(payload)).body
+
+
+def orjson_render(payload) -> bytes:
+    return FastJSONResponse(jsonable_encoder(payload)).body
+
+
+def direct_render(payload) -> bytes:
+    return json_response(payload).body
+
+
+def best_of(func, payload, repeat: int) -> float:
+    """Return best wall time in milliseconds"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(payload)
+        timings.append((time.perf_counter() - started) * 1000)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', type=int, default=1, help='Multiply payload sizes')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    payloads = {
+        f'public menu ({200 * args.scale} items)': make_public_menu(rng, 200 * args.scale),
+        f'orders list ({500 * args.scale} orders)': make_orders(rng, 500 * args.scale),
+        f'admin users ({100 * args.scale} rows)': make_admin_users(rng, 100 * args.scale),
+        f'analytics ({365 * args.scale} days)': make_analytics(rng, 365 * args.scale),
+    }
+
+    if not ORJSON_AVAILABLE:
+        print("⚠️ orjson not installed - FastJSONResponse falls back to stdlib json")
+
+    print("=" * 78)
+    print(f"{'Payload':<30}{'KB':>8}{'default':>11}{'orjson':>11}{'direct':>11}{'speedup':>9}")
+    print("-" * 78)
+    for name, payload in payloads.items():
+        body = default_render(payload)
+        assert json.loads(body) == json.loads(orjson_render(payload)) == json.loads(direct_render(payload)), name
+
+        default_ms = best_of(default_render, payload, args.repeat)
+        orjson_ms = best_of(orjson_render, payload, args.repeat)
+        direct_ms = best_of(direct_render, payload, args.repeat)
+        print(f"{name:<30}{len(body) / 1024:>8.0f}{default_ms:>9.2f}ms{orjson_ms:>9.2f}ms{direct_ms:>9.2f}ms"
+              f"{default_ms / direct_ms:>8.1f}x")
+    print("=" * 78)
+    print("default = jsonable_encoder + stdlib json, orjson = jsonable_encoder + orjson, direct = json_response()")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Orders summary aggregation (100k synthetic orders)
+
+เปรียบเทียบวิธีเดิม (list comprehension / sum() แยกกันทีละ metric)
+กับ OrderSummaryAggregator (single-pass)
+
+Usage:
+    python scripts/bench_order_aggregation.py [--orders 100000] [--repeat 5]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.order_aggregation import summarize_orders
+
+
+def make_orders(count: int, seed: int = 42):
+    """Generate synthetic order rows with the columns used by the summary"""
+    rng = random.Random(seed)
+    orders = []
+    for _ in range(count):
+        total_price = round(rng.uniform(8, 180), 2)
+        orders.append({
+            'total_price': total_price,
+            'tax': round(total_price * 3 / 23, 2),
+            'payment_status': rng.choices(['paid', 'pending', 'failed'], [80, 15, 5])[0],
+            'payment_method': rng.choice(['card', 'bank_transfer', 'cash', 'cash_at_counter']),
+            'service_type': rng.choice(['dine_in', 'pickup', 'delivery']),
+            'status': rng.choice(['completed', 'ready', 'preparing', 'cancelled']),
+            'is_voided': rng.random() < 0.02,
+        })
+    return orders
+
+
+def legacy_summary(orders):
+    """Previous multi-scan implementation (kept here for comparison only)"""
+    not_voided = lambda o: not o.get('is_voided') and o.get('status') != 'voided'
+    return {
+        "total_orders": len(orders),
+        "total_revenue": sum(o.get('total_price', 0) or 0 for o in orders if o.get('payment_status') == 'paid'),
+        "total_tax": sum(o.get('tax', 0) or 0 for o in orders if o.get('payment_status') == 'paid' and not_voided(o)),
+        "payment_status": {
+            "paid": len([o for o in orders if o.get('payment_status') == 'paid']),
+            "pending": len([o for o in orders if o.get('payment_status') == 'pending']),
+            "failed": len([o for o in orders if o.get('payment_status') == 'failed']),
+        },
+        "service_type": {
+            "dine_in": len([o for o in orders if o.get('service_type') == 'dine_in']),
+            "pickup": len([o for o in orders if o.get('service_type') == 'pickup']),
+            "delivery": len([o for o in orders if o.get('service_type') == 'delivery']),
+        },
+        "payment_method": {
+            method: {
+                "count": len([o for o in orders if o.get('payment_method') == method and not_voided(o)]),
+                "revenue": sum(o.get('total_price', 0) or 0 for o in orders
+                               if o.get('payment_method') == method and o.get('payment_status') == 'paid'),
+            }
+            for method in ('card', 'bank_transfer', 'cash')
+        },
+    }
+
+
+def best_of(func, orders, repeat: int) -> float:
+    """Return best wall time in milliseconds"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(orders)
+        timings.append((time.perf_counter() - started) * 1000)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--orders', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"🔄 Generating {args.orders:,} synthetic orders...")
+    orders = make_orders(args.orders)
+
+    legacy = legacy_summary(orders)
+    single = summarize_orders(orders)
+    for key in ('total_orders', 'payment_status', 'service_type'):
+        assert legacy[key] == single[key], f"Mismatch in {key}"
+    assert abs(legacy['total_revenue'] - single['total_revenue']) < 0.01
+    assert abs(legacy['total_tax'] - single['total_tax']) < 0.01
+
+    legacy_ms = best_of(legacy_summary, orders, args.repeat)
+    single_ms = best_of(summarize_orders, orders, args.repeat)
+
+    print("=" * 60)
+    print(f"Legacy multi-scan : {legacy_ms:8.1f} ms")
+    print(f"Single-pass       : {single_ms:8.1f} ms")
+    print(f"Speedup           : {legacy_ms / single_ms:8.2f}x")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
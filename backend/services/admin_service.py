@@ -3,14 +3,43 @@ Admin Service - Super Admin Dashboard Functions
 Provides comprehensive admin management for the entire platform
 """
 import os
+import threading
+import time
 from typing import Optional, Dict, Any, List
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta, timezone
 from supabase import create_client, Client
 
+from .order_tracker import order_status_tracker
+from .analytics_cache import analytics_cache, order_day
+from .columnar_analytics import columnar_engine, group_by
+from .batch_loader import BatchLoader
+from .db_errors import is_missing_function
+from .export_stream import (
+    EXPORT_FORMATS, ORDER_EXPORT_COLUMNS, ORDER_EXPORT_DEFAULT_COLUMNS,
+    PAYMENT_EXPORT_COLUMNS, PAYMENT_EXPORT_DEFAULT_COLUMNS,
+    date_range_filter, iter_pages, parse_columns, stream_export
+)
+
 # Supabase configuration
 SUPABASE_URL = os.getenv('SUPABASE_URL') or os.getenv('NEXT_PUBLIC_SUPABASE_URL')
 SUPABASE_KEY = os.getenv('SUPABASE_SERVICE_ROLE_KEY') or os.getenv('SUPABASE_KEY') or os.getenv('NEXT_PUBLIC_SUPABASE_ANON_KEY')
 
+# Platform overview snapshot (migrations/create_platform_overview_rpc.sql)
+OVERVIEW_RPC_NAME = 'get_platform_overview_stats'
+OVERVIEW_REFRESH_SECONDS = 60
+# Reads older than this recompute synchronously (e.g. after the refresher went idle)
+OVERVIEW_MAX_AGE_SECONDS = 300
+# Refresher stops after this long without an overview read
+OVERVIEW_IDLE_STOP_SECONDS = 1800
+
+# Admin reports: projected columns read in keyset pages (export_stream.iter_pages)
+SUBSCRIPTION_REPORT_COLUMNS = ('subscription_status', 'plan', 'payment_method', 'billing_interval')
+SUBSCRIPTION_REPORT_TTL_SECONDS = 120
+REVENUE_REPORT_COLUMNS = ('amount', 'plan', 'payment_method')
+# analytics_cache key for platform-wide (not per-restaurant) daily buckets
+PLATFORM_CACHE_KEY = 'platform'
+REVENUE_CACHE_METRIC = 'payment_logs:completed'
+
 
 class AdminService:
     """
@@ -20,6 +49,12 @@ class AdminService:
 
     def __init__(self):
         self.supabase_client: Optional[Client] = None
+        self._overview_snapshot: Optional[Dict[str, Any]] = None
+        self._overview_last_read = 0.0
+        self._overview_thread: Optional[threading.Thread] = None
+        self._overview_lock = threading.Lock()
+        self._subscription_report: Optional[Dict[str, Any]] = None
+        self._subscription_report_at = 0.0
         if SUPABASE_URL and SUPABASE_KEY:
             try:
                 self.supabase_client = create_client(SUPABASE_URL, SUPABASE_KEY)
@@ -58,10 +93,33 @@ class AdminService:
         except Exception as e:
             print(f"⚠️ Failed to log admin action: {str(e)}")
 
+    def _restaurant_names(self, restaurant_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Restaurant name / slug for a page of rows in one query"""
+        try:
+            return BatchLoader(self.supabase_client).restaurants(restaurant_ids)
+        except Exception as e:
+            print(f"⚠️ Failed to load restaurant names: {str(e)}")
+            return {}
+
+    def _user_profiles(self, user_ids: List[str], columns: str) -> Dict[str, Dict[str, Any]]:
+        """User profiles for a page of rows in one query"""
+        try:
+            return BatchLoader(self.supabase_client).user_profiles(user_ids, columns)
+        except Exception as e:
+            print(f"⚠️ Failed to load user profiles: {str(e)}")
+            return {}
+
     # ==================== OVERVIEW STATS ====================
 
-    def get_platform_overview(self, admin_user_id: str) -> Dict[str, Any]:
-        """Get platform-wide statistics overview"""
+    def get_platform_overview(self, admin_user_id: str, refresh: bool = False) -> Dict[str, Any]:
+        """
+        Get platform-wide statistics overview
+
+        Served from an in-process snapshot kept fresh by a background refresher,
+        so the admin landing page does not scan orders / users on every load.
+        The snapshot is computed by the get_platform_overview_stats RPC
+        (migrations/create_platform_overview_rpc.sql).
+        """
         if not self._is_admin(admin_user_id):
             return {"error": "Access denied. Admin only."}
 
@@ -69,70 +127,162 @@ class AdminService:
             return {"error": "Database not available"}
 
         try:
-            # Get counts
-            users_result = self.supabase_client.table('user_profiles').select('id', count='exact').execute()
-            restaurants_result = self.supabase_client.table('restaurants').select('id', count='exact').execute()
-            orders_result = self.supabase_client.table('orders').select('id', count='exact').execute()
-            menus_result = self.supabase_client.table('menus').select('id', count='exact').execute()
-
-            # Get revenue stats
-            revenue_result = self.supabase_client.table('orders').select('total_price, payment_status').execute()
-            total_revenue = sum(float(o.get('total_price', 0)) for o in revenue_result.data if o.get('payment_status') == 'paid')
-            pending_revenue = sum(float(o.get('total_price', 0)) for o in revenue_result.data if o.get('payment_status') == 'pending')
-
-            # Get role distribution
-            role_result = self.supabase_client.table('user_profiles').select('role, subscription_status, plan').execute()
-            role_distribution = {}
-            subscription_distribution = {}
-            plan_distribution = {}
-            for user in role_result.data:
-                role = user.get('role', 'free_trial')
-                role_distribution[role] = role_distribution.get(role, 0) + 1
-
-                sub_status = user.get('subscription_status', 'trial')
-                subscription_distribution[sub_status] = subscription_distribution.get(sub_status, 0) + 1
+            with self._overview_lock:
+                snapshot = self._overview_snapshot
+                self._overview_last_read = time.monotonic()
 
-                plan = user.get('plan', 'free_trial')
-                plan_distribution[plan] = plan_distribution.get(plan, 0) + 1
+            if refresh or snapshot is None or time.monotonic() - snapshot["computed_at"] > OVERVIEW_MAX_AGE_SECONDS:
+                try:
+                    snapshot = self._refresh_overview()
+                except Exception as e:
+                    if snapshot is None:
+                        raise
+                    print(f"⚠️ Admin Service: Overview refresh failed, serving stale snapshot: {str(e)}")
 
-            # Get orders by status
-            order_status_result = self.supabase_client.table('orders').select('status').execute()
-            order_status_distribution = {}
-            for order in order_status_result.data:
-                status = order.get('status', 'unknown')
-                order_status_distribution[status] = order_status_distribution.get(status, 0) + 1
-
-            # Get today's stats
-            today = datetime.now().strftime('%Y-%m-%d')
-            today_orders_result = self.supabase_client.table('orders').select('id, total_price, payment_status').gte('created_at', f"{today}T00:00:00").execute()
-            today_orders_count = len(today_orders_result.data)
-            today_revenue = sum(float(o.get('total_price', 0)) for o in today_orders_result.data if o.get('payment_status') == 'paid')
-
-            # Get this week's new users
-            week_ago = (datetime.now() - timedelta(days=7)).strftime('%Y-%m-%d')
-            new_users_result = self.supabase_client.table('user_profiles').select('id', count='exact').gte('created_at', f"{week_ago}T00:00:00").execute()
+            self._ensure_overview_refresher()
 
             return {
                 "success": True,
-                "stats": {
-                    "total_users": users_result.count or 0,
-                    "total_restaurants": restaurants_result.count or 0,
-                    "total_orders": orders_result.count or 0,
-                    "total_menus": menus_result.count or 0,
-                    "total_revenue": round(total_revenue, 2),
-                    "pending_revenue": round(pending_revenue, 2),
-                    "today_orders": today_orders_count,
-                    "today_revenue": round(today_revenue, 2),
-                    "new_users_this_week": new_users_result.count or 0,
-                    "role_distribution": role_distribution,
-                    "subscription_distribution": subscription_distribution,
-                    "plan_distribution": plan_distribution,
-                    "order_status_distribution": order_status_distribution
-                }
+                "stats": snapshot["stats"],
+                "generated_at": snapshot["generated_at"]
             }
         except Exception as e:
             return {"error": f"Failed to get overview: {str(e)}"}
 
+    def _refresh_overview(self) -> Dict[str, Any]:
+        """Recompute the overview snapshot (RPC first, table scan fallback)"""
+        stats = self._compute_overview_from_rpc()
+        if stats is None:
+            stats = self._compute_overview_fallback()
+
+        snapshot = {
+            "stats": stats,
+            "generated_at": datetime.now().isoformat(),
+            "computed_at": time.monotonic()
+        }
+        with self._overview_lock:
+            self._overview_snapshot = snapshot
+        return snapshot
+
+    def _compute_overview_from_rpc(self) -> Optional[Dict[str, Any]]:
+        """
+        Count / sum aggregates computed in Postgres
+
+        Returns:
+            Stats dict, or None if the RPC is not installed
+
+        Raises:
+            Exception: any other RPC error (timeout, network) - no table-scan fallback
+        """
+        today = datetime.now().strftime('%Y-%m-%d')
+        week_ago = (datetime.now() - timedelta(days=7)).strftime('%Y-%m-%d')
+        try:
+            result = self.supabase_client.rpc(OVERVIEW_RPC_NAME, {
+                "p_today_start": f"{today}T00:00:00",
+                "p_week_ago": f"{week_ago}T00:00:00",
+            }).execute()
+
+            stats = result.data
+            if isinstance(stats, list):
+                stats = stats[0] if stats else None
+            if not stats:
+                return None
+            for key in ("total_revenue", "pending_revenue", "today_revenue"):
+                stats[key] = round(float(stats.get(key) or 0), 2)
+            return stats
+        except Exception as e:
+            if not is_missing_function(e):
+                raise
+            print(f"⚠️ Admin Service: Overview RPC unavailable, falling back to table scan: {str(e)}")
+            return None
+
+    def _compute_overview_fallback(self) -> Dict[str, Any]:
+        """Scan-based overview (used only when the RPC migration is not installed)"""
+        # Get counts
+        users_result = self.supabase_client.table('user_profiles').select('id', count='exact').execute()
+        restaurants_result = self.supabase_client.table('restaurants').select('id', count='exact').execute()
+        orders_result = self.supabase_client.table('orders').select('id', count='exact').execute()
+        menus_result = self.supabase_client.table('menus').select('id', count='exact').execute()
+
+        # Get revenue stats
+        revenue_result = self.supabase_client.table('orders').select('total_price, payment_status').execute()
+        total_revenue = sum(float(o.get('total_price', 0)) for o in revenue_result.data if o.get('payment_status') == 'paid')
+        pending_revenue = sum(float(o.get('total_price', 0)) for o in revenue_result.data if o.get('payment_status') == 'pending')
+
+        # Get role distribution
+        role_result = self.supabase_client.table('user_profiles').select('role, subscription_status, plan').execute()
+        role_distribution = {}
+        subscription_distribution = {}
+        plan_distribution = {}
+        for user in role_result.data:
+            role = user.get('role', 'free_trial')
+            role_distribution[role] = role_distribution.get(role, 0) + 1
+
+            sub_status = user.get('subscription_status', 'trial')
+            subscription_distribution[sub_status] = subscription_distribution.get(sub_status, 0) + 1
+
+            plan = user.get('plan', 'free_trial')
+            plan_distribution[plan] = plan_distribution.get(plan, 0) + 1
+
+        # Get orders by status
+        order_status_result = self.supabase_client.table('orders').select('status').execute()
+        order_status_distribution = {}
+        for order in order_status_result.data:
+            status = order.get('status', 'unknown')
+            order_status_distribution[status] = order_status_distribution.get(status, 0) + 1
+
+        # Get today's stats
+        today = datetime.now().strftime('%Y-%m-%d')
+        today_orders_result = self.supabase_client.table('orders').select('id, total_price, payment_status').gte('created_at', f"{today}T00:00:00").execute()
+        today_orders_count = len(today_orders_result.data)
+        today_revenue = sum(float(o.get('total_price', 0)) for o in today_orders_result.data if o.get('payment_status') == 'paid')
+
+        # Get this week's new users
+        week_ago = (datetime.now() - timedelta(days=7)).strftime('%Y-%m-%d')
+        new_users_result = self.supabase_client.table('user_profiles').select('id', count='exact').gte('created_at', f"{week_ago}T00:00:00").execute()
+
+        return {
+            "total_users": users_result.count or 0,
+            "total_restaurants": restaurants_result.count or 0,
+            "total_orders": orders_result.count or 0,
+            "total_menus": menus_result.count or 0,
+            "total_revenue": round(total_revenue, 2),
+            "pending_revenue": round(pending_revenue, 2),
+            "today_orders": today_orders_count,
+            "today_revenue": round(today_revenue, 2),
+            "new_users_this_week": new_users_result.count or 0,
+            "role_distribution": role_distribution,
+            "subscription_distribution": subscription_distribution,
+            "plan_distribution": plan_distribution,
+            "order_status_distribution": order_status_distribution
+        }
+
+    def _ensure_overview_refresher(self):
+        """Start the background refresher thread (once, lazily)"""
+        with self._overview_lock:
+            if self._overview_thread and self._overview_thread.is_alive():
+                return
+            self._overview_thread = threading.Thread(
+                target=self._overview_refresh_loop,
+                name="admin-overview-refresher",
+                daemon=True
+            )
+            self._overview_thread.start()
+
+    def _overview_refresh_loop(self):
+        """Refresh the snapshot periodically while the dashboard is being viewed"""
+        while True:
+            time.sleep(OVERVIEW_REFRESH_SECONDS)
+            with self._overview_lock:
+                idle = time.monotonic() - self._overview_last_read
+            if idle > OVERVIEW_IDLE_STOP_SECONDS:
+                # Nobody is looking - stop; the next read restarts the thread
+                return
+            try:
+                self._refresh_overview()
+            except Exception as e:
+                print(f"⚠️ Admin Service: Overview refresh failed: {str(e)}")
+
     # ==================== USERS MANAGEMENT ====================
 
     def get_all_users_detailed(self, admin_user_id: str, page: int = 1, limit: int = 20,
@@ -160,26 +310,23 @@ class AdminService:
             result = query.execute()
             users = result.data or []
 
-            # Enrich with restaurant info
+            # Enrich with restaurant info (batched: restaurants + stats for the whole page)
+            loader = BatchLoader(self.supabase_client)
+            try:
+                owned = loader.load_grouped('restaurants', 'user_id', [u.get('user_id') for u in users], 'id, name, slug, is_active')
+                stats = loader.restaurant_stats(r['id'] for rows in owned.values() for r in rows)
+            except Exception as e:
+                print(f"⚠️ Failed to load restaurants for users: {str(e)}")
+                owned, stats = {}, {}
+
             for user in users:
                 user_id = user.get('user_id')
                 if user_id:
-                    try:
-                        restaurant_result = self.supabase_client.table('restaurants').select('id, name, slug, is_active').eq('user_id', user_id).execute()
-                        user['restaurants'] = restaurant_result.data or []
-                        user['restaurant_count'] = len(restaurant_result.data or [])
-
-                        # Get order count for this user's restaurants
-                        if restaurant_result.data:
-                            rest_ids = [r['id'] for r in restaurant_result.data]
-                            order_count = 0
-                            for rest_id in rest_ids:
-                                order_result = self.supabase_client.table('orders').select('id', count='exact').eq('restaurant_id', rest_id).execute()
-                                order_count += order_result.count or 0
-                            user['total_orders'] = order_count
-                    except:
-                        user['restaurants'] = []
-                        user['restaurant_count'] = 0
+                    restaurants = owned.get(user_id, [])
+                    user['restaurants'] = restaurants
+                    user['restaurant_count'] = len(restaurants)
+                    if restaurants:
+                        user['total_orders'] = sum(stats.get(r['id'], {}).get('total_orders', 0) for r in restaurants)
 
             return {
                 "success": True,
@@ -254,21 +401,12 @@ class AdminService:
             total_menu_items = 0
             total_staff = 0
 
-            for restaurant in user['restaurants']:
-                rest_id = restaurant.get('id')
-                if rest_id:
-                    # Orders
-                    orders_result = self.supabase_client.table('orders').select('id, total_price, payment_status', count='exact').eq('restaurant_id', rest_id).execute()
-                    total_orders += orders_result.count or 0
-                    total_revenue += sum(float(o.get('total_price', 0)) for o in orders_result.data if o.get('payment_status') == 'paid')
-
-                    # Menu items
-                    menu_result = self.supabase_client.table('menus').select('id', count='exact').eq('restaurant_id', rest_id).execute()
-                    total_menu_items += menu_result.count or 0
-
-                    # Staff
-                    staff_result = self.supabase_client.table('staff').select('id', count='exact').eq('restaurant_id', rest_id).execute()
-                    total_staff += staff_result.count or 0
+            stats = BatchLoader(self.supabase_client).restaurant_stats(r.get('id') for r in user['restaurants'])
+            for restaurant_stats in stats.values():
+                total_orders += restaurant_stats['total_orders']
+                total_revenue += restaurant_stats['total_revenue']
+                total_menu_items += restaurant_stats['menu_count']
+                total_staff += restaurant_stats['staff_count']
 
             user['total_orders'] = total_orders
             user['total_revenue'] = round(total_revenue, 2)
@@ -326,36 +464,28 @@ class AdminService:
             result = query.execute()
             restaurants = result.data or []
 
-            # Enrich with owner and stats
+            # Enrich with owner and stats (one owner query + one stats RPC per page)
+            loader = BatchLoader(self.supabase_client)
+            try:
+                owners = loader.user_profiles(r.get('user_id') for r in restaurants)
+            except Exception as e:
+                print(f"⚠️ Failed to load restaurant owners: {str(e)}")
+                owners = {}
+            try:
+                stats = loader.restaurant_stats(r.get('id') for r in restaurants)
+            except Exception as e:
+                print(f"⚠️ Failed to load restaurant stats: {str(e)}")
+                stats = {}
+
             for restaurant in restaurants:
-                user_id = restaurant.get('user_id')
-                restaurant_id = restaurant.get('id')
+                owner = owners.get(restaurant.get('user_id'))
+                if owner:
+                    restaurant['owner_email'] = owner.get('email')
+                    restaurant['owner_role'] = owner.get('role')
 
-                if user_id:
-                    try:
-                        owner_result = self.supabase_client.table('user_profiles').select('email, role').eq('user_id', user_id).execute()
-                        if owner_result.data:
-                            restaurant['owner_email'] = owner_result.data[0].get('email')
-                            restaurant['owner_role'] = owner_result.data[0].get('role')
-                    except:
-                        pass
-
-                if restaurant_id:
-                    try:
-                        # Order stats
-                        order_result = self.supabase_client.table('orders').select('id, total_price, payment_status', count='exact').eq('restaurant_id', restaurant_id).execute()
-                        restaurant['total_orders'] = order_result.count or 0
-                        restaurant['total_revenue'] = sum(float(o.get('total_price', 0)) for o in order_result.data if o.get('payment_status') == 'paid')
-
-                        # Menu count
-                        menu_result = self.supabase_client.table('menus').select('id', count='exact').eq('restaurant_id', restaurant_id).execute()
-                        restaurant['menu_count'] = menu_result.count or 0
-
-                        # Staff count
-                        staff_result = self.supabase_client.table('staff').select('id', count='exact').eq('restaurant_id', restaurant_id).execute()
-                        restaurant['staff_count'] = staff_result.count or 0
-                    except:
-                        pass
+                restaurant_stats = stats.get(restaurant.get('id'))
+                if restaurant_stats:
+                    restaurant.update(restaurant_stats)
 
             return {
                 "success": True,
@@ -425,16 +555,12 @@ class AdminService:
             orders = result.data or []
 
             # Enrich with restaurant name
+            names = self._restaurant_names([o.get('restaurant_id') for o in orders])
             for order in orders:
-                restaurant_id = order.get('restaurant_id')
-                if restaurant_id:
-                    try:
-                        rest_result = self.supabase_client.table('restaurants').select('name, slug').eq('id', restaurant_id).execute()
-                        if rest_result.data:
-                            order['restaurant_name'] = rest_result.data[0].get('name')
-                            order['restaurant_slug'] = rest_result.data[0].get('slug')
-                    except:
-                        pass
+                restaurant = names.get(order.get('restaurant_id'))
+                if restaurant:
+                    order['restaurant_name'] = restaurant.get('name')
+                    order['restaurant_slug'] = restaurant.get('slug')
 
             return {
                 "success": True,
@@ -447,6 +573,13 @@ class AdminService:
         except Exception as e:
             return {"error": f"Failed to get orders: {str(e)}"}
 
+    def export_orders(self, admin_user_id: str, restaurant_id: str = None,
+                      date_from: str = None, date_to: str = None, columns: str = None,
+                      export_format: str = 'csv', gzip: bool = False) -> Dict[str, Any]:
+        """Stream orders platform-wide as CSV / NDJSON (keyset pages, constant memory)"""
+        return self._export_table(admin_user_id, 'orders', ORDER_EXPORT_COLUMNS, ORDER_EXPORT_DEFAULT_COLUMNS,
+                                  restaurant_id, date_from, date_to, columns, export_format, gzip)
+
     def update_order_status(self, admin_user_id: str, order_id: str, status: str = None,
                            payment_status: str = None) -> Dict[str, Any]:
         """Update order status"""
@@ -465,6 +598,11 @@ class AdminService:
 
             result = self.supabase_client.table('orders').update(updates).eq('id', order_id).execute()
 
+            # Notify customers watching this order (and drop cached analytics of a past day)
+            if result.data:
+                order_status_tracker.record(result.data[0])
+                analytics_cache.invalidate_order(result.data[0])
+
             self._log_admin_action(admin_user_id, 'update_order', 'order', order_id, None, updates)
 
             return {
@@ -505,15 +643,11 @@ class AdminService:
             payments = result.data or []
 
             # Enrich with restaurant name
+            names = self._restaurant_names([p.get('restaurant_id') for p in payments])
             for payment in payments:
-                restaurant_id = payment.get('restaurant_id')
-                if restaurant_id:
-                    try:
-                        rest_result = self.supabase_client.table('restaurants').select('name').eq('id', restaurant_id).execute()
-                        if rest_result.data:
-                            payment['restaurant_name'] = rest_result.data[0].get('name')
-                    except:
-                        pass
+                restaurant = names.get(payment.get('restaurant_id'))
+                if restaurant:
+                    payment['restaurant_name'] = restaurant.get('name')
 
             return {
                 "success": True,
@@ -526,6 +660,47 @@ class AdminService:
         except Exception as e:
             return {"error": f"Failed to get payments: {str(e)}"}
 
+    def export_payment_logs(self, admin_user_id: str, restaurant_id: str = None,
+                            date_from: str = None, date_to: str = None, columns: str = None,
+                            export_format: str = 'csv', gzip: bool = False) -> Dict[str, Any]:
+        """Stream payment logs as CSV / NDJSON (keyset pages, constant memory)"""
+        return self._export_table(admin_user_id, 'payment_logs', PAYMENT_EXPORT_COLUMNS, PAYMENT_EXPORT_DEFAULT_COLUMNS,
+                                  restaurant_id, date_from, date_to, columns, export_format, gzip)
+
+    def _export_table(self, admin_user_id: str, table: str, allowed_columns, default_columns,
+                      restaurant_id: str = None, date_from: str = None, date_to: str = None,
+                      columns: str = None, export_format: str = 'csv', gzip: bool = False) -> Dict[str, Any]:
+        """Validate an export request; the returned stream is consumed by StreamingResponse"""
+        if not self._is_admin(admin_user_id):
+            return {"error": "Access denied. Admin only."}
+
+        if not self.supabase_client:
+            return {"error": "Database not available"}
+
+        if export_format not in EXPORT_FORMATS:
+            return {"error": f"Unsupported export format: {export_format}"}
+        try:
+            selected = parse_columns(columns, allowed_columns, default_columns)
+        except ValueError as e:
+            return {"error": str(e)}
+
+        self._log_admin_action(admin_user_id, f'export_{table}', table, restaurant_id, None, {
+            'date_from': date_from, 'date_to': date_to, 'columns': selected, 'format': export_format
+        })
+
+        return {
+            "success": True,
+            "columns": selected,
+            "stream": stream_export(
+                self.supabase_client,
+                table,
+                selected,
+                date_range_filter(date_from, date_to, restaurant_id=restaurant_id),
+                export_format,
+                gzip
+            )
+        }
+
     def get_payment_summary(self, admin_user_id: str, period: str = 'month') -> Dict[str, Any]:
         """Get payment summary stats"""
         if not self._is_admin(admin_user_id):
@@ -545,31 +720,43 @@ class AdminService:
             else:
                 start_date = (datetime.now() - timedelta(days=365)).strftime('%Y-%m-%d')
 
-            # Get orders with payment info
-            result = self.supabase_client.table('orders').select('total_price, payment_status, payment_method, created_at').gte('created_at', f"{start_date}T00:00:00").execute()
-
-            orders = result.data or []
-
-            # Calculate summaries
-            total_amount = sum(float(o.get('total_price', 0)) for o in orders)
-            paid_amount = sum(float(o.get('total_price', 0)) for o in orders if o.get('payment_status') == 'paid')
-            pending_amount = sum(float(o.get('total_price', 0)) for o in orders if o.get('payment_status') == 'pending')
-            refunded_amount = sum(float(o.get('total_price', 0)) for o in orders if o.get('payment_status') == 'refunded')
-
-            # By payment method
-            by_method = {}
-            for order in orders:
-                method = order.get('payment_method', 'unknown')
-                if method not in by_method:
-                    by_method[method] = {'count': 0, 'amount': 0}
-                by_method[method]['count'] += 1
-                by_method[method]['amount'] += float(order.get('total_price', 0))
+            if columnar_engine.available:
+                # Vectorized over the warm platform-wide window
+                columns = columnar_engine.get_columns(None, datetime.fromisoformat(f"{start_date}T00:00:00+00:00"))
+                by_status = group_by(columns, 'payment_status')
+                by_method = group_by(columns, 'payment_method')
+                transaction_count = len(columns)
+                total_amount = float(columns.total.sum())
+                paid_amount = by_status.get('paid', {}).get('amount', 0)
+                pending_amount = by_status.get('pending', {}).get('amount', 0)
+                refunded_amount = by_status.get('refunded', {}).get('amount', 0)
+            else:
+                # Get orders with payment info
+                result = self.supabase_client.table('orders').select('total_price, payment_status, payment_method, created_at').gte('created_at', f"{start_date}T00:00:00").execute()
+
+                orders = result.data or []
+
+                # Calculate summaries
+                total_amount = sum(float(o.get('total_price', 0)) for o in orders)
+                paid_amount = sum(float(o.get('total_price', 0)) for o in orders if o.get('payment_status') == 'paid')
+                pending_amount = sum(float(o.get('total_price', 0)) for o in orders if o.get('payment_status') == 'pending')
+                refunded_amount = sum(float(o.get('total_price', 0)) for o in orders if o.get('payment_status') == 'refunded')
+
+                # By payment method
+                by_method = {}
+                for order in orders:
+                    method = order.get('payment_method', 'unknown')
+                    if method not in by_method:
+                        by_method[method] = {'count': 0, 'amount': 0}
+                    by_method[method]['count'] += 1
+                    by_method[method]['amount'] += float(order.get('total_price', 0))
+                transaction_count = len(orders)
 
             return {
                 "success": True,
                 "period": period,
                 "summary": {
-                    "total_transactions": len(orders),
+                    "total_transactions": transaction_count,
                     "total_amount": round(total_amount, 2),
                     "paid_amount": round(paid_amount, 2),
                     "pending_amount": round(pending_amount, 2),
@@ -606,17 +793,14 @@ class AdminService:
             coupons = result.data or []
 
             # Enrich with usage stats and restaurant name
+            names = self._restaurant_names([c.get('restaurant_id') for c in coupons])
             for coupon in coupons:
-                coupon_id = coupon.get('id')
                 restaurant_id = coupon.get('restaurant_id')
 
                 if restaurant_id:
-                    try:
-                        rest_result = self.supabase_client.table('restaurants').select('name').eq('id', restaurant_id).execute()
-                        if rest_result.data:
-                            coupon['restaurant_name'] = rest_result.data[0].get('name')
-                    except:
-                        coupon['restaurant_name'] = 'Global'
+                    restaurant = names.get(restaurant_id)
+                    if restaurant:
+                        coupon['restaurant_name'] = restaurant.get('name')
                 else:
                     coupon['restaurant_name'] = 'Global'
 
@@ -736,15 +920,11 @@ class AdminService:
             logs = result.data or []
 
             # Enrich with admin email
+            admins = self._user_profiles([log.get('admin_user_id') for log in logs], 'user_id, email')
             for log in logs:
-                admin_id = log.get('admin_user_id')
-                if admin_id:
-                    try:
-                        admin_result = self.supabase_client.table('user_profiles').select('email').eq('user_id', admin_id).execute()
-                        if admin_result.data:
-                            log['admin_email'] = admin_result.data[0].get('email')
-                    except:
-                        pass
+                admin = admins.get(log.get('admin_user_id'))
+                if admin:
+                    log['admin_email'] = admin.get('email')
 
             return {
                 "success": True,
@@ -783,15 +963,11 @@ class AdminService:
             staff = result.data or []
 
             # Enrich with restaurant name
+            names = self._restaurant_names([m.get('restaurant_id') for m in staff])
             for member in staff:
-                rest_id = member.get('restaurant_id')
-                if rest_id:
-                    try:
-                        rest_result = self.supabase_client.table('restaurants').select('name').eq('id', rest_id).execute()
-                        if rest_result.data:
-                            member['restaurant_name'] = rest_result.data[0].get('name')
-                    except:
-                        pass
+                restaurant = names.get(member.get('restaurant_id'))
+                if restaurant:
+                    member['restaurant_name'] = restaurant.get('name')
 
             return {
                 "success": True,
@@ -820,17 +996,13 @@ class AdminService:
             payments = result.data or []
 
             # Enrich with user and restaurant info
+            profiles = self._user_profiles([p.get('user_id') for p in payments], 'user_id, email, restaurant_name, phone')
             for payment in payments:
-                user_id = payment.get('user_id')
-                if user_id:
-                    try:
-                        user_result = self.supabase_client.table('user_profiles').select('email, restaurant_name, phone').eq('user_id', user_id).execute()
-                        if user_result.data:
-                            payment['user_email'] = user_result.data[0].get('email')
-                            payment['restaurant_name'] = user_result.data[0].get('restaurant_name')
-                            payment['user_phone'] = user_result.data[0].get('phone')
-                    except:
-                        pass
+                profile = profiles.get(payment.get('user_id'))
+                if profile:
+                    payment['user_email'] = profile.get('email')
+                    payment['restaurant_name'] = profile.get('restaurant_name')
+                    payment['user_phone'] = profile.get('phone')
 
             return {
                 "success": True,
@@ -870,6 +1042,9 @@ class AdminService:
             }
             self.supabase_client.table('payment_logs').update(payment_updates).eq('id', payment_log_id).execute()
 
+            # The payment now counts as revenue on the day it was submitted
+            analytics_cache.invalidate(PLATFORM_CACHE_KEY, order_day(payment))
+
             # Calculate subscription dates
             if billing_interval == 'yearly':
                 next_billing = now + timedelta(days=365)
@@ -1239,7 +1414,12 @@ class AdminService:
     # ==================== REPORTS ====================
 
     def get_subscription_report(self, admin_user_id: str) -> Dict[str, Any]:
-        """Get subscription statistics and trends"""
+        """
+        Get subscription statistics and trends
+
+        Reads only the report columns of user_profiles in keyset pages and
+        aggregates page by page; the result is cached for a short while.
+        """
         if not self._is_admin(admin_user_id):
             return {"error": "Access denied. Admin only."}
 
@@ -1247,16 +1427,33 @@ class AdminService:
             return {"error": "Database not available"}
 
         try:
-            # Get all user profiles
-            result = self.supabase_client.table('user_profiles').select('*').execute()
-            users = result.data or []
+            if self._subscription_report is None or time.monotonic() - self._subscription_report_at > SUBSCRIPTION_REPORT_TTL_SECONDS:
+                self._subscription_report = self._build_subscription_report()
+                self._subscription_report_at = time.monotonic()
 
-            # Calculate stats
-            total_users = len(users)
-            by_status = {}
-            by_plan = {}
-            by_payment_method = {}
+            return {
+                "success": True,
+                "report": self._subscription_report
+            }
+        except Exception as e:
+            return {"error": f"Failed to get subscription report: {str(e)}"}
 
+    def _build_subscription_report(self) -> Dict[str, Any]:
+        """Incremental aggregation over paged user_profiles reads"""
+        # Calculate monthly recurring revenue (MRR)
+        plan_prices = {
+            'starter': 39,
+            'professional': 89,
+            'enterprise': 199
+        }
+        total_users = 0
+        by_status = {}
+        by_plan = {}
+        by_payment_method = {}
+        mrr = 0
+
+        for users in iter_pages(self.supabase_client, 'user_profiles', SUBSCRIPTION_REPORT_COLUMNS, lambda query: query):
+            total_users += len(users)
             for user in users:
                 status = user.get('subscription_status', 'trial')
                 by_status[status] = by_status.get(status, 0) + 1
@@ -1267,39 +1464,29 @@ class AdminService:
                 method = user.get('payment_method', 'none')
                 by_payment_method[method] = by_payment_method.get(method, 0) + 1
 
-            # Calculate monthly recurring revenue (MRR)
-            plan_prices = {
-                'starter': 39,
-                'professional': 89,
-                'enterprise': 199
-            }
-            mrr = 0
-            for user in users:
-                if user.get('subscription_status') == 'active':
-                    plan = user.get('plan', '')
-                    interval = user.get('billing_interval', 'monthly')
-                    price = plan_prices.get(plan, 0)
-                    if interval == 'yearly':
+                if status == 'active':
+                    price = plan_prices.get(user.get('plan', ''), 0)
+                    if user.get('billing_interval', 'monthly') == 'yearly':
                         mrr += price * 0.9 / 12  # Assume 10% yearly discount
                     else:
                         mrr += price
 
-            return {
-                "success": True,
-                "report": {
-                    "total_users": total_users,
-                    "by_status": by_status,
-                    "by_plan": by_plan,
-                    "by_payment_method": by_payment_method,
-                    "mrr": round(mrr, 2),
-                    "arr": round(mrr * 12, 2)
-                }
-            }
-        except Exception as e:
-            return {"error": f"Failed to get subscription report: {str(e)}"}
+        return {
+            "total_users": total_users,
+            "by_status": by_status,
+            "by_plan": by_plan,
+            "by_payment_method": by_payment_method,
+            "mrr": round(mrr, 2),
+            "arr": round(mrr * 12, 2)
+        }
 
     def get_revenue_report(self, admin_user_id: str, period: str = 'month') -> Dict[str, Any]:
-        """Get revenue report with breakdown"""
+        """
+        Get revenue report with breakdown
+
+        Aggregated per UTC day; completed days come from analytics_cache and
+        only the missing / open days are read (paged, projected columns).
+        """
         if not self._is_admin(admin_user_id):
             return {"error": "Access denied. Admin only."}
 
@@ -1320,35 +1507,60 @@ class AdminService:
             else:
                 start_date = (now - timedelta(days=30)).strftime('%Y-%m-%d')
 
-            # Get payment logs
-            result = self.supabase_client.table('payment_logs').select('*').eq('payment_status', 'completed').gte('created_at', f"{start_date}T00:00:00").execute()
-            payments = result.data or []
+            start_day = date.fromisoformat(start_date)
+            end_day = max(start_day, datetime.now(timezone.utc).date())
+            days = analytics_cache.get_days(
+                PLATFORM_CACHE_KEY, REVENUE_CACHE_METRIC, start_day, end_day, self._load_revenue_days
+            )
 
-            # Calculate revenue breakdown
-            total_revenue = sum(float(p.get('amount', 0)) for p in payments)
+            # Merge per-day buckets
+            total_revenue = 0.0
+            transaction_count = 0
             by_plan = {}
             by_method = {}
-
-            for payment in payments:
-                plan = payment.get('plan', 'unknown')
-                by_plan[plan] = by_plan.get(plan, 0) + float(payment.get('amount', 0))
-
-                method = payment.get('payment_method', 'unknown')
-                by_method[method] = by_method.get(method, 0) + float(payment.get('amount', 0))
+            for _, bucket in days:
+                if not bucket:
+                    continue
+                total_revenue += bucket['total']
+                transaction_count += bucket['count']
+                for plan, amount in bucket['by_plan'].items():
+                    by_plan[plan] = by_plan.get(plan, 0) + amount
+                for method, amount in bucket['by_payment_method'].items():
+                    by_method[method] = by_method.get(method, 0) + amount
 
             return {
                 "success": True,
                 "report": {
                     "period": period,
                     "total_revenue": round(total_revenue, 2),
-                    "transaction_count": len(payments),
-                    "by_plan": {k: round(v, 2) for k, v in by_plan.items()},
-                    "by_payment_method": {k: round(v, 2) for k, v in by_method.items()}
+                    "transaction_count": transaction_count,
+                    "by_plan": {plan: round(amount, 2) for plan, amount in by_plan.items()},
+                    "by_payment_method": {method: round(amount, 2) for method, amount in by_method.items()}
                 }
             }
         except Exception as e:
             return {"error": f"Failed to get revenue report: {str(e)}"}
 
+    def _load_revenue_days(self, start: date, end: date) -> Dict[date, Dict[str, Any]]:
+        """Completed payments per UTC day for [start, end] (paged, projected)"""
+        buckets: Dict[date, Dict[str, Any]] = {}
+        apply_filters = date_range_filter(start.isoformat(), end.isoformat(), payment_status='completed')
+
+        for payments in iter_pages(self.supabase_client, 'payment_logs', REVENUE_REPORT_COLUMNS, apply_filters):
+            for payment in payments:
+                bucket = buckets.setdefault(order_day(payment), {
+                    'total': 0.0, 'count': 0, 'by_plan': {}, 'by_payment_method': {}
+                })
+                amount = float(payment.get('amount') or 0)
+                plan = 'unknown' if payment.get('plan') is None else str(payment['plan'])
+                method = 'unknown' if payment.get('payment_method') is None else str(payment['payment_method'])
+                bucket['total'] += amount
+                bucket['count'] += 1
+                bucket['by_plan'][plan] = bucket['by_plan'].get(plan, 0) + amount
+                bucket['by_payment_method'][method] = bucket['by_payment_method'].get(method, 0) + amount
+
+        return buckets
+
     # ==================== SUBMIT BANK TRANSFER (For Users) ====================
 
     def submit_bank_transfer(self, user_id: str, plan: str, amount: float, billing_interval: str = 'monthly',
@@ -6,9 +6,10 @@ COST OPTIMIZATION: Uses gemini-1.5-flash for text, imagen-3.0-generate-001 for i
 import os
 import base64
 import io
+import json
 import uuid
 import requests
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from datetime import datetime
 from PIL import Image, ImageDraw, ImageFont
 
@@ -38,6 +39,13 @@ else:
 TEXT_MODEL_NAME = "gemini-2.0-flash"  # Stable, fast text model
 TRANSLATION_MODEL_NAME = "gemini-2.0-flash"  # Translation (stable)
 
+# Language codes used by the public menu language switcher
+LANGUAGE_NAMES = {
+    'en': 'English', 'th': 'Thai', 'zh': 'Chinese', 'ja': 'Japanese', 'ko': 'Korean',
+    'vi': 'Vietnamese', 'hi': 'Hindi', 'es': 'Spanish', 'fr': 'French', 'de': 'German',
+    'id': 'Indonesian', 'ms': 'Malay',
+}
+
 # Image models: gemini-2.5-flash-image (GA version - preview was retired Oct 2025)
 # Reference: https://ai.google.dev/gemini-api/docs/image-generation
 # Note: gemini-2.5-flash-image-preview was retired on October 31, 2025
@@ -63,6 +71,18 @@ SUPABASE_KEY = (
 )
 
 
+class TranslationQuotaError(Exception):
+    """Gemini quota / rate limit reached while translating"""
+
+
+def _is_quota_error(error: Exception) -> bool:
+    """True for Gemini 429 / RESOURCE_EXHAUSTED errors"""
+    if getattr(error, 'code', None) == 429 or type(error).__name__ in ('ResourceExhausted', 'TooManyRequests'):
+        return True
+    message = str(error).lower()
+    return '429' in message or 'resource_exhausted' in message or 'quota' in message
+
+
 class AIService:
     """
     Unified AI Service for Text and Image Tasks
@@ -93,7 +113,7 @@ class AIService:
                 print(f"⚠️ Failed to initialize Supabase client: {str(e)}")
                 self.supabase_client = None
     
-    def translate_text(self, text: str, target_lang: str, source_lang: str = "auto") -> str:
+    def translate_text(self, text: str, target_lang: str, source_lang: str = "auto", strict: bool = False) -> str:
         """
         Translate text using a high-quality Gemini model (defaults to gemini-1.5-pro with flash fallback)
 
@@ -101,6 +121,8 @@ class AIService:
             text: Text to translate
             target_lang: Target language (e.g., "English", "Thai", "Chinese", "Japanese")
             source_lang: Source language (default: "auto" for auto-detect)
+            strict: Raise on API errors and return '' for an empty response instead of
+                falling back to the original text (used by translate_batch)
 
         Returns:
             Translated text (or original text if translation fails)
@@ -241,14 +263,86 @@ Text to translate:
             else:
                 print(f"✅ Successfully translated to {target_lang_normalized}")
             
-            return translated if translated else text
+            return translated if translated or strict else text
             
         except Exception as e:
+            if strict:
+                raise
             print(f"❌ TRANSLATION FAILED: {e}")
             import traceback
             traceback.print_exc()
             return text  # Silent fallback - return original text
-    
+
+    def translate_batch(self, texts: List[str], target_lang: str) -> List[Optional[str]]:
+        """
+        Translate many short menu strings in one Gemini request
+
+        Args:
+            texts: Strings to translate (names, descriptions, categories, options)
+            target_lang: Language code or name (e.g., "ja", "Japanese")
+
+        Returns:
+            Translations in the same order (None where translation failed, so the
+            caller can retry later instead of storing the original text)
+
+        Raises:
+            TranslationQuotaError: Gemini quota / rate limit hit (retrying text by text would only add calls)
+        """
+        if not self.ready or not texts:
+            return [None] * len(texts)
+
+        target_lang_name = LANGUAGE_NAMES.get(target_lang.strip(), target_lang.strip())
+        print(f"🔄 Batch translating {len(texts)} texts to {target_lang_name}")
+
+        prompt = f"""Translate each restaurant menu text in this JSON array to {target_lang_name}.
+
+CRITICAL RULES:
+- Natural, fluent, appetizing {target_lang_name} (professional restaurant style)
+- Keep text that is already in {target_lang_name} unchanged
+- NO symbols, NO parentheses, NO extra explanations
+- Return ONLY a JSON array of strings with exactly {len(texts)} items, in the same order
+
+{json.dumps(texts, ensure_ascii=False)}"""
+
+        try:
+            model = genai.GenerativeModel(
+                TRANSLATION_MODEL_NAME or TEXT_MODEL_NAME,
+                generation_config={
+                    "temperature": 0.2,
+                    "response_mime_type": "application/json",
+                    "max_output_tokens": 8192,
+                },
+            )
+            response = model.generate_content(prompt)
+            result_text = response.text.strip()
+            if '```' in result_text:
+                result_text = result_text.split('```')[1].removeprefix('json')
+            translations = json.loads(result_text)
+
+            if isinstance(translations, list) and len(translations) == len(texts):
+                return [
+                    str(translated).strip() or None if translated is not None else None
+                    for translated in translations
+                ]
+            print(f"⚠️ Batch translation returned {len(translations) if isinstance(translations, list) else 'invalid'} items for {len(texts)} texts, translating one by one")
+        except Exception as e:
+            if _is_quota_error(e):
+                print(f"❌ Batch translation hit the Gemini quota: {e}")
+                raise TranslationQuotaError(str(e)) from e
+            print(f"⚠️ Batch translation failed, translating one by one: {e}")
+
+        results: List[Optional[str]] = []
+        for text in texts:
+            try:
+                results.append(self.translate_text(text, target_lang_name, strict=True) or None)
+            except Exception as e:
+                if _is_quota_error(e):
+                    print(f"❌ Translation hit the Gemini quota: {e}")
+                    raise TranslationQuotaError(str(e)) from e
+                print(f"⚠️ Could not translate '{text[:50]}': {e}")
+                results.append(None)
+        return results
+
     def generate_menu_image(self, prompt: str) -> Optional[str]:
         """
         Generate menu image using imagen-3.0-generate-001
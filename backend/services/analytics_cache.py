@@ -0,0 +1,200 @@
+"""
+Analytics Cache - cache ผลลัพธ์ analytics แยกตามร้าน / metric / วัน (UTC)
+
+- วันที่ปิดแล้ว (closed bucket) ถูก cache ไว้โดยไม่มีวันหมดอายุ
+- วันปัจจุบัน (open bucket) ถูกคำนวณใหม่ทุกครั้งแล้ว merge กับวันที่ cache ไว้
+- ผลลัพธ์ของทั้งช่วงวัน (เช่น top-N จาก RPC) cache ได้เมื่อทุกวันในช่วงปิดแล้ว (get_range)
+- ออเดอร์ของวันที่ปิดแล้วถูก void / refund / เปลี่ยนสถานะ -> invalidate วันนั้นของร้าน
+  (รวมถึงผลลัพธ์ช่วงวันที่ครอบวันนั้น)
+  (OrdersService._publish_order_event เรียก invalidate_order)
+
+ใช้โดย RollupService (revenue / trends / popular items / best sellers)
+และ OrdersService.get_orders_summary
+"""
+
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# A day stays open for a few hours after midnight UTC so late status changes
+# (e.g. an order placed at 23:55 completed at 00:10) are not frozen into the cache
+OPEN_GRACE_HOURS = 6
+# LRU bound: restaurants with cached buckets
+MAX_CACHED_RESTAURANTS = 2000
+
+RangeLoader = Callable[[date, date], Dict[date, Any]]
+# Bucket key: (metric, day) for per-day values, (metric, start_day, end_day) for range results
+BucketKey = Tuple[Any, ...]
+
+
+def _days(start_day: date, end_day: date):
+    day = start_day
+    while day <= end_day:
+        yield day
+        day += timedelta(days=1)
+
+
+def order_day(order: Dict[str, Any]) -> Optional[date]:
+    """UTC day of an order row's created_at"""
+    created_at = order.get('created_at')
+    if not created_at:
+        return None
+    parsed = datetime.fromisoformat(str(created_at).replace('Z', '+00:00'))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc)
+    return parsed.date()
+
+
+class AnalyticsCache:
+    """Per-restaurant, per-metric, per-day result buckets"""
+
+    def __init__(self, max_restaurants: int = MAX_CACHED_RESTAURANTS):
+        self.max_restaurants = max_restaurants
+        # Store: {restaurant_id: {(metric, day) | (metric, start_day, end_day): value}}
+        self._buckets: 'OrderedDict[str, Dict[BucketKey, Any]]' = OrderedDict()
+        # Bumped on invalidation so a load that raced with it is not stored
+        self._generation: Dict[str, int] = {}
+        self._epoch = 0
+        self._lock = threading.Lock()
+
+    def last_closed_day(self) -> date:
+        """Newest day whose bucket can be cached"""
+        now = datetime.now(timezone.utc) - timedelta(hours=OPEN_GRACE_HOURS)
+        return now.date() - timedelta(days=1)
+
+    def get_days(
+        self,
+        restaurant_id: str,
+        metric: str,
+        start_day: date,
+        end_day: date,
+        load_range: RangeLoader
+    ) -> List[Tuple[date, Any]]:
+        """
+        Per-day values for [start_day, end_day]
+
+        Closed days come from the cache; missing closed days are loaded with a
+        single load_range() call, and open days are always loaded fresh.
+
+        Args:
+            restaurant_id: Restaurant ID
+            metric: Metric name (include any filters that change the result)
+            start_day: First day (inclusive)
+            end_day: Last day (inclusive)
+            load_range: Loader returning {day: value} for a contiguous range
+                (days with no data may be omitted)
+
+        Returns:
+            List of (day, value) in day order; value is None for days without data
+        """
+        closed_end = min(end_day, self.last_closed_day())
+        values: Dict[date, Any] = {}
+        missing: List[date] = []
+
+        with self._lock:
+            buckets = self._buckets.get(restaurant_id, {})
+            generation = (self._epoch, self._generation.get(restaurant_id, 0))
+            if restaurant_id in self._buckets:
+                self._buckets.move_to_end(restaurant_id)
+            for day in _days(start_day, closed_end):
+                key = (metric, day)
+                if key in buckets:
+                    values[day] = buckets[key]
+                else:
+                    missing.append(day)
+
+        if missing:
+            loaded = load_range(missing[0], missing[-1])
+            for day in missing:
+                values[day] = loaded.get(day)
+            self._store(restaurant_id, {(metric, day): values[day] for day in missing}, generation)
+
+        if end_day > closed_end:
+            open_start = max(start_day, closed_end + timedelta(days=1))
+            loaded = load_range(open_start, end_day)
+            for day in _days(open_start, end_day):
+                values[day] = loaded.get(day)
+
+        return [(day, values.get(day)) for day in _days(start_day, end_day)]
+
+    def get_range(
+        self,
+        restaurant_id: str,
+        metric: str,
+        start_day: date,
+        end_day: date,
+        load: Callable[[], Any]
+    ) -> Any:
+        """
+        One value for the whole range [start_day, end_day] (e.g. a top-N RPC result)
+
+        Cached only when every day in the range is closed; ranges that reach the
+        open day are loaded fresh. Invalidating any day in the range drops it.
+
+        Args:
+            restaurant_id: Restaurant ID
+            metric: Metric name (include any filters that change the result)
+            start_day: First day (inclusive)
+            end_day: Last day (inclusive)
+            load: Loader returning the value for the range
+        """
+        if end_day > self.last_closed_day():
+            return load()
+
+        key = (metric, start_day, end_day)
+        with self._lock:
+            buckets = self._buckets.get(restaurant_id, {})
+            generation = (self._epoch, self._generation.get(restaurant_id, 0))
+            if restaurant_id in self._buckets:
+                self._buckets.move_to_end(restaurant_id)
+            if key in buckets:
+                return buckets[key]
+
+        value = load()
+        self._store(restaurant_id, {key: value}, generation)
+        return value
+
+    def _store(self, restaurant_id: str, values: Dict[BucketKey, Any], generation: Tuple[int, int]):
+        with self._lock:
+            if (self._epoch, self._generation.get(restaurant_id, 0)) != generation:
+                return
+            buckets = self._buckets.setdefault(restaurant_id, {})
+            self._buckets.move_to_end(restaurant_id)
+            buckets.update(values)
+            while len(self._buckets) > self.max_restaurants:
+                self._buckets.popitem(last=False)
+
+    def invalidate(self, restaurant_id: str, day: Optional[date] = None):
+        """Drop a restaurant's buckets for one day and the ranges covering it (None = every day)"""
+        with self._lock:
+            self._generation[restaurant_id] = self._generation.get(restaurant_id, 0) + 1
+            buckets = self._buckets.get(restaurant_id)
+            if not buckets:
+                return
+            if day is None:
+                del self._buckets[restaurant_id]
+                return
+            for key in [key for key in buckets if key[1] <= day <= key[-1]]:
+                del buckets[key]
+
+    def clear(self):
+        """Drop every bucket (e.g. after a rollup rebuild of all restaurants)"""
+        with self._lock:
+            self._epoch += 1
+            self._buckets.clear()
+
+    def invalidate_order(self, order: Dict[str, Any]):
+        """Invalidate the closed day an updated order belongs to (void / refund / late status change)"""
+        restaurant_id = order.get('restaurant_id')
+        if not restaurant_id:
+            return
+        day = order_day(order)
+        if day is None:
+            self.invalidate(restaurant_id)
+        elif day <= self.last_closed_day():
+            self.invalidate(restaurant_id, day)
+
+
+# Global cache instance
+analytics_cache = AnalyticsCache()
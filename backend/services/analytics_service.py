@@ -2,12 +2,17 @@
 Analytics Service - Generate business insights and reports
 """
 from typing import Dict, Any, List, Optional
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from collections import defaultdict
-import json
 import os
 from dotenv import load_dotenv
 
+from .rollup_service import rollup_service, SERVICE_TYPES, PAYMENT_METHODS, WEEKDAYS
+from .columnar_analytics import (
+    columnar_engine, histogram, hour_of_day_histogram, period_over_period,
+    COUNTED_STATUSES, SECONDS_PER_DAY
+)
+
 # Load environment variables
 load_dotenv()
 
@@ -63,62 +68,53 @@ class AnalyticsService:
             start_date = end_date - timedelta(days=30)
         
         try:
-            # Query orders within date range
-            response = self.supabase.table('orders').select('*').eq(
-                'restaurant_id', restaurant_id
-            ).gte(
-                'created_at', start_date.isoformat()
-            ).lte(
-                'created_at', end_date.isoformat()
-            ).in_(
-                'status', ['completed', 'ready', 'preparing']  # Exclude cancelled
-            ).execute()
-            
-            orders = response.data if response.data else []
-            
+            # Read pre-aggregated daily rollups (maintained by trigger on orders)
+            rollups = rollup_service.get_daily_rollups(restaurant_id, start_date.date(), end_date.date())
+            rollups = [row for row in rollups if (row.get('order_count') or 0) > 0]
+
             # Calculate stats
-            total_revenue = sum(order.get('total_price', 0) for order in orders)
-            total_orders = len(orders)
+            total_revenue = sum(float(row.get('revenue') or 0) for row in rollups)
+            total_orders = sum(int(row.get('order_count') or 0) for row in rollups)
             avg_order_value = total_revenue / total_orders if total_orders > 0 else 0
-            
-            # Group by date for daily revenue
-            daily_revenue = defaultdict(float)
-            daily_orders = defaultdict(int)
-            
-            for order in orders:
-                order_date = order.get('created_at', '')[:10]  # YYYY-MM-DD
-                daily_revenue[order_date] += order.get('total_price', 0)
-                daily_orders[order_date] += 1
-            
-            # Convert to sorted list
+
+            # Daily revenue (one rollup row per day)
             daily_data = [
                 {
-                    'date': date,
-                    'revenue': revenue,
-                    'orders': daily_orders[date]
+                    'date': row['day'],
+                    'revenue': float(row.get('revenue') or 0),
+                    'orders': int(row.get('order_count') or 0)
                 }
-                for date, revenue in sorted(daily_revenue.items())
+                for row in rollups
             ]
-            
+
             # Service type breakdown
-            service_type_revenue = defaultdict(float)
-            service_type_orders = defaultdict(int)
-            
-            for order in orders:
-                service_type = order.get('service_type', 'dine_in')
-                service_type_revenue[service_type] += order.get('total_price', 0)
-                service_type_orders[service_type] += 1
-            
-            service_breakdown = [
-                {
+            service_breakdown = []
+            for stype in SERVICE_TYPES:
+                orders_count = sum(int(row.get(f'{stype}_orders') or 0) for row in rollups)
+                if orders_count <= 0:
+                    continue
+                revenue = sum(float(row.get(f'{stype}_revenue') or 0) for row in rollups)
+                service_breakdown.append({
                     'type': stype,
                     'revenue': revenue,
-                    'orders': service_type_orders[stype],
+                    'orders': orders_count,
                     'percentage': (revenue / total_revenue * 100) if total_revenue > 0 else 0
-                }
-                for stype, revenue in service_type_revenue.items()
-            ]
-            
+                })
+
+            # Payment method breakdown
+            payment_breakdown = []
+            for method in PAYMENT_METHODS:
+                orders_count = sum(int(row.get(f'{method}_orders') or 0) for row in rollups)
+                if orders_count <= 0:
+                    continue
+                revenue = sum(float(row.get(f'{method}_revenue') or 0) for row in rollups)
+                payment_breakdown.append({
+                    'method': 'other' if method == 'other_payment' else method,
+                    'revenue': round(revenue, 2),
+                    'orders': orders_count,
+                    'percentage': (revenue / total_revenue * 100) if total_revenue > 0 else 0
+                })
+
             return {
                 'success': True,
                 'period': {
@@ -132,7 +128,8 @@ class AnalyticsService:
                     'average_order_value': round(avg_order_value, 2)
                 },
                 'daily_data': daily_data,
-                'service_breakdown': service_breakdown
+                'service_breakdown': service_breakdown,
+                'payment_breakdown': payment_breakdown
             }
             
         except Exception as e:
@@ -163,55 +160,24 @@ class AnalyticsService:
             return {"error": "Database not available"}
         
         try:
-            start_date = datetime.now() - timedelta(days=days)
-            
-            # Get orders with items
-            response = self.supabase.table('orders').select('items').eq(
-                'restaurant_id', restaurant_id
-            ).gte(
-                'created_at', start_date.isoformat()
-            ).in_(
-                'status', ['completed', 'ready', 'preparing']
-            ).execute()
-            
-            orders = response.data if response.data else []
-            
-            # Count item frequencies
-            item_stats = defaultdict(lambda: {'count': 0, 'revenue': 0, 'name': ''})
+            end_day = date.today()
+            start_day = end_day - timedelta(days=days)
             
-            for order in orders:
-                items = order.get('items', [])
-                if isinstance(items, str):
-                    try:
-                        items = json.loads(items)
-                    except:
-                        items = []
-                
-                for item in items:
-                    menu_id = item.get('menu_id', 'unknown')
-                    quantity = item.get('quantity', 1)
-                    price = item.get('price', 0)
-                    name = item.get('nameEn') or item.get('name', 'Unknown')
-                    
-                    item_stats[menu_id]['count'] += quantity
-                    item_stats[menu_id]['revenue'] += price * quantity
-                    item_stats[menu_id]['name'] = name
+            # Top N from the item sales facts (maintained by trigger on orders)
+            top_items = rollup_service.get_top_items(
+                restaurant_id, start_day, end_day, limit=limit
+            )
             
-            # Convert to sorted list
             popular_items = [
                 {
-                    'menu_id': menu_id,
-                    'name': stats['name'],
-                    'orders_count': stats['count'],
-                    'revenue': round(stats['revenue'], 2)
+                    'menu_id': row['menu_id'],
+                    'name': row.get('name_en') or row.get('name') or 'Unknown',
+                    'orders_count': row.get('quantity') or 0,
+                    'revenue': round(float(row.get('revenue') or 0), 2)
                 }
-                for menu_id, stats in item_stats.items()
+                for row in top_items[:limit]
             ]
             
-            # Sort by orders count
-            popular_items.sort(key=lambda x: x['orders_count'], reverse=True)
-            popular_items = popular_items[:limit]
-            
             return {
                 'success': True,
                 'period_days': days,
@@ -233,70 +199,58 @@ class AnalyticsService:
         """
         Get order trends (hourly distribution, peak times)
         
+        Reads the maintained hour-of-week matrix (7x24, restaurant local time)
+        for the last ceil(days / 7) complete weeks plus the current week
+        (returned as `weeks`).
+        
         Args:
             restaurant_id: Restaurant ID
             days: Number of days to analyze
             
         Returns:
-            Dictionary with order trends
+            Dictionary with order trends and the 7x24 heatmap
         """
         if not self.supabase:
             return {"error": "Database not available"}
         
         try:
-            start_date = datetime.now() - timedelta(days=days)
-            
-            response = self.supabase.table('orders').select('created_at').eq(
-                'restaurant_id', restaurant_id
-            ).gte(
-                'created_at', start_date.isoformat()
-            ).in_(
-                'status', ['completed', 'ready', 'preparing']
-            ).execute()
+            # Last ceil(days / 7) complete weeks plus the current (partial) week,
+            # so the window always covers at least `days` days
+            end_week = rollup_service.current_week_start(restaurant_id)
+            start_week = end_week - timedelta(weeks=max(1, -(-days // 7)))
+            heatmap = rollup_service.get_demand_heatmap(restaurant_id, start_week, end_week)
+            matrix = heatmap['orders']
             
-            orders = response.data if response.data else []
-            
-            # Analyze by hour of day
-            hourly_orders = defaultdict(int)
-            daily_orders = defaultdict(int)
-            
-            for order in orders:
-                created_at = order.get('created_at', '')
-                if not created_at:
-                    continue
-                
-                try:
-                    dt = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
-                    hour = dt.hour
-                    day_of_week = dt.strftime('%A')
-                    
-                    hourly_orders[hour] += 1
-                    daily_orders[day_of_week] += 1
-                except:
-                    pass
+            hourly_orders = [sum(matrix[dow][hour] for dow in range(7)) for hour in range(24)]
+            daily_orders = [sum(row) for row in matrix]
             
             # Convert to lists
             hourly_data = [
                 {'hour': hour, 'orders': count}
-                for hour, count in sorted(hourly_orders.items())
+                for hour, count in enumerate(hourly_orders)
+                if count > 0
             ]
-            
-            # Day of week order (Monday-Sunday)
-            day_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
             daily_data = [
-                {'day': day, 'orders': daily_orders.get(day, 0)}
-                for day in day_order
+                {'day': day, 'orders': daily_orders[dow]}
+                for dow, day in enumerate(WEEKDAYS)
             ]
             
             # Find peak times
-            peak_hour = max(hourly_orders.items(), key=lambda x: x[1])[0] if hourly_orders else 12
-            peak_day = max(daily_orders.items(), key=lambda x: x[1])[0] if daily_orders else 'Friday'
+            peak_hour = max(range(24), key=lambda hour: hourly_orders[hour]) if any(hourly_orders) else 12
+            peak_day = WEEKDAYS[max(range(7), key=lambda dow: daily_orders[dow])] if any(daily_orders) else 'Friday'
             
             return {
                 'success': True,
                 'period_days': days,
+                'weeks': {
+                    'start': start_week.isoformat(),
+                    'end': end_week.isoformat(),
+                    'complete_weeks': (end_week - start_week).days // 7,
+                    'includes_current_week': True
+                },
                 'hourly_distribution': hourly_data,
                 'daily_distribution': daily_data,
+                'heatmap': heatmap,
                 'peak_times': {
                     'hour': peak_hour,
                     'day': peak_day
@@ -309,6 +263,128 @@ class AnalyticsService:
                 'success': False,
                 'error': str(e)
             }
+    
+    def get_demand_forecast(
+        self,
+        restaurant_id: str,
+        weeks: int = 8
+    ) -> Dict[str, Any]:
+        """
+        Expected load for next week per hour-of-week (for staffing)
+        
+        Args:
+            restaurant_id: Restaurant ID
+            weeks: Number of past complete weeks to learn from
+            
+        Returns:
+            Dictionary with the expected 7x24 heatmap, per-day totals and busiest slots
+        """
+        if not self.supabase:
+            return {"error": "Database not available"}
+        
+        try:
+            forecast = rollup_service.get_demand_forecast(restaurant_id, weeks)
+            matrix = forecast['orders']
+            next_week = rollup_service.current_week_start(restaurant_id) + timedelta(weeks=1)
+            
+            daily_data = [
+                {
+                    'day': day,
+                    'date': (next_week + timedelta(days=dow)).isoformat(),
+                    'expected_orders': round(sum(matrix[dow]), 1),
+                    'expected_revenue': round(sum(forecast['revenue'][dow]), 2)
+                }
+                for dow, day in enumerate(WEEKDAYS)
+            ]
+            busiest = sorted(
+                ((dow, hour) for dow in range(7) for hour in range(24) if matrix[dow][hour] > 0),
+                key=lambda cell: -matrix[cell[0]][cell[1]]
+            )[:10]
+            
+            return {
+                'success': True,
+                'week_start': next_week.isoformat(),
+                'history_weeks': weeks,
+                'heatmap': forecast,
+                'daily_forecast': daily_data,
+                'busiest_slots': [
+                    {'day': WEEKDAYS[dow], 'hour': hour, 'expected_orders': matrix[dow][hour]}
+                    for dow, hour in busiest
+                ]
+            }
+            
+        except Exception as e:
+            print(f"❌ Error getting demand forecast: {str(e)}")
+            return {
+                'success': False,
+                'error': str(e)
+            }
+    
+    def get_period_comparison(
+        self,
+        restaurant_id: str,
+        days: int = 30
+    ) -> Dict[str, Any]:
+        """
+        Compare the last N days with the N days before (period-over-period)
+        
+        Runs on the columnar engine (warm per-restaurant window, vectorized).
+        
+        Args:
+            restaurant_id: Restaurant ID
+            days: Length of each period in days
+            
+        Returns:
+            Dictionary with current/previous totals, % change, daily series and hourly distribution
+        """
+        if not columnar_engine.available:
+            return {"error": "Columnar analytics not available"}
+        
+        try:
+            end_date = datetime.now()
+            start_date = end_date - timedelta(days=days)
+            previous_start = start_date - timedelta(days=days)
+            end_ts = int(end_date.timestamp())
+            start_ts = int(start_date.timestamp())
+            previous_start_ts = int(previous_start.timestamp())
+            
+            columns = columnar_engine.get_columns(restaurant_id, previous_start)
+            comparison = period_over_period(columns, start_ts, end_ts)
+            
+            counted = columns.take(columns.mask_in('status', COUNTED_STATUSES))
+            current_counts, current_revenue = histogram(counted, start_ts, SECONDS_PER_DAY, days)
+            previous_counts, previous_revenue = histogram(counted, previous_start_ts, SECONDS_PER_DAY, days)
+            hourly = hour_of_day_histogram(counted.between(start_ts, end_ts))
+            
+            daily_data = [
+                {
+                    'day': index + 1,
+                    'date': (start_date + timedelta(days=index)).date().isoformat(),
+                    'revenue': round(float(current_revenue[index]), 2),
+                    'orders': int(current_counts[index]),
+                    'previous_revenue': round(float(previous_revenue[index]), 2),
+                    'previous_orders': int(previous_counts[index])
+                }
+                for index in range(days)
+            ]
+            
+            return {
+                'success': True,
+                'period_days': days,
+                **comparison,
+                'daily_data': daily_data,
+                'hourly_distribution': [
+                    {'hour': hour, 'orders': int(count)}
+                    for hour, count in enumerate(hourly)
+                ]
+            }
+            
+        except Exception as e:
+            print(f"❌ Error getting period comparison: {str(e)}")
+            return {
+                'success': False,
+                'error': str(e)
+            }
 
 
 # Import os at the top
@@ -0,0 +1,136 @@
+"""
+Batch Loader - รวม lookup ของหลายแถวเป็น query เดียวต่อ entity type
+
+แทนการ query ทีละแถว (N+1) ในหน้า list ของ admin:
+- เก็บ id ของทั้งหน้าแล้วดึงด้วย in_() ครั้งเดียว
+- memoize ภายใน request (สร้าง BatchLoader ใหม่ทุก request)
+- สถิติต่อร้าน (orders / revenue / menus / staff) ดึงด้วย RPC เดียว
+  (migrations/create_restaurant_stats_rpc.sql)
+
+ใช้โดย AdminService
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .db_errors import is_missing_function
+
+# Max ids per in_() filter (keeps the PostgREST URL short)
+IN_CHUNK_SIZE = 200
+
+RESTAURANT_STATS_RPC_NAME = 'get_restaurant_stats'
+EMPTY_RESTAURANT_STATS = {'total_orders': 0, 'total_revenue': 0.0, 'menu_count': 0, 'staff_count': 0}
+
+
+def _unique(ids: Iterable[Any]) -> List[Any]:
+    return list(dict.fromkeys(i for i in ids if i))
+
+
+class BatchLoader:
+    """Per-request memoized batch lookups"""
+
+    def __init__(self, supabase_client: Any):
+        self.supabase_client = supabase_client
+        # Store: {(table, key_column, columns): {key: row or list of rows}}
+        self._memo: Dict[Tuple[str, str, str, bool], Dict[Any, Any]] = {}
+        self._stats: Dict[str, Dict[str, Any]] = {}
+
+    def _fetch(self, table: str, key_column: str, columns: str, ids: Iterable[Any], many: bool) -> Dict[Any, Any]:
+        memo = self._memo.setdefault((table, key_column, columns, many), {})
+        missing = [i for i in _unique(ids) if i not in memo]
+
+        if missing:
+            select = columns if key_column in [c.strip() for c in columns.split(',')] else f"{key_column}, {columns}"
+            for start in range(0, len(missing), IN_CHUNK_SIZE):
+                chunk = missing[start:start + IN_CHUNK_SIZE]
+                result = self.supabase_client.table(table).select(select).in_(key_column, chunk).execute()
+                for key in chunk:
+                    memo[key] = [] if many else None
+                for row in result.data or []:
+                    key = row.get(key_column)
+                    if many:
+                        memo[key].append(row)
+                    else:
+                        memo[key] = row
+        return memo
+
+    def load_many(self, table: str, key_column: str, ids: Iterable[Any], columns: str = '*') -> Dict[Any, Optional[Dict[str, Any]]]:
+        """
+        One row per key (e.g. restaurants by id, user_profiles by user_id)
+
+        Returns:
+            {key: row or None}
+        """
+        ids = _unique(ids)
+        memo = self._fetch(table, key_column, columns, ids, many=False)
+        return {i: memo.get(i) for i in ids}
+
+    def load_grouped(self, table: str, key_column: str, ids: Iterable[Any], columns: str = '*') -> Dict[Any, List[Dict[str, Any]]]:
+        """
+        All rows per key (e.g. restaurants by owner user_id)
+
+        Returns:
+            {key: [rows]}
+        """
+        ids = _unique(ids)
+        memo = self._fetch(table, key_column, columns, ids, many=True)
+        return {i: memo.get(i, []) for i in ids}
+
+    def restaurants(self, ids: Iterable[Any], columns: str = 'id, name, slug') -> Dict[Any, Optional[Dict[str, Any]]]:
+        return self.load_many('restaurants', 'id', ids, columns)
+
+    def user_profiles(self, user_ids: Iterable[Any], columns: str = 'user_id, email, role') -> Dict[Any, Optional[Dict[str, Any]]]:
+        return self.load_many('user_profiles', 'user_id', user_ids, columns)
+
+    def restaurant_stats(self, restaurant_ids: Iterable[Any]) -> Dict[str, Dict[str, Any]]:
+        """
+        Order count, paid revenue, menu count and staff count per restaurant
+
+        One RPC for the whole page; falls back to per-restaurant count queries
+        when the migration is not installed.
+
+        Returns:
+            {restaurant_id: stats} (EMPTY_RESTAURANT_STATS for restaurants without rows)
+        """
+        ids = _unique(restaurant_ids)
+        missing = [i for i in ids if i not in self._stats]
+
+        if missing:
+            loaded = self._restaurant_stats_from_rpc(missing)
+            if loaded is None:
+                loaded = {i: self._restaurant_stats_fallback(i) for i in missing}
+            for restaurant_id in missing:
+                self._stats[restaurant_id] = loaded.get(restaurant_id, dict(EMPTY_RESTAURANT_STATS))
+
+        return {i: self._stats[i] for i in ids}
+
+    def _restaurant_stats_from_rpc(self, restaurant_ids: List[str]) -> Optional[Dict[str, Dict[str, Any]]]:
+        try:
+            stats = {}
+            for start in range(0, len(restaurant_ids), IN_CHUNK_SIZE):
+                result = self.supabase_client.rpc(RESTAURANT_STATS_RPC_NAME, {
+                    'p_restaurant_ids': restaurant_ids[start:start + IN_CHUNK_SIZE]
+                }).execute()
+                for row in result.data or []:
+                    stats[row['restaurant_id']] = {
+                        'total_orders': int(row.get('total_orders') or 0),
+                        'total_revenue': round(float(row.get('total_revenue') or 0), 2),
+                        'menu_count': int(row.get('menu_count') or 0),
+                        'staff_count': int(row.get('staff_count') or 0),
+                    }
+            return stats
+        except Exception as e:
+            if not is_missing_function(e):
+                raise
+            print(f"⚠️ Batch Loader: Restaurant stats RPC unavailable, falling back to count queries: {str(e)}")
+            return None
+
+    def _restaurant_stats_fallback(self, restaurant_id: str) -> Dict[str, Any]:
+        orders = self.supabase_client.table('orders').select('total_price, payment_status', count='exact').eq('restaurant_id', restaurant_id).execute()
+        menus = self.supabase_client.table('menus').select('id', count='exact').eq('restaurant_id', restaurant_id).limit(1).execute()
+        staff = self.supabase_client.table('staff').select('id', count='exact').eq('restaurant_id', restaurant_id).limit(1).execute()
+        return {
+            'total_orders': orders.count or 0,
+            'total_revenue': round(sum(float(o.get('total_price') or 0) for o in orders.data or [] if o.get('payment_status') == 'paid'), 2),
+            'menu_count': menus.count or 0,
+            'staff_count': staff.count or 0,
+        }
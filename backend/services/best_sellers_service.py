@@ -1,5 +1,8 @@
 """
 Best Sellers Service - คำนวณเมนูขายดีจากยอดขาย 7 วัน
+
+ยอดขายรายเมนูอ่านจาก menu_item_sales_daily (top-N ผ่าน RollupService)
+ไม่ scan ตาราง orders
 """
 
 import os
@@ -8,7 +11,11 @@ from supabase import create_client, Client
 from dotenv import load_dotenv
 import pathlib
 import re
-from datetime import datetime, timedelta
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime, timedelta, timezone
+
+from .rollup_service import rollup_service
 
 # Load environment variables
 env_path = pathlib.Path(__file__).parent.parent.parent / '.env'
@@ -24,6 +31,18 @@ SUPABASE_KEY = (
     os.getenv('NEXT_PUBLIC_SUPABASE_ANON_KEY')
 )
 
+REFRESH_RPC_NAME = 'refresh_bestseller_flags'
+CHANGED_RESTAURANTS_RPC_NAME = 'get_restaurants_with_new_item_sales'
+REFRESH_RUNS_TABLE = 'bestseller_refresh_runs'
+
+# Items flagged as bestseller per restaurant
+BESTSELLER_TOP_N = 5
+# Minimum quantity to be ranked above pinned items
+MIN_QUANTITY_THRESHOLD = 20
+# Restaurants per refresh RPC call / concurrent calls
+REFRESH_BATCH_SIZE = 200
+REFRESH_MAX_WORKERS = 4
+
 class BestSellersService:
     """Service for calculating best selling menu items"""
     
@@ -73,8 +92,8 @@ class BestSellersService:
 
         try:
             # Calculate date range
-            end_date = datetime.now()
-            start_date = end_date - timedelta(days=days)
+            end_day = date.today()
+            start_day = end_day - timedelta(days=days)
 
             # Get pinned bestsellers (manually marked)
             pinned_result = self.supabase_client.table('menus').select(
@@ -83,15 +102,6 @@ class BestSellersService:
 
             pinned_menus = {menu['id']: menu for menu in (pinned_result.data or [])}
 
-            # Get all orders from the last N days (including pending/confirmed orders)
-            orders_result = self.supabase_client.table('orders').select(
-                'items, status'
-            ).eq('restaurant_id', restaurant_id).gte(
-                'created_at', start_date.isoformat()
-            ).lte(
-                'created_at', end_date.isoformat()
-            ).neq('status', 'cancelled').execute()
-
             # Count menu item sales
             menu_sales: Dict[str, Dict[str, Any]] = {}
 
@@ -109,37 +119,35 @@ class BestSellersService:
                     'category': menu.get('category', 'Main Course'),
                 }
 
-            # Count sales from orders
-            for order in (orders_result.data or []):
-                items = order.get('items', [])
-                if not isinstance(items, list):
-                    continue
-
-                for item in items:
-                    menu_id = item.get('menu_id')
-                    if not menu_id:
-                        continue
-
-                    quantity = item.get('quantity', 1)
-
-                    if menu_id not in menu_sales:
-                        menu_sales[menu_id] = {
-                            'menu_id': menu_id,
-                            'name': item.get('name', ''),
-                            'nameEn': item.get('nameEn', ''),
-                            'total_quantity': 0,
-                            'order_count': 0,
-                            'is_pinned': False,
-                        }
-
-                    menu_sales[menu_id]['total_quantity'] += quantity
-                    menu_sales[menu_id]['order_count'] += 1
+            # Top sellers from the item sales facts (completed / ready / preparing, non-voided orders).
+            # limit + pinned is enough: pinned items can take at most that many of the top slots.
+            top_sales = rollup_service.get_top_items(
+                restaurant_id,
+                start_day,
+                end_day,
+                limit=limit + len(pinned_menus),
+                include_menu_ids=list(pinned_menus)
+            )
+
+            for row in top_sales:
+                menu_id = row['menu_id']
+                if menu_id not in menu_sales:
+                    menu_sales[menu_id] = {
+                        'menu_id': menu_id,
+                        'name': row.get('name') or '',
+                        'nameEn': row.get('name_en') or '',
+                        'total_quantity': 0,
+                        'order_count': 0,
+                        'is_pinned': False,
+                    }
+
+                menu_sales[menu_id]['total_quantity'] = row.get('quantity') or 0
+                menu_sales[menu_id]['order_count'] = row.get('order_count') or 0
 
             # Sort priority:
             # 1. Items with quantity >= 20 (sorted by quantity desc)
             # 2. Pinned items by owner
             # 3. Items with quantity < 20 (sorted by quantity desc)
-            MIN_QUANTITY_THRESHOLD = 20  # Minimum orders to be ranked above pinned items
 
             def sort_key(x):
                 quantity = x['total_quantity']
@@ -200,6 +208,22 @@ class BestSellersService:
             traceback.print_exc()
             return []
 
+    def _refresh_flags(self, restaurant_ids: List[str], days: int, limit: int) -> List[Dict[str, Any]]:
+        """
+        Rank top-N per restaurant and set is_best_seller for a batch of restaurants
+        (one aggregated query + one set-based UPDATE, migrations/create_bestseller_refresh.sql)
+
+        Returns:
+            Top items per restaurant: {restaurant_id, menu_id, rank, quantity, is_pinned, newly_flagged}
+        """
+        result = self.supabase_client.rpc(REFRESH_RPC_NAME, {
+            'p_restaurant_ids': restaurant_ids,
+            'p_days': days,
+            'p_limit': limit,
+            'p_min_quantity': MIN_QUANTITY_THRESHOLD,
+        }).execute()
+        return result.data or []
+
     def update_bestseller_flags(self, restaurant_id: str, days: int = 14) -> Dict[str, Any]:
         """
         อัพเดท is_best_seller flag ตามยอดสั่งซื้อ (เรียกทุก 2 สัปดาห์)
@@ -219,41 +243,13 @@ class BestSellersService:
             return {'success': False, 'error': 'Invalid restaurant ID'}
 
         try:
-            # Get current bestsellers
-            current_bestsellers = self.get_best_sellers(restaurant_id, days=days, limit=5)
-            current_ids = {item['menu_id'] for item in current_bestsellers}
-
-            # Get pinned menus (these should always stay as bestsellers)
-            pinned_result = self.supabase_client.table('menus').select('id').eq(
-                'restaurant_id', restaurant_id
-            ).eq('is_best_seller', True).execute()
-
-            pinned_ids = {menu['id'] for menu in (pinned_result.data or [])}
-
-            # Get all menus for this restaurant
-            all_menus = self.supabase_client.table('menus').select('id, is_best_seller').eq(
+            # Pinned menus (these always stay as bestsellers)
+            pinned_result = self.supabase_client.table('menus').select('id', count='exact').eq(
                 'restaurant_id', restaurant_id
-            ).execute()
+            ).eq('is_best_seller', True).limit(1).execute()
 
-            updated_count = 0
-
-            for menu in (all_menus.data or []):
-                menu_id = menu['id']
-                current_status = menu.get('is_best_seller', False)
-
-                # Should be bestseller if: in top 5 by sales OR manually pinned
-                should_be_bestseller = menu_id in current_ids or menu_id in pinned_ids
-
-                # Only update if status changed (and not pinned - don't unpin manually pinned items)
-                if current_status != should_be_bestseller:
-                    # Don't change manually pinned items
-                    if menu_id in pinned_ids:
-                        continue
-
-                    self.supabase_client.table('menus').update({
-                        'is_best_seller': should_be_bestseller
-                    }).eq('id', menu_id).execute()
-                    updated_count += 1
+            top_items = self._refresh_flags([restaurant_id], days, BESTSELLER_TOP_N)
+            updated_count = sum(1 for item in top_items if item.get('newly_flagged'))
 
             print(f"✅ Updated bestseller flags for restaurant {restaurant_id}: {updated_count} changes")
 
@@ -261,8 +257,8 @@ class BestSellersService:
                 'success': True,
                 'restaurant_id': restaurant_id,
                 'updated_count': updated_count,
-                'bestsellers': [item['menu_id'] for item in current_bestsellers],
-                'pinned_count': len(pinned_ids)
+                'bestsellers': [item['menu_id'] for item in top_items],
+                'pinned_count': pinned_result.count or 0
             }
 
         except Exception as e:
@@ -271,40 +267,121 @@ class BestSellersService:
             traceback.print_exc()
             return {'success': False, 'error': str(e)}
 
-    def update_all_restaurants_bestsellers(self, days: int = 14) -> Dict[str, Any]:
+    def _last_refresh_started_at(self) -> Optional[str]:
+        """Start time of the last completed refresh run (None = never ran)"""
+        result = self.supabase_client.table(REFRESH_RUNS_TABLE).select('started_at').eq(
+            'status', 'completed'
+        ).order('started_at', desc=True).limit(1).execute()
+        return result.data[0]['started_at'] if result.data else None
+
+    def update_all_restaurants_bestsellers(self, days: int = 14, force: bool = False) -> Dict[str, Any]:
         """
         อัพเดท bestseller flags สำหรับทุกร้าน (เรียกจาก cron job)
 
+        - ประมวลผลเฉพาะร้านที่มียอดขายใหม่ตั้งแต่รอบที่แล้ว (force=True = ทุกร้านที่มียอดขายในช่วง)
+        - แบ่งร้านเป็น batch ละ REFRESH_BATCH_SIZE ร้าน แต่ละ batch = 1 RPC (จัดอันดับ + UPDATE แบบ set-based)
+        - รัน batch พร้อมกันด้วย thread pool ขนาด REFRESH_MAX_WORKERS
+
         Args:
             days: จำนวนวันย้อนหลัง (default: 14)
+            force: Process every restaurant with sales in the window
 
         Returns:
-            Dict with update results for all restaurants
+            Dict with update results and timings
         """
         if not self.supabase_client:
             return {'success': False, 'error': 'Supabase client not available'}
 
+        started = time.perf_counter()
+        run_id = None
+
         try:
-            # Get all active restaurants
-            restaurants = self.supabase_client.table('restaurants').select('id, name').execute()
+            since = None if force else self._last_refresh_started_at()
 
-            results = []
-            for restaurant in (restaurants.data or []):
-                result = self.update_bestseller_flags(restaurant['id'], days=days)
-                results.append({
-                    'restaurant_id': restaurant['id'],
-                    'restaurant_name': restaurant['name'],
-                    **result
-                })
+            run = self.supabase_client.table(REFRESH_RUNS_TABLE).insert({'days': days}).execute()
+            run_id = run.data[0]['id'] if run.data else None
 
-            success_count = sum(1 for r in results if r.get('success'))
+            changed = self.supabase_client.rpc(CHANGED_RESTAURANTS_RPC_NAME, {
+                'p_since': since,
+                'p_start': (date.today() - timedelta(days=days)).isoformat(),
+            }).execute()
+            restaurant_ids = [row['restaurant_id'] for row in (changed.data or [])]
 
-            print(f"✅ Updated bestsellers for {success_count}/{len(results)} restaurants")
+            batches = [
+                restaurant_ids[i:i + REFRESH_BATCH_SIZE]
+                for i in range(0, len(restaurant_ids), REFRESH_BATCH_SIZE)
+            ]
+            print(f"🔄 Bestsellers refresh: {len(restaurant_ids)} restaurants with new sales "
+                  f"since {since or 'beginning'} in {len(batches)} batch(es)")
+
+            results = []
+            failed_count = 0
+            updated_count = 0
+            processed = 0
+
+            def run_batch(batch: List[str]):
+                batch_started = time.perf_counter()
+                return self._refresh_flags(batch, days, BESTSELLER_TOP_N), time.perf_counter() - batch_started
+
+            with ThreadPoolExecutor(max_workers=REFRESH_MAX_WORKERS) as pool:
+                futures = {pool.submit(run_batch, batch): batch for batch in batches}
+                for future in as_completed(futures):
+                    batch = futures[future]
+                    processed += len(batch)
+                    try:
+                        top_items, elapsed = future.result()
+                    except Exception as e:
+                        failed_count += len(batch)
+                        results.extend(
+                            {'restaurant_id': rid, 'success': False, 'error': str(e)} for rid in batch
+                        )
+                        print(f"❌ Bestsellers refresh: batch of {len(batch)} failed: {str(e)}")
+                        continue
+
+                    by_restaurant: Dict[str, List[Dict[str, Any]]] = {rid: [] for rid in batch}
+                    for item in top_items:
+                        by_restaurant.setdefault(item['restaurant_id'], []).append(item)
+
+                    batch_updated = 0
+                    for rid, items in by_restaurant.items():
+                        changes = sum(1 for item in items if item.get('newly_flagged'))
+                        batch_updated += changes
+                        results.append({
+                            'restaurant_id': rid,
+                            'success': True,
+                            'updated_count': changes,
+                            'bestsellers': [item['menu_id'] for item in items],
+                        })
+                    updated_count += batch_updated
+
+                    print(f"🔄 Bestsellers refresh: {processed}/{len(restaurant_ids)} restaurants "
+                          f"(+{batch_updated} flags, batch {elapsed * 1000:.0f} ms)")
+
+            duration_ms = int((time.perf_counter() - started) * 1000)
+            success_count = len(restaurant_ids) - failed_count
+
+            if run_id:
+                self.supabase_client.table(REFRESH_RUNS_TABLE).update({
+                    'status': 'completed' if failed_count == 0 else 'failed',
+                    'finished_at': datetime.now(timezone.utc).isoformat(),
+                    'restaurants_processed': success_count,
+                    'restaurants_failed': failed_count,
+                    'flags_updated': updated_count,
+                    'duration_ms': duration_ms,
+                }).eq('id', run_id).execute()
+
+            print(f"✅ Updated bestsellers for {success_count}/{len(restaurant_ids)} restaurants: "
+                  f"{updated_count} flags in {duration_ms} ms")
 
             return {
-                'success': True,
-                'total_restaurants': len(results),
+                'success': failed_count == 0,
+                'total_restaurants': len(restaurant_ids),
                 'success_count': success_count,
+                'failed_count': failed_count,
+                'updated_count': updated_count,
+                'batches': len(batches),
+                'since': since,
+                'duration_ms': duration_ms,
                 'results': results
             }
 
@@ -312,6 +389,15 @@ class BestSellersService:
             print(f"❌ Failed to update all restaurants bestsellers: {str(e)}")
             import traceback
             traceback.print_exc()
+            if run_id:
+                try:
+                    self.supabase_client.table(REFRESH_RUNS_TABLE).update({
+                        'status': 'failed',
+                        'finished_at': datetime.now(timezone.utc).isoformat(),
+                        'error': str(e),
+                    }).eq('id', run_id).execute()
+                except Exception:
+                    pass
             return {'success': False, 'error': str(e)}
 
 # Create singleton instance
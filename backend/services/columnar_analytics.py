@@ -0,0 +1,387 @@
+"""
+Columnar Analytics - in-process columnar engine สำหรับ dashboard ช่วงเวลายาว
+
+โหลดเฉพาะคอลัมน์ที่ใช้ (created_at, total_price, status, payment_status,
+payment_method, service_type) เป็น NumPy arrays แบบ typed แล้วคำนวณ
+group-by / histogram / period-over-period แบบ vectorized
+
+- ค่า categorical ถูกเก็บเป็น int codes (vocabulary ร่วมกันทั้ง process)
+- เก็บ warm window ต่อร้าน (และ '*' สำหรับทั้ง platform) ไว้ใน memory:
+  เรียกซ้ำจะโหลดใหม่เฉพาะช่วงท้าย (ออเดอร์ที่ยังเปลี่ยนสถานะได้)
+  และโหลดใหม่ทั้งหมดเมื่อ window หมดอายุ
+- numpy เป็น optional dependency: ถ้าไม่ได้ติดตั้ง NUMPY_AVAILABLE = False
+  และผู้เรียกใช้ path แบบ pure Python เดิม
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from dotenv import load_dotenv
+
+from .export_stream import iter_pages
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+# Load environment variables
+load_dotenv()
+
+ORDER_COLUMNS = ('created_at', 'total_price', 'status', 'payment_status', 'payment_method', 'service_type')
+CATEGORICAL_FIELDS = ('status', 'payment_status', 'payment_method', 'service_type')
+
+# Statuses counted as revenue by restaurant analytics (same as the rollups)
+COUNTED_STATUSES = ('completed', 'ready', 'preparing')
+
+# Rows per PostgREST page when loading a window
+LOAD_PAGE_SIZE = 1000
+# Full reload after this many seconds
+WARM_WINDOW_TTL_SECONDS = int(os.getenv('ANALYTICS_WARM_WINDOW_TTL_SECONDS', '900'))
+# Between full reloads, re-read only the most recent orders at most this often
+TAIL_REFRESH_SECONDS = 30
+# Orders newer than this may still change status / payment and are re-read on refresh
+MUTABLE_WINDOW_SECONDS = 48 * 3600
+# Max cached windows (one per restaurant + platform-wide)
+MAX_WARM_WINDOWS = 64
+
+SECONDS_PER_DAY = 86400
+
+
+def _to_epoch(value: Any) -> int:
+    """ISO timestamp from Supabase -> epoch seconds (naive = UTC)"""
+    if not value:
+        return 0
+    parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp())
+
+
+def _to_iso(epoch: int) -> str:
+    return datetime.fromtimestamp(epoch, tz=timezone.utc).isoformat()
+
+
+class _Vocabulary:
+    """Label <-> int code mapping shared by every loaded window"""
+
+    def __init__(self, seed: Sequence[str] = ()):
+        self.labels: List[str] = []
+        self.codes: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        for label in seed:
+            self.code(label)
+
+    def code(self, label: Optional[str]) -> int:
+        label = label or 'unknown'
+        code = self.codes.get(label)
+        if code is None:
+            with self._lock:
+                code = self.codes.get(label)
+                if code is None:
+                    code = len(self.labels)
+                    self.labels.append(label)
+                    self.codes[label] = code
+        return code
+
+    def encode(self, values: Iterable[Optional[str]]):
+        codes = self.codes
+        return np.fromiter(
+            (codes[v] if v in codes else self.code(v) for v in values),
+            dtype=np.int16
+        )
+
+
+VOCABULARIES = {
+    'status': _Vocabulary(('pending_payment', 'pending', 'confirmed', 'preparing', 'ready', 'completed', 'cancelled')),
+    'payment_status': _Vocabulary(('pending', 'paid', 'failed', 'refunded')),
+    'payment_method': _Vocabulary(('card', 'bank_transfer', 'cash')),
+    'service_type': _Vocabulary(('dine_in', 'pickup', 'delivery')),
+}
+
+
+class OrderColumns:
+    """Typed column arrays for a set of orders, sorted by created_at"""
+
+    __slots__ = ('created_at', 'total') + CATEGORICAL_FIELDS
+
+    def __init__(self, created_at, total, status, payment_status, payment_method, service_type):
+        self.created_at = created_at
+        self.total = total
+        self.status = status
+        self.payment_status = payment_status
+        self.payment_method = payment_method
+        self.service_type = service_type
+
+    @classmethod
+    def empty(cls) -> 'OrderColumns':
+        codes = np.empty(0, dtype=np.int16)
+        return cls(np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64), codes, codes, codes, codes)
+
+    @classmethod
+    def from_rows(cls, rows: List[Dict[str, Any]]) -> 'OrderColumns':
+        """Build columns from order rows (projected with ORDER_COLUMNS)"""
+        if not rows:
+            return cls.empty()
+
+        columns = cls(
+            np.fromiter((_to_epoch(row.get('created_at')) for row in rows), dtype=np.int64, count=len(rows)),
+            np.fromiter((float(row.get('total_price') or 0) for row in rows), dtype=np.float64, count=len(rows)),
+            *(VOCABULARIES[field].encode(row.get(field) for row in rows) for field in CATEGORICAL_FIELDS)
+        )
+        if len(rows) > 1 and np.any(columns.created_at[1:] < columns.created_at[:-1]):
+            columns = columns.take(np.argsort(columns.created_at, kind='stable'))
+        return columns
+
+    @classmethod
+    def concat(cls, parts: List['OrderColumns']) -> 'OrderColumns':
+        """Concatenate windows that are already in time order"""
+        parts = [part for part in parts if len(part)]
+        if not parts:
+            return cls.empty()
+        if len(parts) == 1:
+            return parts[0]
+        return cls(*(np.concatenate([getattr(part, name) for part in parts]) for name in cls.__slots__))
+
+    def __len__(self) -> int:
+        return len(self.created_at)
+
+    def take(self, index) -> 'OrderColumns':
+        """Rows selected by a boolean mask, index array or slice"""
+        return OrderColumns(*(getattr(self, name)[index] for name in self.__slots__))
+
+    def between(self, start_ts: Optional[int] = None, end_ts: Optional[int] = None) -> 'OrderColumns':
+        """Rows with start_ts <= created_at < end_ts (binary search, no copy)"""
+        lo = 0 if start_ts is None else int(np.searchsorted(self.created_at, start_ts, side='left'))
+        hi = len(self) if end_ts is None else int(np.searchsorted(self.created_at, end_ts, side='left'))
+        return self.take(slice(lo, hi))
+
+    def mask_in(self, field: str, labels: Iterable[str]):
+        """Boolean mask of rows whose categorical `field` is one of `labels`"""
+        vocabulary = VOCABULARIES[field]
+        codes = [vocabulary.codes[label] for label in labels if label in vocabulary.codes]
+        return np.isin(getattr(self, field), codes)
+
+
+# ==================== Vectorized operations ====================
+
+def group_by(columns: OrderColumns, field: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Count and sum total_price per label of a categorical column
+
+    Returns:
+        {label: {'count': int, 'amount': float}} for labels with at least one row
+    """
+    labels = VOCABULARIES[field].labels
+    codes = getattr(columns, field)
+    counts = np.bincount(codes, minlength=len(labels))
+    amounts = np.bincount(codes, weights=columns.total, minlength=len(labels))
+    return {
+        labels[code]: {'count': int(counts[code]), 'amount': round(float(amounts[code]), 2)}
+        for code in np.flatnonzero(counts)
+    }
+
+
+def histogram(
+    columns: OrderColumns,
+    start_ts: int,
+    bucket_seconds: int,
+    buckets: int,
+    utc_offset_seconds: int = 0
+):
+    """
+    Order count and revenue per fixed-size time bucket from start_ts
+
+    Returns:
+        (counts, amounts) arrays of length `buckets`
+    """
+    index = (columns.created_at + utc_offset_seconds - start_ts) // bucket_seconds
+    valid = (index >= 0) & (index < buckets)
+    index = index[valid]
+    counts = np.bincount(index, minlength=buckets)[:buckets]
+    amounts = np.bincount(index, weights=columns.total[valid], minlength=buckets)[:buckets]
+    return counts, amounts
+
+
+def hour_of_day_histogram(columns: OrderColumns, utc_offset_seconds: int = 0):
+    """Order count per hour of day (0-23)"""
+    hours = ((columns.created_at + utc_offset_seconds) // 3600) % 24
+    return np.bincount(hours, minlength=24)
+
+
+def _change_pct(current: float, previous: float) -> Optional[float]:
+    if previous == 0:
+        return None
+    return round((current - previous) / previous * 100, 1)
+
+
+def period_over_period(columns: OrderColumns, start_ts: int, end_ts: int) -> Dict[str, Any]:
+    """
+    Compare [start_ts, end_ts) with the preceding period of the same length
+
+    Only COUNTED_STATUSES are included (same rule as restaurant analytics).
+    """
+    length = end_ts - start_ts
+    counted = columns.take(columns.mask_in('status', COUNTED_STATUSES))
+
+    def summarize(window: OrderColumns) -> Dict[str, Any]:
+        orders = len(window)
+        revenue = float(window.total.sum()) if orders else 0.0
+        return {
+            'orders': orders,
+            'revenue': round(revenue, 2),
+            'average_order_value': round(revenue / orders, 2) if orders else 0,
+        }
+
+    current = summarize(counted.between(start_ts, end_ts))
+    previous = summarize(counted.between(start_ts - length, start_ts))
+
+    return {
+        'current': current,
+        'previous': previous,
+        'change_pct': {
+            key: _change_pct(current[key], previous[key])
+            for key in ('orders', 'revenue', 'average_order_value')
+        }
+    }
+
+
+def sum_by_label(labels: Sequence[Any], values: Sequence[float]) -> Dict[str, float]:
+    """Sum `values` per label (vectorized when numpy is available)"""
+    labels = ['unknown' if label is None else str(label) for label in labels]
+    if not NUMPY_AVAILABLE:
+        totals: Dict[str, float] = {}
+        for label, value in zip(labels, values):
+            totals[label] = totals.get(label, 0) + float(value or 0)
+        return {label: round(total, 2) for label, total in totals.items()}
+
+    if not labels:
+        return {}
+    unique, inverse = np.unique(np.asarray(labels, dtype=object), return_inverse=True)
+    sums = np.bincount(inverse, weights=np.asarray([float(v or 0) for v in values], dtype=np.float64))
+    return {str(label): round(float(total), 2) for label, total in zip(unique, sums)}
+
+
+# ==================== Warm window cache ====================
+
+class _WarmWindow:
+    __slots__ = ('columns', 'start_ts', 'loaded_at', 'refreshed_at')
+
+    def __init__(self, columns: OrderColumns, start_ts: int, now: float):
+        self.columns = columns
+        self.start_ts = start_ts
+        self.loaded_at = now
+        self.refreshed_at = now
+
+
+class ColumnarAnalyticsEngine:
+    """Loads and caches per-restaurant order columns"""
+
+    PLATFORM_KEY = '*'
+
+    def __init__(self, window_ttl: int = WARM_WINDOW_TTL_SECONDS, max_windows: int = MAX_WARM_WINDOWS):
+        self.window_ttl = window_ttl
+        self.max_windows = max_windows
+        self._windows: 'OrderedDict[str, _WarmWindow]' = OrderedDict()
+        self._lock = threading.Lock()
+
+        if not NUMPY_AVAILABLE:
+            print("⚠️ Columnar Analytics: numpy not installed - using pure Python paths")
+
+        try:
+            from supabase import create_client
+            supabase_url = os.getenv('SUPABASE_URL') or os.getenv('NEXT_PUBLIC_SUPABASE_URL')
+            supabase_key = (
+                os.getenv('SUPABASE_SERVICE_ROLE_KEY') or
+                os.getenv('SUPABASE_KEY') or
+                os.getenv('NEXT_PUBLIC_SUPABASE_ANON_KEY')
+            )
+
+            if supabase_url and supabase_key:
+                self.supabase = create_client(supabase_url, supabase_key)
+            else:
+                self.supabase = None
+        except Exception as e:
+            print(f"⚠️ Failed to initialize ColumnarAnalyticsEngine: {str(e)}")
+            self.supabase = None
+
+    @property
+    def available(self) -> bool:
+        return NUMPY_AVAILABLE and self.supabase is not None
+
+    def _load(self, restaurant_id: Optional[str], start_ts: int, end_ts: Optional[int] = None) -> OrderColumns:
+        """Page through orders in [start_ts, end_ts) by (created_at, id) keyset and build columns page by page"""
+        def apply_filters(query):
+            query = query.gte('created_at', _to_iso(start_ts))
+            if end_ts is not None:
+                query = query.lt('created_at', _to_iso(end_ts))
+            if restaurant_id:
+                query = query.eq('restaurant_id', restaurant_id)
+            return query
+
+        parts = [
+            OrderColumns.from_rows(rows)
+            for rows in iter_pages(self.supabase, 'orders', ORDER_COLUMNS, apply_filters, LOAD_PAGE_SIZE)
+        ]
+        return OrderColumns.concat(parts)
+
+    def get_columns(
+        self,
+        restaurant_id: Optional[str],
+        start: datetime,
+        end: Optional[datetime] = None
+    ) -> OrderColumns:
+        """
+        Order columns for a restaurant (None = whole platform) in [start, end)
+
+        Served from the warm window when it covers `start`; otherwise the
+        missing older range is loaded and prepended.
+        """
+        key = restaurant_id or self.PLATFORM_KEY
+        start_ts = int(start.timestamp())
+        end_ts = int(end.timestamp()) if end else None
+        now = time.time()
+
+        with self._lock:
+            window = self._windows.get(key)
+
+        if window is None or now - window.loaded_at > self.window_ttl:
+            window = _WarmWindow(self._load(restaurant_id, start_ts), start_ts, now)
+        else:
+            columns = window.columns
+            window_start = window.start_ts
+            if start_ts < window_start:
+                columns = OrderColumns.concat([self._load(restaurant_id, start_ts, window_start), columns])
+                window_start = start_ts
+            if now - window.refreshed_at > TAIL_REFRESH_SECONDS:
+                # Re-read recent orders: new ones plus status / payment changes
+                cut_ts = max(window_start, int(now) - MUTABLE_WINDOW_SECONDS)
+                columns = OrderColumns.concat([columns.between(None, cut_ts), self._load(restaurant_id, cut_ts)])
+                window.refreshed_at = now
+            window.columns, window.start_ts = columns, window_start
+
+        with self._lock:
+            self._windows[key] = window
+            self._windows.move_to_end(key)
+            while len(self._windows) > self.max_windows:
+                self._windows.popitem(last=False)
+
+        return window.columns.between(start_ts, end_ts)
+
+    def invalidate(self, restaurant_id: Optional[str] = None):
+        """Drop the warm window of a restaurant (None = all windows)"""
+        with self._lock:
+            if restaurant_id is None:
+                self._windows.clear()
+            else:
+                self._windows.pop(restaurant_id, None)
+
+
+# Create singleton instance
+columnar_engine = ColumnarAnalyticsEngine()
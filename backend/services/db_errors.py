@@ -0,0 +1,23 @@
+"""
+DB Errors - แยก error ของ Supabase / PostgREST ที่ service ต้องจัดการต่างกัน
+
+- RPC ที่ยังไม่ได้สร้าง (ยังไม่ได้รัน migration): PGRST202 / 42883
+  -> service ใช้ fallback จาก Python ได้
+- error อื่น (statement timeout, network, ข้อมูลผิด) ต้องไม่ fallback ไปเป็น table scan
+  แต่ให้ raise / ใช้ค่าเดิมแทน
+
+ใช้โดย AdminService, BatchLoader, OrdersService, MenuService, MenuCloneService
+"""
+
+# PostgREST (function not in schema cache) / Postgres (undefined_function) codes
+MISSING_FUNCTION_CODES = ('PGRST202', '42883')
+
+
+def is_missing_function(error: Exception) -> bool:
+    """True if an RPC failed because its migration has not been run"""
+    if getattr(error, 'code', None) in MISSING_FUNCTION_CODES:
+        return True
+    message = str(error)
+    return any(code in message for code in MISSING_FUNCTION_CODES) or (
+        'function' in message.lower() and 'does not exist' in message.lower()
+    )
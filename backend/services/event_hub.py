@@ -0,0 +1,132 @@
+"""
+Event Hub - In-process publish/subscribe สำหรับ realtime updates
+
+- Service publish event ไปที่ topic (เช่น "order:<id>", "restaurant:<id>")
+- Endpoint (SSE / long-poll) subscribe topic แล้วรอ event ผ่าน asyncio.Queue
+- Subscriber ที่อ่านไม่ทันจะถูกทิ้ง event เก่าที่สุด (ไม่ block publisher)
+
+In-memory (per process) - สำหรับหลาย instance ควรใช้ Redis pub/sub หรือ Supabase Realtime
+"""
+
+import asyncio
+import threading
+from collections import defaultdict
+from typing import Any, AsyncIterator, Dict, Optional, Set, Tuple
+
+DEFAULT_QUEUE_SIZE = 100
+
+
+class EventHub:
+    """
+    Topic-based fan-out hub.
+
+    Usage:
+        queue = hub.subscribe("order:123")
+        try:
+            event = await asyncio.wait_for(queue.get(), timeout=25)
+        finally:
+            hub.unsubscribe("order:123", queue)
+    """
+
+    def __init__(self, name: str, queue_size: int = DEFAULT_QUEUE_SIZE):
+        self.name = name
+        self.queue_size = queue_size
+        # Store: {topic: {(queue, loop), ...}}
+        self.subscribers: Dict[str, Set[Tuple[asyncio.Queue, asyncio.AbstractEventLoop]]] = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, topic: str) -> asyncio.Queue:
+        """Register a new subscriber queue for a topic (must be called inside the event loop)"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self.subscribers[topic].add((queue, asyncio.get_running_loop()))
+        return queue
+
+    def unsubscribe(self, topic: str, queue: asyncio.Queue) -> None:
+        """Remove a subscriber queue"""
+        with self._lock:
+            entries = self.subscribers.get(topic)
+            if not entries:
+                return
+            for entry in [e for e in entries if e[0] is queue]:
+                entries.discard(entry)
+            if not entries:
+                del self.subscribers[topic]
+
+    def subscriber_count(self, topic: Optional[str] = None) -> int:
+        """Number of subscribers for a topic (or all topics)"""
+        with self._lock:
+            if topic is not None:
+                return len(self.subscribers.get(topic, ()))
+            return sum(len(entries) for entries in self.subscribers.values())
+
+    @staticmethod
+    def _deliver(queue: asyncio.Queue, event: Dict[str, Any]) -> None:
+        """Put event on the queue, dropping the oldest event if the subscriber is slow"""
+        if queue.full():
+            try:
+                queue.get_nowait()
+            except asyncio.QueueEmpty:
+                pass
+        queue.put_nowait(event)
+
+    def publish(self, topic: str, event: Dict[str, Any]) -> int:
+        """
+        Publish an event to every subscriber of a topic.
+        Safe to call from sync service code (event loop thread or worker threads).
+
+        Returns:
+            Number of subscribers the event was delivered to
+        """
+        with self._lock:
+            entries = list(self.subscribers.get(topic, ()))
+
+        if not entries:
+            return 0
+
+        try:
+            current_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            current_loop = None
+
+        for queue, loop in entries:
+            try:
+                if loop is current_loop:
+                    self._deliver(queue, event)
+                else:
+                    loop.call_soon_threadsafe(self._deliver, queue, event)
+            except RuntimeError:
+                # Loop already closed - subscriber is gone
+                self.unsubscribe(topic, queue)
+
+        return len(entries)
+
+    async def listen(self, topic: str, timeout: Optional[float] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Async iterator over events for a topic.
+        Stops after `timeout` seconds without an event (None = wait forever).
+        """
+        queue = self.subscribe(topic)
+        try:
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    return
+                yield event
+        finally:
+            self.unsubscribe(topic, queue)
+
+
+def order_topic(order_id: str) -> str:
+    """Topic for a single order"""
+    return f"order:{order_id}"
+
+
+def restaurant_topic(restaurant_id: str) -> str:
+    """Topic for all events of a restaurant"""
+    return f"restaurant:{restaurant_id}"
+
+
+# Global hub for order state changes
+order_events = EventHub("orders")
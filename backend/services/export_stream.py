@@ -0,0 +1,181 @@
+"""
+Export Stream - stream ข้อมูลทั้งตารางเป็น CSV / NDJSON โดยใช้ memory คงที่
+
+- อ่านทีละหน้าแบบ keyset (created_at, id) แทน offset
+  หน้าถัดไปเริ่มต่อจากแถวสุดท้ายของหน้าก่อน ไม่ช้าลงเมื่อข้อมูลเยอะ
+- encode ทีละหน้าแล้ว yield เป็น bytes ให้ StreamingResponse
+- gzip แบบ streaming (zlib) ได้ตามต้องการ
+
+ใช้โดย OrdersService.export_orders และ AdminService.export_orders / export_payment_logs
+"""
+
+import csv
+import io
+import json
+import zlib
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+
+EXPORT_PAGE_SIZE = 1000
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+# Columns every keyset read needs (cursor), whether exported or not
+CURSOR_COLUMNS = ('created_at', 'id')
+
+# Exportable columns (whitelist) and defaults when ?columns= is omitted
+ORDER_EXPORT_COLUMNS = (
+    'id', 'restaurant_id', 'created_at', 'updated_at', 'paid_at', 'completed_at',
+    'table_no', 'service_type', 'status', 'payment_status', 'payment_method', 'payment_intent_id',
+    'subtotal', 'tax', 'surcharge_amount', 'delivery_fee', 'total_price',
+    'customer_name', 'customer_phone', 'special_instructions', 'items', 'customer_details',
+    'is_voided', 'void_reason', 'voided_at', 'cancel_reason',
+)
+ORDER_EXPORT_DEFAULT_COLUMNS = (
+    'id', 'created_at', 'paid_at', 'table_no', 'service_type', 'status',
+    'payment_status', 'payment_method', 'subtotal', 'tax', 'surcharge_amount',
+    'delivery_fee', 'total_price', 'is_voided',
+)
+PAYMENT_EXPORT_COLUMNS = (
+    'id', 'user_id', 'restaurant_id', 'created_at', 'updated_at', 'amount', 'currency',
+    'payment_type', 'payment_method', 'payment_status', 'plan', 'billing_interval',
+    'stripe_payment_id', 'stripe_invoice_id', 'stripe_subscription_id',
+    'bank_transfer_reference', 'bank_name', 'coupon_code', 'coupon_discount', 'admin_approved_at',
+)
+PAYMENT_EXPORT_DEFAULT_COLUMNS = (
+    'id', 'created_at', 'restaurant_id', 'user_id', 'amount', 'currency',
+    'payment_type', 'payment_method', 'payment_status', 'plan', 'billing_interval', 'coupon_code',
+)
+
+
+def parse_columns(requested: Optional[str], allowed: Sequence[str], default: Sequence[str]) -> List[str]:
+    """
+    Comma-separated column list -> validated list (None/empty = default)
+
+    Raises:
+        ValueError: If a column is not exportable
+    """
+    if not requested:
+        return list(default)
+
+    columns = [column.strip() for column in requested.split(',') if column.strip()]
+    unknown = [column for column in columns if column not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown export column(s): {', '.join(unknown)}. Allowed: {', '.join(allowed)}")
+    return list(dict.fromkeys(columns))
+
+
+def iter_pages(
+    supabase_client: Any,
+    table: str,
+    columns: Sequence[str],
+    apply_filters: Callable[[Any], Any],
+    page_size: int = EXPORT_PAGE_SIZE
+) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Yield pages of rows in (created_at, id) order using keyset pagination
+
+    Args:
+        supabase_client: Supabase client
+        table: Table name
+        columns: Columns to export (cursor columns are added automatically)
+        apply_filters: Adds date range / restaurant filters to a query
+        page_size: Rows per request
+    """
+    select = ', '.join(dict.fromkeys(list(columns) + list(CURSOR_COLUMNS)))
+    cursor = None
+
+    while True:
+        query = apply_filters(supabase_client.table(table).select(select))
+        if cursor:
+            created_at, row_id = cursor
+            query = query.or_(
+                f'created_at.gt."{created_at}",and(created_at.eq."{created_at}",id.gt.{row_id})'
+            )
+
+        rows = query.order('created_at').order('id').limit(page_size).execute().data or []
+        if rows:
+            yield rows
+        if len(rows) < page_size:
+            return
+        cursor = (rows[-1]['created_at'], rows[-1]['id'])
+
+
+def _cell(value: Any) -> Any:
+    # Nested JSON (e.g. order items) goes into a single CSV cell
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+    return value
+
+
+def encode_csv(pages: Iterable[List[Dict[str, Any]]], columns: Sequence[str]) -> Iterator[bytes]:
+    """CSV with a header row, one chunk per page"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # UTF-8 BOM so spreadsheet apps detect the encoding (Thai / Chinese names)
+    writer.writerow(columns)
+    yield ('﻿' + buffer.getvalue()).encode('utf-8')
+
+    for rows in pages:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([_cell(row.get(column)) for column in columns] for row in rows)
+        yield buffer.getvalue().encode('utf-8')
+
+
+def encode_ndjson(pages: Iterable[List[Dict[str, Any]]], columns: Sequence[str]) -> Iterator[bytes]:
+    """One JSON object per line, one chunk per page"""
+    for rows in pages:
+        yield ''.join(
+            json.dumps({column: row.get(column) for column in columns}, ensure_ascii=False, default=str) + '\n'
+            for row in rows
+        ).encode('utf-8')
+
+
+def gzip_chunks(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Streaming gzip (no full buffering)"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def stream_export(
+    supabase_client: Any,
+    table: str,
+    columns: Sequence[str],
+    apply_filters: Callable[[Any], Any],
+    export_format: str = 'csv',
+    gzip: bool = False
+) -> Iterator[bytes]:
+    """
+    Full export pipeline: keyset pages -> CSV / NDJSON -> optional gzip
+
+    Returns:
+        Iterator of bytes for StreamingResponse
+    """
+    pages = iter_pages(supabase_client, table, columns, apply_filters)
+    encode = encode_ndjson if export_format == 'ndjson' else encode_csv
+    chunks = encode(pages, columns)
+    return gzip_chunks(chunks) if gzip else chunks
+
+
+def date_range_filter(
+    start_date: Optional[str],
+    end_date: Optional[str],
+    **equals: Optional[str]
+) -> Callable[[Any], Any]:
+    """Build apply_filters for a created_at day range (UTC) plus equality filters"""
+    def apply(query):
+        if start_date:
+            query = query.gte('created_at', f"{start_date}T00:00:00")
+        if end_date:
+            query = query.lte('created_at', f"{end_date}T23:59:59")
+        for column, value in equals.items():
+            if value:
+                query = query.eq(column, value)
+        return query
+    return apply
@@ -0,0 +1,137 @@
+"""
+Idempotency Service - ป้องกันการสร้างออเดอร์/การจ่ายเงินซ้ำจากการ retry
+
+Client ส่ง header `Idempotency-Key` มากับ request:
+- ครั้งแรก: ประมวลผลตามปกติและเก็บผลลัพธ์ไว้ (TTL)
+- Retry ด้วย key เดิมภายใน TTL: ส่งผลลัพธ์เดิมกลับไปทันที (ไม่ insert / ไม่เรียก Stripe ซ้ำ)
+- Request ซ้ำที่เข้ามาพร้อมกันขณะครั้งแรกยังทำงานอยู่: รอผลลัพธ์เดียวกัน
+
+In-memory store (เหมือน RateLimiter) - สำหรับหลาย instance ควรย้ายไป Redis
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from fastapi import HTTPException
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+DEFAULT_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))  # 24 hours
+MAX_KEY_LENGTH = 255
+MAX_ENTRIES = 10000
+
+
+class IdempotencyStore:
+    """
+    In-memory idempotency store keyed by (scope, Idempotency-Key).
+
+    Only successful results are stored; failures are re-raised to every
+    waiter and the key is released so the client can retry.
+    """
+
+    def __init__(self, ttl_seconds: int = DEFAULT_TTL_SECONDS, max_entries: int = MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        # Store: {(scope, key): (expires_at, fingerprint, result)}
+        # Insertion order == expiry order (fixed TTL), so expired entries are always at the front
+        self.completed: 'OrderedDict[Tuple[str, str], Tuple[float, str, Any]]' = OrderedDict()
+        # In-flight executions: {(scope, key): (fingerprint, future)}
+        self.in_flight: Dict[Tuple[str, str], Tuple[str, asyncio.Future]] = {}
+
+    @staticmethod
+    def fingerprint(payload: Any) -> str:
+        """Stable hash of the request payload (detects key reuse with a different body)"""
+        raw = json.dumps(payload, sort_keys=True, default=str)
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def _clean_expired(self):
+        """Remove expired entries (and the oldest ones if the store is full) from the front"""
+        now = time.time()
+        while self.completed:
+            expires_at = next(iter(self.completed.values()))[0]
+            if expires_at > now and len(self.completed) <= self.max_entries:
+                break
+            self.completed.popitem(last=False)
+
+    async def run(
+        self,
+        scope: str,
+        key: Optional[str],
+        payload: Any,
+        func: Callable[[], Awaitable[Any]]
+    ) -> Tuple[Any, bool]:
+        """
+        Execute func once per (scope, key)
+
+        Args:
+            scope: Endpoint scope (e.g. 'orders:create')
+            key: Value of the Idempotency-Key header (None = no idempotency)
+            payload: Request payload used to detect key reuse
+            func: Coroutine factory that performs the real work
+
+        Returns:
+            (result, replayed) - replayed is True when the stored result was returned
+        """
+        if not key:
+            return await func(), False
+
+        key = key.strip()
+        if not key or len(key) > MAX_KEY_LENGTH:
+            raise HTTPException(status_code=400, detail=f"Invalid {IDEMPOTENCY_HEADER} header")
+
+        store_key = (scope, key)
+        fingerprint = self.fingerprint(payload)
+
+        self._clean_expired()
+
+        # Replay stored result
+        if store_key in self.completed:
+            _, stored_fingerprint, result = self.completed[store_key]
+            if stored_fingerprint != fingerprint:
+                raise HTTPException(
+                    status_code=422,
+                    detail=f"{IDEMPOTENCY_HEADER} was already used with a different request body"
+                )
+            print(f"♻️ Idempotency: Replaying stored response for {scope} ({key[:16]})")
+            return result, True
+
+        # Coalesce onto an in-flight execution
+        if store_key in self.in_flight:
+            stored_fingerprint, future = self.in_flight[store_key]
+            if stored_fingerprint != fingerprint:
+                raise HTTPException(
+                    status_code=422,
+                    detail=f"{IDEMPOTENCY_HEADER} was already used with a different request body"
+                )
+            print(f"⏳ Idempotency: Waiting for in-flight {scope} ({key[:16]})")
+            return await asyncio.shield(future), True
+
+        future = asyncio.get_running_loop().create_future()
+        self.in_flight[store_key] = (fingerprint, future)
+
+        try:
+            result = await func()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+                # Mark exception as retrieved when nobody is waiting
+                future.exception()
+            raise
+        else:
+            self.completed[store_key] = (time.time() + self.ttl_seconds, fingerprint, result)
+            if not future.done():
+                future.set_result(result)
+            return result, False
+        finally:
+            self.in_flight.pop(store_key, None)
+
+
+# Global idempotency store instance
+idempotency_store = IdempotencyStore()
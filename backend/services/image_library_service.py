@@ -5,8 +5,11 @@ import os
 from typing import Optional, Dict, Any, List
 from dotenv import load_dotenv
 import pathlib
+import time
 from datetime import datetime
 
+from .menu_service import menu_service
+
 try:
     from supabase import create_client, Client
     SUPABASE_AVAILABLE = True
@@ -23,6 +26,9 @@ else:
 SUPABASE_URL = os.getenv('SUPABASE_URL')
 SUPABASE_KEY = os.getenv('SUPABASE_SERVICE_ROLE_KEY') or os.getenv('SUPABASE_KEY')
 
+# Search-as-you-type: user's restaurant list is reused for this long
+USER_RESTAURANTS_TTL_SECONDS = 60
+
 
 class ImageLibraryService:
     """Service for managing shared image library across all user's restaurants"""
@@ -35,6 +41,17 @@ class ImageLibraryService:
                 print("✅ Image Library Service: Supabase client initialized")
             except Exception as e:
                 print(f"⚠️ Image Library Service: Failed to initialize: {str(e)}")
+        # Store: {user_id: (fetched_at, [restaurants])}
+        self._user_restaurants: Dict[str, Any] = {}
+
+    def _get_user_restaurants(self, user_id: str) -> List[Dict[str, Any]]:
+        cached = self._user_restaurants.get(user_id)
+        if cached and time.monotonic() - cached[0] < USER_RESTAURANTS_TTL_SECONDS:
+            return cached[1]
+        result = self.supabase_client.table('restaurants').select('id, name').eq('user_id', user_id).execute()
+        restaurants = result.data or []
+        self._user_restaurants[user_id] = (time.monotonic(), restaurants)
+        return restaurants
     
     def get_all_images_by_user(
         self, 
@@ -189,41 +206,35 @@ class ImageLibraryService:
         
         try:
             # ดึงร้านทั้งหมดของ user
-            restaurants_result = self.supabase_client.table('restaurants').select(
-                'id, name'
-            ).eq('user_id', user_id).execute()
+            restaurants = self._get_user_restaurants(user_id)
             
-            if not restaurants_result.data:
+            if not restaurants:
                 return []
             
-            restaurant_ids = [r['id'] for r in restaurants_result.data]
-            restaurant_map = {r['id']: r['name'] for r in restaurants_result.data}
+            restaurant_ids = [r['id'] for r in restaurants]
+            restaurant_map = {r['id']: r['name'] for r in restaurants}
             
-            # ค้นหา menu items (ค้นหาทั้งชื่อ original และ English)
-            result = self.supabase_client.table('menus').select(
-                'id, name_original, name_english, image_url, restaurant_id, created_at'
-            ).in_('restaurant_id', restaurant_ids).not_.is_(
-                'image_url', 'null'
-            ).or_(f'name_original.ilike.%{search_term}%,name_english.ilike.%{search_term}%').limit(limit).execute()
-
-            if not result.data:
-                return []
+            # ค้นหาจาก in-memory n-gram index (ชื่อ / คำแปล, prefix / substring / fuzzy)
+            matches = menu_service.search_menus(restaurant_ids, search_term, limit * 2, require_image=True)
 
             images = []
             seen_urls = set()
-            for item in result.data:
+            for item in matches:
                 image_url = item.get('image_url')
                 if image_url and image_url not in seen_urls:
                     seen_urls.add(image_url)
-                    menu_name = item.get('name_english') or item.get('name_original') or 'Unknown'
+                    menu_name = item.get('nameEn') or item.get('name') or 'Unknown'
                     images.append({
-                        'image_id': item['id'],
+                        'image_id': item['menu_id'],
                         'image_url': image_url,
                         'menu_name': menu_name,
                         'restaurant_id': item['restaurant_id'],
                         'restaurant_name': restaurant_map.get(item['restaurant_id'], 'Unknown'),
-                        'created_at': item.get('created_at')
+                        'created_at': item.get('created_at'),
+                        'score': item['score']
                     })
+                    if len(images) >= limit:
+                        break
 
             return images
             
@@ -0,0 +1,77 @@
+"""
+JSON Response - serialize response ด้วย orjson (fallback เป็น stdlib json ถ้าไม่ได้ติดตั้ง)
+
+- FastJSONResponse: default_response_class ของแอป (main_ai.py)
+- json_response(): คืน response ตรงจาก endpoint เพื่อข้าม jsonable_encoder
+  ใช้กับ payload ที่มาจาก database / service อยู่แล้ว (dict, list, str, ตัวเลข, bool, None,
+  date / datetime, UUID, Decimal, numpy) เท่านั้น - ไม่ใช้กับ Pydantic model ที่ต้อง validate
+- dumps(): bytes แบบ compact สำหรับ cache ที่ serialize ไว้ล่วงหน้า (menu_wire)
+
+Benchmark: python scripts/bench_json_serialization.py
+"""
+
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Dict, Optional
+from uuid import UUID
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+    print("⚠️ orjson not installed - using stdlib json for responses")
+
+if ORJSON_AVAILABLE:
+    ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _default(value: Any) -> Any:
+    """Types orjson does not serialize natively"""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, bytes):
+        return value.decode('utf-8', errors='replace')
+    if hasattr(value, 'model_dump'):
+        return value.model_dump(mode='json')
+    if hasattr(value, 'item'):
+        # numpy scalar
+        return value.item()
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def _stdlib_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    return _default(value)
+
+
+def dumps(content: Any) -> bytes:
+    """Compact UTF-8 JSON bytes"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(content, default=_default, option=ORJSON_OPTIONS)
+    return json.dumps(
+        content, ensure_ascii=False, separators=(',', ':'), default=_stdlib_default
+    ).encode('utf-8')
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def json_response(content: Any, status_code: int = 200, headers: Optional[Dict[str, str]] = None) -> FastJSONResponse:
+    """Response ที่ไม่ผ่าน jsonable_encoder (content ต้องเป็นชนิดที่ dumps() รองรับ)"""
+    return FastJSONResponse(content=content, status_code=status_code, headers=headers)
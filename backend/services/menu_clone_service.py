@@ -0,0 +1,313 @@
+"""
+Menu Clone Service - คัดลอกเมนูทั้งร้านไปยังอีกร้านเป็น background job
+
+- คัดลอก menus (options / variants / image_url เดิม) และ menu_translations ที่ cache ไว้
+  แบบ set-based ทีละ batch ผ่าน RPC clone_menu_batch (migrations/create_menu_clone.sql)
+- ไม่อัปโหลดรูปซ้ำ: ร้านปลายทางใช้ image_url เดียวกับร้านต้นทาง
+- สถานะ / progress ของงานเก็บใน menu_clone_jobs (อ่านผ่าน GET /api/menus/clone/{job_id})
+- ถ้ายังไม่ได้รัน migration (RPC ไม่มีอยู่) จะ fallback เป็น multi-row insert จาก Python
+  error อื่นจาก RPC ทำให้งาน failed
+- หลัง clone เสร็จ enqueue การแปลล่วงหน้าของร้านปลายทาง (MenuTranslationService)
+
+ใช้โดย POST /api/menus/clone
+"""
+
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from .db_errors import is_missing_function
+from .menu_service import menu_service, BULK_INSERT_CHUNK_SIZE
+from .menu_translation_service import menu_translation_service
+
+CLONE_RPC_NAME = 'clone_menu_batch'
+JOBS_TABLE = 'menu_clone_jobs'
+
+# Source rows per clone_menu_batch call (one progress update per batch)
+CLONE_BATCH_SIZE = 100
+# Concurrent clone jobs per process
+CLONE_MAX_WORKERS = 2
+
+# Copied as-is; id / restaurant_id / timestamps are assigned for the target
+CLONE_MENU_COLUMNS = (
+    'name_original', 'name_english', 'description_original', 'description_english',
+    'price', 'image_url', 'category', 'category_english', 'language_code', 'display_mode',
+    'is_active', 'is_featured', 'is_best_seller', 'menu_type', 'options', 'variants', 'sort_order',
+)
+CLONE_TRANSLATION_COLUMNS = (
+    'menu_id, language_code, translated_name, translated_description, translated_category, '
+    'translated_meats, translated_addons, source_hash'
+)
+
+JOB_FIELDS = (
+    'id', 'user_id', 'source_restaurant_id', 'target_restaurant_id', 'status', 'filters',
+    'total_items', 'processed_items', 'copied_items', 'copied_translations', 'error',
+    'created_at', 'started_at', 'finished_at',
+)
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class MenuCloneService:
+    """Background whole-menu clone jobs with progress"""
+
+    def __init__(self):
+        self.supabase_client = menu_service.supabase_client
+        self._executor = ThreadPoolExecutor(max_workers=CLONE_MAX_WORKERS, thread_name_prefix='menu-clone')
+        # In-process state of queued / running jobs; finished jobs are read back from menu_clone_jobs
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+
+    def start_clone(
+        self,
+        user_id: str,
+        source_restaurant_id: str,
+        target_restaurant_id: str,
+        menu_ids: Optional[List[str]] = None,
+        categories: Optional[List[str]] = None,
+        skip_existing: bool = True
+    ) -> Dict[str, Any]:
+        """
+        สร้างงาน clone และเริ่มรันใน background
+
+        Args:
+            user_id: เจ้าของทั้งสองร้าน (ตรวจสิทธิ์ที่ endpoint แล้ว)
+            source_restaurant_id: ร้านต้นทาง
+            target_restaurant_id: ร้านปลายทาง
+            menu_ids: เฉพาะเมนูเหล่านี้ (None = ทั้งร้าน)
+            categories: เฉพาะหมวดเหล่านี้ (None = ทุกหมวด)
+            skip_existing: ข้ามเมนูที่ร้านปลายทางมีชื่อ + หมวดเดียวกันอยู่แล้ว
+
+        Returns:
+            Job dict (status 'pending') หรือ {"error": ...}
+        """
+        if not self.supabase_client:
+            return {'error': 'Database not available'}
+
+        if source_restaurant_id == target_restaurant_id:
+            return {'error': 'Source and target restaurant must be different'}
+
+        filters = {
+            'menu_ids': list(dict.fromkeys(menu_ids)) if menu_ids else None,
+            'categories': list(dict.fromkeys(categories)) if categories else None,
+            'skip_existing': skip_existing,
+        }
+
+        try:
+            total = self._count_source_items(source_restaurant_id, filters)
+        except Exception as e:
+            print(f"❌ Menu Clone: Error counting source menu: {str(e)}")
+            return {'error': str(e)}
+
+        if total == 0:
+            return {'error': 'No menu items to clone'}
+
+        job = {
+            'id': str(uuid.uuid4()),
+            'user_id': user_id,
+            'source_restaurant_id': source_restaurant_id,
+            'target_restaurant_id': target_restaurant_id,
+            'status': 'pending',
+            'filters': filters,
+            'total_items': total,
+            'processed_items': 0,
+            'copied_items': 0,
+            'copied_translations': 0,
+            'error': None,
+            'created_at': _now(),
+            'started_at': None,
+            'finished_at': None,
+        }
+        self._jobs[job['id']] = job
+        self._save_job(job, insert=True)
+
+        self._executor.submit(self._run_job, job['id'])
+        print(f"✅ Menu Clone: Job {job['id']} queued ({total} items, {source_restaurant_id} → {target_restaurant_id})")
+        return self._public_job(job)
+
+    def get_job(self, job_id: str, user_id: str) -> Optional[Dict[str, Any]]:
+        """สถานะ / progress ของงาน (None ถ้าไม่พบหรือไม่ใช่งานของ user)"""
+        job = self._jobs.get(job_id)
+        if job is None and self.supabase_client:
+            try:
+                result = self.supabase_client.table(JOBS_TABLE).select('*').eq('id', job_id).limit(1).execute()
+                job = result.data[0] if result.data else None
+            except Exception as e:
+                print(f"⚠️ Menu Clone: Could not load job {job_id}: {str(e)}")
+
+        if not job or job.get('user_id') != user_id:
+            return None
+        return self._public_job(job)
+
+    def _public_job(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        public = {field: job.get(field) for field in JOB_FIELDS}
+        total = public.get('total_items') or 0
+        public['progress'] = round(100.0 * (public.get('processed_items') or 0) / total, 1) if total else 0.0
+        return public
+
+    def _count_source_items(self, source_restaurant_id: str, filters: Dict[str, Any]) -> int:
+        query = self.supabase_client.table('menus').select('id', count='exact').eq('restaurant_id', source_restaurant_id).eq('is_active', True)
+        if filters.get('menu_ids'):
+            query = query.in_('id', filters['menu_ids'])
+        if filters.get('categories'):
+            query = query.in_('category', filters['categories'])
+        result = query.limit(1).execute()
+        return result.count or 0
+
+    def _save_job(self, job: Dict[str, Any], insert: bool = False) -> None:
+        """Persist job state (best effort; in-process state stays authoritative)"""
+        try:
+            if insert:
+                self.supabase_client.table(JOBS_TABLE).insert(job).execute()
+            else:
+                fields = {k: v for k, v in job.items() if k not in ('id', 'user_id', 'created_at')}
+                self.supabase_client.table(JOBS_TABLE).update(fields).eq('id', job['id']).execute()
+        except Exception as e:
+            print(f"⚠️ Menu Clone: Could not persist job {job['id']}: {str(e)}")
+
+    def _run_job(self, job_id: str) -> None:
+        job = self._jobs[job_id]
+        job['status'] = 'running'
+        job['started_at'] = _now()
+        self._save_job(job)
+
+        try:
+            use_rpc = True
+            after_id = None
+            while True:
+                if use_rpc:
+                    try:
+                        batch = self._clone_batch_rpc(job, after_id)
+                    except Exception as e:
+                        if not is_missing_function(e):
+                            raise
+                        print(f"⚠️ Menu Clone: {CLONE_RPC_NAME} RPC unavailable, falling back to Python inserts: {str(e)}")
+                        use_rpc = False
+                        continue
+                else:
+                    batch = self._clone_batch_fallback(job, after_id)
+
+                if batch['processed'] == 0:
+                    break
+
+                job['processed_items'] += batch['processed']
+                job['copied_items'] += batch['copied']
+                job['copied_translations'] += batch['translations']
+                self._save_job(job)
+                after_id = batch['last_id']
+
+                if batch['processed'] < CLONE_BATCH_SIZE:
+                    break
+
+            job['status'] = 'completed'
+            # Items may have been added / removed after the initial count
+            job['total_items'] = job['processed_items']
+            print(f"✅ Menu Clone: Job {job_id} completed ({job['copied_items']} items, {job['copied_translations']} translations)")
+            if job['copied_items']:
+                menu_translation_service.invalidate_cache(job['target_restaurant_id'])
+                # Languages enabled only on the target restaurant are still missing
+                menu_translation_service.enqueue(job['target_restaurant_id'])
+        except Exception as e:
+            job['status'] = 'failed'
+            job['error'] = str(e)
+            print(f"❌ Menu Clone: Job {job_id} failed: {str(e)}")
+            import traceback
+            traceback.print_exc()
+        finally:
+            job['finished_at'] = _now()
+            self._save_job(job)
+            self._jobs.pop(job_id, None)
+
+    def _clone_batch_rpc(self, job: Dict[str, Any], after_id: Optional[str]) -> Dict[str, Any]:
+        filters = job['filters']
+        result = self.supabase_client.rpc(CLONE_RPC_NAME, {
+            'p_source_restaurant_id': job['source_restaurant_id'],
+            'p_target_restaurant_id': job['target_restaurant_id'],
+            'p_after_id': after_id,
+            'p_batch_size': CLONE_BATCH_SIZE,
+            'p_menu_ids': filters.get('menu_ids'),
+            'p_categories': filters.get('categories'),
+            'p_skip_existing': filters.get('skip_existing', True),
+        }).execute()
+        row = (result.data or [{}])[0]
+        return {
+            'processed': int(row.get('processed') or 0),
+            'copied': int(row.get('copied') or 0),
+            'translations': int(row.get('translations') or 0),
+            'last_id': row.get('last_id'),
+        }
+
+    def _clone_batch_fallback(self, job: Dict[str, Any], after_id: Optional[str]) -> Dict[str, Any]:
+        """Same batch as clone_menu_batch using multi-row inserts"""
+        filters = job['filters']
+        query = self.supabase_client.table('menus').select('id, ' + ', '.join(CLONE_MENU_COLUMNS)).eq(
+            'restaurant_id', job['source_restaurant_id']
+        ).eq('is_active', True)
+        if after_id:
+            query = query.gt('id', after_id)
+        if filters.get('menu_ids'):
+            query = query.in_('id', filters['menu_ids'])
+        if filters.get('categories'):
+            query = query.in_('category', filters['categories'])
+        source_rows = query.order('id').limit(CLONE_BATCH_SIZE).execute().data or []
+
+        if not source_rows:
+            return {'processed': 0, 'copied': 0, 'translations': 0, 'last_id': after_id}
+
+        to_copy = source_rows
+        if filters.get('skip_existing', True):
+            existing = self.supabase_client.table('menus').select('name_original, category').eq(
+                'restaurant_id', job['target_restaurant_id']
+            ).eq('is_active', True).in_('name_original', [r['name_original'] for r in source_rows]).execute()
+            existing_keys = {
+                ((r.get('name_original') or '').lower(), (r.get('category') or '').lower())
+                for r in existing.data or []
+            }
+            to_copy = [
+                r for r in source_rows
+                if ((r.get('name_original') or '').lower(), (r.get('category') or '').lower()) not in existing_keys
+            ]
+
+        # New ids up front so translations can follow their menu row
+        id_map = {r['id']: str(uuid.uuid4()) for r in to_copy}
+        new_rows = [
+            {
+                **{column: r.get(column) for column in CLONE_MENU_COLUMNS},
+                'id': id_map[r['id']],
+                'restaurant_id': job['target_restaurant_id'],
+            }
+            for r in to_copy
+        ]
+        for start in range(0, len(new_rows), BULK_INSERT_CHUNK_SIZE):
+            self.supabase_client.table('menus').insert(new_rows[start:start + BULK_INSERT_CHUNK_SIZE]).execute()
+
+        translations = 0
+        if id_map:
+            cached = self.supabase_client.table('menu_translations').select(CLONE_TRANSLATION_COLUMNS).eq(
+                'restaurant_id', job['source_restaurant_id']
+            ).in_('menu_id', list(id_map)).execute()
+            new_translations = [
+                {**t, 'restaurant_id': job['target_restaurant_id'], 'menu_id': id_map[str(t['menu_id'])], 'updated_at': _now()}
+                for t in cached.data or []
+                if str(t.get('menu_id')) in id_map
+            ]
+            for start in range(0, len(new_translations), BULK_INSERT_CHUNK_SIZE):
+                self.supabase_client.table('menu_translations').upsert(
+                    new_translations[start:start + BULK_INSERT_CHUNK_SIZE],
+                    on_conflict='restaurant_id,menu_id,language_code',
+                    ignore_duplicates=True
+                ).execute()
+            translations = len(new_translations)
+
+        return {
+            'processed': len(source_rows),
+            'copied': len(new_rows),
+            'translations': translations,
+            'last_id': source_rows[-1]['id'],
+        }
+
+
+# Create singleton instance
+menu_clone_service = MenuCloneService()
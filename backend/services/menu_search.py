@@ -0,0 +1,271 @@
+"""
+Menu Search - in-memory n-gram inverted index ของชื่อเมนู / คำอธิบาย / คำแปลที่ cache ไว้
+
+- รองรับภาษาไทย, จีน / ญี่ปุ่น / เกาหลี (ไม่มีช่องว่างระหว่างคำ) และอักษรละติน
+  normalize: NFKC + casefold, ตัด accent ของอักษรละติน (phở -> pho) แต่คงวรรณยุกต์ / สระไทย
+- index n-gram ขนาด 2 และ 3 ตัวอักษรต่อคำ (padding ต้นคำ / ท้ายคำด้วยช่องว่าง)
+- ranking: ตรงทั้งคำ > prefix > prefix ของคำ > substring > fuzzy (สัดส่วน n-gram ที่ตรงกัน)
+  ถ่วงน้ำหนักตาม field (ชื่อ > คำแปล > หมวด > คำอธิบาย)
+- index แยกต่อร้าน เก็บ menu version ล่าสุดที่ sync แล้ว
+  MenuService.search_menus sync แบบ incremental ด้วย delta (get_menu_changes)
+
+ใช้โดย MenuService.search_menus (GET /api/menus/search) และ ImageLibraryService.search_images
+"""
+
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+NGRAM_SIZES = (2, 3)
+# Minimum share of query n-grams a field must contain to count as a fuzzy match
+FUZZY_MIN_SIMILARITY = 0.45
+# LRU bound: restaurants with an index in memory
+MAX_INDEXED_RESTAURANTS = 2000
+
+# Field weights (translations use TRANSLATION_WEIGHT for every language)
+FIELD_WEIGHTS = {
+    'name': 1.0,
+    'nameEn': 1.0,
+    'category': 0.6,
+    'categoryEn': 0.6,
+    'description': 0.4,
+    'descriptionEn': 0.4,
+}
+TRANSLATION_WEIGHT = 0.9
+TRANSLATION_DESCRIPTION_WEIGHT = 0.35
+
+# Match kinds, best first
+EXACT_SCORE = 3.0
+PREFIX_SCORE = 2.0
+WORD_PREFIX_SCORE = 1.6
+SUBSTRING_SCORE = 1.2
+
+
+def _is_latin(ch: str) -> bool:
+    return ch < 'ɐ'
+
+
+def normalize(text: Any) -> str:
+    """casefold + NFKC, ตัด accent ละติน, เครื่องหมายวรรคตอนเป็นช่องว่าง"""
+    if not text:
+        return ''
+    decomposed = unicodedata.normalize('NFD', unicodedata.normalize('NFKC', str(text)).casefold())
+    chars = []
+    base = ''
+    for ch in decomposed:
+        if unicodedata.category(ch).startswith('M'):
+            # Latin accents are dropped; Thai vowels / tone marks are part of the word
+            if base and not _is_latin(base):
+                chars.append(ch)
+            continue
+        base = ch
+        chars.append(ch if ch.isalnum() else ' ')
+    return ' '.join(unicodedata.normalize('NFC', ''.join(chars)).split())
+
+
+def ngrams(text: str, padded: bool = True) -> Set[str]:
+    """n-grams of each word in normalized text (padded words also yield prefix / suffix grams)"""
+    grams: Set[str] = set()
+    for word in text.split():
+        if padded:
+            word = f' {word} '
+        for size in NGRAM_SIZES:
+            for start in range(len(word) - size + 1):
+                grams.add(word[start:start + size])
+    return grams
+
+
+def _query_grams(query: str) -> Set[str]:
+    # Unpadded: a query may start or end mid-word (substring search)
+    return ngrams(query, padded=False)
+
+
+def _match_score(query: str, text: str, grams: Set[str], query_grams: Set[str]) -> float:
+    if text == query:
+        return EXACT_SCORE
+    if text.startswith(query):
+        return PREFIX_SCORE
+    position = text.find(query)
+    if position > 0:
+        return WORD_PREFIX_SCORE if text[position - 1] == ' ' else SUBSTRING_SCORE
+    if not query_grams:
+        return 0.0
+    similarity = len(query_grams & grams) / len(query_grams)
+    return similarity if similarity >= FUZZY_MIN_SIMILARITY else 0.0
+
+
+class _Document:
+    __slots__ = ('item', 'fields')
+
+    def __init__(self, item: Dict[str, Any], fields: List[Tuple[str, float, str, Set[str]]]):
+        self.item = item
+        self.fields = fields
+
+    def grams(self) -> Set[str]:
+        return set().union(*(grams for _, _, _, grams in self.fields)) if self.fields else set()
+
+
+class RestaurantIndex:
+    """Inverted index of one restaurant's active menu items"""
+
+    def __init__(self, version: Optional[int]):
+        self.version = version
+        self.synced_at = time.monotonic()
+        self.loaded_at = self.synced_at
+        self.stale = False
+        self.docs: Dict[str, _Document] = {}
+        self.postings: Dict[str, Set[str]] = {}
+
+    def upsert(self, item: Dict[str, Any], translations: Iterable[Dict[str, Any]] = ()) -> None:
+        menu_id = item.get('menu_id')
+        if not menu_id:
+            return
+        self.remove(menu_id)
+
+        fields = []
+        for name, weight in FIELD_WEIGHTS.items():
+            text = normalize(item.get(name))
+            if text and not any(text == existing for _, _, existing, _ in fields):
+                fields.append((name, weight, text, ngrams(text)))
+        for translation in translations:
+            language = translation.get('language_code') or ''
+            for column, weight in (('translated_name', TRANSLATION_WEIGHT), ('translated_description', TRANSLATION_DESCRIPTION_WEIGHT)):
+                text = normalize(translation.get(column))
+                if text and not any(text == existing for _, _, existing, _ in fields):
+                    fields.append((f'{column}:{language}', weight, text, ngrams(text)))
+
+        doc = _Document({
+            'menu_id': menu_id,
+            'restaurant_id': item.get('restaurant_id'),
+            'name': item.get('name'),
+            'nameEn': item.get('nameEn'),
+            'category': item.get('category'),
+            'price': item.get('price'),
+            'image_url': item.get('image_url') or item.get('photo_url'),
+            'created_at': item.get('created_at'),
+        }, fields)
+        self.docs[menu_id] = doc
+        for gram in doc.grams():
+            self.postings.setdefault(gram, set()).add(menu_id)
+
+    def remove(self, menu_id: str) -> None:
+        doc = self.docs.pop(menu_id, None)
+        if doc is None:
+            return
+        for gram in doc.grams():
+            ids = self.postings.get(gram)
+            if ids is not None:
+                ids.discard(menu_id)
+                if not ids:
+                    del self.postings[gram]
+
+    def search(self, query: str, limit: int, require_image: bool = False) -> List[Dict[str, Any]]:
+        query_grams = _query_grams(query)
+
+        if query_grams:
+            hits: Dict[str, int] = {}
+            for gram in query_grams:
+                for menu_id in self.postings.get(gram, ()):
+                    hits[menu_id] = hits.get(menu_id, 0) + 1
+            threshold = FUZZY_MIN_SIMILARITY * len(query_grams)
+            candidates = [menu_id for menu_id, count in hits.items() if count >= threshold]
+        else:
+            # Single character: too short for n-grams, scan this restaurant's documents
+            candidates = list(self.docs)
+
+        results = []
+        for menu_id in candidates:
+            doc = self.docs[menu_id]
+            if require_image and not doc.item.get('image_url'):
+                continue
+            best, matched = 0.0, None
+            for name, weight, text, grams in doc.fields:
+                score = weight * _match_score(query, text, grams, query_grams)
+                if score > best:
+                    best, matched = score, name
+            if best > 0:
+                results.append({**doc.item, 'score': round(best, 3), 'matched': matched})
+
+        results.sort(key=lambda r: (-r['score'], str(r.get('name') or '')))
+        return results[:limit]
+
+
+class MenuSearchIndex:
+    """Per-restaurant indexes with LRU eviction"""
+
+    def __init__(self, max_restaurants: int = MAX_INDEXED_RESTAURANTS):
+        self.max_restaurants = max_restaurants
+        self._indexes: 'OrderedDict[str, RestaurantIndex]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, restaurant_id: str) -> Optional[RestaurantIndex]:
+        with self._lock:
+            index = self._indexes.get(restaurant_id)
+            if index is not None:
+                self._indexes.move_to_end(restaurant_id)
+            return index
+
+    def replace(self, restaurant_id: str, index: RestaurantIndex) -> None:
+        with self._lock:
+            self._indexes[restaurant_id] = index
+            self._indexes.move_to_end(restaurant_id)
+            while len(self._indexes) > self.max_restaurants:
+                self._indexes.popitem(last=False)
+
+    def apply(
+        self,
+        restaurant_id: str,
+        version: Optional[int],
+        items: List[Dict[str, Any]],
+        deleted: Iterable[str],
+        translations: Dict[str, List[Dict[str, Any]]]
+    ) -> None:
+        """Apply a menu delta (changed items + deleted ids) and record the synced version"""
+        with self._lock:
+            index = self._indexes.get(restaurant_id)
+            if index is None:
+                return
+            for menu_id in deleted:
+                index.remove(menu_id)
+            for item in items:
+                index.upsert(item, translations.get(str(item.get('menu_id')), []))
+            index.version = version
+            index.synced_at = time.monotonic()
+            index.stale = False
+
+    def mark_stale(self, restaurant_id: Optional[str]) -> None:
+        """Next search syncs this restaurant before answering (called after menu writes)"""
+        if not restaurant_id:
+            return
+        with self._lock:
+            index = self._indexes.get(restaurant_id)
+            if index is not None:
+                index.stale = True
+
+    def search(
+        self,
+        restaurant_ids: Iterable[str],
+        query: str,
+        limit: int = 20,
+        require_image: bool = False
+    ) -> List[Dict[str, Any]]:
+        """Ranked matches across the given restaurants (already synced by the caller)"""
+        normalized = normalize(query)
+        if not normalized:
+            return []
+
+        results = []
+        for restaurant_id in restaurant_ids:
+            index = self.get(restaurant_id)
+            if index is not None:
+                with self._lock:
+                    results.extend(index.search(normalized, limit, require_image))
+
+        results.sort(key=lambda r: (-r['score'], str(r.get('name') or '')))
+        return results[:limit]
+
+
+# Create singleton instance
+menu_search_index = MenuSearchIndex()
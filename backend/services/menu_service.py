@@ -8,6 +8,11 @@ from supabase import create_client, Client
 from dotenv import load_dotenv
 import pathlib
 import re
+import time
+
+from .db_errors import is_missing_function
+from .menu_wire import menu_wire_cache, COMPACT_MENU_COLUMNS
+from .menu_search import menu_search_index, RestaurantIndex
 
 # Load environment variables
 env_path = pathlib.Path(__file__).parent.parent.parent / '.env'
@@ -30,6 +35,76 @@ if SUPABASE_SERVICE_KEY:
 else:
     print("⚠️ Menu Service: Using ANON_KEY (subject to RLS policies)")
 
+# Bulk import: rows per multi-row insert and max items per request
+BULK_INSERT_CHUNK_SIZE = 100
+MAX_BULK_IMPORT_ITEMS = 1000
+# Multi-row inserts need the same columns on every row
+BULK_ROW_DEFAULTS = {
+    "image_url": None,
+    "category_english": None,
+    "is_best_seller": False,
+    "menu_type": "food",
+    "options": {},
+}
+
+# Delta sync (migrations/create_menu_versions.sql)
+MENU_VERSIONS_TABLE = 'menu_versions'
+MENU_TOMBSTONES_TABLE = 'menu_tombstones'
+# Max changed + deleted items per delta response
+DELTA_PAGE_SIZE = 500
+
+# Search index (services/menu_search.py): delta sync at most every SEARCH_SYNC_SECONDS
+# per restaurant, full reload (picks up translation edits) every SEARCH_RELOAD_SECONDS
+SEARCH_SYNC_SECONDS = 5
+SEARCH_RELOAD_SECONDS = 600
+SEARCH_TRANSLATION_COLUMNS = 'menu_id, language_code, translated_name, translated_description'
+# menu_id values per .in_() filter (URL length) and rows per PostgREST page (max-rows limit)
+SEARCH_MENU_ID_CHUNK_SIZE = 200
+SEARCH_TRANSLATION_PAGE_SIZE = 1000
+
+# Menu stats (migrations/create_menu_stats_rpc.sql): recomputed when the menu version changes,
+# or after STATS_CACHE_TTL_SECONDS (translation counts change without a menu version bump)
+MENU_STATS_RPC_NAME = 'get_menu_stats'
+STATS_CACHE_TTL_SECONDS = 60
+
+_PRICE_PATTERN = re.compile(r'-?\d+(?:[.,]\d+)*')
+_THOUSANDS_PATTERN = re.compile(r'-?\d{1,3}(?:,\d{3})+')
+
+
+def _parse_price(value: Any) -> Optional[float]:
+    """Price from a number or a string such as "$18.50" / "18,50 NZD" / "$1,234.50" (None if invalid)"""
+    if value is None or value == "":
+        return 0.0
+    if isinstance(value, (int, float)):
+        return float(value) if value >= 0 else None
+    match = _PRICE_PATTERN.search(str(value).replace(' ', ''))
+    if not match:
+        return None
+    text = match.group()
+    if ',' in text and '.' in text:
+        # The separator that comes last is the decimal point ("1,234.50" / "1.234,50")
+        thousands = ',' if text.rindex('.') > text.rindex(',') else '.'
+        text = text.replace(thousands, '').replace(',', '.')
+    elif _THOUSANDS_PATTERN.fullmatch(text):
+        text = text.replace(',', '')
+    elif text.count('.') > 1:
+        text = text.replace('.', '')
+    else:
+        text = text.replace(',', '.')
+    try:
+        price = float(text)
+    except ValueError:
+        return None
+    return price if price >= 0 else None
+
+
+def _dedupe_key(row: Dict[str, Any]) -> tuple:
+    return (
+        str(row.get("name_original") or "").strip().casefold(),
+        str(row.get("category") or "").strip().casefold(),
+    )
+
+
 class MenuService:
     """Service for managing menu items in Supabase"""
     
@@ -44,6 +119,9 @@ class MenuService:
                 self.supabase_client = None
         else:
             print("⚠️ Menu Service: Supabase credentials not found")
+
+        # Store: {restaurant_id: (menu_version, languages, expires_at, stats)}
+        self._stats_cache: Dict[str, tuple] = {}
     
     def _is_valid_uuid(self, uuid_string: str) -> bool:
         """ตรวจสอบว่า string เป็น UUID format หรือไม่"""
@@ -94,41 +172,9 @@ class MenuService:
                     return self.get_menu_item(existing_id)
 
             # Prepare menu data for database
-            db_data = {
-                "restaurant_id": restaurant_id,
-                "name_original": menu_data.get("name", ""),
-                "name_english": menu_data.get("nameEn", ""),
-                "description_original": menu_data.get("description", ""),
-                "description_english": menu_data.get("descriptionEn", ""),
-                "price": float(menu_data.get("price", 0)),
-                "image_url": menu_data.get("image_url") or menu_data.get("photo_url"),
-                "category": menu_data.get("category", "Main Course"),
-                "category_english": menu_data.get("categoryEn") or menu_data.get("category_english"),
-                "language_code": menu_data.get("language_code", "en"),
-                "display_mode": menu_data.get("display_mode", "both"),
-                "is_active": menu_data.get("is_active", True),
-                "is_featured": menu_data.get("is_featured", False),
-            }
-            
-            # Add is_best_seller if provided
-            if "is_best_seller" in menu_data:
-                db_data["is_best_seller"] = menu_data.get("is_best_seller", False)
-
-            # Add menu_type if provided (food, snack, beverage)
-            if "menu_type" in menu_data:
-                db_data["menu_type"] = menu_data.get("menu_type", "food")
-
-            # Store meats and addOns in options JSONB column
-            import json
-            options_data = {}
-            if menu_data.get("meats"):
-                options_data["meats"] = menu_data.get("meats")
-            if menu_data.get("addOns"):
-                options_data["addOns"] = menu_data.get("addOns")
-            
-            if options_data:
-                db_data["options"] = options_data
-            
+            db_data = self._build_db_row(restaurant_id, menu_data)
+            options_data = db_data.get("options", {})
+
             print(f"🔄 Menu Service: Inserting menu item...")
             print(f"   Restaurant ID: {restaurant_id}")
             print(f"   Name: {db_data.get('name_original')}")
@@ -147,18 +193,12 @@ class MenuService:
             else:
                 print(f"   Image URL: None")
 
-            # Remove any keys that might not exist in schema
-            safe_data = {}
-            skip_columns = ['meats_json', 'addons_json']  # Skip old columns that don't exist
-            for key, value in db_data.items():
-                if key not in skip_columns and value is not None:
-                    safe_data[key] = value
-            
-            result = self.supabase_client.table('menus').insert(safe_data).execute()
+            result = self.supabase_client.table('menus').insert(db_data).execute()
             
             if result.data and len(result.data) > 0:
                 menu_item = result.data[0]
                 print(f"✅ Menu Service: Created menu item with ID: {menu_item.get('id')}")
+                menu_search_index.mark_stale(restaurant_id)
                 return self._format_menu_item(menu_item)
             else:
                 print(f"⚠️ Menu Service: Insert succeeded but no data returned")
@@ -170,6 +210,156 @@ class MenuService:
             traceback.print_exc()
             raise Exception(f"Database error: {str(e)}")
     
+    def _build_db_row(self, restaurant_id: str, menu_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        แปลง frontend format เป็นแถวของตาราง menus (ไม่รวมค่าที่เป็น None)
+
+        Args:
+            restaurant_id: Restaurant ID
+            menu_data: Menu item in frontend format
+
+        Returns:
+            Row for insert into menus
+        """
+        db_data = {
+            "restaurant_id": restaurant_id,
+            "name_original": menu_data.get("name", ""),
+            "name_english": menu_data.get("nameEn", ""),
+            "description_original": menu_data.get("description", ""),
+            "description_english": menu_data.get("descriptionEn", ""),
+            "price": float(menu_data.get("price", 0)),
+            "image_url": menu_data.get("image_url") or menu_data.get("photo_url"),
+            "category": menu_data.get("category", "Main Course"),
+            "category_english": menu_data.get("categoryEn") or menu_data.get("category_english"),
+            "language_code": menu_data.get("language_code", "en"),
+            "display_mode": menu_data.get("display_mode", "both"),
+            "is_active": menu_data.get("is_active", True),
+            "is_featured": menu_data.get("is_featured", False),
+        }
+
+        # Add is_best_seller if provided
+        if "is_best_seller" in menu_data:
+            db_data["is_best_seller"] = menu_data.get("is_best_seller", False)
+
+        # Add menu_type if provided (food, snack, beverage)
+        if "menu_type" in menu_data:
+            db_data["menu_type"] = menu_data.get("menu_type", "food")
+
+        # Store meats and addOns in options JSONB column
+        options_data = {}
+        if menu_data.get("meats"):
+            options_data["meats"] = menu_data.get("meats")
+        if menu_data.get("addOns"):
+            options_data["addOns"] = menu_data.get("addOns")
+
+        if options_data:
+            db_data["options"] = options_data
+
+        # Remove any keys that might not exist in schema
+        skip_columns = ['meats_json', 'addons_json']  # Skip old columns that don't exist
+        return {key: value for key, value in db_data.items() if key not in skip_columns and value is not None}
+
+    def bulk_create_menu_items(
+        self,
+        restaurant_id: str,
+        items: List[Dict[str, Any]],
+        skip_existing: bool = True,
+        max_items: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        นำเข้าเมนูหลายรายการใน request เดียว (onboarding / ผลจาก extract_menu_from_file)
+
+        - validate ทุกรายการก่อน (มี error รายการเดียว = ไม่ insert เลย)
+        - ตัดรายการซ้ำในชุดเดียวกัน และ (skip_existing) รายการที่มีอยู่แล้วในร้าน
+        - insert แบบ multi-row ทีละ BULK_INSERT_CHUNK_SIZE แถว
+
+        Args:
+            restaurant_id: Restaurant ID
+            items: Menu items in frontend format (name, price, category, ...)
+            skip_existing: Skip items whose name + category already exist in the restaurant
+            max_items: Maximum number of new items allowed (trial / plan limit)
+
+        Returns:
+            Dict with created items and skipped duplicates, or {"error": ..., "errors": [...]}
+        """
+        if not self.supabase_client:
+            return {"error": "Database not available"}
+
+        if not self._is_valid_uuid(restaurant_id):
+            return {"error": f"Invalid restaurant_id format '{restaurant_id}'"}
+
+        if not items:
+            return {"error": "No menu items to import"}
+        if len(items) > MAX_BULK_IMPORT_ITEMS:
+            return {"error": f"Too many items (max {MAX_BULK_IMPORT_ITEMS} per import)"}
+
+        # Validate everything up front
+        rows = []
+        errors = []
+        for index, item in enumerate(items):
+            name = str(item.get("name") or "").strip()
+            if not name:
+                errors.append({"index": index, "error": "name is required"})
+                continue
+            price = _parse_price(item.get("price"))
+            if price is None:
+                errors.append({"index": index, "name": name, "error": f"invalid price '{item.get('price')}'"})
+                continue
+            rows.append({**BULK_ROW_DEFAULTS, **self._build_db_row(restaurant_id, {
+                **item,
+                "name": name,
+                "price": price,
+                "category": item.get("category") or "Main Course",
+            })})
+
+        if errors:
+            return {"error": "Validation failed", "errors": errors}
+
+        try:
+            # Dedupe in memory (within the import and against the current menu)
+            seen = set()
+            if skip_existing:
+                existing = self.supabase_client.table('menus').select('name_original, category').eq(
+                    'restaurant_id', restaurant_id
+                ).eq('is_active', True).execute()
+                seen = {_dedupe_key(row) for row in existing.data or []}
+
+            new_rows = []
+            skipped = []
+            for row in rows:
+                key = _dedupe_key(row)
+                if key in seen:
+                    skipped.append(row["name_original"])
+                    continue
+                seen.add(key)
+                new_rows.append(row)
+
+            if max_items is not None and len(new_rows) > max_items:
+                return {
+                    "error": f"Import would exceed your menu item limit ({len(new_rows)} new items, {max_items} remaining)",
+                    "limit_exceeded": True
+                }
+
+            created = []
+            for start in range(0, len(new_rows), BULK_INSERT_CHUNK_SIZE):
+                result = self.supabase_client.table('menus').insert(
+                    new_rows[start:start + BULK_INSERT_CHUNK_SIZE]
+                ).execute()
+                created.extend(result.data or [])
+
+            print(f"✅ Menu Service: Imported {len(created)} menu items ({len(skipped)} duplicates skipped)")
+            menu_search_index.mark_stale(restaurant_id)
+            return {
+                "success": True,
+                "created": [self._format_menu_item(item) for item in created],
+                "created_count": len(created),
+                "skipped": skipped,
+                "skipped_count": len(skipped)
+            }
+        except Exception as e:
+            print(f"❌ Menu Service: Bulk import failed: {str(e)}")
+            return {"error": f"Database error: {str(e)}"}
+
     def get_menu_items(self, restaurant_id: str) -> List[Dict[str, Any]]:
         """
         ดึง menu items ทั้งหมดของร้าน
@@ -199,6 +389,320 @@ class MenuService:
             traceback.print_exc()
             return []
     
+    def get_compact_menu(self, restaurant_id: str) -> Optional[bytes]:
+        """
+        เมนูทั้งร้านแบบ compact (JSON bytes จัดกลุ่มตาม category) ดู services/menu_wire.py
+
+        ถ้า version ของร้านไม่เปลี่ยนจะคืน bytes ที่ cache ไว้โดยไม่ query เมนู
+
+        Returns:
+            UTF-8 JSON bytes หรือ None ถ้าผิดพลาด
+        """
+        if not self.supabase_client:
+            return None
+
+        if not self._is_valid_uuid(restaurant_id):
+            print(f"⚠️ Menu Service: Invalid restaurant_id format '{restaurant_id}'")
+            return None
+
+        version = self.get_menu_version(restaurant_id)
+        cached = menu_wire_cache.get(restaurant_id, version)
+        if cached is not None:
+            return cached
+
+        try:
+            columns = COMPACT_MENU_COLUMNS if version is None else f"{COMPACT_MENU_COLUMNS}, menu_version"
+            result = self.supabase_client.table('menus').select(columns).eq(
+                'restaurant_id', restaurant_id
+            ).eq('is_active', True).order('sort_order', desc=False).execute()
+            return menu_wire_cache.build(restaurant_id, version, result.data or [])
+        except Exception as e:
+            print(f"❌ Menu Service: Failed to build compact menu: {str(e)}")
+            import traceback
+            traceback.print_exc()
+            return None
+
+    def get_menu_version(self, restaurant_id: str) -> Optional[int]:
+        """
+        Version ปัจจุบันของเมนูร้าน (เพิ่มขึ้นทุกครั้งที่เมนูถูกสร้าง / แก้ไข / ลบ)
+
+        Returns:
+            Version (0 ถ้ายังไม่มีเมนู) หรือ None ถ้ายังไม่ได้รัน migration
+        """
+        if not self.supabase_client or not self._is_valid_uuid(restaurant_id):
+            return None
+
+        try:
+            result = self.supabase_client.table(MENU_VERSIONS_TABLE).select('version').eq(
+                'restaurant_id', restaurant_id
+            ).limit(1).execute()
+            return int(result.data[0]['version']) if result.data else 0
+        except Exception as e:
+            print(f"⚠️ Menu Service: Menu versions unavailable: {str(e)}")
+            return None
+
+    def get_menu_changes(self, restaurant_id: str, since_version: int, limit: int = DELTA_PAGE_SIZE) -> Dict[str, Any]:
+        """
+        Delta sync: เมนูที่เปลี่ยนแปลงหรือถูกลบหลัง since_version
+
+        - items: เมนูที่ยัง active และถูกสร้าง / แก้ไขหลัง since_version
+        - deleted: menu_id ที่ถูก soft delete (is_active = false) หรือลบจริง (tombstone)
+        - has_more: มีการเปลี่ยนแปลงเกิน limit -> เรียกซ้ำด้วย since = version
+        - full: since_version ใช้ไม่ได้ (0 / มากกว่า version ปัจจุบัน) -> ส่งเมนูทั้งหมด
+
+        Args:
+            restaurant_id: Restaurant ID
+            since_version: Version ล่าสุดที่ client มี
+            limit: จำนวนรายการสูงสุดต่อ response
+
+        Returns:
+            {version, full, items, deleted, has_more} หรือ {"error": ...}
+        """
+        if not self.supabase_client:
+            return {"error": "Database not available"}
+
+        if not self._is_valid_uuid(restaurant_id):
+            return {"error": f"Invalid restaurant_id format '{restaurant_id}'"}
+
+        # Read the version first: rows committed later carry higher versions
+        version = self.get_menu_version(restaurant_id)
+        if version is None:
+            return {"error": "Menu versioning is not available"}
+
+        if since_version <= 0 or since_version > version:
+            items = self.get_menu_items(restaurant_id)
+            return {"version": version, "full": True, "items": items, "deleted": [], "has_more": False}
+
+        if since_version == version:
+            return {"version": version, "full": False, "items": [], "deleted": [], "has_more": False}
+
+        # Both reads stop at the version read above: the two statements see different
+        # snapshots, so entries above it may have gaps and are left for the next delta
+        try:
+            rows = self.supabase_client.table('menus').select('*').eq(
+                'restaurant_id', restaurant_id
+            ).gt('menu_version', since_version).lte(
+                'menu_version', version
+            ).order('menu_version').limit(limit).execute().data or []
+            tombstones = self.supabase_client.table(MENU_TOMBSTONES_TABLE).select('menu_id, menu_version').eq(
+                'restaurant_id', restaurant_id
+            ).gt('menu_version', since_version).lte(
+                'menu_version', version
+            ).order('menu_version').limit(limit).execute().data or []
+        except Exception as e:
+            print(f"❌ Menu Service: Failed to get menu changes: {str(e)}")
+            return {"error": f"Database error: {str(e)}"}
+
+        # Versions are unique per restaurant, so the merged page can stop at any entry
+        changes = sorted(
+            [(int(row['menu_version']), row, None) for row in rows] +
+            [(int(t['menu_version']), None, t['menu_id']) for t in tombstones],
+            key=lambda change: change[0]
+        )
+        # A full source page may hide later entries: stop at the lowest page end
+        cutoffs = [int(page[-1]['menu_version']) for page in (rows, tombstones) if len(page) == limit]
+        has_more = bool(cutoffs)
+        if has_more:
+            changes = [c for c in changes if c[0] <= min(cutoffs)][:limit]
+
+        items = []
+        deleted = []
+        for _, row, deleted_id in changes:
+            if row is None:
+                deleted.append(deleted_id)
+            elif row.get('is_active', True):
+                items.append(self._format_menu_item(row))
+            else:
+                deleted.append(row.get('id'))
+
+        if has_more and changes:
+            version = changes[-1][0]
+
+        return {"version": version, "full": False, "items": items, "deleted": deleted, "has_more": has_more}
+
+    def get_menu_stats(self, restaurant_id: str, languages: List[str] = ()) -> Dict[str, Any]:
+        """
+        สถิติเมนูของร้าน (นับใน database ผ่าน RPC get_menu_stats ไม่ดึงแถวเมนู)
+
+        Args:
+            restaurant_id: Restaurant ID
+            languages: ภาษาที่นับเมนูที่ยังไม่มีคำแปล
+
+        Returns:
+            {"total_items", "categories", "with_images", "image_coverage", "items_per_category",
+             "missing_translations", "version"} หรือ {"error": ...}
+        """
+        languages = tuple(languages)
+        version = self.get_menu_version(restaurant_id)
+        cached = self._stats_cache.get(restaurant_id)
+        if cached and cached[0] == version and cached[1] == languages and cached[2] > time.monotonic():
+            return cached[3]
+
+        try:
+            try:
+                result = self.supabase_client.rpc(MENU_STATS_RPC_NAME, {
+                    'p_restaurant_id': restaurant_id,
+                    'p_languages': list(languages),
+                }).execute()
+                raw = result.data
+            except Exception as e:
+                if not is_missing_function(e):
+                    raise
+                print(f"⚠️ Menu Service: {MENU_STATS_RPC_NAME} RPC unavailable, counting projected rows: {str(e)}")
+                raw = self._compute_menu_stats(restaurant_id, languages)
+        except Exception as e:
+            print(f"❌ Menu Service: Failed to compute menu stats: {str(e)}")
+            return {"error": f"Database error: {str(e)}"}
+
+        total_items = int(raw.get('total_items') or 0)
+        with_images = int(raw.get('with_images') or 0)
+        per_category = raw.get('items_per_category') or {}
+        missing = raw.get('missing_translations') or {}
+        stats = {
+            "total_items": total_items,
+            "categories": int(raw.get('categories') or 0),
+            "with_images": with_images,
+            "image_coverage": round(with_images * 100 / total_items, 1) if total_items else 0.0,
+            "items_per_category": [
+                {"category": category, "count": int(count)}
+                for category, count in sorted(per_category.items(), key=lambda entry: (-int(entry[1]), entry[0]))
+            ],
+            # Languages with no active items are absent from the RPC result
+            "missing_translations": {language: int(missing.get(language) or 0) for language in languages},
+            "version": version,
+        }
+        self._stats_cache[restaurant_id] = (version, languages, time.monotonic() + STATS_CACHE_TTL_SECONDS, stats)
+        return stats
+
+    def _compute_menu_stats(self, restaurant_id: str, languages: tuple) -> Dict[str, Any]:
+        """Fallback before the migration: same numbers from projected columns"""
+        rows = self.supabase_client.table('menus').select('id, category, image_url').eq(
+            'restaurant_id', restaurant_id
+        ).eq('is_active', True).execute().data or []
+
+        per_category: Dict[str, int] = {}
+        for row in rows:
+            if row.get('category'):
+                per_category[row['category']] = per_category.get(row['category'], 0) + 1
+
+        missing = {}
+        if languages and rows:
+            translated: Dict[str, set] = {language: set() for language in languages}
+            result = self.supabase_client.table('menu_translations').select('menu_id, language_code').eq(
+                'restaurant_id', restaurant_id
+            ).in_('language_code', list(languages)).execute()
+            for row in result.data or []:
+                translated.setdefault(row.get('language_code'), set()).add(str(row.get('menu_id')))
+            menu_ids = {str(row['id']) for row in rows}
+            missing = {language: len(menu_ids - translated[language]) for language in languages}
+
+        return {
+            'total_items': len(rows),
+            'categories': len(per_category),
+            'with_images': sum(1 for row in rows if row.get('image_url')),
+            'items_per_category': per_category,
+            'missing_translations': missing,
+        }
+
+    def search_menus(
+        self,
+        restaurant_ids: List[str],
+        query: str,
+        limit: int = 20,
+        require_image: bool = False
+    ) -> List[Dict[str, Any]]:
+        """
+        ค้นหาเมนู (ชื่อ / คำอธิบาย / หมวด / คำแปลที่ cache ไว้) จาก in-memory index
+
+        Args:
+            restaurant_ids: ร้านที่ค้นหา
+            query: คำค้นหา (ไทย / CJK / ละติน, prefix / substring / fuzzy)
+            limit: จำนวนผลลัพธ์สูงสุด
+            require_image: เฉพาะเมนูที่มีรูป (image library)
+
+        Returns:
+            Ranked items (menu_id, restaurant_id, name, nameEn, category, price, image_url, score, matched)
+        """
+        restaurant_ids = [rid for rid in dict.fromkeys(restaurant_ids) if rid and self._is_valid_uuid(rid)]
+        for restaurant_id in restaurant_ids:
+            self._sync_search_index(restaurant_id)
+        return menu_search_index.search(restaurant_ids, query, limit, require_image)
+
+    def _sync_search_index(self, restaurant_id: str) -> None:
+        """Bring the restaurant's search index up to date (full load or menu delta)"""
+        index = menu_search_index.get(restaurant_id)
+        now = time.monotonic()
+        if index is not None and not index.stale and now - index.synced_at < SEARCH_SYNC_SECONDS:
+            return
+
+        if index is None or now - index.loaded_at > SEARCH_RELOAD_SECONDS or (index.version is None and index.stale):
+            self._rebuild_search_index(restaurant_id)
+            return
+        if index.version is None:
+            # Versioning migration not installed: no delta, reload on local writes / interval only
+            return
+
+        since = index.version
+        items: List[Dict[str, Any]] = []
+        deleted: List[str] = []
+        while True:
+            changes = self.get_menu_changes(restaurant_id, since)
+            if "error" in changes:
+                # Serve the current index; retry after the sync interval
+                index.synced_at = now
+                return
+            if changes["full"]:
+                self._rebuild_search_index(restaurant_id)
+                return
+            items.extend(changes["items"])
+            deleted.extend(changes["deleted"])
+            since = changes["version"]
+            if not changes["has_more"]:
+                break
+
+        translations = self._search_translations(restaurant_id, [item["menu_id"] for item in items]) if items else {}
+        menu_search_index.apply(restaurant_id, since, items, deleted, translations)
+
+    def _rebuild_search_index(self, restaurant_id: str) -> None:
+        version = self.get_menu_version(restaurant_id)
+        items = self.get_menu_items(restaurant_id)
+        translations = self._search_translations(restaurant_id)
+
+        index = RestaurantIndex(version)
+        for item in items:
+            index.upsert(item, translations.get(str(item["menu_id"]), []))
+        menu_search_index.replace(restaurant_id, index)
+        print(f"✅ Menu Service: Search index built for {restaurant_id} ({len(items)} items)")
+
+    def _search_translations(self, restaurant_id: str, menu_ids: Optional[List[str]] = None) -> Dict[str, List[Dict[str, Any]]]:
+        """Cached menu_translations grouped by menu_id (empty if unavailable)"""
+        chunks = [None] if menu_ids is None else [
+            menu_ids[start:start + SEARCH_MENU_ID_CHUNK_SIZE]
+            for start in range(0, len(menu_ids), SEARCH_MENU_ID_CHUNK_SIZE)
+        ]
+        try:
+            grouped: Dict[str, List[Dict[str, Any]]] = {}
+            for chunk in chunks:
+                offset = 0
+                while True:
+                    query = self.supabase_client.table('menu_translations').select(SEARCH_TRANSLATION_COLUMNS).eq(
+                        'restaurant_id', restaurant_id
+                    )
+                    if chunk is not None:
+                        query = query.in_('menu_id', chunk)
+                    page = query.order('menu_id').order('language_code').range(
+                        offset, offset + SEARCH_TRANSLATION_PAGE_SIZE - 1
+                    ).execute().data or []
+                    for row in page:
+                        grouped.setdefault(str(row.get('menu_id')), []).append(row)
+                    if len(page) < SEARCH_TRANSLATION_PAGE_SIZE:
+                        break
+                    offset += SEARCH_TRANSLATION_PAGE_SIZE
+            return grouped
+        except Exception as e:
+            print(f"⚠️ Menu Service: Could not load translations for search: {str(e)}")
+            return {}
+
     def get_menu_item(self, menu_id: str) -> Optional[Dict[str, Any]]:
         """
         ดึง menu item เดียว
@@ -283,6 +787,7 @@ class MenuService:
             print(f"📝 Menu Service: Update result = {result.data}")
             
             if result.data and len(result.data) > 0:
+                menu_search_index.mark_stale(result.data[0].get('restaurant_id'))
                 return self._format_menu_item(result.data[0])
             return None
         except Exception as e:
@@ -322,6 +827,8 @@ class MenuService:
         
         try:
             result = self.supabase_client.table('menus').update({"is_active": False}).eq('id', menu_id).execute()
+            if result.data:
+                menu_search_index.mark_stale(result.data[0].get('restaurant_id'))
             return result.data is not None and len(result.data) > 0
         except Exception as e:
             print(f"❌ Menu Service: Failed to delete menu item: {str(e)}")
@@ -373,6 +880,8 @@ class MenuService:
             "created_at": db_item.get("created_at"),
             "updated_at": db_item.get("updated_at"),
             "restaurant_id": db_item.get("restaurant_id"),
+            "sort_order": db_item.get("sort_order"),
+            "version": db_item.get("menu_version"),
         }
 
 # Create singleton instance
@@ -0,0 +1,616 @@
+"""
+Menu Translation Service - แปลเมนูล่วงหน้าเป็นภาษาที่ร้านเปิดใช้ (background)
+
+- เมื่อสร้าง / แก้ไข / นำเข้า / clone เมนู endpoint จะ enqueue งานของร้านนั้น
+  งานของร้านเดียวกันที่เข้ามาติด ๆ กันถูกรวมเป็นงานเดียว (TRANSLATION_DEBOUNCE_SECONDS)
+- source_hash คำนวณแบบเดียวกับ generateSourceHash เดิมของหน้าเมนูลูกค้า (คำแปลที่ cache ไว้แล้วยังใช้ได้)
+  เมนูที่ hash ตรงกับ cache อยู่แล้วจะถูกข้าม
+- ข้อความ (ชื่อ, คำอธิบาย, หมวด, ตัวเลือกเนื้อสัตว์ / add-on) ไม่ซ้ำกันถูกส่งให้
+  AIService.translate_batch ทีละชุด แล้ว upsert ลง menu_translations แบบ multi-row
+  เมนูที่แปลไม่สำเร็จบางช่องจะไม่ถูกบันทึก (ยังเป็น stale -> แปลใหม่รอบถัดไป)
+  ถ้าติด quota ของ Gemini งานจะหยุดและ failed แทนการแปลทีละข้อความ
+- ภาษาที่แปล: restaurants.translation_languages (migrations/add_translation_languages_to_restaurants.sql)
+  ถ้าไม่ได้ตั้งค่า: ทุกภาษาของ language switcher สำหรับแพลน multi-language, แพลนอื่นไม่แปล
+  ('en' ไม่ต้องแปล - ใช้ name_english / description_english)
+
+Translation cache (GET / POST / DELETE /api/translations/menu):
+- อ่านเฉพาะ column ที่หน้าเมนูใช้ และ cache ใน process ต่อ (ร้าน, ภาษา) TRANSLATION_CACHE_TTL_SECONDS
+  ถูก invalidate เมื่อบันทึก / ลบ / แปลล่วงหน้า / clone
+- บันทึกแบบ multi-row upsert ทีละ TRANSLATION_UPSERT_CHUNK_SIZE แถว
+  (ถ้าทั้ง chunk ล้มเหลวจะลองทีละแถว เพื่อข้ามเฉพาะรายการที่เสีย)
+
+Read-through (GET /api/public/menu/{restaurant_id}?lang=...):
+- รวมคำแปลที่ยังตรงกับ source_hash ของแถวปัจจุบันเข้ากับรายการเมนู (คำนวณ hash ฝั่ง server)
+- รายการที่คำแปลเก่า / ไม่มีคำแปลคืนเป็นต้นฉบับ + stale_ids และ enqueue ให้แปลใหม่
+  (เฉพาะภาษาที่ร้านเปิดใช้)
+
+ใช้โดย main_ai.py (menu write endpoints, public menu, /api/translations/menu/...)
+และ MenuCloneService (หลัง clone เสร็จ)
+"""
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from .ai_service import ai_service, LANGUAGE_NAMES, TranslationQuotaError
+from .menu_service import menu_service
+from .menu_search import menu_search_index
+from .user_role_service import user_role_service
+
+TRANSLATIONS_TABLE = 'menu_translations'
+SOURCE_MENU_COLUMNS = 'id, name_original, description_original, category, options'
+# Fields the public menu reads from the cache
+TRANSLATION_CACHE_COLUMNS = (
+    'menu_id, translated_name, translated_description, translated_category, '
+    'translated_meats, translated_addons, source_hash'
+)
+
+# Plans whose public menu offers every language (same list as the public menu page)
+MULTI_LANGUAGE_PLANS = ('enterprise', 'admin', 'premium')
+# Pre-translated by default for multi-language plans ('en' comes from the *_english columns)
+DEFAULT_TRANSLATION_LANGUAGES = tuple(code for code in LANGUAGE_NAMES if code != 'en')
+
+# Strings per Gemini request
+TRANSLATION_BATCH_SIZE = 60
+# Rows per menu_translations upsert
+TRANSLATION_UPSERT_CHUNK_SIZE = 100
+# Menu ids per .in_() filter
+MENU_ID_CHUNK_SIZE = 200
+# Wait for more edits of the same restaurant before translating
+TRANSLATION_DEBOUNCE_SECONDS = 3
+# Restaurants translated concurrently per process
+TRANSLATION_MAX_WORKERS = 2
+
+# In-process translation cache (other workers' writes are seen after the TTL)
+TRANSLATION_CACHE_TTL_SECONDS = 300
+# LRU bound: (restaurant, language) entries in memory
+MAX_CACHED_TRANSLATION_SETS = 2000
+# Enabled languages per restaurant (read on every translated public menu request)
+LANGUAGES_CACHE_TTL_SECONDS = 60
+
+# Length caps applied by the public menu page (longer output is likely a description / explanation)
+MAX_NAME_LENGTH = 200
+MAX_CATEGORY_LENGTH = 50
+MAX_OPTION_LENGTH = 50
+
+
+def _options(row: Dict[str, Any]) -> Dict[str, Any]:
+    options = row.get('options') or {}
+    if isinstance(options, str):
+        try:
+            options = json.loads(options)
+        except ValueError:
+            options = {}
+    return options if isinstance(options, dict) else {}
+
+
+def _option_names(row: Dict[str, Any], key: str) -> List[str]:
+    names = []
+    for option in _options(row).get(key) or []:
+        name = option.get('name') if isinstance(option, dict) else None
+        names.append('' if name is None else str(name))
+    return names
+
+
+def _source_texts(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Translatable fields of a menus row, as the public menu shows them"""
+    return {
+        'name': row.get('name_original') or '',
+        'description': row.get('description_original') or '',
+        'category': row.get('category', 'Main Course') or '',
+        'meats': _option_names(row, 'meats'),
+        'addons': _option_names(row, 'addOns'),
+    }
+
+
+def compute_source_hash(row: Dict[str, Any]) -> str:
+    """
+    source_hash ของแถวใน menus (ตรงกับ generateSourceHash ใน JavaScript ที่เขียน cache เดิมไว้)
+
+    JavaScript: hash = ((hash << 5) - hash) + charCode; hash &= hash (int32, ทีละ UTF-16 code unit)
+    """
+    texts = _source_texts(row)
+    source_text = '|'.join([texts['name'], texts['description'], texts['category'], *texts['meats'], *texts['addons']])
+
+    encoded = source_text.encode('utf-16-le')
+    value = 0
+    for index in range(0, len(encoded), 2):
+        shifted = ((value << 5) + 2 ** 31) % 2 ** 32 - 2 ** 31
+        value = ((shifted - value + (encoded[index] | encoded[index + 1] << 8)) + 2 ** 31) % 2 ** 32 - 2 ** 31
+    return format(abs(value), 'x')
+
+
+def compute_item_source_hash(item: Dict[str, Any]) -> str:
+    """source_hash ของรายการเมนูรูปแบบ frontend (MenuService._format_menu_item)"""
+    return compute_source_hash({
+        'name_original': item.get('name'),
+        'description_original': item.get('description'),
+        'category': item.get('category'),
+        'options': {'meats': item.get('meats'), 'addOns': item.get('addOns')},
+    })
+
+
+def _translated_options(options: Any, names: List[Any]) -> Any:
+    if not isinstance(options, list):
+        return options
+    return [
+        {**option, 'name': _clean(names[index] if index < len(names) else None) or option.get('name')}
+        if isinstance(option, dict) else option
+        for index, option in enumerate(options)
+    ]
+
+
+def _english_options(options: Any) -> Any:
+    if not isinstance(options, list):
+        return options
+    return [
+        {**option, 'name': option.get('nameEn') or option.get('name')} if isinstance(option, dict) else option
+        for option in options
+    ]
+
+
+def _clean(text: Any) -> str:
+    """Same cleanup as cleanTranslation on the public menu page"""
+    if not text:
+        return ''
+    return str(text).replace('**', '').replace('*', '').replace('__', '').replace('_', '').strip()
+
+
+def _capped(translated: str, original: str, max_length: int) -> str:
+    cleaned = _clean(translated)
+    return original if len(cleaned) > max_length else (cleaned or original)
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class MenuTranslationService:
+    """Background pre-translation of menus into each restaurant's enabled languages"""
+
+    def __init__(self):
+        self.supabase_client = menu_service.supabase_client
+        self._executor = ThreadPoolExecutor(max_workers=TRANSLATION_MAX_WORKERS, thread_name_prefix='menu-translate')
+        self._lock = threading.Lock()
+        # Store: {restaurant_id: set of menu ids, or None = whole menu}
+        self._pending: Dict[str, Optional[Set[str]]] = {}
+        # Restaurants with a job submitted or running (later requests join its loop)
+        self._scheduled: Set[str] = set()
+        self._status: Dict[str, Dict[str, Any]] = {}
+        # Store: {(restaurant_id, language_code): (expires_at, {menu_id: translation})}
+        self._cache: 'OrderedDict[Tuple[str, str], Tuple[float, Dict[str, Dict[str, Any]]]]' = OrderedDict()
+        # Bumped on invalidation so a read started earlier does not re-cache old rows
+        self._cache_generation: Dict[str, int] = {}
+        # Store: {restaurant_id: (expires_at, languages)}
+        self._languages: Dict[str, Tuple[float, List[str]]] = {}
+
+    def enqueue(self, restaurant_id: Optional[str], menu_ids: Optional[Iterable[str]] = None) -> bool:
+        """
+        ขอให้แปลเมนูของร้านใน background (คืนทันที)
+
+        Args:
+            restaurant_id: Restaurant ID
+            menu_ids: เฉพาะเมนูเหล่านี้ (None = ทั้งร้าน)
+
+        Returns:
+            True ถ้ารับงานแล้ว
+        """
+        if not self.supabase_client or not ai_service.ready:
+            return False
+        if not restaurant_id or not menu_service._is_valid_uuid(restaurant_id):
+            return False
+
+        ids = None if menu_ids is None else {str(menu_id) for menu_id in menu_ids if menu_id}
+        with self._lock:
+            if restaurant_id in self._pending:
+                current = self._pending[restaurant_id]
+                self._pending[restaurant_id] = None if current is None or ids is None else current | ids
+            else:
+                self._pending[restaurant_id] = ids
+            scheduled = restaurant_id in self._scheduled
+            if not scheduled:
+                self._scheduled.add(restaurant_id)
+                self._status[restaurant_id] = {'status': 'queued', 'queued_at': _now()}
+        if not scheduled:
+            self._executor.submit(self._run, restaurant_id)
+        return True
+
+    def get_status(self, restaurant_id: str) -> Optional[Dict[str, Any]]:
+        """สถานะงานล่าสุดของร้านใน process นี้"""
+        with self._lock:
+            status = self._status.get(restaurant_id)
+            return dict(status) if status else None
+
+    def get_languages(self, restaurant_id: str) -> List[str]:
+        """ภาษาที่ต้องแปลล่วงหน้าของร้าน (ว่าง = ไม่แปล, cache LANGUAGES_CACHE_TTL_SECONDS)"""
+        cached = self._languages.get(restaurant_id)
+        if cached is not None and cached[0] > time.monotonic():
+            return cached[1]
+        languages = self._load_languages(restaurant_id)
+        self._languages[restaurant_id] = (time.monotonic() + LANGUAGES_CACHE_TTL_SECONDS, languages)
+        return languages
+
+    def _load_languages(self, restaurant_id: str) -> List[str]:
+        try:
+            try:
+                result = self.supabase_client.table('restaurants').select(
+                    'user_id, translation_languages'
+                ).eq('id', restaurant_id).limit(1).execute()
+            except Exception:
+                # Column not migrated yet - plan default only
+                result = self.supabase_client.table('restaurants').select('user_id').eq('id', restaurant_id).limit(1).execute()
+            if not result.data:
+                return []
+            restaurant = result.data[0]
+        except Exception as e:
+            print(f"⚠️ Menu Translation: Could not load restaurant {restaurant_id}: {str(e)}")
+            return []
+
+        configured = restaurant.get('translation_languages')
+        if configured is not None:
+            return [code for code in configured if code in DEFAULT_TRANSLATION_LANGUAGES]
+
+        owner_id = restaurant.get('user_id')
+        plan = (user_role_service.get_user_role(owner_id) if owner_id else None) or 'free_trial'
+        return list(DEFAULT_TRANSLATION_LANGUAGES) if plan in MULTI_LANGUAGE_PLANS else []
+
+    def get_translations(self, restaurant_id: str, language_code: str) -> Dict[str, Any]:
+        """
+        คำแปลที่ cache ไว้ของร้านในภาษาหนึ่ง (อ่านผ่าน cache ใน process)
+
+        Args:
+            restaurant_id: Restaurant ID (UUID)
+            language_code: รหัสภาษา
+
+        Returns:
+            {"translations": {menu_id: {...}}} หรือ {"error": ...}
+            (dict ที่คืนถูกแชร์กับ cache - ห้ามแก้ไข)
+        """
+        key = (restaurant_id, language_code)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None and cached[0] > time.monotonic():
+                self._cache.move_to_end(key)
+                return {'translations': cached[1]}
+            generation = self._cache_generation.get(restaurant_id, 0)
+
+        try:
+            result = self.supabase_client.table(TRANSLATIONS_TABLE).select(TRANSLATION_CACHE_COLUMNS).eq(
+                'restaurant_id', restaurant_id
+            ).eq('language_code', language_code).execute()
+        except Exception as e:
+            print(f"❌ Menu Translation: Failed to load translations: {str(e)}")
+            return {'error': f'Database error: {str(e)}'}
+
+        translations = {}
+        for row in result.data or []:
+            menu_id = str(row.get('menu_id'))
+            translations[menu_id] = {
+                'translated_name': row.get('translated_name'),
+                'translated_description': row.get('translated_description'),
+                'translated_category': row.get('translated_category'),
+                'translated_meats': row.get('translated_meats') or [],
+                'translated_addons': row.get('translated_addons') or [],
+                'source_hash': row.get('source_hash'),
+            }
+
+        with self._lock:
+            if self._cache_generation.get(restaurant_id, 0) == generation:
+                self._cache[key] = (time.monotonic() + TRANSLATION_CACHE_TTL_SECONDS, translations)
+                self._cache.move_to_end(key)
+                while len(self._cache) > MAX_CACHED_TRANSLATION_SETS:
+                    self._cache.popitem(last=False)
+        return {'translations': translations}
+
+    def translate_menu_items(self, restaurant_id: str, items: List[Dict[str, Any]], language_code: str) -> Dict[str, Any]:
+        """
+        รวมคำแปลที่ยังใช้ได้เข้ากับรายการเมนู (แบบเดียวกับหน้าเมนูลูกค้า)
+
+        Args:
+            restaurant_id: Restaurant ID
+            items: รายการเมนูจาก MenuService.get_menu_items
+            language_code: รหัสภาษา ('en' ใช้ column ภาษาอังกฤษ)
+
+        Returns:
+            {"items", "translated_count", "stale_ids", "refresh_queued"} หรือ {"error": ...}
+        """
+        if language_code == 'en':
+            merged = [
+                {
+                    **item,
+                    'name': item.get('nameEn') or item.get('name'),
+                    'description': item.get('descriptionEn') or item.get('description'),
+                    'category': item.get('categoryEn') or item.get('category'),
+                    'meats': _english_options(item.get('meats')),
+                    'addOns': _english_options(item.get('addOns')),
+                    'originalName': item.get('name'),
+                    'originalDescription': item.get('description'),
+                }
+                for item in items
+            ]
+            return {'items': merged, 'translated_count': len(merged), 'stale_ids': [], 'refresh_queued': False}
+        if language_code not in DEFAULT_TRANSLATION_LANGUAGES:
+            return {'error': f'Unsupported language: {language_code}'}
+
+        result = self.get_translations(restaurant_id, language_code)
+        # Without the cache the menu is still served, untranslated
+        translations = result.get('translations', {})
+
+        merged = []
+        stale_ids = []
+        for item in items:
+            menu_id = str(item.get('menu_id'))
+            cached = translations.get(menu_id)
+            if cached is None or cached.get('source_hash') != compute_item_source_hash(item):
+                stale_ids.append(menu_id)
+                merged.append(item)
+                continue
+            merged.append({
+                **item,
+                'name': _clean(cached.get('translated_name')) or item.get('name'),
+                'description': _clean(cached.get('translated_description')) or item.get('description'),
+                'category': _clean(cached.get('translated_category')) or item.get('category'),
+                'meats': _translated_options(item.get('meats'), cached.get('translated_meats') or []),
+                'addOns': _translated_options(item.get('addOns'), cached.get('translated_addons') or []),
+                'originalName': item.get('name'),
+                'originalDescription': item.get('description'),
+            })
+
+        refresh_queued = bool(stale_ids) and language_code in self.get_languages(restaurant_id) \
+            and self.enqueue(restaurant_id, stale_ids)
+        return {
+            'items': merged,
+            'translated_count': len(merged) - len(stale_ids),
+            'stale_ids': stale_ids,
+            'refresh_queued': refresh_queued,
+        }
+
+    def save_translations(self, restaurant_id: str, language_code: str, translations: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        บันทึกคำแปล (multi-row upsert ทีละ chunk)
+
+        รองรับทั้ง translated_name / translated_description / ... และ name / description / ... (แบบเก่า)
+
+        Returns:
+            {"success": True, "saved_count": n} หรือ {"error": ...}
+        """
+        now = _now()
+        records: Dict[str, Dict[str, Any]] = {}
+        for trans in translations:
+            menu_id = trans.get('menu_id')
+            if not menu_id:
+                continue
+            # One row per key: a multi-row upsert cannot touch the same row twice
+            records[str(menu_id)] = {
+                'restaurant_id': restaurant_id,
+                'menu_id': menu_id,
+                'language_code': language_code,
+                'translated_name': trans.get('translated_name') or trans.get('name'),
+                'translated_description': trans.get('translated_description') or trans.get('description'),
+                'translated_category': trans.get('translated_category') or trans.get('category'),
+                'translated_meats': trans.get('translated_meats') or trans.get('meats', []),
+                'translated_addons': trans.get('translated_addons') or trans.get('addons', []),
+                'source_hash': trans.get('source_hash'),
+                'updated_at': now,
+            }
+
+        rows = list(records.values())
+        saved_count = 0
+        try:
+            for start in range(0, len(rows), TRANSLATION_UPSERT_CHUNK_SIZE):
+                chunk = rows[start:start + TRANSLATION_UPSERT_CHUNK_SIZE]
+                try:
+                    self.supabase_client.table(TRANSLATIONS_TABLE).upsert(
+                        chunk, on_conflict='restaurant_id,menu_id,language_code'
+                    ).execute()
+                    saved_count += len(chunk)
+                except Exception as e:
+                    print(f"⚠️ Menu Translation: Chunk upsert failed, saving one by one: {str(e)}")
+                    for row in chunk:
+                        try:
+                            self.supabase_client.table(TRANSLATIONS_TABLE).upsert(
+                                row, on_conflict='restaurant_id,menu_id,language_code'
+                            ).execute()
+                            saved_count += 1
+                        except Exception as row_error:
+                            print(f"⚠️ Failed to save translation for menu {row['menu_id']}: {str(row_error)}")
+        finally:
+            self.invalidate_cache(restaurant_id, language_code)
+
+        print(f"✅ Saved {saved_count} menu translations for restaurant {restaurant_id}, lang: {language_code}")
+        return {'success': True, 'saved_count': saved_count}
+
+    def delete_translations(
+        self,
+        restaurant_id: str,
+        menu_id: Optional[str] = None,
+        language_code: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        ลบคำแปลที่ cache ไว้ (ทั้งร้าน / เฉพาะเมนู / เฉพาะภาษา)
+
+        Returns:
+            {"success": True} หรือ {"error": ...}
+        """
+        try:
+            query = self.supabase_client.table(TRANSLATIONS_TABLE).delete().eq('restaurant_id', restaurant_id)
+            if menu_id:
+                query = query.eq('menu_id', menu_id)
+            if language_code:
+                query = query.eq('language_code', language_code)
+            query.execute()
+        except Exception as e:
+            print(f"❌ Menu Translation: Failed to delete translations: {str(e)}")
+            return {'error': f'Database error: {str(e)}'}
+        finally:
+            self.invalidate_cache(restaurant_id, language_code)
+        return {'success': True}
+
+    def invalidate_cache(self, restaurant_id: Optional[str], language_code: Optional[str] = None) -> None:
+        """ลบคำแปลของร้าน (หรือเฉพาะภาษา) ออกจาก cache ใน process"""
+        if not restaurant_id:
+            return
+        with self._lock:
+            self._cache_generation[restaurant_id] = self._cache_generation.get(restaurant_id, 0) + 1
+            for key in [key for key in self._cache if key[0] == restaurant_id]:
+                if language_code is None or key[1] == language_code:
+                    del self._cache[key]
+
+    def _run(self, restaurant_id: str) -> None:
+        # Let a burst of edits for this restaurant collapse into one job
+        time.sleep(TRANSLATION_DEBOUNCE_SECONDS)
+        while True:
+            with self._lock:
+                if restaurant_id not in self._pending:
+                    self._scheduled.discard(restaurant_id)
+                    return
+                menu_ids = self._pending.pop(restaurant_id)
+                self._status[restaurant_id] = {'status': 'running', 'started_at': _now()}
+            try:
+                result = self.translate_restaurant(restaurant_id, menu_ids)
+                status = {'status': 'failed', **result} if 'error' in result else {'status': 'completed', **result}
+            except Exception as e:
+                print(f"❌ Menu Translation: Job for {restaurant_id} failed: {str(e)}")
+                status = {'status': 'failed', 'error': str(e)}
+            with self._lock:
+                self._status[restaurant_id] = {**status, 'finished_at': _now()}
+
+    def translate_restaurant(self, restaurant_id: str, menu_ids: Optional[Set[str]] = None) -> Dict[str, Any]:
+        """
+        แปลเมนูที่ยังไม่มีคำแปลหรือคำแปลเก่า (source_hash ไม่ตรง) ของร้าน (synchronous)
+
+        Args:
+            restaurant_id: Restaurant ID
+            menu_ids: เฉพาะเมนูเหล่านี้ (None = ทั้งร้าน)
+
+        Returns:
+            {"languages", "items", "translated", "skipped", "failed"} หรือ {"error": ...}
+        """
+        languages = self.get_languages(restaurant_id)
+        if not languages:
+            return {'languages': [], 'items': 0, 'translated': 0, 'skipped': 0, 'failed': 0}
+
+        try:
+            rows = self._load_menus(restaurant_id, menu_ids)
+            hashes = {str(row['id']): compute_source_hash(row) for row in rows}
+            cached = self._load_hashes(restaurant_id, languages, list(hashes) if menu_ids is not None else None)
+        except Exception as e:
+            print(f"❌ Menu Translation: Could not load menus for {restaurant_id}: {str(e)}")
+            return {'error': f'Database error: {str(e)}'}
+
+        translated = skipped = failed = 0
+        error = None
+        for language in languages:
+            stale = [row for row in rows if cached.get((str(row['id']), language)) != hashes[str(row['id'])]]
+            skipped += len(rows) - len(stale)
+            if not stale:
+                continue
+            try:
+                records = self._translate_rows(restaurant_id, language, stale, hashes)
+            except TranslationQuotaError as e:
+                # Left stale: the next job / public menu read re-queues them
+                print(f"❌ Menu Translation: Gemini quota reached for {restaurant_id}, stopping: {str(e)}")
+                error = f'Translation quota exceeded: {str(e)}'
+                break
+            failed += len(stale) - len(records)
+            for start in range(0, len(records), TRANSLATION_UPSERT_CHUNK_SIZE):
+                self.supabase_client.table(TRANSLATIONS_TABLE).upsert(
+                    records[start:start + TRANSLATION_UPSERT_CHUNK_SIZE],
+                    on_conflict='restaurant_id,menu_id,language_code'
+                ).execute()
+            translated += len(records)
+            print(f"✅ Menu Translation: {len(records)} items translated to {language} for {restaurant_id}")
+
+        if translated:
+            self.invalidate_cache(restaurant_id)
+            menu_search_index.mark_stale(restaurant_id)
+        result = {'languages': languages, 'items': len(rows), 'translated': translated, 'skipped': skipped, 'failed': failed}
+        if error:
+            result['error'] = error
+        return result
+
+    def _load_menus(self, restaurant_id: str, menu_ids: Optional[Set[str]]) -> List[Dict[str, Any]]:
+        def query():
+            return self.supabase_client.table('menus').select(SOURCE_MENU_COLUMNS).eq(
+                'restaurant_id', restaurant_id
+            ).eq('is_active', True)
+
+        if menu_ids is None:
+            return query().execute().data or []
+        ids = sorted(menu_id for menu_id in menu_ids if menu_service._is_valid_uuid(menu_id))
+        rows = []
+        for start in range(0, len(ids), MENU_ID_CHUNK_SIZE):
+            rows.extend(query().in_('id', ids[start:start + MENU_ID_CHUNK_SIZE]).execute().data or [])
+        return rows
+
+    def _load_hashes(self, restaurant_id: str, languages: List[str], menu_ids: Optional[List[str]]) -> Dict[tuple, str]:
+        """{(menu_id, language_code): source_hash} of cached translations"""
+        hashes = {}
+        for language in languages:
+            chunks = [None] if menu_ids is None else [
+                menu_ids[start:start + MENU_ID_CHUNK_SIZE] for start in range(0, len(menu_ids), MENU_ID_CHUNK_SIZE)
+            ]
+            for chunk in chunks:
+                query = self.supabase_client.table(TRANSLATIONS_TABLE).select('menu_id, source_hash').eq(
+                    'restaurant_id', restaurant_id
+                ).eq('language_code', language)
+                if chunk is not None:
+                    query = query.in_('menu_id', chunk)
+                for row in query.execute().data or []:
+                    hashes[(str(row.get('menu_id')), language)] = row.get('source_hash')
+        return hashes
+
+    def _translate_rows(
+        self,
+        restaurant_id: str,
+        language: str,
+        rows: List[Dict[str, Any]],
+        hashes: Dict[str, str]
+    ) -> List[Dict[str, Any]]:
+        """
+        Translate every distinct string of these rows once and build menu_translations records
+
+        Rows with any string Gemini could not translate are left out, so they keep
+        their old source_hash and are retried instead of caching the original text.
+        """
+        sources = [_source_texts(row) for row in rows]
+        unique: List[str] = []
+        seen: Set[str] = set()
+        for texts in sources:
+            for text in [texts['name'], texts['description'], texts['category'], *texts['meats'], *texts['addons']]:
+                if text.strip() and text not in seen:
+                    seen.add(text)
+                    unique.append(text)
+
+        translations: Dict[str, Optional[str]] = {}
+        for start in range(0, len(unique), TRANSLATION_BATCH_SIZE):
+            batch = unique[start:start + TRANSLATION_BATCH_SIZE]
+            translations.update(zip(batch, ai_service.translate_batch(batch, language)))
+
+        now = _now()
+        records = []
+        for row, texts in zip(rows, sources):
+            fields = [texts['name'], texts['description'], texts['category'], *texts['meats'], *texts['addons']]
+            if any(text.strip() and translations.get(text) is None for text in fields):
+                continue
+            records.append({
+                'restaurant_id': restaurant_id,
+                'menu_id': row['id'],
+                'language_code': language,
+                'translated_name': _capped(translations.get(texts['name'], ''), texts['name'], MAX_NAME_LENGTH),
+                'translated_description': _clean(translations.get(texts['description'], texts['description'])),
+                'translated_category': _capped(translations.get(texts['category'], ''), texts['category'], MAX_CATEGORY_LENGTH),
+                'translated_meats': [_capped(translations.get(name, ''), name, MAX_OPTION_LENGTH) for name in texts['meats']],
+                'translated_addons': [_capped(translations.get(name, ''), name, MAX_OPTION_LENGTH) for name in texts['addons']],
+                'source_hash': hashes[str(row['id'])],
+                'updated_at': now,
+            })
+        return records
+
+
+# Create singleton instance
+menu_translation_service = MenuTranslationService()
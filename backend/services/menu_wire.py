@@ -0,0 +1,158 @@
+"""
+Menu Wire - รูปแบบเมนูแบบ compact สำหรับส่งให้ลูกค้า (pre-serialized, cache ตาม menu version)
+
+เทียบกับ MenuService._format_menu_item:
+- ไม่ส่ง field ซ้ำ (photo_url / image_url, category / categoryEn ต่อรายการ, restaurant_id)
+- price เป็นตัวเลข, ไม่ส่งค่า default / ค่าว่าง (nameEn ว่าง, meats ว่าง, is_best_seller false ...)
+- category ถูกยกขึ้นไปเป็นกลุ่ม: {"categories": [{"name", "nameEn", "items": [...]}]}
+- options JSON ถูก parse ครั้งเดียวต่อ version ของรายการ
+
+แต่ละรายการถูก serialize เป็น bytes แล้ว cache ไว้ตาม menu_version ของแถว
+เอกสารทั้งก้อนถูก cache ตาม version ของร้าน (migrations/create_menu_versions.sql)
+request ที่ version ไม่เปลี่ยนจะได้ bytes เดิมโดยไม่ต้อง query เมนูเลย
+
+ใช้โดย MenuService.get_compact_menu (GET /api/menus?format=compact, /api/public/menu/...?format=compact)
+"""
+
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from .json_response import dumps
+
+# Columns needed for the compact form (menu_version only once the migration is installed)
+COMPACT_MENU_COLUMNS = (
+    'id, name_original, name_english, description_original, description_english, price, image_url, '
+    'category, category_english, menu_type, options, variants, is_featured, is_best_seller, sort_order'
+)
+# LRU bound: restaurants with a cached menu
+MAX_CACHED_MENUS = 1000
+
+DEFAULT_CATEGORY = 'Main Course'
+
+
+def _options(row: Dict[str, Any]) -> Dict[str, Any]:
+    options = row.get('options') or {}
+    if isinstance(options, str):
+        try:
+            options = json.loads(options)
+        except ValueError:
+            options = {}
+    return options if isinstance(options, dict) else {}
+
+
+def compact_menu_item(row: Dict[str, Any]) -> Dict[str, Any]:
+    """แถวจากตาราง menus -> รายการแบบ compact (ไม่มี category)"""
+    item: Dict[str, Any] = {
+        'id': row.get('id'),
+        'name': row.get('name_original') or '',
+        'price': float(row.get('price') or 0),
+    }
+    if row.get('name_english') and row.get('name_english') != item['name']:
+        item['nameEn'] = row['name_english']
+    if row.get('description_original'):
+        item['description'] = row['description_original']
+    if row.get('description_english') and row.get('description_english') != row.get('description_original'):
+        item['descriptionEn'] = row['description_english']
+    if row.get('image_url'):
+        item['image_url'] = row['image_url']
+    if row.get('menu_type') and row.get('menu_type') != 'food':
+        item['menu_type'] = row['menu_type']
+
+    options = _options(row)
+    if options.get('meats'):
+        item['meats'] = options['meats']
+    if options.get('addOns'):
+        item['addOns'] = options['addOns']
+    if row.get('variants'):
+        item['variants'] = row['variants']
+
+    if row.get('is_best_seller'):
+        item['is_best_seller'] = True
+    if row.get('is_featured'):
+        item['is_featured'] = True
+    return item
+
+
+def _category_key(row: Dict[str, Any]) -> Tuple[str, str]:
+    category = row.get('category') or DEFAULT_CATEGORY
+    return category, row.get('category_english') or category
+
+
+class MenuWireCache:
+    """Per-restaurant compact menu bytes keyed by menu version"""
+
+    def __init__(self, max_menus: int = MAX_CACHED_MENUS):
+        self.max_menus = max_menus
+        # Store: {restaurant_id: (version, body, {menu_id: (menu_version, item_bytes)})}
+        self._menus: 'OrderedDict[str, Tuple[Optional[int], bytes, Dict[str, Tuple[int, bytes]]]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, restaurant_id: str, version: Optional[int]) -> Optional[bytes]:
+        """Cached document for this exact version (None = rebuild)"""
+        if version is None:
+            return None
+        with self._lock:
+            cached = self._menus.get(restaurant_id)
+            if cached is None or cached[0] != version:
+                return None
+            self._menus.move_to_end(restaurant_id)
+            return cached[1]
+
+    def build(self, restaurant_id: str, version: Optional[int], rows: List[Dict[str, Any]]) -> bytes:
+        """
+        Serialize the menu, reusing item bytes whose menu_version did not change
+
+        Args:
+            restaurant_id: Restaurant ID
+            version: Restaurant menu version the rows were read at (None = do not cache)
+            rows: Active menu rows ordered by sort_order
+
+        Returns:
+            {"restaurant_id", "version", "count", "categories": [...]} as UTF-8 JSON
+        """
+        with self._lock:
+            cached = self._menus.get(restaurant_id)
+        previous = cached[2] if cached else {}
+
+        items: Dict[str, Tuple[int, bytes]] = {}
+        groups: 'OrderedDict[Tuple[str, str], List[bytes]]' = OrderedDict()
+        for row in rows:
+            item_version = row.get('menu_version')
+            reused = previous.get(row.get('id'))
+            if item_version is not None and reused and reused[0] == item_version:
+                item_bytes = reused[1]
+            else:
+                item_bytes = dumps(compact_menu_item(row))
+            if item_version is not None:
+                items[row.get('id')] = (item_version, item_bytes)
+            groups.setdefault(_category_key(row), []).append(item_bytes)
+
+        categories = b','.join(
+            dumps({'name': name, 'nameEn': name_en})[:-1] + b',"items":[' + b','.join(group) + b']}'
+            for (name, name_en), group in groups.items()
+        )
+        body = (
+            dumps({'restaurant_id': restaurant_id, 'version': version, 'count': len(rows)})[:-1]
+            + b',"categories":[' + categories + b']}'
+        )
+
+        if version is not None:
+            with self._lock:
+                self._menus[restaurant_id] = (version, body, items)
+                self._menus.move_to_end(restaurant_id)
+                while len(self._menus) > self.max_menus:
+                    self._menus.popitem(last=False)
+        return body
+
+    def invalidate(self, restaurant_id: Optional[str] = None) -> None:
+        with self._lock:
+            if restaurant_id is None:
+                self._menus.clear()
+            else:
+                self._menus.pop(restaurant_id, None)
+
+
+# Create singleton instance
+menu_wire_cache = MenuWireCache()
@@ -0,0 +1,140 @@
+"""
+Order Aggregation - คำนวณสรุปยอดออเดอร์แบบ single-pass
+
+ใช้ร่วมกันระหว่าง OrdersService.get_orders_summary และ report อื่นๆ
+- อ่านเฉพาะคอลัมน์ที่จำเป็น (SUMMARY_COLUMNS)
+- วนลูปออเดอร์ครั้งเดียว แล้วได้ทุก metric
+- รองรับผลลัพธ์จาก Postgres RPC (get_orders_summary_aggregates) ที่คืน shape เดียวกัน
+"""
+
+from typing import Dict, Any, Iterable, Optional
+
+# Columns needed to compute the summary (projected select instead of '*')
+SUMMARY_COLUMNS = 'total_price, tax, payment_status, payment_method, service_type, status, is_voided'
+
+# Name of the Postgres function that computes the same summary server-side
+SUMMARY_RPC_NAME = 'get_orders_summary_aggregates'
+
+PAYMENT_STATUSES = ('paid', 'pending', 'failed')
+SERVICE_TYPES = ('dine_in', 'pickup', 'delivery')
+PAYMENT_METHODS = ('card', 'bank_transfer', 'cash')
+
+
+class OrderSummaryAggregator:
+    """
+    Accumulates order summary metrics in a single pass.
+
+    Usage:
+        agg = OrderSummaryAggregator()
+        agg.add_many(orders)
+        summary = agg.to_summary()
+    """
+
+    __slots__ = (
+        'total_orders', 'total_revenue', 'total_tax',
+        'payment_status_counts', 'service_type_counts',
+        'method_counts', 'method_revenue',
+    )
+
+    def __init__(self):
+        self.total_orders = 0
+        self.total_revenue = 0.0
+        self.total_tax = 0.0
+        self.payment_status_counts = dict.fromkeys(PAYMENT_STATUSES, 0)
+        self.service_type_counts = dict.fromkeys(SERVICE_TYPES, 0)
+        self.method_counts = dict.fromkeys(PAYMENT_METHODS, 0)
+        self.method_revenue = dict.fromkeys(PAYMENT_METHODS, 0.0)
+
+    def add(self, order: Dict[str, Any]) -> None:
+        """Add a single order row to the running totals"""
+        self.total_orders += 1
+
+        payment_status = order.get('payment_status')
+        service_type = order.get('service_type')
+        payment_method = order.get('payment_method')
+        is_paid = payment_status == 'paid'
+        is_voided = bool(order.get('is_voided')) or order.get('status') == 'voided'
+
+        if payment_status in self.payment_status_counts:
+            self.payment_status_counts[payment_status] += 1
+        if service_type in self.service_type_counts:
+            self.service_type_counts[service_type] += 1
+
+        # Payment method counts exclude voided orders
+        if payment_method in self.method_counts and not is_voided:
+            self.method_counts[payment_method] += 1
+
+        if is_paid:
+            total_price = float(order.get('total_price', 0) or 0)
+            self.total_revenue += total_price
+            if payment_method in self.method_revenue:
+                self.method_revenue[payment_method] += total_price
+            # Tax only counts paid, non-voided orders
+            if not is_voided:
+                self.total_tax += float(order.get('tax', 0) or 0)
+
+    def add_many(self, orders: Iterable[Dict[str, Any]]) -> 'OrderSummaryAggregator':
+        """Add many order rows (one pass)"""
+        add = self.add
+        for order in orders:
+            add(order)
+        return self
+
+    def merge(self, other: 'OrderSummaryAggregator') -> 'OrderSummaryAggregator':
+        """Merge another aggregator into this one (e.g. per-page partials)"""
+        self.total_orders += other.total_orders
+        self.total_revenue += other.total_revenue
+        self.total_tax += other.total_tax
+        for key, value in other.payment_status_counts.items():
+            self.payment_status_counts[key] += value
+        for key, value in other.service_type_counts.items():
+            self.service_type_counts[key] += value
+        for key in PAYMENT_METHODS:
+            self.method_counts[key] += other.method_counts[key]
+            self.method_revenue[key] += other.method_revenue[key]
+        return self
+
+    def to_summary(self) -> Dict[str, Any]:
+        """Return the summary dict in the shape used by /api/orders/summary"""
+        return {
+            "total_orders": self.total_orders,
+            "total_revenue": self.total_revenue,
+            "total_tax": self.total_tax,
+            "payment_status": dict(self.payment_status_counts),
+            "service_type": dict(self.service_type_counts),
+            "payment_method": {
+                method: {"count": self.method_counts[method], "revenue": self.method_revenue[method]}
+                for method in PAYMENT_METHODS
+            }
+        }
+
+
+def summarize_orders(orders: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """Single-pass summary of an iterable of order rows"""
+    return OrderSummaryAggregator().add_many(orders).to_summary()
+
+
+def summary_from_rpc(row: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Normalize the JSON returned by the get_orders_summary_aggregates RPC
+    into the same shape as OrderSummaryAggregator.to_summary()
+    """
+    row = row or {}
+    payment_status = row.get('payment_status') or {}
+    service_type = row.get('service_type') or {}
+    payment_method = row.get('payment_method') or {}
+
+    return {
+        "total_orders": int(row.get('total_orders') or 0),
+        "total_revenue": float(row.get('total_revenue') or 0),
+        "total_tax": float(row.get('total_tax') or 0),
+        "payment_status": {key: int(payment_status.get(key) or 0) for key in PAYMENT_STATUSES},
+        "service_type": {key: int(service_type.get(key) or 0) for key in SERVICE_TYPES},
+        "payment_method": {
+            method: {
+                "count": int((payment_method.get(method) or {}).get('count') or 0),
+                "revenue": float((payment_method.get(method) or {}).get('revenue') or 0),
+            }
+            for method in PAYMENT_METHODS
+        }
+    }
@@ -0,0 +1,121 @@
+"""
+Order Status Tracker - สถานะออเดอร์แบบ versioned สำหรับหน้า Order Status ของลูกค้า
+
+- เก็บ snapshot เล็กๆ ของแต่ละออเดอร์ (status, payment_status, เวลาประมาณ) ใน memory
+- ทุกครั้งที่ orders_service เปลี่ยนสถานะ จะ record snapshot ใหม่
+  ถ้าค่าเปลี่ยนจริง -> bump version และ publish ไปที่ order_events (per-order + per-restaurant)
+- ลูกค้า long-poll / SSE ด้วย `since` version -> ตอบกลับเฉพาะเมื่อมีการเปลี่ยนแปลง
+  แทนการ poll GET /api/orders/{order_id} (full-row select) ทุกๆ กี่วินาที
+"""
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from .event_hub import order_events, order_topic, restaurant_topic
+
+# Columns needed to build a snapshot (projected select when seeding from the database)
+SNAPSHOT_COLUMNS = 'id, restaurant_id, status, payment_status, estimated_minutes, cooking_started_at, cancel_reason, updated_at'
+
+# Fields compared to decide whether the customer-visible state actually changed
+TRACKED_FIELDS = ('status', 'payment_status', 'estimated_minutes', 'cooking_started_at', 'cancel_reason')
+
+MAX_TRACKED_ORDERS = 20000
+
+
+class OrderStatusTracker:
+    """
+    Bounded LRU of per-order snapshots with monotonic versions.
+
+    Versions are millisecond timestamps (always increasing per order), so a
+    client's `since` value stays meaningful across server restarts.
+    """
+
+    def __init__(self, max_orders: int = MAX_TRACKED_ORDERS):
+        self.max_orders = max_orders
+        self.snapshots: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _next_version(previous: int) -> int:
+        return max(previous + 1, int(time.time() * 1000))
+
+    def get(self, order_id: str) -> Optional[Dict[str, Any]]:
+        """Return the current snapshot (or None if this process has not seen the order)"""
+        with self._lock:
+            snapshot = self.snapshots.get(order_id)
+            if snapshot is not None:
+                self.snapshots.move_to_end(order_id)
+                return dict(snapshot)
+        return None
+
+    def record(self, order: Dict[str, Any], publish: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        Record the latest order row.
+
+        Returns:
+            The new snapshot if customer-visible fields changed, otherwise None
+        """
+        order_id = order.get('id')
+        if not order_id:
+            return None
+
+        with self._lock:
+            previous = self.snapshots.get(order_id)
+            if previous is not None and all(previous.get(f) == order.get(f) for f in TRACKED_FIELDS):
+                self.snapshots.move_to_end(order_id)
+                return None
+
+            snapshot = {field: order.get(field) for field in TRACKED_FIELDS}
+            snapshot.update({
+                'order_id': order_id,
+                'restaurant_id': order.get('restaurant_id') or (previous or {}).get('restaurant_id'),
+                'updated_at': order.get('updated_at'),
+                'version': self._next_version(previous['version'] if previous else 0),
+            })
+            self.snapshots[order_id] = snapshot
+            self.snapshots.move_to_end(order_id)
+            while len(self.snapshots) > self.max_orders:
+                self.snapshots.popitem(last=False)
+
+        if publish:
+            event = {'type': 'order.updated', **snapshot}
+            order_events.publish(order_topic(order_id), event)
+            if snapshot['restaurant_id']:
+                order_events.publish(restaurant_topic(snapshot['restaurant_id']), event)
+
+        return dict(snapshot)
+
+    async def wait_for_change(self, order_id: str, since: int, timeout: float) -> Optional[Dict[str, Any]]:
+        """
+        Wait until the order's version is greater than `since`.
+
+        Returns:
+            The newer snapshot, or None on timeout
+        """
+        queue = order_events.subscribe(order_topic(order_id))
+        try:
+            # Re-check after subscribing so a change between check and subscribe is not lost
+            current = self.get(order_id)
+            if current and current['version'] > since:
+                return current
+
+            deadline = asyncio.get_running_loop().time() + timeout
+            while True:
+                remaining = deadline - asyncio.get_running_loop().time()
+                if remaining <= 0:
+                    return None
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    return None
+                if event.get('version', 0) > since:
+                    return {k: v for k, v in event.items() if k != 'type'}
+        finally:
+            order_events.unsubscribe(order_topic(order_id), queue)
+
+
+# Global tracker instance
+order_status_tracker = OrderStatusTracker()
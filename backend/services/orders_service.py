@@ -8,14 +8,25 @@ GST Calculation for New Zealand:
 """
 
 import os
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterator, Optional
 from supabase import create_client, Client
 from dotenv import load_dotenv
 import pathlib
 import re
-from datetime import datetime
+from datetime import date, datetime, timezone
 from decimal import Decimal, ROUND_HALF_UP
 
+from .order_aggregation import (
+    SUMMARY_COLUMNS, SUMMARY_RPC_NAME, OrderSummaryAggregator, summarize_orders, summary_from_rpc
+)
+from .analytics_cache import analytics_cache, order_day
+from .db_errors import is_missing_function
+from .order_tracker import order_status_tracker, SNAPSHOT_COLUMNS
+from .export_stream import (
+    EXPORT_FORMATS, ORDER_EXPORT_COLUMNS, ORDER_EXPORT_DEFAULT_COLUMNS,
+    date_range_filter, parse_columns, stream_export
+)
+
 # Load environment variables
 env_path = pathlib.Path(__file__).parent.parent.parent / '.env'
 if env_path.exists():
@@ -30,6 +41,20 @@ SUPABASE_KEY = (
     os.getenv('NEXT_PUBLIC_SUPABASE_ANON_KEY')
 )
 
+VALID_ORDER_STATUSES = ['pending_payment', 'pending', 'confirmed', 'preparing', 'ready', 'completed', 'cancelled']
+
+# Statuses that kitchen bulk transitions must not move orders out of
+TERMINAL_ORDER_STATUSES = ['completed', 'cancelled']
+
+# Max orders per bulk status request
+MAX_BULK_STATUS_ORDERS = 100
+
+# Fields that trigger an order change event when updated
+ORDER_EVENT_FIELDS = ('status', 'payment_status', 'estimated_minutes')
+
+# Rows per page when loading orders for the per-day summary cache
+SUMMARY_PAGE_SIZE = 1000
+
 class OrdersService:
     """Service for managing orders in Supabase"""
     
@@ -267,6 +292,7 @@ class OrdersService:
             if result.data and len(result.data) > 0:
                 order = result.data[0]
                 print(f"✅ Orders Service: Created order {order.get('id')} for restaurant {restaurant_id}")
+                self._publish_order_event(order)
                 return order
             return None
         except Exception as e:
@@ -314,6 +340,50 @@ class OrdersService:
             traceback.print_exc()
             return []
     
+    def export_orders(
+        self,
+        restaurant_id: str,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        columns: Optional[str] = None,
+        export_format: str = 'csv',
+        gzip: bool = False
+    ) -> Optional[Iterator[bytes]]:
+        """
+        Export ออเดอร์ของร้านแบบ streaming (CSV / NDJSON) สำหรับยื่น GST
+
+        อ่านทีละหน้าแบบ keyset จึงใช้ memory คงที่ไม่ว่าช่วงวันที่จะยาวแค่ไหน
+
+        Args:
+            restaurant_id: Restaurant ID
+            start_date: Start date (YYYY-MM-DD, UTC)
+            end_date: End date (YYYY-MM-DD, UTC)
+            columns: Comma-separated columns (None = ORDER_EXPORT_DEFAULT_COLUMNS)
+            export_format: 'csv' or 'ndjson'
+            gzip: Gzip the stream
+
+        Returns:
+            Iterator of bytes, or None if the database is unavailable / restaurant_id is invalid
+
+        Raises:
+            ValueError: If the format or a column is not supported
+        """
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"Unsupported export format: {export_format}")
+        selected = parse_columns(columns, ORDER_EXPORT_COLUMNS, ORDER_EXPORT_DEFAULT_COLUMNS)
+
+        if not self.supabase_client or not self._is_valid_uuid(restaurant_id):
+            return None
+
+        return stream_export(
+            self.supabase_client,
+            'orders',
+            selected,
+            date_range_filter(start_date, end_date, restaurant_id=restaurant_id),
+            export_format,
+            gzip
+        )
+
     def get_order(self, order_id: str) -> Optional[Dict[str, Any]]:
         """
         ดึงออเดอร์เดียว
@@ -340,6 +410,63 @@ class OrdersService:
             print(f"❌ Orders Service: Failed to get order: {str(e)}")
             return None
     
+    def mark_refunded(self, payment_intent_id: str) -> List[Dict[str, Any]]:
+        """
+        ตั้ง payment_status = 'refunded' ให้ออเดอร์ของ payment intent ที่ถูก refund เต็มจำนวน
+
+        Args:
+            payment_intent_id: Stripe payment intent ID
+
+        Returns:
+            List of updated orders (empty if none matched)
+        """
+        if not self.supabase_client or not payment_intent_id:
+            return []
+
+        try:
+            result = self.supabase_client.table('orders').update({
+                'payment_status': 'refunded'
+            }).eq('payment_intent_id', payment_intent_id).execute()
+
+            orders = result.data or []
+            for order in orders:
+                self._publish_order_event(order)
+            return orders
+        except Exception as e:
+            print(f"❌ Orders Service: Failed to mark order refunded: {str(e)}")
+            return []
+
+    def get_order_snapshot(self, order_id: str) -> Optional[Dict[str, Any]]:
+        """
+        ดึงสถานะล่าสุดของออเดอร์แบบเบา (สำหรับหน้า Order Status)
+        ใช้ snapshot ใน memory ก่อน ถ้าไม่มีค่อย select เฉพาะคอลัมน์ที่จำเป็น
+
+        Args:
+            order_id: Order ID
+
+        Returns:
+            Snapshot dict with version, or None if not found
+        """
+        if not self._is_valid_uuid(order_id):
+            return None
+
+        snapshot = order_status_tracker.get(order_id)
+        if snapshot:
+            return snapshot
+
+        if not self.supabase_client:
+            return None
+
+        try:
+            result = self.supabase_client.table('orders').select(SNAPSHOT_COLUMNS).eq('id', order_id).limit(1).execute()
+
+            if result.data and len(result.data) > 0:
+                return order_status_tracker.record(result.data[0], publish=False) or order_status_tracker.get(order_id)
+            return None
+        except Exception as e:
+            print(f"❌ Orders Service: Failed to get order snapshot: {str(e)}")
+            return None
+
     def update_order(self, order_id: str, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """
         อัปเดตออเดอร์ด้วยข้อมูลทั่วไป
@@ -369,6 +496,8 @@ class OrdersService:
             if result.data and len(result.data) > 0:
                 order = result.data[0]
                 print(f"✅ Orders Service: Updated order {order_id}")
+                if any(field in data for field in ORDER_EVENT_FIELDS):
+                    self._publish_order_event(order)
                 return order
             return None
         except Exception as e:
@@ -395,28 +524,19 @@ class OrdersService:
         if not self._is_valid_uuid(order_id):
             return None
 
-        valid_statuses = ['pending_payment', 'pending', 'confirmed', 'preparing', 'ready', 'completed', 'cancelled']
-        if status not in valid_statuses:
+        if status not in VALID_ORDER_STATUSES:
             print(f"⚠️ Orders Service: Invalid status '{status}'")
             return None
 
         try:
-            update_data = {"status": status}
-
-            # Add cancel_reason if provided (for cancelled orders)
-            if status == 'cancelled' and cancel_reason:
-                update_data["cancel_reason"] = cancel_reason
-
-            # Auto-update payment_status when order is completed
-            if status == 'completed':
-                update_data["payment_status"] = "paid"
-                update_data["completed_at"] = datetime.now().isoformat()
+            update_data = self._build_status_update(status, cancel_reason)
 
             result = self.supabase_client.table('orders').update(update_data).eq('id', order_id).execute()
 
             if result.data and len(result.data) > 0:
                 order = result.data[0]
                 print(f"✅ Orders Service: Updated order {order_id} status to {status}" + (f" (reason: {cancel_reason})" if cancel_reason else ""))
+                self._publish_order_event(order)
                 return order
             return None
         except Exception as e:
@@ -425,13 +545,150 @@ class OrdersService:
             traceback.print_exc()
             return None
 
+    def _build_status_update(self, status: str, cancel_reason: Optional[str] = None) -> Dict[str, Any]:
+        """สร้าง update payload สำหรับการเปลี่ยนสถานะออเดอร์"""
+        update_data = {"status": status}
+
+        # Add cancel_reason if provided (for cancelled orders)
+        if status == 'cancelled' and cancel_reason:
+            update_data["cancel_reason"] = cancel_reason
+
+        # Auto-update payment_status when order is completed
+        if status == 'completed':
+            update_data["payment_status"] = "paid"
+            update_data["completed_at"] = datetime.now().isoformat()
+
+        return update_data
+
+    def _publish_order_event(self, order: Dict[str, Any]) -> None:
+        """
+        Record the new order state; subscribers are notified only if it actually changed.
+        Voids / refunds / status changes on a past day also drop that day's cached analytics.
+        """
+        try:
+            order_status_tracker.record(order)
+            analytics_cache.invalidate_order(order)
+        except Exception as e:
+            # Never fail an order update because of event delivery
+            print(f"⚠️ Orders Service: Failed to publish order event: {str(e)}")
+
+    def bulk_update_order_status(
+        self,
+        restaurant_id: str,
+        order_ids: List[str],
+        status: str,
+        cancel_reason: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        อัปเดตสถานะหลายออเดอร์พร้อมกัน (ครัวกด bump หลายบิล)
+        ตรวจสอบทุกออเดอร์ด้วย select เดียว แล้ว update ด้วย statement เดียว
+
+        Args:
+            restaurant_id: Restaurant ID (orders of other restaurants are rejected)
+            order_ids: List of order IDs
+            status: New status for all orders
+            cancel_reason: Optional reason for cancellation
+
+        Returns:
+            Dictionary with per-order results and updated orders
+        """
+        if not self.supabase_client:
+            return {"success": False, "error": "Database not available", "results": [], "orders": []}
+
+        if not self._is_valid_uuid(restaurant_id):
+            return {"success": False, "error": "Invalid restaurant ID", "results": [], "orders": []}
+
+        if status not in VALID_ORDER_STATUSES:
+            return {"success": False, "error": f"Invalid status '{status}'", "results": [], "orders": []}
+
+        # Dedupe while keeping request order
+        unique_ids = list(dict.fromkeys(order_ids or []))
+        if len(unique_ids) > MAX_BULK_STATUS_ORDERS:
+            return {"success": False, "error": f"Too many orders (max {MAX_BULK_STATUS_ORDERS})", "results": [], "orders": []}
+
+        results: Dict[str, Dict[str, Any]] = {}
+        valid_ids = []
+        for order_id in unique_ids:
+            if self._is_valid_uuid(order_id):
+                valid_ids.append(order_id)
+            else:
+                results[order_id] = {"order_id": order_id, "success": False, "error": "Invalid order ID"}
+
+        try:
+            current = {}
+            if valid_ids:
+                current_result = self.supabase_client.table('orders').select(
+                    'id, restaurant_id, status, is_voided'
+                ).in_('id', valid_ids).execute()
+                current = {row['id']: row for row in (current_result.data or [])}
+
+            to_update = []
+            for order_id in valid_ids:
+                row = current.get(order_id)
+                if not row or row.get('restaurant_id') != restaurant_id:
+                    results[order_id] = {"order_id": order_id, "success": False, "error": "Order not found"}
+                elif row.get('is_voided'):
+                    results[order_id] = {"order_id": order_id, "success": False, "error": "Order is voided"}
+                elif row.get('status') == status:
+                    results[order_id] = {"order_id": order_id, "success": True, "status": status, "unchanged": True}
+                elif row.get('status') in TERMINAL_ORDER_STATUSES:
+                    results[order_id] = {
+                        "order_id": order_id,
+                        "success": False,
+                        "error": f"Order is already {row.get('status')}"
+                    }
+                else:
+                    to_update.append(order_id)
+
+            updated_orders = []
+            if to_update:
+                update_data = self._build_status_update(status, cancel_reason)
+                # Re-check in the UPDATE itself: orders voided / finished since the select
+                # are left alone and reported as "Update failed"
+                result = self.supabase_client.table('orders').update(update_data).in_(
+                    'id', to_update
+                ).eq('restaurant_id', restaurant_id).not_.is_(
+                    'is_voided', True
+                ).not_.in_('status', TERMINAL_ORDER_STATUSES).execute()
+                updated_orders = result.data or []
+
+            updated_ids = {order['id'] for order in updated_orders}
+            for order_id in to_update:
+                if order_id in updated_ids:
+                    results[order_id] = {
+                        "order_id": order_id,
+                        "success": True,
+                        "previous_status": current[order_id].get('status'),
+                        "status": status
+                    }
+                else:
+                    results[order_id] = {"order_id": order_id, "success": False, "error": "Update failed"}
+
+            for order in updated_orders:
+                self._publish_order_event(order)
+
+            print(f"✅ Orders Service: Bulk updated {len(updated_orders)}/{len(unique_ids)} orders to {status}")
+
+            return {
+                "success": True,
+                "updated_count": len(updated_orders),
+                "results": [results[order_id] for order_id in unique_ids],
+                "orders": updated_orders
+            }
+        except Exception as e:
+            print(f"❌ Orders Service: Failed to bulk update order status: {str(e)}")
+            import traceback
+            traceback.print_exc()
+            return {"success": False, "error": str(e), "results": [], "orders": []}
+
     def get_orders_summary(
         self,
         restaurant_id: str,
         start_date: Optional[str] = None,
         end_date: Optional[str] = None,
         payment_status: Optional[str] = None,
-        service_type: Optional[str] = None
+        service_type: Optional[str] = None,
+        include_orders: bool = True
     ) -> Dict[str, Any]:
         """
         ดึงสรุป Orders พร้อม Filter
@@ -442,6 +699,9 @@ class OrdersService:
             end_date: End date (ISO format)
             payment_status: Filter by payment status (pending, paid, failed)
             service_type: Filter by service type (dine_in, pickup, delivery)
+            include_orders: Return the order rows too (False = aggregates only:
+                per-day cached when start_date is given, otherwise computed by the
+                get_orders_summary_aggregates RPC when available)
 
         Returns:
             Dictionary with orders and summary statistics
@@ -453,7 +713,21 @@ class OrdersService:
             return {"orders": [], "summary": {}}
 
         try:
-            query = self.supabase_client.table('orders').select('*').eq('restaurant_id', restaurant_id)
+            if not include_orders and start_date:
+                summary = self._get_cached_summary(
+                    restaurant_id, start_date, end_date, payment_status, service_type
+                )
+                return {"orders": [], "summary": summary}
+
+            if not include_orders:
+                summary = self._get_summary_from_rpc(
+                    restaurant_id, start_date, end_date, payment_status, service_type
+                )
+                if summary is not None:
+                    return {"orders": [], "summary": summary}
+
+            columns = '*' if include_orders else SUMMARY_COLUMNS
+            query = self.supabase_client.table('orders').select(columns).eq('restaurant_id', restaurant_id)
 
             # Date filters
             if start_date:
@@ -472,60 +746,18 @@ class OrdersService:
             # Exclude cancelled orders from summary (unless specifically filtered)
             # query = query.neq('status', 'cancelled')
 
-            result = query.order('created_at', desc=True).execute()
+            if include_orders:
+                query = query.order('created_at', desc=True)
+
+            result = query.execute()
 
             orders = result.data or []
 
-            # Calculate summary statistics
-            total_orders = len(orders)
-            total_revenue = sum(order.get('total_price', 0) or 0 for order in orders if order.get('payment_status') == 'paid')
-
-            # Count by payment status
-            paid_count = len([o for o in orders if o.get('payment_status') == 'paid'])
-            pending_count = len([o for o in orders if o.get('payment_status') == 'pending'])
-            failed_count = len([o for o in orders if o.get('payment_status') == 'failed'])
-
-            # Count by service type
-            dine_in_count = len([o for o in orders if o.get('service_type') == 'dine_in'])
-            pickup_count = len([o for o in orders if o.get('service_type') == 'pickup'])
-            delivery_count = len([o for o in orders if o.get('service_type') == 'delivery'])
-
-            # Count by payment method (all orders, not just paid)
-            card_count = len([o for o in orders if o.get('payment_method') == 'card' and not o.get('is_voided') and o.get('status') != 'voided'])
-            bank_transfer_count = len([o for o in orders if o.get('payment_method') == 'bank_transfer' and not o.get('is_voided') and o.get('status') != 'voided'])
-            cash_count = len([o for o in orders if o.get('payment_method') == 'cash' and not o.get('is_voided') and o.get('status') != 'voided'])
-
-            # Revenue by payment method (only paid orders)
-            card_revenue = sum(o.get('total_price', 0) or 0 for o in orders if o.get('payment_method') == 'card' and o.get('payment_status') == 'paid')
-            bank_transfer_revenue = sum(o.get('total_price', 0) or 0 for o in orders if o.get('payment_method') == 'bank_transfer' and o.get('payment_status') == 'paid')
-            cash_revenue = sum(o.get('total_price', 0) or 0 for o in orders if o.get('payment_method') == 'cash' and o.get('payment_status') == 'paid')
-
-            # Calculate total tax from paid orders
-            total_tax = sum(o.get('tax', 0) or 0 for o in orders if o.get('payment_status') == 'paid' and not o.get('is_voided') and o.get('status') != 'voided')
-
-            summary = {
-                "total_orders": total_orders,
-                "total_revenue": total_revenue,
-                "total_tax": total_tax,
-                "payment_status": {
-                    "paid": paid_count,
-                    "pending": pending_count,
-                    "failed": failed_count
-                },
-                "service_type": {
-                    "dine_in": dine_in_count,
-                    "pickup": pickup_count,
-                    "delivery": delivery_count
-                },
-                "payment_method": {
-                    "card": {"count": card_count, "revenue": card_revenue},
-                    "bank_transfer": {"count": bank_transfer_count, "revenue": bank_transfer_revenue},
-                    "cash": {"count": cash_count, "revenue": cash_revenue}
-                }
-            }
+            # Calculate all summary statistics in a single pass
+            summary = summarize_orders(orders)
 
             return {
-                "orders": orders,
+                "orders": orders if include_orders else [],
                 "summary": summary
             }
 
@@ -535,6 +767,94 @@ class OrdersService:
             traceback.print_exc()
             return {"orders": [], "summary": {}}
 
+    def _get_cached_summary(
+        self,
+        restaurant_id: str,
+        start_date: str,
+        end_date: Optional[str],
+        payment_status: Optional[str],
+        service_type: Optional[str]
+    ) -> Dict[str, Any]:
+        """
+        สรุปแบบแบ่งเป็นรายวัน: วันที่ปิดแล้วมาจาก analytics_cache
+        โหลดใหม่เฉพาะวันที่ยังไม่มีใน cache และวันปัจจุบัน แล้ว merge aggregators
+
+        Returns:
+            Summary dict (same shape as summarize_orders)
+        """
+        start_day = date.fromisoformat(start_date)
+        end_day = date.fromisoformat(end_date) if end_date else datetime.now(timezone.utc).date()
+        metric = f"orders_summary:{payment_status or ''}:{service_type or ''}"
+
+        def load(start: date, end: date) -> Dict[date, OrderSummaryAggregator]:
+            aggregators: Dict[date, OrderSummaryAggregator] = {}
+            offset = 0
+            while True:
+                query = self.supabase_client.table('orders').select(
+                    f"{SUMMARY_COLUMNS}, created_at"
+                ).eq('restaurant_id', restaurant_id).gte(
+                    'created_at', f"{start.isoformat()}T00:00:00"
+                ).lte(
+                    'created_at', f"{end.isoformat()}T23:59:59"
+                )
+                if payment_status:
+                    query = query.eq('payment_status', payment_status)
+                if service_type:
+                    query = query.eq('service_type', service_type)
+
+                rows = query.order('created_at').order('id').range(
+                    offset, offset + SUMMARY_PAGE_SIZE - 1
+                ).execute().data or []
+                for row in rows:
+                    day = order_day(row)
+                    if day not in aggregators:
+                        aggregators[day] = OrderSummaryAggregator()
+                    aggregators[day].add(row)
+                if len(rows) < SUMMARY_PAGE_SIZE:
+                    return aggregators
+                offset += SUMMARY_PAGE_SIZE
+
+        # Merge into a fresh aggregator (cached per-day aggregators are never mutated)
+        total = OrderSummaryAggregator()
+        for _, aggregator in analytics_cache.get_days(restaurant_id, metric, start_day, end_day, load):
+            if aggregator:
+                total.merge(aggregator)
+        return total.to_summary()
+
+    def _get_summary_from_rpc(
+        self,
+        restaurant_id: str,
+        start_date: Optional[str],
+        end_date: Optional[str],
+        payment_status: Optional[str],
+        service_type: Optional[str]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        คำนวณสรุปใน Postgres (migrations/create_orders_summary_rpc.sql)
+        ส่งกลับมาเฉพาะตัวเลขสรุป ไม่ต้องโหลดออเดอร์ทั้งหมด
+
+        Returns:
+            Summary dict, or None if the RPC is not installed (other errors are raised)
+        """
+        try:
+            result = self.supabase_client.rpc(SUMMARY_RPC_NAME, {
+                "p_restaurant_id": restaurant_id,
+                "p_start": f"{start_date}T00:00:00" if start_date else None,
+                "p_end": f"{end_date}T23:59:59" if end_date else None,
+                "p_payment_status": payment_status,
+                "p_service_type": service_type,
+            }).execute()
+
+            row = result.data
+            if isinstance(row, list):
+                row = row[0] if row else None
+            return summary_from_rpc(row)
+        except Exception as e:
+            if not is_missing_function(e):
+                raise
+            print(f"⚠️ Orders Service: Summary RPC unavailable, falling back to projected select: {str(e)}")
+            return None
+
 
 # Create singleton instance
 orders_service = OrdersService()
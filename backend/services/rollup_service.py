@@ -0,0 +1,396 @@
+"""
+Rollup Service - อ่าน/สร้างตารางสรุปยอดขายรายวันและรายชั่วโมง
+
+ตาราง order_rollups_daily / order_rollups_hourly ถูกอัปเดตแบบ incremental
+โดย trigger บนตาราง orders (migrations/create_order_rollups.sql)
+Service นี้ใช้สำหรับ:
+- อ่าน rollups ตามช่วงวัน (AnalyticsService) ผ่าน analytics_cache
+- อ่านเมนูขายดี (top-N): ยอดรวมต่อเมนูจาก RPC get_top_menu_items (AnalyticsService, BestSellersService)
+- อ่าน heatmap 7x24 (วันในสัปดาห์ x ชั่วโมง, เวลาท้องถิ่น) และ forecast สัปดาห์หน้า
+  จาก order_demand_weekly (migrations/create_demand_heatmap.sql)
+- Backfill / rebuild ผ่าน RPC rebuild_order_rollups + rebuild_menu_item_sales
+  + rebuild_order_demand (scripts/backfill_order_rollups.py)
+"""
+
+import os
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from dotenv import load_dotenv
+
+from .analytics_cache import analytics_cache
+
+# Load environment variables
+load_dotenv()
+
+DAILY_TABLE = 'order_rollups_daily'
+HOURLY_TABLE = 'order_rollups_hourly'
+REBUILD_RPC_NAME = 'rebuild_order_rollups'
+TOP_ITEMS_RPC_NAME = 'get_top_menu_items'
+ITEM_SALES_REBUILD_RPC_NAME = 'rebuild_menu_item_sales'
+DEMAND_HEATMAP_RPC_NAME = 'get_demand_heatmap'
+DEMAND_FORECAST_RPC_NAME = 'get_demand_forecast'
+DEMAND_REBUILD_RPC_NAME = 'rebuild_order_demand'
+
+# Hour-of-week matrix: dow 0 = Monday ... 6 = Sunday, hour 0-23 (restaurant local time)
+WEEKDAYS = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
+# Default of restaurants.timezone (used when a restaurant has none set)
+DEFAULT_TIMEZONE = 'Pacific/Auckland'
+
+SERVICE_TYPES = ('dine_in', 'pickup', 'delivery')
+PAYMENT_METHODS = ('card', 'bank_transfer', 'cash', 'other_payment')
+
+# Rows per PostgREST page when reading per-day tables
+READ_PAGE_SIZE = 1000
+
+# Days per rebuild RPC call when backfilling long ranges
+BACKFILL_CHUNK_DAYS = 31
+
+
+def _rows_by_day(rows: List[Dict[str, Any]]) -> Dict[date, List[Dict[str, Any]]]:
+    by_day: Dict[date, List[Dict[str, Any]]] = {}
+    for row in rows:
+        by_day.setdefault(date.fromisoformat(row['day']), []).append(row)
+    return by_day
+
+
+def _week_matrix(rows: List[Dict[str, Any]], count_key: str, revenue_key: str, count_type=int) -> Dict[str, List[List[float]]]:
+    orders = [[count_type(0)] * 24 for _ in WEEKDAYS]
+    revenue = [[0.0] * 24 for _ in WEEKDAYS]
+    for row in rows:
+        dow, hour = int(row['dow']), int(row['hour'])
+        orders[dow][hour] = count_type(row.get(count_key) or 0)
+        revenue[dow][hour] = round(float(row.get(revenue_key) or 0), 2)
+    return {'orders': orders, 'revenue': revenue}
+
+
+class RollupService:
+    """Read and rebuild per-restaurant order rollups"""
+
+    def __init__(self):
+        try:
+            from supabase import create_client
+            supabase_url = os.getenv('SUPABASE_URL') or os.getenv('NEXT_PUBLIC_SUPABASE_URL')
+            supabase_key = (
+                os.getenv('SUPABASE_SERVICE_ROLE_KEY') or
+                os.getenv('SUPABASE_KEY') or
+                os.getenv('NEXT_PUBLIC_SUPABASE_ANON_KEY')
+            )
+
+            if supabase_url and supabase_key:
+                self.supabase = create_client(supabase_url, supabase_key)
+                print("✅ Rollup Service: Supabase client initialized")
+            else:
+                self.supabase = None
+                print("⚠️ Rollup Service: Supabase credentials not found")
+        except Exception as e:
+            print(f"⚠️ Failed to initialize RollupService: {str(e)}")
+            self.supabase = None
+
+    def _select_days(
+        self,
+        table: str,
+        columns: str,
+        restaurant_id: str,
+        start_day: date,
+        end_day: date,
+        order_by: tuple = ('day',)
+    ) -> List[Dict[str, Any]]:
+        """Every row of a per-day table in [start_day, end_day], paged past the PostgREST row limit"""
+        rows: List[Dict[str, Any]] = []
+        offset = 0
+        while True:
+            query = self.supabase.table(table).select(columns).eq(
+                'restaurant_id', restaurant_id
+            ).gte(
+                'day', start_day.isoformat()
+            ).lte(
+                'day', end_day.isoformat()
+            )
+            for column in order_by:
+                query = query.order(column)
+            page = query.range(offset, offset + READ_PAGE_SIZE - 1).execute().data or []
+            rows.extend(page)
+            if len(page) < READ_PAGE_SIZE:
+                return rows
+            offset += READ_PAGE_SIZE
+
+    def get_daily_rollups(
+        self,
+        restaurant_id: str,
+        start_day: date,
+        end_day: date,
+        columns: str = '*'
+    ) -> List[Dict[str, Any]]:
+        """
+        ดึง daily rollups ของร้านในช่วงวัน (inclusive)
+        วันที่ปิดแล้วมาจาก analytics_cache, วันปัจจุบันอ่านใหม่ทุกครั้ง
+
+        Args:
+            columns: Columns to select (must include 'day')
+
+        Returns:
+            List of rollup rows sorted by day
+        """
+        if not self.supabase:
+            return []
+
+        def load(start: date, end: date) -> Dict[date, Dict[str, Any]]:
+            rows = self._select_days(DAILY_TABLE, columns, restaurant_id, start, end)
+            return {date.fromisoformat(row['day']): row for row in rows}
+
+        days = analytics_cache.get_days(restaurant_id, f'rollups_daily:{columns}', start_day, end_day, load)
+        return [row for _, row in days if row]
+
+    def get_hourly_rollups(
+        self,
+        restaurant_id: str,
+        start_day: date,
+        end_day: date,
+        columns: str = 'day, hour, order_count, revenue'
+    ) -> List[Dict[str, Any]]:
+        """
+        ดึง hourly rollups ของร้านในช่วงวัน (inclusive) - สูงสุด 24 แถวต่อวัน
+        วันที่ปิดแล้วมาจาก analytics_cache, วันปัจจุบันอ่านใหม่ทุกครั้ง
+
+        Args:
+            columns: Columns to select (must include 'day')
+
+        Returns:
+            List of rollup rows sorted by day, hour
+        """
+        if not self.supabase:
+            return []
+
+        def load(start: date, end: date) -> Dict[date, List[Dict[str, Any]]]:
+            rows = self._select_days(HOURLY_TABLE, columns, restaurant_id, start, end, ('day', 'hour'))
+            return _rows_by_day(rows)
+
+        days = analytics_cache.get_days(restaurant_id, f'rollups_hourly:{columns}', start_day, end_day, load)
+        return [row for _, rows in days for row in (rows or [])]
+
+    def _item_totals(self, restaurant_id: str, start_day: date, end_day: date) -> List[Dict[str, Any]]:
+        """Per-menu_id totals for [start_day, end_day], summed in SQL (RPC get_top_menu_items, no limit)"""
+        rows: List[Dict[str, Any]] = []
+        offset = 0
+        while True:
+            page = self.supabase.rpc(TOP_ITEMS_RPC_NAME, {
+                'p_restaurant_id': restaurant_id,
+                'p_start': start_day.isoformat(),
+                'p_end': end_day.isoformat(),
+                'p_limit': None,
+            }).order('menu_id').range(offset, offset + READ_PAGE_SIZE - 1).execute().data or []
+            rows.extend(page)
+            if len(page) < READ_PAGE_SIZE:
+                return rows
+            offset += READ_PAGE_SIZE
+
+    def get_top_items(
+        self,
+        restaurant_id: str,
+        start_day: date,
+        end_day: date,
+        limit: int = 10,
+        include_menu_ids: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        เมนูขายดีจาก menu_item_sales_daily ในช่วงวัน (inclusive)
+        ยอดรวมต่อเมนูของช่วงวันที่ปิดแล้วรวมใน SQL และ cache ใน analytics_cache,
+        ยอดของวันปัจจุบันอ่านใหม่ทุกครั้ง แล้วบวกกันก่อนจัดอันดับ
+
+        Args:
+            restaurant_id: Restaurant ID
+            start_day: First day
+            end_day: Last day
+            limit: Top N by quantity
+            include_menu_ids: Menu IDs to return even if outside the top N (e.g. pinned)
+
+        Returns:
+            List of {menu_id, quantity, revenue, order_count, name, name_en}
+            sorted by quantity desc
+        """
+        if not self.supabase:
+            return []
+
+        closed_end = min(end_day, analytics_cache.last_closed_day())
+        parts: List[List[Dict[str, Any]]] = []
+        if start_day <= closed_end:
+            parts.append(analytics_cache.get_range(
+                restaurant_id, 'item_totals', start_day, closed_end,
+                lambda: self._item_totals(restaurant_id, start_day, closed_end)
+            ))
+        if end_day > closed_end:
+            parts.append(self._item_totals(restaurant_id, max(start_day, closed_end + timedelta(days=1)), end_day))
+
+        totals: Dict[str, Dict[str, Any]] = {}
+        for rows in parts:
+            for row in rows:
+                item = totals.get(row['menu_id'])
+                if item is None:
+                    item = totals[row['menu_id']] = {
+                        'menu_id': row['menu_id'], 'quantity': 0, 'revenue': 0.0,
+                        'order_count': 0, 'name': None, 'name_en': None,
+                    }
+                item['quantity'] += row.get('quantity') or 0
+                item['revenue'] += float(row.get('revenue') or 0)
+                item['order_count'] += row.get('order_count') or 0
+                item['name'] = row.get('name') or item['name']
+                item['name_en'] = row.get('name_en') or item['name_en']
+
+        ranked = sorted(
+            (item for item in totals.values() if item['quantity'] > 0),
+            key=lambda item: (-item['quantity'], -item['order_count'])
+        )
+        top = ranked[:limit]
+        if include_menu_ids:
+            wanted = set(include_menu_ids) - {item['menu_id'] for item in top}
+            top.extend(item for item in ranked[limit:] if item['menu_id'] in wanted)
+        return top
+
+    def restaurant_timezone(self, restaurant_id: str) -> ZoneInfo:
+        """restaurants.timezone of a restaurant (DEFAULT_TIMEZONE if unset or unknown)"""
+        name = None
+        if self.supabase:
+            result = self.supabase.table('restaurants').select('timezone').eq(
+                'id', restaurant_id
+            ).limit(1).execute()
+            if result.data:
+                name = result.data[0].get('timezone')
+        try:
+            return ZoneInfo(name or DEFAULT_TIMEZONE)
+        except (ZoneInfoNotFoundError, ValueError):
+            print(f"⚠️ Unknown timezone '{name}' for restaurant {restaurant_id}, using {DEFAULT_TIMEZONE}")
+            return ZoneInfo(DEFAULT_TIMEZONE)
+
+    def current_week_start(self, restaurant_id: str) -> date:
+        """Monday of the current week in the restaurant's local time (same zone as order_demand_weekly)"""
+        today = datetime.now(self.restaurant_timezone(restaurant_id)).date()
+        return today - timedelta(days=today.weekday())
+
+    def get_demand_heatmap(self, restaurant_id: str, start_week: date, end_week: date) -> Dict[str, List[List[float]]]:
+        """
+        Hour-of-week matrix (7x24, local time) summed over a range of weeks
+
+        Args:
+            restaurant_id: Restaurant ID
+            start_week: First week (Monday, inclusive)
+            end_week: Last week (Monday, inclusive)
+
+        Returns:
+            {'orders': [[int] * 24] * 7, 'revenue': [[float] * 24] * 7}, indexed [dow][hour]
+        """
+        if not self.supabase:
+            return _week_matrix([], 'order_count', 'revenue')
+
+        result = self.supabase.rpc(DEMAND_HEATMAP_RPC_NAME, {
+            'p_restaurant_id': restaurant_id,
+            'p_start_week': start_week.isoformat(),
+            'p_end_week': end_week.isoformat(),
+        }).execute()
+        return _week_matrix(result.data or [], 'order_count', 'revenue')
+
+    def get_demand_forecast(self, restaurant_id: str, weeks: int = 8, decay: float = 0.7) -> Dict[str, List[List[float]]]:
+        """
+        Expected orders / revenue per hour-of-week cell for next week
+        (exponentially weighted mean of the last `weeks` complete weeks)
+
+        Returns:
+            {'orders': [[float] * 24] * 7, 'revenue': [[float] * 24] * 7}, indexed [dow][hour]
+        """
+        if not self.supabase:
+            return _week_matrix([], 'expected_orders', 'expected_revenue', float)
+
+        result = self.supabase.rpc(DEMAND_FORECAST_RPC_NAME, {
+            'p_restaurant_id': restaurant_id,
+            'p_weeks': weeks,
+            'p_decay': decay,
+        }).execute()
+        return _week_matrix(result.data or [], 'expected_orders', 'expected_revenue', float)
+
+    def rebuild(
+        self,
+        restaurant_id: Optional[str] = None,
+        start_day: Optional[date] = None,
+        end_day: Optional[date] = None
+    ) -> Dict[str, Any]:
+        """
+        Rebuild rollups from the orders table (batch backfill)
+
+        Long ranges are processed in BACKFILL_CHUNK_DAYS chunks so each RPC
+        call stays well inside the statement timeout.
+
+        Args:
+            restaurant_id: Restaurant ID (None = all restaurants)
+            start_day: First day (None = everything up to end_day in one call)
+            end_day: Last day (default: today)
+
+        Returns:
+            Dict with number of daily / item / demand rows written and chunks processed
+        """
+        if not self.supabase:
+            return {'success': False, 'error': 'Database not available'}
+
+        end_day = end_day or date.today()
+
+        # Rebuilt days may differ from what the cache holds
+        if restaurant_id:
+            analytics_cache.invalidate(restaurant_id)
+        else:
+            analytics_cache.clear()
+
+        try:
+            if not start_day:
+                params = {
+                    'p_restaurant_id': restaurant_id,
+                    'p_start': None,
+                    'p_end': end_day.isoformat(),
+                }
+                result = self.supabase.rpc(REBUILD_RPC_NAME, params).execute()
+                item_result = self.supabase.rpc(ITEM_SALES_REBUILD_RPC_NAME, params).execute()
+                demand_result = self.supabase.rpc(DEMAND_REBUILD_RPC_NAME, params).execute()
+                return {
+                    'success': True,
+                    'daily_rows': result.data or 0,
+                    'item_rows': item_result.data or 0,
+                    'demand_rows': demand_result.data or 0,
+                    'chunks': 1
+                }
+
+            daily_rows = 0
+            item_rows = 0
+            demand_rows = 0
+            chunks = 0
+            chunk_start = start_day
+            while chunk_start <= end_day:
+                chunk_end = min(chunk_start + timedelta(days=BACKFILL_CHUNK_DAYS - 1), end_day)
+                params = {
+                    'p_restaurant_id': restaurant_id,
+                    'p_start': chunk_start.isoformat(),
+                    'p_end': chunk_end.isoformat(),
+                }
+                result = self.supabase.rpc(REBUILD_RPC_NAME, params).execute()
+                item_result = self.supabase.rpc(ITEM_SALES_REBUILD_RPC_NAME, params).execute()
+                demand_result = self.supabase.rpc(DEMAND_REBUILD_RPC_NAME, params).execute()
+                daily_rows += result.data or 0
+                item_rows += item_result.data or 0
+                demand_rows += demand_result.data or 0
+                chunks += 1
+                print(f"🔄 Rollups rebuilt for {chunk_start} → {chunk_end}")
+                chunk_start = chunk_end + timedelta(days=1)
+
+            return {
+                'success': True,
+                'daily_rows': daily_rows,
+                'item_rows': item_rows,
+                'demand_rows': demand_rows,
+                'chunks': chunks
+            }
+
+        except Exception as e:
+            print(f"❌ Failed to rebuild rollups: {str(e)}")
+            return {'success': False, 'error': str(e)}
+
+
+# Create singleton instance
+rollup_service = RollupService()
@@ -0,0 +1,133 @@
+"""
+Service Request Feed - realtime fan-out ของคำขอบริการ (เรียกพนักงาน, ขอน้ำ, ขอบิล ฯลฯ)
+
+- สร้าง / อัปเดตสถานะคำขอ -> publish ไปที่ hub ต่อร้าน (restaurant:<id>)
+- เก็บ event ล่าสุดของแต่ละร้านใน buffer จำกัดขนาด (deque)
+  เครื่องของพนักงานที่ reconnect ส่ง `since` มา แล้วได้ event ที่พลาดไปโดยไม่ต้อง query database
+- ถ้า `since` เก่ากว่า buffer -> แจ้ง client ให้ดึงรายการเต็มจาก GET /api/service-requests
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from .event_hub import EventHub, restaurant_topic
+
+RECENT_BUFFER_SIZE = 200
+MAX_TRACKED_RESTAURANTS = 5000
+
+# Hub for service request events (per-restaurant topics)
+service_request_events = EventHub("service_requests")
+
+
+class ServiceRequestFeed:
+    """Per-restaurant bounded event buffer + fan-out"""
+
+    def __init__(self, buffer_size: int = RECENT_BUFFER_SIZE):
+        self.buffer_size = buffer_size
+        # Store: {restaurant_id: deque([event, ...])}
+        self.buffers: Dict[str, Deque[Dict[str, Any]]] = {}
+        # Newest seq that fell out of each restaurant's buffer
+        self.evicted_seq: Dict[str, int] = {}
+        # Events before this process started are unknown to the buffer
+        self.started_seq = int(time.time() * 1000)
+        self._last_seq = self.started_seq
+        self._lock = threading.Lock()
+
+    def _next_seq(self) -> int:
+        # Millisecond-based sequence so `since` survives server restarts
+        self._last_seq = max(self._last_seq + 1, int(time.time() * 1000))
+        return self._last_seq
+
+    def publish(self, event_type: str, service_request: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Append an event to the restaurant buffer and fan it out to subscribers
+
+        Args:
+            event_type: 'service_request.created' or 'service_request.updated'
+            service_request: Service request row from the database
+
+        Returns:
+            The published event (None if the row has no restaurant_id)
+        """
+        restaurant_id = service_request.get('restaurant_id')
+        if not restaurant_id:
+            return None
+
+        with self._lock:
+            event = {
+                'seq': self._next_seq(),
+                'type': event_type,
+                'service_request': service_request,
+            }
+            buffer = self.buffers.get(restaurant_id)
+            if buffer is None:
+                if len(self.buffers) >= MAX_TRACKED_RESTAURANTS:
+                    # Drop the restaurant that has been quiet the longest
+                    stalest = min(self.buffers, key=lambda rid: self.buffers[rid][-1]['seq'])
+                    self.evicted_seq[stalest] = self.buffers.pop(stalest)[-1]['seq']
+                buffer = self.buffers[restaurant_id] = deque(maxlen=self.buffer_size)
+            elif len(buffer) == self.buffer_size:
+                self.evicted_seq[restaurant_id] = buffer[0]['seq']
+            buffer.append(event)
+
+        service_request_events.publish(restaurant_topic(restaurant_id), event)
+        return event
+
+    def events_since(self, restaurant_id: str, since: int) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        Buffered events newer than `since`
+
+        Returns:
+            (events, complete) - complete is False when events older than the
+            buffer may have been missed and the client should do a full fetch
+        """
+        with self._lock:
+            buffer = list(self.buffers.get(restaurant_id, ()))
+            evicted = self.evicted_seq.get(restaurant_id, 0)
+
+        events = [event for event in buffer if event['seq'] > since]
+        complete = since >= self.started_seq and since >= evicted
+        return events, complete
+
+    def latest_seq(self, restaurant_id: str) -> int:
+        """Cursor for a client that has just loaded the full list from the database"""
+        with self._lock:
+            buffer = self.buffers.get(restaurant_id)
+            return max(
+                buffer[-1]['seq'] if buffer else 0,
+                self.evicted_seq.get(restaurant_id, 0),
+                self.started_seq
+            )
+
+    async def wait_for_events(
+        self,
+        restaurant_id: str,
+        since: int,
+        timeout: float
+    ) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        Return buffered events newer than `since`, waiting up to `timeout`
+        seconds for a new one if there are none yet.
+        """
+        topic = restaurant_topic(restaurant_id)
+        queue = service_request_events.subscribe(topic)
+        try:
+            events, complete = self.events_since(restaurant_id, since)
+            if events or not complete:
+                return events, complete
+
+            try:
+                await asyncio.wait_for(queue.get(), timeout=timeout)
+            except asyncio.TimeoutError:
+                return [], True
+
+            return self.events_since(restaurant_id, since)
+        finally:
+            service_request_events.unsubscribe(topic, queue)
+
+
+# Global feed instance
+service_request_feed = ServiceRequestFeed()
@@ -408,13 +408,14 @@ class TrialLimitsService:
             "message": f"{remaining} {action} remaining in trial"
         }
     
-    def increment_usage(self, user_id: str, action: str) -> Dict[str, Any]:
+    def increment_usage(self, user_id: str, action: str, amount: int = 1) -> Dict[str, Any]:
         """
         เพิ่มจำนวนการใช้งาน
         
         Args:
             user_id: User ID
             action: 'menu_items', 'image_generation', หรือ 'image_enhancement'
+            amount: Units to add (e.g. number of items in a bulk import)
             
         Returns:
             Updated user status
@@ -424,7 +425,7 @@ class TrialLimitsService:
             self.initialize_user(user_id)
 
         count_key = f"{action}_count"
-        new_count = self.usage_data[user_id].get(count_key, 0) + 1
+        new_count = self.usage_data[user_id].get(count_key, 0) + amount
         self.usage_data[user_id][count_key] = new_count
         self.save_data()
 
@@ -0,0 +1,41 @@
+"""
+Test Menu Price Parsing - ตรวจสอบ _parse_price ที่ใช้ตอน import เมนู (ไม่ต้องต่อ database)
+
+- จุด/จุลภาคคั่นหลักพัน ต้องไม่ถูกอ่านเป็นทศนิยม ("$1,234.50" = 1234.5 ไม่ใช่ 1.234)
+- จุลภาคทศนิยม ("18,50 NZD") ยังอ่านได้เหมือนเดิม
+
+รัน: python -m pytest test_menu_price.py หรือ python test_menu_price.py
+"""
+from services.menu_service import _parse_price
+
+# (input, expected price)
+PRICE_VECTORS = [
+    ('$18.50', 18.5),
+    ('18,50 NZD', 18.5),
+    ('12,5', 12.5),
+    ('$1,234.50', 1234.5),
+    ('1.234,50 €', 1234.5),
+    ('1,234', 1234.0),
+    ('1,234,567', 1234567.0),
+    ('1.234.567', 1234567.0),
+    ('฿ 120', 120.0),
+    (42, 42.0),
+    (None, 0.0),
+]
+
+
+def test_prices_parse():
+    for value, expected in PRICE_VECTORS:
+        assert _parse_price(value) == expected, value
+
+
+def test_invalid_prices():
+    for value in ('abc', '-5', -1):
+        assert _parse_price(value) is None, value
+
+
+if __name__ == '__main__':
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,124 @@
+"""
+Test Source Hash + Analytics Cache - ตรวจสอบ helper ที่ไม่ต้องต่อ database
+
+- compute_source_hash ต้องตรงกับ generateSourceHash ใน JavaScript
+  (ค่าที่คาดไว้ได้จากการรัน generateSourceHash ใน Node กับ input เดียวกัน)
+- AnalyticsCache: วันที่ปิดแล้ว cache ไว้, วันปัจจุบันโหลดใหม่ทุกครั้ง, invalidate ทีละวัน
+
+รัน: python -m pytest test_source_hash_and_cache.py หรือ python test_source_hash_and_cache.py
+"""
+from datetime import date, timedelta
+
+from services.analytics_cache import AnalyticsCache
+from services.menu_translation_service import compute_source_hash
+
+# (menus row, generateSourceHash output)
+SOURCE_HASH_VECTORS = [
+    # Thai + emoji (surrogate pair) + option names
+    ({
+        'name_original': 'ผัดไทย',
+        'description_original': 'Rice noodles 🍜 with prawns and tamarind sauce, a classic',
+        'category': 'Noodles',
+        'options': {'meats': [{'name': 'Chicken'}, {'name': 'Beef'}], 'addOns': [{'name': 'Egg'}]},
+    }, '79865785'),
+    # CJK, null fields, options stored as a JSON string, option without a name
+    ({
+        'name_original': 'ラーメン',
+        'description_original': None,
+        'category': None,
+        'options': '{"meats":["x"],"addOns":[]}',
+    }, '51a7d5c9'),
+    # Missing category defaults to 'Main Course' (as the public menu shows it)
+    ({'name_original': 'a', 'description_original': ''}, '4893b5df'),
+]
+
+CLOSED_DAY = date(2026, 1, 10)
+
+
+def _cache() -> AnalyticsCache:
+    cache = AnalyticsCache()
+    cache.last_closed_day = lambda: CLOSED_DAY
+    return cache
+
+
+def _counting_loader(calls):
+    def load(start, end):
+        calls.append((start, end))
+        day, values = start, {}
+        while day <= end:
+            values[day] = day.day
+            day += timedelta(days=1)
+        return values
+    return load
+
+
+def test_source_hash_matches_javascript():
+    for row, expected in SOURCE_HASH_VECTORS:
+        assert compute_source_hash(row) == expected, row['name_original']
+
+
+def test_closed_days_are_cached():
+    cache, calls = _cache(), []
+    load = _counting_loader(calls)
+    start = CLOSED_DAY - timedelta(days=6)
+
+    first = cache.get_days('r1', 'metric', start, CLOSED_DAY, load)
+    second = cache.get_days('r1', 'metric', start, CLOSED_DAY, load)
+
+    assert first == second
+    assert [value for _, value in first] == [4, 5, 6, 7, 8, 9, 10]
+    assert calls == [(start, CLOSED_DAY)]
+
+
+def test_open_days_are_loaded_every_time():
+    cache, calls = _cache(), []
+    load = _counting_loader(calls)
+    start = CLOSED_DAY - timedelta(days=2)
+    open_day = CLOSED_DAY + timedelta(days=1)
+
+    cache.get_days('r1', 'metric', start, open_day, load)
+    cache.get_days('r1', 'metric', start, open_day, load)
+
+    assert calls == [(start, CLOSED_DAY), (open_day, open_day), (open_day, open_day)]
+
+
+def test_invalidate_reloads_only_that_day():
+    cache, calls = _cache(), []
+    load = _counting_loader(calls)
+    start = CLOSED_DAY - timedelta(days=6)
+    voided_day = CLOSED_DAY - timedelta(days=3)
+
+    cache.get_days('r1', 'metric', start, CLOSED_DAY, load)
+    cache.get_days('r2', 'metric', start, CLOSED_DAY, load)
+    cache.invalidate('r1', voided_day)
+    cache.get_days('r1', 'metric', start, CLOSED_DAY, load)
+    cache.get_days('r2', 'metric', start, CLOSED_DAY, load)
+
+    assert calls == [(start, CLOSED_DAY), (start, CLOSED_DAY), (voided_day, voided_day)]
+
+
+def test_range_results_follow_day_invalidation():
+    cache, calls = _cache(), []
+    start = CLOSED_DAY - timedelta(days=6)
+
+    def load():
+        calls.append(1)
+        return ['top']
+
+    cache.get_range('r1', 'top', start, CLOSED_DAY, load)
+    cache.get_range('r1', 'top', start, CLOSED_DAY, load)
+    cache.invalidate('r1', CLOSED_DAY - timedelta(days=20))
+    cache.get_range('r1', 'top', start, CLOSED_DAY, load)
+    assert len(calls) == 1
+
+    cache.invalidate('r1', CLOSED_DAY - timedelta(days=1))
+    cache.get_range('r1', 'top', start, CLOSED_DAY, load)
+    cache.get_range('r1', 'top', start, CLOSED_DAY + timedelta(days=1), load)
+    assert len(calls) == 3
+
+
+if __name__ == '__main__':
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"✅ {name}")
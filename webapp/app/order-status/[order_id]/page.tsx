@@ -2,7 +2,6 @@
 
 import { useEffect, useState } from 'react';
 import { useParams, useRouter, useSearchParams } from 'next/navigation';
-import { supabase } from '@/lib/supabase/client';
 import Link from 'next/link';
 import {
   Clock,
@@ -160,14 +159,24 @@ export default function OrderStatusPage() {
   useEffect(() => {
     if (order_id) {
       fetchOrder();
-      setupRealtimeSubscription();
     }
   }, [order_id]);
 
+  // Watch for status changes (long-poll only answers when status or estimated time changes)
+  useEffect(() => {
+    if (!order_id) return;
+
+    const controller = new AbortController();
+    watchOrderStatus(controller.signal);
+
+    return () => controller.abort();
+  }, [order_id]);
+
   // Update estimated time countdown every 30 seconds
   useEffect(() => {
     if (!order) return;
 
+    calculateEstimatedTime(order);
     const interval = setInterval(() => {
       calculateEstimatedTime(order);
     }, 30000); // Update every 30 seconds
@@ -245,30 +254,41 @@ export default function OrderStatusPage() {
     }
   };
 
-  const setupRealtimeSubscription = () => {
-    if (!supabase || !order_id) return;
-
-    const channel = supabase
-      .channel(`order-${order_id}`)
-      .on(
-        'postgres_changes',
-        {
-          event: 'UPDATE',
-          schema: 'public',
-          table: 'orders',
-          filter: `id=eq.${order_id}`
-        },
-        (payload) => {
-          console.log('🔄 Order status updated:', payload);
-          // Reload order when status changes
-          fetchOrder();
+  const watchOrderStatus = async (signal: AbortSignal) => {
+    const API_URL = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000';
+    let since = 0;
+
+    while (!signal.aborted) {
+      try {
+        const response = await fetch(
+          `${API_URL}/api/orders/${order_id}/status?since=${since}&timeout=25`,
+          { signal }
+        );
+
+        if (response.status === 404) return;
+        if (!response.ok) throw new Error('Failed to watch order status');
+
+        const data = await response.json();
+        const snapshot = data.order;
+
+        if (data.changed && snapshot) {
+          since = snapshot.version;
+          setOrder((prev) => prev ? {
+            ...prev,
+            status: snapshot.status,
+            estimated_minutes: snapshot.estimated_minutes,
+            cooking_started_at: snapshot.cooking_started_at,
+            cancel_reason: snapshot.cancel_reason,
+          } : prev);
+
+          if (snapshot.status === 'completed' || snapshot.status === 'cancelled') return;
         }
-      )
-      .subscribe();
-
-    return () => {
-      supabase.removeChannel(channel);
-    };
+      } catch (err) {
+        if (signal.aborted) return;
+        // Network hiccup - back off before retrying
+        await new Promise((resolve) => setTimeout(resolve, 5000));
+      }
+    }
   };
 
   const getStatusInfo = (orderData: Order) => {
@@ -496,7 +496,10 @@ export default function PaymentPage() {
 
           const response = await fetch(`${API_URL}/api/payments/create-intent`, {
             method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
+            headers: {
+              'Content-Type': 'application/json',
+              'Idempotency-Key': `create-intent-${order.id}-${finalAmount}`,
+            },
             body: JSON.stringify({
               order_id: order.id,
               amount: finalAmount,
@@ -575,7 +578,10 @@ export default function PaymentPage() {
       // Update order to confirm and set payment method to cash_at_counter
       const response = await fetch(`${API_URL}/api/orders/${order.id}/pay-at-counter`, {
         method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
+        headers: {
+          'Content-Type': 'application/json',
+          'Idempotency-Key': `pay-at-counter-${order.id}`,
+        },
         body: JSON.stringify({
           payment_method: 'cash_at_counter',
         }),
@@ -236,20 +236,28 @@ export default function StaffOrdersPage() {
     }
   }, [session?.restaurantId]);
 
-  // Fetch service requests
+  // Fetch service requests (open ones) and the feed cursor for the event stream.
+  // With a cursor the backend replays buffered events instead of querying the database.
+  const serviceRequestsSeqRef = useRef(0);
+  const applyServiceRequestEventRef = useRef<(eventType: string, request: ServiceRequest) => void>(() => {});
   const fetchServiceRequests = useCallback(async () => {
     if (!session?.restaurantId) return;
 
     try {
-      const { data, error } = await supabase
-        .from('service_requests')
-        .select('*')
-        .eq('restaurant_id', session.restaurantId)
-        .in('status', ['pending', 'acknowledged'])
-        .order('created_at', { ascending: false });
-
-      if (data) {
-        setServiceRequests(data);
+      const since = serviceRequestsSeqRef.current ? `&since=${serviceRequestsSeqRef.current}` : '';
+      const response = await fetch(
+        `${BACKEND_URL}/api/service-requests?restaurant_id=${session.restaurantId}&open_only=true${since}`
+      );
+      if (response.ok) {
+        const data = await response.json();
+        serviceRequestsSeqRef.current = data.seq || 0;
+        if (data.events) {
+          data.events.forEach((event: { type: string; service_request: ServiceRequest }) =>
+            applyServiceRequestEventRef.current(event.type, event.service_request)
+          );
+        } else {
+          setServiceRequests(data.service_requests || []);
+        }
       }
     } catch (error) {
       console.error('Failed to fetch service requests:', error);
@@ -358,10 +366,9 @@ export default function StaffOrdersPage() {
   useEffect(() => {
     if (session?.restaurantId) {
       fetchOrders();
-      fetchServiceRequests();
       fetchRestaurantSettings();
     }
-  }, [session?.restaurantId, fetchOrders, fetchServiceRequests, fetchRestaurantSettings]);
+  }, [session?.restaurantId, fetchOrders, fetchRestaurantSettings]);
 
   // Real-time subscription for restaurant settings (language changes)
   useEffect(() => {
@@ -449,49 +456,61 @@ export default function StaffOrdersPage() {
       )
       .subscribe();
 
-    // Service requests channel
-    const requestsChannel = supabase
-      .channel('staff-requests')
-      .on(
-        'postgres_changes',
-        {
-          event: '*',
-          schema: 'public',
-          table: 'service_requests',
-          filter: `restaurant_id=eq.${session.restaurantId}`
-        },
-        (payload) => {
-          console.log('Service request update:', payload);
-
-          if (payload.eventType === 'INSERT') {
-            playNotification('request');
-            setServiceRequests((prev) => [payload.new as ServiceRequest, ...prev]);
-            // Auto-switch to requests tab
-            setActiveTab('requests');
-          } else if (payload.eventType === 'UPDATE') {
-            const newRequest = payload.new as ServiceRequest;
-            if (newRequest.status === 'completed') {
-              setServiceRequests((prev) => prev.filter((r) => r.id !== newRequest.id));
-            } else {
-              setServiceRequests((prev) =>
-                prev.map((req) =>
-                  req.id === newRequest.id ? newRequest : req
-                )
-              );
-            }
-          } else if (payload.eventType === 'DELETE') {
-            setServiceRequests((prev) => prev.filter((req) => req.id !== payload.old.id));
-          }
-        }
-      )
-      .subscribe();
-
     return () => {
       supabase.removeChannel(ordersChannel);
-      supabase.removeChannel(requestsChannel);
     };
   }, [session?.restaurantId, playNotification]);
 
+  // Service requests: backend event stream (new requests + acknowledgements from any staff device)
+  useEffect(() => {
+    if (!session?.restaurantId) return;
+
+    const applyRequest = (eventType: string, request: ServiceRequest) => {
+      if (eventType === 'service_request.created') {
+        playNotification('request');
+        setServiceRequests((prev) => [request, ...prev.filter((r) => r.id !== request.id)]);
+        // Auto-switch to requests tab
+        setActiveTab('requests');
+      } else if (request.status === 'completed') {
+        setServiceRequests((prev) => prev.filter((r) => r.id !== request.id));
+      } else {
+        setServiceRequests((prev) =>
+          prev.map((req) => req.id === request.id ? request : req)
+        );
+      }
+    };
+
+    applyServiceRequestEventRef.current = applyRequest;
+
+    let stream: EventSource | null = null;
+    let closed = false;
+
+    // Full fetch first so the stream starts from its cursor (no gap between the two)
+    fetchServiceRequests().then(() => {
+      if (closed) return;
+      stream = new EventSource(
+        `${BACKEND_URL}/api/service-requests/stream?restaurant_id=${session.restaurantId}&since=${serviceRequestsSeqRef.current}`
+      );
+      ['service_request.created', 'service_request.updated'].forEach((eventType) => {
+        stream?.addEventListener(eventType, (e) => {
+          const event = JSON.parse((e as MessageEvent).data);
+          serviceRequestsSeqRef.current = Math.max(serviceRequestsSeqRef.current, event.seq || 0);
+          applyRequest(eventType, event.service_request as ServiceRequest);
+        });
+      });
+      // Events fell out of the server buffer - reload the open list from the database
+      stream.addEventListener('resync', () => {
+        serviceRequestsSeqRef.current = 0;
+        fetchServiceRequests();
+      });
+    });
+
+    return () => {
+      closed = true;
+      stream?.close();
+    };
+  }, [session?.restaurantId, playNotification, fetchServiceRequests]);
+
   // Update order status
   const updateOrderStatus = async (orderId: string, newStatus: Order['status']) => {
     try {
@@ -1192,19 +1211,25 @@ export default function StaffOrdersPage() {
   // Update service request status
   const updateRequestStatus = async (requestId: string, newStatus: ServiceRequest['status']) => {
     try {
-      const { error } = await supabase
-        .from('service_requests')
-        .update({
+      // Through the backend so the change is published to every staff device
+      const response = await fetch(`${BACKEND_URL}/api/service-requests/${requestId}/status`, {
+        method: 'PUT',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({
           status: newStatus,
           acknowledged_by: newStatus === 'acknowledged' ? session?.staffId : undefined,
-          acknowledged_at: newStatus === 'acknowledged' ? new Date().toISOString() : undefined,
-          completed_at: newStatus === 'completed' ? new Date().toISOString() : undefined,
-          updated_at: new Date().toISOString()
-        })
-        .eq('id', requestId);
+        }),
+      });
 
-      if (!error && newStatus === 'completed') {
-        setServiceRequests((prev) => prev.filter((r) => r.id !== requestId));
+      if (response.ok) {
+        const data = await response.json();
+        if (newStatus === 'completed') {
+          setServiceRequests((prev) => prev.filter((r) => r.id !== requestId));
+        } else if (data.service_request) {
+          setServiceRequests((prev) =>
+            prev.map((req) => req.id === requestId ? data.service_request : req)
+          );
+        }
       }
     } catch (error) {
       console.error('Failed to update request:', error);
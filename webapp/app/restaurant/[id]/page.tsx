@@ -1,6 +1,6 @@
 'use client';
 
-import { useEffect, useState } from 'react';
+import { useEffect, useRef, useState } from 'react';
 import { useParams, useRouter } from 'next/navigation';
 import { Loader2, Utensils, ShoppingCart, Plus, Minus, X, CheckCircle, MapPin, Clock, Store, Globe, Languages, MessageCircle, Bell, UtensilsCrossed, Droplets, Receipt, HelpCircle, Send, Check, Pencil, ClipboardList } from 'lucide-react';
 import ClassicList from './templates/ClassicList';
@@ -432,286 +432,47 @@ export default function RestaurantMenuPage() {
     return () => clearTimeout(timeoutId);
   }, [customerDetails.address, serviceType, restaurantLocation.latitude, restaurantLocation.longitude, restaurantId]);
 
-  // Helper function to clean markdown/formatting artifacts from translations
-  const cleanTranslation = (text: string | undefined): string => {
-    if (!text) return '';
-    // Remove markdown bold/italic markers
-    let cleaned = text.replace(/\*\*/g, '').replace(/\*/g, '').replace(/__/g, '').replace(/_/g, '');
-    // Remove any leading/trailing whitespace
-    cleaned = cleaned.trim();
-    return cleaned;
-  };
-
-  // Helper function to generate a simple hash for cache invalidation detection
-  const generateSourceHash = (menu: MenuItem): string => {
-    const sourceText = [
-      menu.name || '',
-      menu.description || '',
-      menu.category || '',
-      ...(menu.meats?.map(m => m.name) || []),
-      ...(menu.addOns?.map(a => a.name) || []),
-    ].join('|');
-    // Simple hash - sum of char codes
-    let hash = 0;
-    for (let i = 0; i < sourceText.length; i++) {
-      hash = ((hash << 5) - hash) + sourceText.charCodeAt(i);
-      hash = hash & hash;
-    }
-    return Math.abs(hash).toString(16);
-  };
-
   // Function to translate menus to selected language
+  // One request: the backend merges cached translations (source_hash checked server-side)
+  // and queues a background translation for anything missing or stale
   const translateMenusToLanguage = async (targetLang: string) => {
     if (targetLang === 'original') {
       setMenus(originalMenus);
       return;
     }
 
-    if (targetLang === 'en') {
-      // English is already available as nameEn/descriptionEn/categoryEn
-      // Map to use English versions
-      const englishMenus = originalMenus.map(menu => ({
-        ...menu,
-        name: menu.nameEn || menu.name,
-        description: menu.descriptionEn || menu.description,
-        category: menu.categoryEn || menu.category,
-        meats: menu.meats?.map(meat => ({
-          ...meat,
-          name: meat.nameEn || meat.name,
-        })),
-        addOns: menu.addOns?.map(addon => ({
-          ...addon,
-          name: addon.nameEn || addon.name,
-        })),
-        // Keep original for kitchen orders
-        originalName: menu.name,
-        originalDescription: menu.description,
-      }));
-      setMenus(englishMenus);
-      return;
-    }
-
     // Check local state cache first (for current session)
     if (translatedMenusCache[targetLang]) {
       setMenus(translatedMenusCache[targetLang]);
       return;
     }
 
-    // Translate using AI with Supabase cache
     setTranslatingMenu(true);
     try {
       const API_URL = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000';
-
-      // Step 1: Check Supabase cache for existing translations
-      let cachedTranslations: Record<string, any> = {};
-      if (restaurantId) {
-        try {
-          const cacheResponse = await fetch(
-            `${API_URL}/api/translations/menu/${restaurantId}?language_code=${targetLang}`
-          );
-          if (cacheResponse.ok) {
-            const cacheData = await cacheResponse.json();
-            if (cacheData.success) {
-              cachedTranslations = cacheData.translations || {};
-            }
-          }
-        } catch (err) {
-          console.log('Cache fetch failed, will translate all:', err);
-        }
-      }
-
-      // Step 2: Determine which menus need translation (not in cache or source changed)
-      const menusNeedingTranslation: MenuItem[] = [];
-      const menuHashes: Record<string, string> = {};
-
-      originalMenus.forEach(menu => {
-        const currentHash = generateSourceHash(menu);
-        menuHashes[menu.menu_id] = currentHash;
-
-        const cached = cachedTranslations[menu.menu_id];
-        if (!cached || cached.source_hash !== currentHash) {
-          menusNeedingTranslation.push(menu);
-        }
-      });
-
-      // Step 3: If all menus are cached, use them directly
-      if (menusNeedingTranslation.length === 0) {
-        const translatedMenus = originalMenus.map(menu => {
-          const cached = cachedTranslations[menu.menu_id];
-          return {
-            ...menu,
-            name: cleanTranslation(cached.translated_name) || menu.name,
-            description: cleanTranslation(cached.translated_description) || menu.description,
-            category: cleanTranslation(cached.translated_category) || menu.category,
-            meats: menu.meats?.map((meat, idx) => ({
-              ...meat,
-              name: cleanTranslation(cached.translated_meats?.[idx]) || meat.name,
-            })),
-            addOns: menu.addOns?.map((addon, idx) => ({
-              ...addon,
-              name: cleanTranslation(cached.translated_addons?.[idx]) || addon.name,
-            })),
-            originalName: menu.name,
-            originalDescription: menu.description,
-          };
-        });
-
-        // Save to local state cache
-        setTranslatedMenusCache(prev => ({
-          ...prev,
-          [targetLang]: translatedMenus,
-        }));
-        setMenus(translatedMenus);
-        return;
+      const response = await fetch(
+        `${API_URL}/api/public/menu/${restaurant_id}?lang=${encodeURIComponent(targetLang)}`
+      );
+      if (!response.ok) {
+        throw new Error('Failed to fetch translated menu');
       }
 
-      // Step 4: Prepare texts to translate for non-cached menus only
-      const textsToTranslate: string[] = [];
-      const menuStructure: Array<{menu: MenuItem, meatCount: number, addOnCount: number}> = [];
-
-      menusNeedingTranslation.forEach(menu => {
-        textsToTranslate.push(menu.name || '');
-        textsToTranslate.push(menu.description || '');
-        textsToTranslate.push(menu.category || '');
-
-        const meatCount = menu.meats?.length || 0;
-        menu.meats?.forEach(meat => {
-          textsToTranslate.push(meat.name || '');
-        });
-
-        const addOnCount = menu.addOns?.length || 0;
-        menu.addOns?.forEach(addon => {
-          textsToTranslate.push(addon.name || '');
-        });
-
-        menuStructure.push({ menu, meatCount, addOnCount });
-      });
-
-      // Step 5: Call translate API
-      const response = await fetch(`${API_URL}/api/translate/batch`, {
-        method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({
-          texts: textsToTranslate,
-          source_lang: 'auto',
-          target_lang: targetLang,
-        }),
-      });
-
-      if (response.ok) {
-        const data = await response.json();
-        const translations: string[] = data.translations || [];
-
-        // Step 6: Map translations back and create new translations map
-        const newTranslations: Record<string, any> = {};
-        let translationIndex = 0;
-
-        menuStructure.forEach(({ menu, meatCount, addOnCount }) => {
-          const rawTranslatedName = cleanTranslation(translations[translationIndex] || menu.name || '');
-          // If name translation is too long (>200 chars), use original
-          const translatedName = rawTranslatedName.length > 200 ? menu.name : rawTranslatedName;
-          translationIndex++;
-          const translatedDesc = cleanTranslation(translations[translationIndex] || menu.description || '');
-          translationIndex++;
-          const rawTranslatedCategory = cleanTranslation(translations[translationIndex] || menu.category || '');
-          // If category translation is too long (>50 chars), use original
-          const translatedCategory = rawTranslatedCategory.length > 50 ? menu.category : rawTranslatedCategory;
-          translationIndex++;
-
-          const translatedMeats: string[] = [];
-          for (let i = 0; i < meatCount; i++) {
-            const rawMeat = cleanTranslation(translations[translationIndex + i] || '');
-            const originalMeat = menu.meats?.[i]?.name || '';
-            // If translation is too long (likely corrupted/description), use original
-            translatedMeats.push(rawMeat.length > 50 ? originalMeat : (rawMeat || originalMeat));
-          }
-          translationIndex += meatCount;
-
-          const translatedAddons: string[] = [];
-          for (let i = 0; i < addOnCount; i++) {
-            const rawAddon = cleanTranslation(translations[translationIndex + i] || '');
-            const originalAddon = menu.addOns?.[i]?.name || '';
-            // If translation is too long (likely corrupted/description), use original
-            translatedAddons.push(rawAddon.length > 50 ? originalAddon : (rawAddon || originalAddon));
-          }
-          translationIndex += addOnCount;
-
-          newTranslations[menu.menu_id] = {
-            translated_name: translatedName,
-            translated_description: translatedDesc,
-            translated_category: translatedCategory,
-            translated_meats: translatedMeats,
-            translated_addons: translatedAddons,
-            source_hash: menuHashes[menu.menu_id],
-          };
-        });
-
-        // Step 7: Merge cached and new translations
-        const allTranslations = { ...cachedTranslations, ...newTranslations };
-
-        // Step 8: Save new translations to Supabase cache
-        if (restaurantId && Object.keys(newTranslations).length > 0) {
-          try {
-            const translationsToSave = Object.entries(newTranslations).map(([menuId, trans]) => ({
-              menu_id: menuId,
-              translated_name: trans.translated_name,
-              translated_description: trans.translated_description,
-              translated_category: trans.translated_category,
-              translated_meats: trans.translated_meats,
-              translated_addons: trans.translated_addons,
-              source_hash: trans.source_hash,
-            }));
-
-            await fetch(`${API_URL}/api/translations/menu`, {
-              method: 'POST',
-              headers: { 'Content-Type': 'application/json' },
-              body: JSON.stringify({
-                restaurant_id: restaurantId,
-                language_code: targetLang,
-                translations: translationsToSave,
-              }),
-            });
-          } catch (err) {
-            console.log('Failed to save translations to cache:', err);
-          }
-        }
-
-        // Step 9: Build final translated menus
-        const translatedMenus = originalMenus.map(menu => {
-          const trans = allTranslations[menu.menu_id];
-          if (trans) {
-            return {
-              ...menu,
-              name: cleanTranslation(trans.translated_name) || menu.name,
-              description: cleanTranslation(trans.translated_description) || menu.description,
-              category: cleanTranslation(trans.translated_category) || menu.category,
-              meats: menu.meats?.map((meat, idx) => ({
-                ...meat,
-                name: cleanTranslation(trans.translated_meats?.[idx]) || meat.name,
-              })),
-              addOns: menu.addOns?.map((addon, idx) => ({
-                ...addon,
-                name: cleanTranslation(trans.translated_addons?.[idx]) || addon.name,
-              })),
-              originalName: menu.name,
-              originalDescription: menu.description,
-            };
-          }
-          return {
-            ...menu,
-            originalName: menu.name,
-            originalDescription: menu.description,
-          };
-        });
+      const data = await response.json();
+      // Keep the best seller flags merged into the original menu
+      const bestSellerIds = new Set(originalMenus.filter(menu => menu.is_best_seller).map(menu => menu.menu_id));
+      const translatedMenus: MenuItem[] = (data.menu_items || []).map((menu: MenuItem) => ({
+        ...menu,
+        is_best_seller: bestSellerIds.has(menu.menu_id),
+      }));
 
-        // Save to local state cache
+      // Items still being translated in the background are fetched again on the next switch
+      if (!data.translation?.stale_ids?.length) {
         setTranslatedMenusCache(prev => ({
           ...prev,
           [targetLang]: translatedMenus,
         }));
-
-        setMenus(translatedMenus);
       }
+      setMenus(translatedMenus);
     } catch (err) {
       console.error('Translation failed:', err);
       // Fall back to original
@@ -869,6 +630,9 @@ export default function RestaurantMenuPage() {
     return langMap[selectedLanguage] || 'en';
   };
 
+  // Idempotency-Key of the current checkout and the body it was first sent with
+  const orderCheckout = useRef<{ key: string; signature: string; body: string } | null>(null);
+
   const handlePlaceOrder = async () => {
     // Validation based on service type
     if (serviceType === 'dine_in' && !customerDetails.table_no.trim()) {
@@ -945,31 +709,61 @@ export default function RestaurantMenuPage() {
         };
       }
       
-      const response = await fetch(`${API_URL}/api/orders`, {
+      const orderBody = {
+        restaurant_id: restaurant_id,
+        items: orderItems,
+        service_type: serviceType,
+        customer_details: customerDetailsJson,
+        table_no: serviceType === 'dine_in' ? customerDetails.table_no : null,
+        customer_name: serviceType !== 'dine_in' ? customerDetails.name : null,
+        customer_phone: serviceType !== 'dine_in' ? customerDetails.phone : null,
+        tax: 0, // Can be calculated later
+        delivery_fee: serviceType === 'delivery' ? getDeliveryFee() : 0,
+        subtotal: getSubtotal(),
+        surcharge_amount: getSurchargeAmount(),
+        food_surcharge_amount: getFoodSurchargeAmount(),
+        food_surcharge_name: hasFoodSurcharge() ? foodSurchargeSettings.food_surcharge_name : null,
+        payment_method: 'card', // Default to card, will be updated in payment flow
+      };
+
+      // Retries of the same checkout reuse its key and body so the backend never creates a duplicate order;
+      // any change to the cart or details starts a new checkout with a new key
+      // (an empty pickup time defaults to "now" on every attempt, so compare the field as entered)
+      const signature = JSON.stringify({
+        ...orderBody,
+        customer_details: { ...customerDetailsJson, pickup_time: customerDetails.pickup_time },
+      });
+      let checkout = orderCheckout.current;
+      if (!checkout || checkout.signature !== signature) {
+        checkout = { key: crypto.randomUUID(), signature, body: JSON.stringify(orderBody) };
+        orderCheckout.current = checkout;
+      }
+
+      const postOrder = (key: string, body: string) => fetch(`${API_URL}/api/orders`, {
         method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({
-          restaurant_id: restaurant_id,
-          items: orderItems,
-          service_type: serviceType,
-          customer_details: customerDetailsJson,
-          table_no: serviceType === 'dine_in' ? customerDetails.table_no : null,
-          customer_name: serviceType !== 'dine_in' ? customerDetails.name : null,
-          customer_phone: serviceType !== 'dine_in' ? customerDetails.phone : null,
-          tax: 0, // Can be calculated later
-          delivery_fee: serviceType === 'delivery' ? getDeliveryFee() : 0,
-          subtotal: getSubtotal(),
-          surcharge_amount: getSurchargeAmount(),
-          food_surcharge_amount: getFoodSurchargeAmount(),
-          food_surcharge_name: hasFoodSurcharge() ? foodSurchargeSettings.food_surcharge_name : null,
-          payment_method: 'card', // Default to card, will be updated in payment flow
-        }),
+        headers: {
+          'Content-Type': 'application/json',
+          'Idempotency-Key': key,
+        },
+        body,
       });
-      
+
+      let response = await postOrder(checkout.key, checkout.body);
+      if (response.status === 422) {
+        const errorData = await response.clone().json().catch(() => ({}));
+        if (String(errorData.detail || '').includes('Idempotency-Key')) {
+          // Key already used for another body (e.g. an earlier response was lost) - retry with a fresh key
+          checkout = { ...checkout, key: crypto.randomUUID() };
+          orderCheckout.current = checkout;
+          response = await postOrder(checkout.key, checkout.body);
+        }
+      }
+
       const data = await response.json();
       
       if (data.success) {
         const orderId = data.order?.id;
+        orderCheckout.current = null;
         setOrderPlaced(true);
         setCart([]);
         localStorage.removeItem(`cart_${restaurant_id}`);